@@ -1,48 +1,76 @@
 import getopt
+import importlib
 import os
 import sys
 import logging
+import pkgutil
+import signal
 
-from pcs import (
-    settings,
-    usage,
-    utils,
-)
-
+from pcs import settings
 from pcs.cli.common import (
-    capabilities,
     completion,
     errors,
     parse_args,
     routing,
 )
-from pcs.cli.routing import (
-    acl,
-    alert,
-    booth,
-    client,
-    cluster,
-    config,
-    constraint,
-    host,
-    node,
-    pcsd,
-    prop,
-    qdevice,
-    quorum,
-    resource,
-    status,
-    stonith,
-)
 from pcs.lib.errors import LibraryError
 
 
+# Top level commands and the functions running them. Modules of a command are
+# imported only when the command is run, so that a command does not pay for
+# importing all the others.
+COMMAND_MAP = {
+    "resource": ("pcs.cli.routing.resource", "resource_cmd"),
+    "cluster": ("pcs.cli.routing.cluster", "cluster_cmd"),
+    "stonith": ("pcs.cli.routing.stonith", "stonith_cmd"),
+    "property": ("pcs.cli.routing.prop", "property_cmd"),
+    "constraint": ("pcs.cli.routing.constraint", "constraint_cmd"),
+    "acl": ("pcs.cli.routing.acl", "acl_cmd"),
+    "status": ("pcs.cli.routing.status", "status_cmd"),
+    "config": ("pcs.cli.routing.config", "config_cmd"),
+    "pcsd": ("pcs.cli.routing.pcsd", "pcsd_cmd"),
+    "node": ("pcs.cli.routing.node", "node_cmd"),
+    "quorum": ("pcs.cli.routing.quorum", "quorum_cmd"),
+    "qdevice": ("pcs.cli.routing.qdevice", "qdevice_cmd"),
+    "alert": ("pcs.cli.routing.alert", "alert_cmd"),
+    "booth": ("pcs.cli.routing.booth", "booth_cmd"),
+    "host": ("pcs.cli.routing.host", "host_cmd"),
+    "client": ("pcs.cli.routing.client", "client_cmd"),
+}
+
+def load_command(module_name, function_name):
+    """
+    Return a command function which imports its module when it is called
+    """
+    def run(*args):
+        return getattr(importlib.import_module(module_name), function_name)(
+            *args
+        )
+    return run
+
+def import_commands():
+    """
+    Import modules of all commands
+
+    Meant for long running processes which run many commands, so that the
+    commands do not import anything themselves.
+    """
+    for module_name, dummy_function_name in COMMAND_MAP.values():
+        importlib.import_module(module_name)
+    importlib.import_module("pcs.batch")
+    lib_commands = importlib.import_module("pcs.lib.commands")
+    for module_info in pkgutil.walk_packages(
+        lib_commands.__path__, lib_commands.__name__ + "."
+    ):
+        importlib.import_module(module_info.name)
+
 def non_root_run(argv_cmd):
     """
     This function will run commands which has to be run as root for users which
     are not root. If it required to run such command as root it will do that by
     sending it to the local pcsd and then it will exit.
     """
+    from pcs import utils
     # specific commands need to be run under root account, pass them to pcsd
     # don't forget to allow each command in pcsd.rb in "post /run_pcs do"
     root_command_list = [
@@ -104,20 +132,16 @@ def non_root_run(argv_cmd):
 logging.basicConfig()
 usefile = False
 filename = ""
-def main(argv=None):
-    # pylint: disable=too-many-locals, too-many-branches, too-many-statements, global-statement
-    if completion.has_applicable_environment(os.environ):
-        print(completion.make_suggestions(
-            os.environ,
-            usage.generate_completion_tree_from_usage()
-        ))
-        sys.exit()
 
-    argv = argv if argv else sys.argv[1:]
-    utils.subprocess_setup()
-    global filename, usefile
-    utils.pcs_options = {}
+# options which apply to a whole batch, they cannot be used in its commands
+BATCH_GLOBAL_OPTIONS = (
+    "-f", "-h", "--help", "--corosync_conf", "--version", "--fullhelp",
+)
 
+def parse_options(argv):
+    """
+    Return options and arguments of a pcs command line
+    """
     # we want to support optional arguments for --wait, so if an argument
     # is specified with --wait (ie. --wait=30) then we use them
     waitsecs = None
@@ -138,27 +162,60 @@ def main(argv=None):
             parse_args.PCS_LONG_OPTIONS,
         )
     except getopt.GetoptError as err:
+        from pcs import usage
         print(err)
         usage.main()
         sys.exit(1)
     argv = parse_args.filter_out_options(argv)
 
-    full = False
-    for option, dummy_value in pcs_options:
-        if option == "--full":
-            full = True
-            break
-
+    options = {}
     for opt, val in pcs_options:
-        if not opt in utils.pcs_options:
-            utils.pcs_options[opt] = val
-        else:
+        if opt in options:
             # If any options are a list then they've been entered twice which
             # isn't valid
+            from pcs import utils
             utils.err("%s can only be used once" % opt)
+        if opt == "--wait":
+            val = waitsecs
+        elif opt == "--request-timeout":
+            request_timeout_valid = False
+            try:
+                timeout = int(val)
+                if timeout > 0:
+                    val = timeout
+                    request_timeout_valid = True
+            except ValueError:
+                pass
+            if not request_timeout_valid:
+                from pcs import utils
+                utils.err(
+                    (
+                        "'{0}' is not a valid --request-timeout value, use "
+                        "a positive integer"
+                    ).format(val)
+                )
+        options[opt] = val
+    return options, argv
 
+def main(argv=None):
+    # pylint: disable=too-many-branches
+    if completion.has_applicable_environment(os.environ):
+        print(completion.complete(os.environ))
+        sys.exit()
+
+    argv = argv if argv else sys.argv[1:]
+    # the same as utils.subprocess_setup, utils is not imported yet
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    global filename, usefile
+    pcs_options, argv = parse_options(argv)
+
+    # Modules needed by commands are imported after the options which do not
+    # run any command, e.g. --version, have been processed.
+    full = "--full" in pcs_options
+    for opt, val in pcs_options.items():
         if opt in ("-h", "--help"):
             if  not argv:
+                from pcs import usage
                 usage.main()
                 sys.exit()
             else:
@@ -166,13 +223,12 @@ def main(argv=None):
         elif opt == "-f":
             usefile = True
             filename = val
-            utils.usefile = usefile
-            utils.filename = filename
         elif opt == "--corosync_conf":
             settings.corosync_conf_file = val
         elif opt == "--version":
             print(settings.pcs_version)
             if full:
+                from pcs.cli.common import capabilities
                 print(" ".join(
                     sorted([
                         feat["id"]
@@ -181,26 +237,15 @@ def main(argv=None):
                 ))
             sys.exit()
         elif opt == "--fullhelp":
+            from pcs import usage
             usage.full_usage()
             sys.exit()
-        elif opt == "--wait":
-            utils.pcs_options[opt] = waitsecs
-        elif opt == "--request-timeout":
-            request_timeout_valid = False
-            try:
-                timeout = int(val)
-                if timeout > 0:
-                    utils.pcs_options[opt] = timeout
-                    request_timeout_valid = True
-            except ValueError:
-                pass
-            if not request_timeout_valid:
-                utils.err(
-                    (
-                        "'{0}' is not a valid --request-timeout value, use "
-                        "a positive integer"
-                    ).format(val)
-                )
+
+    from pcs import utils
+    utils.pcs_options = pcs_options
+    if usefile:
+        utils.usefile = usefile
+        utils.filename = filename
 
     logger = logging.getLogger("pcs")
     logger.propagate = 0
@@ -208,28 +253,58 @@ def main(argv=None):
 
     if (os.getuid() != 0) and (argv and argv[0] != "help") and not usefile:
         non_root_run(argv)
+    if settings.agent_metadata_cache_location:
+        from pcs.lib import resource_agent
+        from pcs.lib.resource_agent_cache import AgentMetadataCache
+        resource_agent.Agent.set_metadata_cache(AgentMetadataCache(
+            settings.agent_metadata_cache_location,
+            settings.agent_metadata_cache_max_entries,
+        ))
     cmd_map = {
-        "resource": resource.resource_cmd,
-        "cluster": cluster.cluster_cmd,
-        "stonith": stonith.stonith_cmd,
-        "property": prop.property_cmd,
-        "constraint": constraint.constraint_cmd,
-        "acl": acl.acl_cmd,
-        "status": status.status_cmd,
-        "config": config.config_cmd,
-        "pcsd": pcsd.pcsd_cmd,
-        "node": node.node_cmd,
-        "quorum": quorum.quorum_cmd,
-        "qdevice": qdevice.qdevice_cmd,
-        "alert": alert.alert_cmd,
-        "booth": booth.booth_cmd,
-        "host": host.host_cmd,
-        "client": client.client_cmd,
-        "help": lambda lib, argv, modifiers: usage.main(),
+        cmd: load_command(module_name, function_name)
+        for cmd, (module_name, function_name) in COMMAND_MAP.items()
     }
+    show_usage = load_command("pcs.usage", "main")
+    cmd_map["help"] = lambda lib, argv, modifiers: show_usage()
+    run_batch = load_command("pcs.batch", "batch_cmd")
+    cmd_map["batch"] = lambda lib, argv, modifiers: run_batch(
+        lib,
+        argv,
+        modifiers,
+        lambda batch_lib, batch_argv, batch_options: _run_batch_command(
+            cmd_map, batch_lib, batch_argv, batch_options
+        )
+    )
+    _run_command(cmd_map, utils.get_library_wrapper(), argv)
+
+def _run_batch_command(cmd_map, lib, argv, batch_options):
+    """
+    Run one command of a batch
+
+    dict cmd_map -- top level commands
+    Library lib -- library wrapper shared by all commands of the batch
+    list argv -- the command line of the command
+    dict batch_options -- options of the batch applied to the command as well
+    """
+    from pcs import utils
+    options, argv = parse_options(argv)
+    for opt in options:
+        if opt in BATCH_GLOBAL_OPTIONS:
+            utils.err(
+                "Option '{0}' cannot be used in a batch command, specify it "
+                "for the whole batch instead".format(opt)
+            )
+    if argv and argv[0] == "batch":
+        utils.err("Cannot run a batch within a batch")
+    utils.pcs_options = dict(batch_options)
+    utils.pcs_options.update(options)
+    _run_command(cmd_map, lib, argv)
+
+def _run_command(cmd_map, lib, argv):
+    from pcs import usage, utils
     try:
         routing.create_router(cmd_map, [])(
-            utils.get_library_wrapper(), argv, utils.get_input_modifiers()
+            lib, argv, utils.get_input_modifiers()
         )
     except LibraryError as e:
         utils.process_library_reports(e.args)
@@ -0,0 +1,142 @@
+import shlex
+import sys
+import tempfile
+
+from pcs import (
+    usage,
+    utils,
+)
+from pcs.cli.common.errors import CmdLineInputError
+from pcs.lib.errors import LibraryError
+
+
+def batch_cmd(lib, argv, modifiers, run_command):
+    """
+    Options:
+      * -f - CIB file
+      * --debug
+      * --request-timeout - timeout of HTTP requests, passed to the commands
+
+    callable run_command -- runs one command of the batch, takes a library
+        wrapper, a command line and options of the batch
+    """
+    # pylint: disable=unused-argument
+    modifiers.ensure_only_supported("-f", "--request-timeout")
+    if argv and argv[0] == "help":
+        usage.show("batch", [])
+        return
+    if len(argv) > 1:
+        raise CmdLineInputError()
+    command_list = parse_commands(_read_batch(argv[0] if argv else "-"))
+    cib_original = utils.get_cib()
+    cib_modified = _run_commands(command_list, cib_original, run_command)
+    if cib_modified != cib_original:
+        _push_cib_changes(cib_original, cib_modified)
+
+def parse_commands(text):
+    """
+    Return a list of (line number, command line) tuples of commands in a batch
+
+    Each line holds one command, a line ending with a backslash continues on
+    the next line. Empty lines and comments starting with '#' are skipped.
+
+    string text -- the batch
+    """
+    command_list = []
+    command_text = ""
+    command_line_number = None
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if command_line_number is None:
+            command_line_number = line_number
+        if line.endswith("\\"):
+            command_text += line[:-1] + " "
+            continue
+        command_text += line
+        try:
+            command = shlex.split(command_text, comments=True)
+        except ValueError as e:
+            utils.err("Unable to parse line {0}: {1}".format(
+                command_line_number, e
+            ))
+        if command:
+            command_list.append((command_line_number, command))
+        command_text = ""
+        command_line_number = None
+    if command_text.strip():
+        utils.err("Unexpected end of the batch after line {0}".format(
+            command_line_number
+        ))
+    return command_list
+
+def _read_batch(path):
+    if path == "-":
+        return sys.stdin.read()
+    try:
+        with open(path) as batch_file:
+            return batch_file.read()
+    except EnvironmentError as e:
+        utils.err("Unable to read batch file '{0}': {1}".format(
+            path, e.strerror
+        ))
+    return None
+
+def _run_commands(command_list, cib_original, run_command):
+    """
+    Run commands against a private copy of the CIB, return the modified CIB
+
+    Legacy commands access the copy by pacemaker tools like they do in the -f
+    mode. Library commands keep the CIB they modify in memory and do not push
+    it by pacemaker tools. The copy is validated once when it is pushed.
+    """
+    original_usefile, original_filename = utils.usefile, utils.filename
+    batch_options = dict(utils.pcs_options)
+    with tempfile.NamedTemporaryFile(mode="w+", suffix=".pcs") as cib_file:
+        cib_file.write(cib_original)
+        cib_file.flush()
+        batch_options["-f"] = cib_file.name
+        _set_cib_file(True, cib_file.name)
+        try:
+            lib = utils.get_library_wrapper()
+            lib.env.defer_cib_push = True
+            for line_number, command in command_list:
+                try:
+                    run_command(lib, command, batch_options)
+                except SystemExit as e:
+                    if e.code:
+                        utils.err(
+                            "Command on line {0} failed, no changes have been "
+                            "pushed".format(line_number)
+                        )
+            cib_file.seek(0)
+            return cib_file.read()
+        finally:
+            utils.pcs_options = {
+                opt: val
+                for opt, val in batch_options.items()
+                if opt != "-f"
+            }
+            if original_usefile:
+                utils.pcs_options["-f"] = original_filename
+            _set_cib_file(original_usefile, original_filename)
+
+def _set_cib_file(usefile, filename):
+    utils.usefile = usefile
+    utils.filename = filename
+    # the runner is cached with the CIB file set in its environment
+    utils.cmd_runner.cache_clear()
+    utils.invalidate_cib_snapshot()
+
+def _push_cib_changes(cib_original, cib_modified):
+    lib_env = utils.get_lib_env()
+    try:
+        lib_env.push_cib_changes(cib_original, cib_modified)
+    except LibraryError as e:
+        utils.process_library_reports(e.args)
+    if not lib_env.is_cib_live:
+        try:
+            with open(utils.filename, "w") as cib_file:
+                cib_file.write(lib_env.final_mocked_cib_content)
+        except EnvironmentError as e:
+            utils.err("Unable to write cib file '{0}': {1}".format(
+                utils.filename, e.strerror
+            ))
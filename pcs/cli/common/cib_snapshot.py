@@ -0,0 +1,79 @@
+from lxml import etree
+
+
+class CibSnapshot():
+    """
+    A CIB loaded once and shared by all queries until it is invalidated.
+    Legacy commands query the CIB many times during one run. Without the
+    snapshot, each query runs cibadmin and transfers the whole CIB again.
+    """
+    def __init__(self):
+        self.__source = None
+        self.__cib_xml = None
+        self.__cib_tree = None
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    def invalidate(self):
+        """
+        Forget the loaded CIB, it will be loaded again by the next query
+        """
+        self.__source = None
+        self.__cib_xml = None
+        self.__cib_tree = None
+
+    def get_xml(self, source, load_cib_xml):
+        """
+        Return the CIB as a string
+
+        hashable source -- identifies where the CIB comes from, the CIB is
+            loaded again when the source changes
+        callable load_cib_xml -- takes no arguments, returns the CIB string or
+            None if the CIB cannot be loaded
+        """
+        if self.__cib_xml is not None and source == self.__source:
+            self.__hits += 1
+            return self.__cib_xml
+        self.__misses += 1
+        self.invalidate()
+        cib_xml = load_cib_xml()
+        if cib_xml is not None:
+            self.__source = source
+            self.__cib_xml = cib_xml
+        return cib_xml
+
+    def xpath(self, source, load_cib_xml, query):
+        """
+        Return a list of strings, each containing one element matching the
+        xpath query, or None if the query cannot be evaluated in the snapshot
+
+        hashable source -- identifies where the CIB comes from
+        callable load_cib_xml -- takes no arguments, returns the CIB string or
+            None if the CIB cannot be loaded
+        string query -- xpath query, it must select elements
+        """
+        cib_xml = self.get_xml(source, load_cib_xml)
+        if cib_xml is None:
+            return None
+        try:
+            if self.__cib_tree is None:
+                self.__cib_tree = etree.fromstring(cib_xml)
+            result = self.__cib_tree.xpath(query)
+        except (etree.XMLSyntaxError, etree.XPathError):
+            return None
+        if not isinstance(result, list) or not all(
+            etree.iselement(item) for item in result
+        ):
+            return None
+        return [
+            etree.tostring(element, encoding="unicode", with_tail=False)
+            for element in result
+        ]
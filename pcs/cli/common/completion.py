@@ -1,3 +1,51 @@
+import json
+import os
+import re
+import time
+
+from pcs import settings
+
+
+# bump when the structure of the completion index changes
+INDEX_FORMAT = 1
+# the index built at install time
+PACKAGED_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "completion_index.json"
+)
+# description of arguments in usage -> kind of values completing them
+_ARGUMENT_KINDS = (
+    (r"\[?<(resource|group|bundle) id\b", "resource"),
+    (r"<(resource1?|source resource id)>", "resource"),
+    (r"\[?<stonith id>", "stonith"),
+    (r"\[?\[?<node( name)?>", "node"),
+    (r"\[<standard>:\[<provider>:\]\]<type>", "resource_agent"),
+    (r"<stonith agent>", "stonith_agent"),
+)
+# commands creating what their first argument names, nothing to complete there
+_NEW_VALUE_COMMANDS = frozenset([
+    "cluster node add",
+    "cluster node add-guest",
+    "cluster node add-remote",
+    "resource bundle create",
+    "resource create",
+    "stonith create",
+])
+# kind of values -> their source
+_VALUE_SOURCES = {
+    "resource": "cib",
+    "stonith": "cib",
+    "node": "cib",
+    "resource_agent": "resource_agents",
+    "stonith_agent": "stonith_agents",
+}
+# source of values -> for how many seconds its values are cached
+_VALUE_SOURCE_MAX_AGE = {
+    "cib": 15,
+    "resource_agents": 600,
+    "stonith_agents": 600,
+}
+
 def has_applicable_environment(environment):
     """
     dict environment - very likely os.environ
@@ -14,10 +62,221 @@ def has_applicable_environment(environment):
         environment['COMP_CWORD'].isdigit()
     )
 
-def make_suggestions(environment, suggestion_tree):
+def complete(environment):
+    """
+    Return suggestions for the pcs command line being completed
+
+    dict environment - very likely os.environ
+    """
+    index = get_completion_index(environment)
+    return make_suggestions(
+        environment,
+        index["tree"],
+        lambda previous_word_list: _get_argument_values(
+            environment, index["arguments"], previous_word_list
+        )
+    )
+
+def get_completion_index(environment):
+    """
+    Return the completion index of pcs commands
+
+    The index holds the tree of pcs commands and kinds of values their first
+    arguments are completed by. Building it means rendering and scanning the
+    usage of all commands. It only changes with pcs version, so it is built at
+    install time or built once and cached by the user running the completion.
+
+    dict environment - very likely os.environ
+    """
+    for index_path in (PACKAGED_INDEX_PATH, get_cache_path(environment)):
+        index = _load_index(index_path)
+        if index is not None:
+            return index
+    index = build_completion_index()
+    _save_json(get_cache_path(environment), index)
+    return index
+
+def build_completion_index():
+    # usage is big, import it only when the index is being built
+    from pcs import usage
+    arguments = {}
+    for command, description in (
+        usage.generate_completion_arguments_from_usage().items()
+    ):
+        if command in _NEW_VALUE_COMMANDS:
+            continue
+        for pattern, kind in _ARGUMENT_KINDS:
+            if re.match(pattern, description):
+                arguments[command] = kind
+                break
+    return {
+        "format": INDEX_FORMAT,
+        "pcs_version": settings.pcs_version,
+        "tree": usage.generate_completion_tree_from_usage(),
+        "arguments": arguments,
+    }
+
+def get_cache_path(environment, file_name="completion-index.json"):
+    """
+    dict environment - very likely os.environ
+    string file_name -- name of the cache file
+    """
+    cache_dir = environment.get("XDG_CACHE_HOME", "").strip()
+    if not cache_dir:
+        cache_dir = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_dir, "pcs", file_name)
+
+def _load_index(index_path):
+    index = _load_json(index_path)
+    if (
+        not isinstance(index, dict)
+        or
+        index.get("format") != INDEX_FORMAT
+        or
+        index.get("pcs_version") != settings.pcs_version
+        or
+        not isinstance(index.get("tree"), dict)
+        or
+        not isinstance(index.get("arguments"), dict)
+    ):
+        return None
+    return index
+
+def _get_argument_values(environment, argument_kinds, previous_word_list):
+    kind = argument_kinds.get(" ".join(previous_word_list))
+    if kind not in _VALUE_SOURCES:
+        return []
+    source = _VALUE_SOURCES[kind]
+    cache_path = get_cache_path(environment, "completion-values.json")
+    cache = _load_json(cache_path)
+    if not isinstance(cache, dict):
+        cache = {}
+    cached = cache.get(source)
+    try:
+        if time.time() - cached["timestamp"] < _VALUE_SOURCE_MAX_AGE[source]:
+            return sorted(cached["values"][kind])
+    except (KeyError, TypeError):
+        pass
+    values = _load_values(source)
+    cache[source] = {"timestamp": time.time(), "values": values}
+    _save_json(cache_path, cache)
+    return sorted(values.get(kind, []))
+
+def _load_values(source):
+    if source == "cib":
+        return _load_cib_values()
+    if source == "resource_agents":
+        return _load_resource_agents()
+    return _load_stonith_agents()
+
+def _load_cib_values():
+    # imported here to keep the completion of commands quick
+    # pylint: disable=import-outside-toplevel
+    from xml.etree import ElementTree
+
+    values = {"resource": [], "stonith": [], "node": []}
+    stdout, retval = _run([settings.cibadmin, "--local", "--query"])
+    if retval != 0:
+        return values
+    try:
+        cib = ElementTree.fromstring(stdout)
+    except ElementTree.ParseError:
+        return values
+    for element in cib.iterfind("./configuration/resources//*[@id]"):
+        if element.tag == "primitive" and element.get("class") == "stonith":
+            values["stonith"].append(element.get("id"))
+        elif element.tag in ("primitive", "group", "clone", "master", "bundle"):
+            values["resource"].append(element.get("id"))
+    for element in cib.iterfind("./configuration/nodes/node[@uname]"):
+        values["node"].append(element.get("uname"))
+    return values
+
+def _load_resource_agents():
+    agent_list = []
+    for standard in _run_list(
+        [settings.crm_resource_binary, "--list-standards"]
+    ):
+        if standard == "stonith":
+            continue
+        if standard == "ocf":
+            standard_list = [
+                "ocf:{0}".format(provider)
+                for provider in _run_list(
+                    [settings.crm_resource_binary, "--list-ocf-providers"]
+                )
+            ]
+        else:
+            standard_list = [standard]
+        for standard_provider in standard_list:
+            agent_list.extend(
+                "{0}:{1}".format(standard_provider, agent)
+                for agent in _run_list([
+                    settings.crm_resource_binary,
+                    "--list-agents",
+                    standard_provider,
+                ])
+            )
+    return {"resource_agent": agent_list}
+
+def _load_stonith_agents():
+    return {
+        "stonith_agent": _run_list(
+            [settings.crm_resource_binary, "--list-agents", "stonith"]
+        ),
+    }
+
+def _run_list(args):
+    stdout, retval = _run(args)
+    if retval != 0:
+        return []
+    return [line.strip() for line in stdout.splitlines() if line.strip()]
+
+def _run(args):
+    # imported here to keep the completion of commands quick
+    # pylint: disable=import-outside-toplevel
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=dict(os.environ, LC_ALL="C"),
+        )
+    except EnvironmentError:
+        return "", 1
+    return result.stdout.decode("utf-8", "replace"), result.returncode
+
+def _load_json(path):
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (EnvironmentError, ValueError):
+        return None
+
+def _save_json(path, document):
+    # Caches are only an optimization, the completion works without them.
+    tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # write the cache atomically, a completion may run concurrently
+        try:
+            with open(tmp_path, "w") as cache_file:
+                json.dump(document, cache_file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except EnvironmentError:
+        pass
+
+def make_suggestions(environment, suggestion_tree, get_argument_values=None):
     """
     dict environment - very likely os.environ
     dict suggestion_tree - {'acl': {'role': {'create': ...}}}...
+    callable get_argument_values - takes words of a command, returns values to
+        complete its argument by
     """
     if not has_applicable_environment(environment):
         raise EnvironmentError("Environment is not completion read")
@@ -33,7 +292,8 @@ def make_suggestions(environment, suggestion_tree):
     return "\n".join(_find_suggestions(
         suggestion_tree,
         typed_word_list,
-        int(environment['COMP_CWORD'])
+        int(environment['COMP_CWORD']),
+        get_argument_values,
     ))
 
 def _split_words(joined_words, word_lengths):
@@ -65,7 +325,10 @@ def _split_words(joined_words, word_lengths):
 
     return word_list
 
-def _find_suggestions(suggestion_tree, typed_word_list, word_under_cursor_idx):
+def _find_suggestions(
+    suggestion_tree, typed_word_list, word_under_cursor_idx,
+    get_argument_values=None
+):
     if not  1 <= word_under_cursor_idx <= len(typed_word_list):
         return []
 
@@ -79,6 +342,10 @@ def _find_suggestions(suggestion_tree, typed_word_list, word_under_cursor_idx):
         suggestion_tree,
         typed_word_list[1:word_under_cursor_idx]
     )
+    if not words_for_current_cursor_position and get_argument_values:
+        words_for_current_cursor_position = get_argument_values(
+            typed_word_list[1:word_under_cursor_idx]
+        )
 
     return [
         word for word in words_for_current_cursor_position
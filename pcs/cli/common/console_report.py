@@ -1098,6 +1098,13 @@ CODE_TO_MESSAGE_BUILDER_MAP = {
         .format(**info)
     ,
 
+    codes.CIB_PUSH_NATIVE_DIFF_REJECTED: lambda info:
+        (
+            "Unable to apply the CIB diff, trying again with a diff from "
+            "crm_diff: {reason}"
+        ).format(**info)
+    ,
+
     codes.CIB_DIFF_ERROR: lambda info:
         "Unable to diff CIB: {reason}\n{cib_new}"
         .format(**info)
@@ -1353,6 +1360,10 @@ CODE_TO_MESSAGE_BUILDER_MAP = {
         .format(**info)
     ,
 
+    codes.AGENT_METADATA_CACHE_DISABLED:
+        "Caching metadata of agents is disabled"
+    ,
+
     codes.AGENT_NAME_GUESSED: lambda info:
         "Assumed agent name '{guessed_name}' (deduced from '{entered_name}')"
         .format(**info)
@@ -4,29 +4,6 @@ from collections import namedtuple
 
 from pcs.cli.common import middleware
 from pcs.cli.common.reports import process_library_reports
-from pcs.lib.commands import (
-    acl,
-    alert,
-    booth,
-    cib_options,
-    cluster,
-    fencing_topology,
-    node,
-    pcsd,
-    qdevice,
-    quorum,
-    remote_node,
-    resource,
-    resource_agent,
-    sbd,
-    stonith,
-    stonith_agent,
-)
-from pcs.lib.commands.constraint import (
-    colocation as constraint_colocation,
-    order as constraint_order,
-    ticket as constraint_ticket
-)
 from pcs.lib.env import LibraryEnvironment
 from pcs.lib.errors import LibraryEnvError
 
@@ -47,6 +24,7 @@ def cli_env_to_lib_env(cli_env):
         booth=cli_env.booth,
         known_hosts_getter=cli_env.known_hosts_getter,
         request_timeout=cli_env.request_timeout,
+        defer_cib_push=cli_env.defer_cib_push,
     )
 
 def lib_env_to_cli_env(lib_env, cli_env):
@@ -73,7 +51,10 @@ def bind(cli_env, run_with_middleware, run_library_command):
     def run(cli_env, *args, **kwargs):
         lib_env = cli_env_to_lib_env(cli_env)
 
-        lib_call_result = run_library_command(lib_env, *args, **kwargs)
+        try:
+            lib_call_result = run_library_command(lib_env, *args, **kwargs)
+        finally:
+            lib_env.close_node_connections()
 
         #midlewares needs finish its work and they see only cli_env
         #so we need reflect some changes to cli_env
@@ -105,8 +86,12 @@ def get_module(env, middleware_factory, name):
 
 
 def load_module(env, middleware_factory, name):
+    # Library commands are imported only when they are used. Importing all of
+    # them takes a considerable part of a pcs command's run time.
     # pylint: disable=too-many-return-statements, too-many-branches
+    # pylint: disable=import-outside-toplevel
     if name == "acl":
+        from pcs.lib.commands import acl
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -130,6 +115,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "alert":
+        from pcs.lib.commands import alert
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -145,6 +131,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "booth":
+        from pcs.lib.commands import booth
         return bind_all(
             env,
             middleware.build(
@@ -173,6 +160,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "cluster":
+        from pcs.lib.commands import cluster
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -187,6 +175,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "remote_node":
+        from pcs.lib.commands import remote_node
         return bind_all(
             env,
             middleware.build(
@@ -202,6 +191,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == 'constraint_colocation':
+        from pcs.lib.commands.constraint import colocation as constraint_colocation
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -212,6 +202,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == 'constraint_order':
+        from pcs.lib.commands.constraint import order as constraint_order
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -222,6 +213,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == 'constraint_ticket':
+        from pcs.lib.commands.constraint import ticket as constraint_ticket
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -234,6 +226,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "fencing_topology":
+        from pcs.lib.commands import fencing_topology
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -248,6 +241,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "node":
+        from pcs.lib.commands import node
         return bind_all(
             env,
             middleware.build(middleware_factory.cib),
@@ -265,6 +259,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "pcsd":
+        from pcs.lib.commands import pcsd
         return bind_all(
             env,
             middleware.build(),
@@ -274,6 +269,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "qdevice":
+        from pcs.lib.commands import qdevice
         return bind_all(
             env,
             middleware.build(),
@@ -297,6 +293,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "quorum":
+        from pcs.lib.commands import quorum
         return bind_all(
             env,
             middleware.build(middleware_factory.corosync_conf_existing),
@@ -314,6 +311,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "resource_agent":
+        from pcs.lib.commands import resource_agent
         return bind_all(
             env,
             middleware.build(),
@@ -324,10 +322,13 @@ def load_module(env, middleware_factory, name):
                     resource_agent.list_agents_for_standard_and_provider,
                 "list_ocf_providers": resource_agent.list_ocf_providers,
                 "list_standards": resource_agent.list_standards,
+                "refresh_metadata_cache":
+                    resource_agent.refresh_metadata_cache,
             }
         )
 
     if name == "resource":
+        from pcs.lib.commands import resource
         return bind_all(
             env,
             middleware.build(
@@ -355,6 +356,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "cib_options":
+        from pcs.lib.commands import cib_options
         return bind_all(
             env,
             middleware.build(
@@ -367,6 +369,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "stonith":
+        from pcs.lib.commands import stonith
         return bind_all(
             env,
             middleware.build(
@@ -384,6 +387,7 @@ def load_module(env, middleware_factory, name):
 
 
     if name == "sbd":
+        from pcs.lib.commands import sbd
         return bind_all(
             env,
             middleware.build(),
@@ -403,6 +407,7 @@ def load_module(env, middleware_factory, name):
         )
 
     if name == "stonith_agent":
+        from pcs.lib.commands import stonith_agent
         return bind_all(
             env,
             middleware.build(),
@@ -13,14 +13,23 @@ def build(*middleware_list):
         return next_in_line(env, *args, **kwargs)
     return run
 
-def cib(filename, touch_cib_file):
+def cib(filename, touch_cib_file, on_finished=None):
     """
     return configured middleware that cares about local cib
     bool use_local_cib is flag if local cib was required
     callable load_cib_content returns local cib content, take no params
     callable write_cib put content of cib to required place
+    callable on_finished is called when the cib may have been changed, take no
+        params
     """
     def apply(next_in_line, env, *args, **kwargs):
+        try:
+            return _apply(next_in_line, env, *args, **kwargs)
+        finally:
+            if on_finished:
+                on_finished()
+
+    def _apply(next_in_line, env, *args, **kwargs):
         if filename:
             touch_cib_file(filename)
             try:
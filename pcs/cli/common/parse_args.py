@@ -27,6 +27,8 @@ PCS_LONG_OPTIONS = [
     "groups",
     # "pcs resource clear --expired" - only clear expired moves and bans
     "expired",
+    # "pcs resource agents --refresh-cache" - refresh agent metadata cache
+    "refresh-cache",
 ]
 
 def split_list(arg_list, separator):
@@ -369,6 +371,7 @@ class InputModifiers():
             "--no-watchdog-validation": "--no-watchdog-validation" in options,
             "--off": "--off" in options,
             "--pacemaker": "--pacemaker" in options,
+            "--refresh-cache": "--refresh-cache" in options,
             "--skip-offline": "--skip-offline" in options,
             "--start": "--start" in options,
             # string values
@@ -1,4 +1,3 @@
-from pcs import utils
 from pcs.cli.common.errors import CmdLineInputError
 
 def create_router(cmd_map, usage_sub_cmd, default_cmd=None):
@@ -18,6 +17,7 @@ def create_router(cmd_map, usage_sub_cmd, default_cmd=None):
         except CmdLineInputError as e:
             if not usage_sub_cmd:
                 raise
+            from pcs import utils
             utils.exit_on_cmdline_input_errror(
                 e,
                 usage_sub_cmd[0],
@@ -14,7 +14,6 @@ from pcs import (
     settings,
     utils,
 )
-from pcs.utils import parallel_for_nodes
 from pcs.cli.common import parse_args
 from pcs.cli.common.errors import (
     CmdLineInputError,
@@ -58,6 +57,10 @@ import pcs.lib.pacemaker.live as lib_pacemaker
 
 # pylint: disable=too-many-branches, too-many-statements
 
+# Stopping pacemaker may take long as it stops all resources. Ask again when
+# a request times out.
+STOP_PACEMAKER_REPEAT_ON_TIMEOUT = 15
+
 
 def cluster_cib_upgrade_cmd(lib, argv, modifiers):
     """
@@ -241,9 +244,8 @@ def start_cluster_nodes(nodes):
     timeout = int(
         settings.default_request_timeout * math.ceil(len(nodes) / 8.0)
     )
-    utils.read_known_hosts_file() # cache known hosts
-    node_errors = parallel_for_nodes(
-        utils.startCluster, nodes, quiet=True, timeout=timeout
+    node_errors = utils.send_http_request_to_nodes(
+        nodes, RequestData("remote/cluster_start"), timeout=timeout
     )
     if node_errors:
         utils.err(
@@ -268,7 +270,7 @@ def wait_for_local_node_started(stop_at, interval):
         while True:
             time.sleep(interval)
             node_status = lib_pacemaker.get_local_node_status(
-                utils.cmd_runner()
+                utils.cmd_runner(), trusted_source=True
             )
             if is_node_fully_started(node_status):
                 return 0, "Started"
@@ -279,28 +281,57 @@ def wait_for_local_node_started(stop_at, interval):
             "\n".join([build_report_message(item) for item in e.args])
         )
 
-def wait_for_remote_node_started(node, stop_at, interval):
+def get_remote_node_start_status(code, output):
+    """
+    Return a tuple (code, message) if the node is started or it will not get
+    started, return None if the node is still starting
+
+    Commandline options: no options
+    """
+    # HTTP error, permission denied or unable to auth
+    # there is no point in trying again as it won't get magically fixed
+    if code in [1, 3, 4]:
+        return 1, output
+    if code == 0:
+        try:
+            node_status = json.loads(output)
+            if is_node_fully_started(node_status):
+                return 0, "Started"
+        except (ValueError, KeyError):
+            # this won't get fixed either
+            return 1, "Unable to get node status"
+    return None
+
+def wait_for_remote_nodes_started(node_list, stop_at, interval):
     """
+    Print nodes start status, return a list of nodes which failed to start
+
     Commandline options:
       * --request-timeout - timeout for HTTP requests
     """
-    while True:
+    failed_nodes = []
+    waiting_nodes = list(node_list)
+    while waiting_nodes:
         time.sleep(interval)
-        code, output = utils.getPacemakerNodeStatus(node)
-        # HTTP error, permission denied or unable to auth
-        # there is no point in trying again as it won't get magically fixed
-        if code in [1, 3, 4]:
-            return 1, output
-        if code == 0:
-            try:
-                node_status = json.loads(output)
-                if is_node_fully_started(node_status):
-                    return 0, "Started"
-            except (ValueError, KeyError):
-                # this won't get fixed either
-                return 1, "Unable to get node status"
-        if datetime.datetime.now() > stop_at:
-            return 1, "Waiting timeout"
+        still_waiting_nodes = []
+        for node, code, output in utils.send_http_requests(
+            waiting_nodes, RequestData("remote/pacemaker_node_status")
+        ):
+            status = get_remote_node_start_status(code, output)
+            if status is None:
+                still_waiting_nodes.append(node)
+                continue
+            code, output = status
+            print("{0}: {1}".format(node, output.strip()))
+            if code != 0:
+                failed_nodes.append(node)
+        waiting_nodes = still_waiting_nodes
+        if waiting_nodes and datetime.datetime.now() > stop_at:
+            for node in waiting_nodes:
+                print("{0}: Waiting timeout".format(node))
+            failed_nodes.extend(waiting_nodes)
+            break
+    return failed_nodes
 
 def wait_for_nodes_started(node_list, timeout=None):
     """
@@ -319,11 +350,7 @@ def wait_for_nodes_started(node_list, timeout=None):
         else:
             print(output)
     else:
-        utils.read_known_hosts_file() # cache known hosts
-        node_errors = parallel_for_nodes(
-            wait_for_remote_node_started, node_list, stop_at, interval
-        )
-        if node_errors:
+        if wait_for_remote_nodes_started(node_list, stop_at, interval):
             utils.err("unable to verify all nodes have started")
 
 def stop_cluster_all():
@@ -360,7 +387,6 @@ def stop_cluster_nodes(nodes):
             % "', '".join(sorted(unknown_nodes))
         )
 
-    utils.read_known_hosts_file() # cache known hosts
     stopping_all = set(nodes) >= set(all_nodes)
     if "--force" not in utils.pcs_options and not stopping_all:
         error_list = []
@@ -398,10 +424,14 @@ def stop_cluster_nodes(nodes):
             )
 
     was_error = False
-    node_errors = parallel_for_nodes(
-        utils.repeat_if_timeout(utils.stopPacemaker),
+    request_data, timeout = utils.get_stop_cluster_request(
+        pacemaker=True, corosync=False
+    )
+    node_errors = utils.send_http_request_to_nodes(
         nodes,
-        quiet=True
+        request_data,
+        timeout=timeout,
+        repeat_on_timeout=STOP_PACEMAKER_REPEAT_ON_TIMEOUT,
     )
     accessible_nodes = [
         node for node in nodes if node not in node_errors.keys()
@@ -416,10 +446,11 @@ def stop_cluster_nodes(nodes):
     for node in node_errors:
         print("{0}: Not stopping cluster - node is unreachable".format(node))
 
-    node_errors = parallel_for_nodes(
-        utils.stopCorosync,
-        accessible_nodes,
-        quiet=True
+    request_data, timeout = utils.get_stop_cluster_request(
+        pacemaker=False, corosync=True
+    )
+    node_errors = utils.send_http_request_to_nodes(
+        accessible_nodes, request_data, timeout=timeout
     )
     if node_errors:
         utils.err(
@@ -512,20 +543,21 @@ def destroy_cluster(argv):
       * --request-timeout - timeout for HTTP requests
     """
     if argv:
-        utils.read_known_hosts_file() # cache known hosts
         # stop pacemaker and resources while cluster is still quorate
         nodes = argv
-        node_errors = parallel_for_nodes(
-            utils.repeat_if_timeout(utils.stopPacemaker),
+        request_data, timeout = utils.get_stop_cluster_request(
+            pacemaker=True, corosync=False
+        )
+        node_errors = utils.send_http_request_to_nodes(
             nodes,
-            quiet=True
+            request_data,
+            timeout=timeout,
+            repeat_on_timeout=STOP_PACEMAKER_REPEAT_ON_TIMEOUT,
         )
         # proceed with destroy regardless of errors
         # destroy will stop any remaining cluster daemons
-        node_errors = parallel_for_nodes(
-            utils.destroyCluster,
-            nodes,
-            quiet=True
+        node_errors = utils.send_http_request_to_nodes(
+            nodes, RequestData("remote/cluster_destroy")
         )
         if node_errors:
             utils.err(
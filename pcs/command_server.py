@@ -0,0 +1,342 @@
+"""
+Local server running pcs commands in a process with pcs already loaded
+
+Each pcs command pays for starting python and importing pcs before it starts
+to do its job. The command server imports pcs once and runs each command in
+a process forked from itself. A client forwards its command line, environment
+and working directory together with its stdin, stdout and stderr to the server
+and waits for the exit code of the command. The command reads and writes the
+client's standard streams directly, so its output is not delayed.
+
+Only root is allowed to use the server. If the server is not available, the
+command runs in the client process as usual.
+
+Requests and responses are json documents framed by their length:
+"<length of the document in bytes>\\n<document>".
+"""
+import array
+import json
+import os
+import select
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import traceback
+
+from pcs import settings
+from pcs.cli.common import completion
+
+
+FRAME_HEADER_MAX_BYTES = 32
+_STD_FDS = (0, 1, 2)
+_FD_SIZE = array.array("i").itemsize
+_PEER_CREDENTIALS = struct.Struct("3i")
+
+
+class CommandServerError(Exception):
+    pass
+
+
+def main(argv=None):
+    """
+    Run a pcs command by the command server, run it in-process as a fallback
+
+    list argv -- the command line, sys.argv is used if not specified
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if completion.has_applicable_environment(os.environ):
+        # completion needs neither the server nor the rest of pcs
+        print(completion.complete(os.environ))
+        sys.exit()
+    if _can_use_server():
+        exit_code = run_by_server(settings.pcs_command_server_socket, argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    # pylint: disable=import-outside-toplevel
+    from pcs import app
+    app.main(argv)
+
+def _can_use_server():
+    # The command runs in a process without a controlling terminal, so it
+    # would not be able to prompt for passwords and such.
+    return os.geteuid() == 0 and not os.isatty(0)
+
+def run_by_server(socket_path, argv):
+    """
+    Run a pcs command by the command server, return its exit code
+
+    None is returned if the server is not available. The command has not been
+    run in that case.
+
+    string socket_path -- the server's socket
+    list argv -- the command line
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except OSError:
+        return None
+    with sock:
+        try:
+            sock.connect(socket_path)
+            _send_frame(
+                sock,
+                {
+                    "argv": argv,
+                    "env": dict(os.environ),
+                    "cwd": os.getcwd(),
+                },
+                _STD_FDS
+            )
+        except OSError:
+            return None
+        try:
+            response, dummy_fds = _recv_frame(sock)
+            return int(response["exit_code"])
+        except (CommandServerError, OSError, KeyError, TypeError, ValueError):
+            sys.stderr.write(
+                "Error: Connection to the pcs command server has been lost\n"
+            )
+            return 1
+
+def serve(socket_path, parent_pid=None):
+    """
+    Import pcs and serve commands until terminated
+
+    string socket_path -- the socket to listen on
+    int parent_pid -- stop serving when the process with this pid stops being
+        the parent of the server
+    """
+    # pylint: disable=import-outside-toplevel
+    from pcs import app
+    app.import_commands()
+
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir:
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    _remove_socket(socket_path)
+    old_umask = os.umask(0o077)
+    try:
+        server = _CommandServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.run_pcs = app.main
+    server.parent_pid = parent_pid
+    try:
+        with server:
+            server.serve_forever()
+    finally:
+        _remove_socket(socket_path)
+
+def start_server_process(socket_path):
+    """
+    Run the command server in a new process, return the process' pid
+
+    The server stops on SIGTERM or when the calling process exits.
+
+    string socket_path -- the socket to listen on
+    """
+    parent_pid = os.getpid()
+    pid = os.fork()
+    if pid:
+        return pid
+    exit_code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+        serve(socket_path, parent_pid)
+        exit_code = 0
+    except SystemExit:
+        exit_code = 0
+    finally:
+        # do not run any cleanup of the parent process
+        os._exit(exit_code) # pylint: disable=protected-access
+    return None
+
+def _raise_system_exit(signal_number, frame):
+    # pylint: disable=unused-argument
+    raise SystemExit(0)
+
+def _remove_socket(socket_path):
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+
+class _CommandServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    run_pcs = None
+    parent_pid = None
+
+    def service_actions(self):
+        super().service_actions()
+        if self.parent_pid is not None and os.getppid() != self.parent_pid:
+            raise SystemExit(0)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """
+    Serve one request in a process forked from the server
+    """
+    def handle(self):
+        if _get_peer_uid(self.request) != 0:
+            return
+        try:
+            request, fd_list = _recv_frame(self.request, len(_STD_FDS))
+        except (CommandServerError, OSError, ValueError):
+            return
+        try:
+            if len(fd_list) != len(_STD_FDS) or not _is_valid(request):
+                return
+            exit_code = self.__run_command(request, fd_list)
+        finally:
+            for fd in fd_list:
+                os.close(fd)
+        try:
+            _send_frame(self.request, {"exit_code": exit_code})
+        except OSError:
+            pass
+
+    def __run_command(self, request, fd_list):
+        # The command runs in its own process so that it can be terminated
+        # when the client disconnects. The pipe gets closed when the command
+        # exits.
+        exit_read_fd, exit_write_fd = os.pipe()
+        pid = os.fork()
+        if not pid:
+            os.close(exit_read_fd)
+            try:
+                _run_command(self.server.run_pcs, request, fd_list)
+            finally:
+                os._exit(1) # pylint: disable=protected-access
+        os.close(exit_write_fd)
+        try:
+            readable, dummy_writable, dummy_error = select.select(
+                [exit_read_fd, self.request], [], []
+            )
+            if exit_read_fd not in readable:
+                # the client has gone away
+                os.kill(pid, signal.SIGTERM)
+        finally:
+            os.close(exit_read_fd)
+        dummy_pid, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            return 128 + os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+
+def _run_command(run_pcs, request, fd_list):
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    for std_fd, fd in zip(_STD_FDS, fd_list):
+        os.dup2(fd, std_fd)
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = ["pcs"] + request["argv"]
+    try:
+        os.chdir(request["cwd"])
+        run_pcs(request["argv"])
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = _get_exit_code(e.code)
+    except BaseException: # pylint: disable=broad-except
+        traceback.print_exc()
+        exit_code = 1
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except OSError:
+            pass
+    os._exit(exit_code) # pylint: disable=protected-access
+
+def _get_exit_code(code):
+    # the same way python interprets the argument of sys.exit
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    sys.stderr.write("{0}\n".format(code))
+    return 1
+
+def _is_valid(request):
+    return (
+        isinstance(request, dict)
+        and
+        isinstance(request.get("argv"), list)
+        and
+        all(isinstance(arg, str) for arg in request["argv"])
+        and
+        isinstance(request.get("env"), dict)
+        and
+        all(
+            isinstance(name, str) and isinstance(value, str)
+            for name, value in request["env"].items()
+        )
+        and
+        isinstance(request.get("cwd"), str)
+    )
+
+def _get_peer_uid(sock):
+    dummy_pid, uid, dummy_gid = _PEER_CREDENTIALS.unpack(
+        sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, _PEER_CREDENTIALS.size
+        )
+    )
+    return uid
+
+def _send_frame(sock, document, fd_list=()):
+    payload = json.dumps(document).encode()
+    frame = "{0}\n".format(len(payload)).encode() + payload
+    ancillary_data = []
+    if fd_list:
+        ancillary_data.append((
+            socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fd_list)
+        ))
+    sent = sock.sendmsg([frame], ancillary_data)
+    sock.sendall(frame[sent:])
+
+def _recv_frame(sock, max_fds=0):
+    """
+    Return a received document and a list of file descriptors received with it
+
+    socket sock -- connected socket to read the frame from
+    int max_fds -- how many file descriptors are accepted
+    """
+    fd_list = []
+    buffer = b""
+    while b"\n" not in buffer:
+        if len(buffer) > FRAME_HEADER_MAX_BYTES:
+            _close_fds(fd_list)
+            raise CommandServerError("Invalid frame header")
+        data, ancillary_data, dummy_flags, dummy_address = sock.recvmsg(
+            4096, socket.CMSG_SPACE(max_fds * _FD_SIZE) if max_fds else 0
+        )
+        fd_list.extend(_get_fds(ancillary_data))
+        if not data:
+            _close_fds(fd_list)
+            raise CommandServerError("Connection closed")
+        buffer += data
+    header, payload = buffer.split(b"\n", 1)
+    try:
+        length = int(header)
+        while len(payload) < length:
+            data = sock.recv(length - len(payload))
+            if not data:
+                raise CommandServerError("Connection closed")
+            payload += data
+        return json.loads(payload[:length].decode()), fd_list
+    except BaseException:
+        _close_fds(fd_list)
+        raise
+
+def _get_fds(ancillary_data):
+    fd_list = array.array("i")
+    for level, cmsg_type, data in ancillary_data:
+        if level == socket.SOL_SOCKET and cmsg_type == socket.SCM_RIGHTS:
+            fd_list.frombytes(data[:len(data) - (len(data) % _FD_SIZE)])
+    return list(fd_list)
+
+def _close_fds(fd_list):
+    for fd in fd_list:
+        os.close(fd)
@@ -0,0 +1,141 @@
+import fcntl
+import json
+import os
+
+from pcs import settings
+from pcs.common.host import PcsKnownHost
+
+
+CURRENT_FORMAT = 1
+
+
+class KnownHostsError(Exception):
+    pass
+
+
+def get_default_file_path():
+    """
+    Return path to the known-hosts file of the user running the process
+    """
+    if os.geteuid() == 0:
+        return settings.pcsd_known_hosts_location
+    return os.path.expanduser(settings.pcsd_user_known_hosts_location)
+
+
+class KnownHostsStore():
+    """
+    Known hosts loaded from a known-hosts file. The file is parsed only when it
+    has been changed since it was parsed last time, so the store is cheap to
+    query repeatedly.
+    """
+    def __init__(self, file_path):
+        """
+        string file_path -- path to the known-hosts file
+        """
+        self.__file_path = file_path
+        self.__file_id = None
+        self.__known_hosts = {}
+        self.__data_version = 0
+        self.__load_count = 0
+
+    @property
+    def file_path(self):
+        return self.__file_path
+
+    @property
+    def load_count(self):
+        """
+        How many times the file has been parsed
+        """
+        return self.__load_count
+
+    @property
+    def data_version(self):
+        self.__refresh()
+        return self.__data_version
+
+    def get_all(self):
+        """
+        Return a dict host name -> PcsKnownHost of all known hosts
+        """
+        self.__refresh()
+        return dict(self.__known_hosts)
+
+    def __get_file_id(self):
+        try:
+            stat = os.stat(self.__file_path)
+        except FileNotFoundError:
+            return None
+        except EnvironmentError as e:
+            raise KnownHostsError(
+                "Unable to read known-hosts file '{0}': {1}".format(
+                    self.__file_path, e.strerror
+                )
+            )
+        return _get_file_id(stat)
+
+    def __refresh(self):
+        file_id = self.__get_file_id()
+        if file_id == self.__file_id:
+            return
+        if file_id is None:
+            self.__set(None, {}, 0)
+            return
+        try:
+            with open(self.__file_path) as known_hosts_file:
+                # pcsd locks the file while writing it
+                fcntl.flock(known_hosts_file.fileno(), fcntl.LOCK_SH)
+                text = known_hosts_file.read()
+                # the file may have been changed before it was locked
+                file_id = _get_file_id(os.fstat(known_hosts_file.fileno()))
+        except EnvironmentError as e:
+            raise KnownHostsError(
+                "Unable to read known-hosts file '{0}': {1}".format(
+                    self.__file_path, e.strerror
+                )
+            )
+        self.__load_count += 1
+        try:
+            known_hosts, data_version = _parse(text)
+        except KnownHostsError:
+            # report a broken file once, not on each query
+            self.__set(file_id, {}, 0)
+            raise
+        self.__set(file_id, known_hosts, data_version)
+
+    def __set(self, file_id, known_hosts, data_version):
+        self.__file_id = file_id
+        self.__known_hosts = known_hosts
+        self.__data_version = data_version
+
+
+def _get_file_id(stat):
+    return (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _parse(text):
+    """
+    Return a dict name -> PcsKnownHost and a data version from the file text
+    """
+    if not text.strip():
+        return {}, 0
+    try:
+        data = json.loads(text)
+        format_version = data["format_version"]
+        if format_version != CURRENT_FORMAT:
+            raise KnownHostsError(
+                "Unsupported known-hosts file format version '{0}'".format(
+                    format_version
+                )
+            )
+        return (
+            {
+                name: PcsKnownHost.from_known_host_file_dict(name, host)
+                for name, host in data["known_hosts"].items()
+            },
+            data["data_version"],
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise KnownHostsError(
+            "Unable to parse known-hosts file: {0}".format(e)
+        )
@@ -1,7 +1,15 @@
+import asyncio
 import base64
 import io
 import re
-from collections import namedtuple
+import selectors
+from collections import (
+    Counter,
+    OrderedDict,
+    deque,
+    namedtuple,
+)
+from time import monotonic
 from urllib.parse import urlencode
 
 # We should ignore SIGPIPE when using pycurl.NOSIGNAL - see the libcurl tutorial
@@ -250,12 +258,58 @@ class Response():
             self.response_code,
         )
 
+class ConnectionPool():
+    """
+    This class keeps connections, TLS sessions and resolved addresses to be
+    reused by all requests of all communicators it is given to. So subsequent
+    requests to the same node do not need to establish a new TCP connection and
+    do a full TLS handshake.
+
+    Connections are held by libcurl in a cache keyed by host and port which is
+    shared by all curl easy handles using the pool.
+    """
+    def __init__(self):
+        self._share = None
+
+    def use_for(self, handle):
+        """
+        Make a curl easy handle use the pooled connections
+
+        pycurl.Curl handle -- curl easy handle
+        """
+        handle.setopt(pycurl.SHARE, self._get_share())
+
+    def close(self):
+        """
+        Release the pool. Connections are closed by libcurl once no handle
+        which uses them exists.
+        """
+        self._share = None
+
+    def _get_share(self):
+        if self._share is None:
+            self._share = pycurl.CurlShare()
+            self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+            self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+            try:
+                # Sharing connections is available since libcurl 7.57.0. With
+                # an older libcurl, at least TLS sessions are resumed.
+                self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT)
+            except (AttributeError, pycurl.error):
+                pass
+        return self._share
+
+
 class NodeCommunicatorFactory():
-    def __init__(self, communicator_logger, user, groups, request_timeout):
+    def __init__(
+        self, communicator_logger, user, groups, request_timeout,
+        connection_pool=None
+    ):
         self._logger = communicator_logger
         self._user = user
         self._groups = groups
         self._request_timeout = request_timeout
+        self._connection_pool = connection_pool
 
     def get_communicator(self, request_timeout=None):
         return self.get_simple_communicator(request_timeout=request_timeout)
@@ -263,14 +317,15 @@ class NodeCommunicatorFactory():
     def get_simple_communicator(self, request_timeout=None):
         timeout = request_timeout if request_timeout else self._request_timeout
         return Communicator(
-            self._logger, self._user, self._groups, request_timeout=timeout
+            self._logger, self._user, self._groups, request_timeout=timeout,
+            connection_pool=self._connection_pool,
         )
 
     def get_multiaddress_communicator(self, request_timeout=None):
         timeout = request_timeout if request_timeout else self._request_timeout
         return MultiaddressCommunicator(
-            self._logger, self._user, self._groups, request_timeout=timeout
-
+            self._logger, self._user, self._groups, request_timeout=timeout,
+            connection_pool=self._connection_pool,
         )
 
 
@@ -280,9 +335,12 @@ class Communicator():
     The instances of this class are not thread-safe! It is intended to use it
     only in a single thread. Use an unique instance for each thread.
     """
-    curl_multi_select_timeout_default = 0.8 # in seconds
-
-    def __init__(self, communicator_logger, user, groups, request_timeout=None):
+    def __init__(
+        self, communicator_logger, user, groups, request_timeout=None,
+        connection_pool=None, max_parallel_requests=None,
+        max_parallel_requests_per_host=None,
+    ):
+        # pylint: disable=too-many-arguments
         self._logger = communicator_logger
         self._auth_cookies = _get_auth_cookies(user, groups)
         self._request_timeout = (
@@ -290,12 +348,31 @@ class Communicator():
             if request_timeout is not None
             else settings.default_request_timeout
         )
+        self._connection_pool = connection_pool
+        self._max_parallel_requests = (
+            max_parallel_requests
+            if max_parallel_requests is not None
+            else settings.node_communicator_max_parallel_requests
+        )
+        self._max_parallel_requests_per_host = (
+            max_parallel_requests_per_host
+            if max_parallel_requests_per_host is not None
+            else settings.node_communicator_max_parallel_requests_per_host
+        )
         self._multi_handle = pycurl.CurlMulti()
+        self._curl_events = None
         self._is_running = False
+        self._finished_count = 0
         # This is used just for storing references of curl easy handles.
         # We need to have references for all the handles, so they don't be
         # cleaned up by the garbage collector.
         self._easy_handle_list = []
+        # Handles waiting for a free slot, grouped by a host they are going to
+        # connect to. Hosts are served in a round-robin fashion so a host with
+        # many requests does not delay requests to other hosts.
+        self._waiting_handles = OrderedDict()
+        self._running_count = 0
+        self._running_count_per_host = Counter()
 
     def add_requests(self, request_list):
         """
@@ -304,7 +381,9 @@ class Communicator():
         getting responses from generator.  Requests are not performed after
         calling this method, but only when generator returned by start_loop
         method is in progress (returned at least one response and not raised
-        StopIteration exception).
+        StopIteration exception). The number of requests performed at the same
+        time is limited, the rest of requests waits until running requests
+        finish.
 
         list request_list -- Request objects to add to the queue
         """
@@ -312,10 +391,15 @@ class Communicator():
             handle = _create_request_handle(
                 request, self._auth_cookies, self._request_timeout,
             )
+            if self._connection_pool is not None:
+                self._connection_pool.use_for(handle)
             self._easy_handle_list.append(handle)
-            self._multi_handle.add_handle(handle)
-            if self._is_running:
-                self._logger.log_request_start(request)
+            host_key = _get_host_key(request)
+            if host_key not in self._waiting_handles:
+                self._waiting_handles[host_key] = deque()
+            self._waiting_handles[host_key].append(handle)
+        if self._is_running:
+            self.__start_waiting_requests()
 
     def start_loop(self):
         """
@@ -340,30 +424,82 @@ class Communicator():
             # if needed, add some new requests to the queue
             com.add_requests([Request(...)])
         """
+        self._start_loop()
+        while self._has_running_requests():
+            self._curl_events.process_events()
+            yield from self._process_finished_requests()
+        self._finish_loop()
+
+    def _create_curl_events(self):
+        return _CurlEventsSelector(self._multi_handle)
+
+    def _start_loop(self):
         if self._is_running:
             raise AssertionError("Method start_loop already running")
         self._is_running = True
-        for handle in self._easy_handle_list:
-            self._logger.log_request_start(handle.request_obj)
-
-        finished_count = 0
-        while finished_count < len(self._easy_handle_list):
-            self.__multi_perform()
-            self.__wait_for_multi_handle()
-            response_list = self.__get_all_ready_responses()
-            for response in response_list:
-                # free up memory for next usage of this Communicator instance
-                self._multi_handle.remove_handle(response.handle)
-                self._logger.log_response(response)
-                yield response
-                # if something was added to the queue in the meantime, run it
-                # immediately, so we don't need to wait until all responses will
-                # be processed
-                self.__multi_perform()
-            finished_count += len(response_list)
+        if self._curl_events is None:
+            self._curl_events = self._create_curl_events()
+        self._finished_count = 0
+        self.__start_waiting_requests()
+
+    def _finish_loop(self):
         self._easy_handle_list = []
         self._is_running = False
 
+    def _has_running_requests(self):
+        return self._finished_count < len(self._easy_handle_list)
+
+    def _process_finished_requests(self):
+        for response in self.__get_all_ready_responses():
+            # free up memory for next usage of this Communicator instance
+            self._multi_handle.remove_handle(response.handle)
+            self._finished_count += 1
+            self._running_count -= 1
+            self._running_count_per_host[
+                _get_host_key(response.handle.request_obj)
+            ] -= 1
+            self._logger.log_response(response)
+            self.__start_waiting_requests()
+            final_response = self._finalize_response(response)
+            if final_response is not None:
+                yield final_response
+
+    def _finalize_response(self, response):
+        """
+        Return a response to be passed to the caller or None if the response
+        has been handled otherwise (e.g. the request has been retried)
+
+        Response response -- a response of a finished request
+        """
+        # pylint: disable=no-self-use
+        return response
+
+    def __start_waiting_requests(self):
+        while self._running_count < self._max_parallel_requests:
+            started = False
+            for host_key in list(self._waiting_handles):
+                if self._running_count >= self._max_parallel_requests:
+                    break
+                if (
+                    self._running_count_per_host[host_key]
+                    >=
+                    self._max_parallel_requests_per_host
+                ):
+                    continue
+                handle_queue = self._waiting_handles[host_key]
+                handle = handle_queue.popleft()
+                if handle_queue:
+                    self._waiting_handles.move_to_end(host_key)
+                else:
+                    del self._waiting_handles[host_key]
+                self._multi_handle.add_handle(handle)
+                self._running_count += 1
+                self._running_count_per_host[host_key] += 1
+                self._logger.log_request_start(handle.request_obj)
+                started = True
+            if not started:
+                return
+
     def __get_all_ready_responses(self):
         response_list = []
         repeat = True
@@ -379,33 +515,6 @@ class Communicator():
             repeat = num_queued > 0
         return response_list
 
-    def __multi_perform(self):
-        # run all internal operation required by libcurl
-        status, num_to_process = self._multi_handle.perform()
-        # if perform returns E_CALL_MULTI_PERFORM it requires to call perform
-        # once again right away
-        while status == pycurl.E_CALL_MULTI_PERFORM:
-            status, num_to_process = self._multi_handle.perform()
-        return num_to_process
-
-    def __wait_for_multi_handle(self):
-        # try to wait until there is something to do for us
-        need_to_wait = True
-        while need_to_wait:
-            timeout = self._multi_handle.timeout()
-            if timeout == 0:
-                # if timeout == 0 then there is something to precess already
-                return
-            timeout = (
-                timeout / 1000.0
-                if timeout > 0
-                # curl don't have timeout set, so we can use our default
-                else self.curl_multi_select_timeout_default
-            )
-            # when value returned from select is -1, it timed out, so we can
-            # wait
-            need_to_wait = (self._multi_handle.select(timeout) == -1)
-
 
 class MultiaddressCommunicator(Communicator):
     """
@@ -414,19 +523,207 @@ class MultiaddressCommunicator(Communicator):
     possible to connect to target using first hostname, it will use next one
     until connection will be successful or there is no host left.
     """
-    def start_loop(self):
-        for response in super(MultiaddressCommunicator, self).start_loop():
-            if response.was_connected:
-                yield response
-                continue
-            try:
-                previous_dest = response.request.dest
-                response.request.next_dest()
-                self._logger.log_retry(response, previous_dest)
-                self.add_requests([response.request])
-            except StopIteration:
-                self._logger.log_no_more_addresses(response)
+    def _finalize_response(self, response):
+        if response.was_connected:
+            return response
+        try:
+            previous_dest = response.request.dest
+            response.request.next_dest()
+            self._logger.log_retry(response, previous_dest)
+            self.add_requests([response.request])
+            return None
+        except StopIteration:
+            self._logger.log_no_more_addresses(response)
+            return response
+
+
+class AsyncCommunicator(Communicator):
+    """
+    Class with same interface as Communicator except start_loop is an
+    asynchronous generator. Requests are processed by the running asyncio event
+    loop (e.g. the tornado IOLoop) without blocking it.
+
+    USAGE:
+    com = AsyncCommunicator(...)
+    com.add_requests([
+        Request(...), ...
+    ])
+    async for response in com.start_loop():
+        # do something with response
+    """
+    async def start_loop(self):
+        # pylint: disable=invalid-overridden-method
+        self._start_loop()
+        while self._has_running_requests():
+            await self._curl_events.process_events()
+            for response in self._process_finished_requests():
                 yield response
+        self._finish_loop()
+
+    def _create_curl_events(self):
+        return _CurlEventsAsyncio(
+            self._multi_handle, asyncio.get_event_loop()
+        )
+
+
+class AsyncMultiaddressCommunicator(
+    AsyncCommunicator, MultiaddressCommunicator
+):
+    """
+    Class with same interface as AsyncCommunicator taking advantage of multiple
+    hosts in RequestTarget like MultiaddressCommunicator does.
+    """
+
+
+def send_requests(communicator, request_list, repeat_on_timeout=0):
+    """
+    Perform requests in parallel and yield their responses as they finish
+
+    Communicator communicator -- communicator performing the requests
+    iterable request_list -- Request objects to perform
+    int repeat_on_timeout -- how many times to repeat a timed out request
+        before its response is returned
+    """
+    repeats_left = {}
+    communicator.add_requests(request_list)
+    for response in communicator.start_loop():
+        request = response.request
+        if (
+            response.errno == pycurl.E_OPERATION_TIMEDOUT
+            and
+            repeats_left.setdefault(request, repeat_on_timeout) > 0
+        ):
+            repeats_left[request] -= 1
+            communicator.add_requests([request])
+            continue
+        yield response
+
+
+class _CurlEventsSelector():
+    """
+    This class lets curl process its sockets as soon as they are ready. Curl
+    tells which sockets to watch and when to call it back via callbacks so it
+    is not needed to poll the multi handle.
+    """
+    _curl_to_selector_events = {
+        pycurl.POLL_IN: selectors.EVENT_READ,
+        pycurl.POLL_OUT: selectors.EVENT_WRITE,
+        pycurl.POLL_INOUT: selectors.EVENT_READ | selectors.EVENT_WRITE,
+    }
+
+    def __init__(self, multi_handle):
+        self._multi_handle = multi_handle
+        self._selector = selectors.DefaultSelector()
+        self._deadline = None
+        multi_handle.setopt(pycurl.M_SOCKETFUNCTION, self._watch_socket)
+        multi_handle.setopt(pycurl.M_TIMERFUNCTION, self._set_timer)
+
+    def process_events(self):
+        """
+        Wait until at least one socket is ready or curl timer expires and let
+        curl process it
+        """
+        if self._deadline is None and not self._selector.get_map():
+            # nothing to wait for, let curl decide what to do next
+            self._deadline = monotonic()
+        timeout = (
+            None if self._deadline is None
+            else max(0, self._deadline - monotonic())
+        )
+        for key, events in self._selector.select(timeout):
+            curl_events = 0
+            if events & selectors.EVENT_READ:
+                curl_events |= pycurl.CSELECT_IN
+            if events & selectors.EVENT_WRITE:
+                curl_events |= pycurl.CSELECT_OUT
+            _socket_action(self._multi_handle, key.fd, curl_events)
+        if self._deadline is not None and self._deadline <= monotonic():
+            self._deadline = None
+            _socket_action(self._multi_handle, pycurl.SOCKET_TIMEOUT, 0)
+
+    def _watch_socket(self, event, sock_fd, dummy_multi, dummy_data):
+        if sock_fd in self._selector.get_map():
+            self._selector.unregister(sock_fd)
+        if event in self._curl_to_selector_events:
+            self._selector.register(
+                sock_fd, self._curl_to_selector_events[event]
+            )
+
+    def _set_timer(self, timeout_ms):
+        self._deadline = (
+            None if timeout_ms < 0 else monotonic() + timeout_ms / 1000.0
+        )
+
+
+class _CurlEventsAsyncio():
+    """
+    This class lets curl process its sockets as soon as they are ready. Sockets
+    and curl timer are watched by an asyncio event loop.
+    """
+    def __init__(self, multi_handle, loop):
+        self._multi_handle = multi_handle
+        self._loop = loop
+        self._watched_sockets = set()
+        self._timer = None
+        self._activity = asyncio.Event()
+        multi_handle.setopt(pycurl.M_SOCKETFUNCTION, self._watch_socket)
+        multi_handle.setopt(pycurl.M_TIMERFUNCTION, self._set_timer)
+
+    async def process_events(self):
+        """
+        Wait until curl processes at least one of its events
+        """
+        if self._timer is None and not self._watched_sockets:
+            # nothing to wait for, let curl decide what to do next
+            self._timer = self._loop.call_soon(self._on_timeout)
+        await self._activity.wait()
+        self._activity.clear()
+
+    def _watch_socket(self, event, sock_fd, dummy_multi, dummy_data):
+        if sock_fd in self._watched_sockets:
+            self._loop.remove_reader(sock_fd)
+            self._loop.remove_writer(sock_fd)
+            self._watched_sockets.discard(sock_fd)
+        if event in (pycurl.POLL_IN, pycurl.POLL_INOUT):
+            self._loop.add_reader(
+                sock_fd, self._on_socket, sock_fd, pycurl.CSELECT_IN
+            )
+            self._watched_sockets.add(sock_fd)
+        if event in (pycurl.POLL_OUT, pycurl.POLL_INOUT):
+            self._loop.add_writer(
+                sock_fd, self._on_socket, sock_fd, pycurl.CSELECT_OUT
+            )
+            self._watched_sockets.add(sock_fd)
+
+    def _set_timer(self, timeout_ms):
+        # Curl must not be called back from its callback. So the timer is
+        # always scheduled in the event loop, even if it expires immediately.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if timeout_ms >= 0:
+            self._timer = self._loop.call_later(
+                timeout_ms / 1000.0, self._on_timeout
+            )
+
+    def _on_socket(self, sock_fd, curl_events):
+        _socket_action(self._multi_handle, sock_fd, curl_events)
+        self._activity.set()
+
+    def _on_timeout(self):
+        self._timer = None
+        _socket_action(self._multi_handle, pycurl.SOCKET_TIMEOUT, 0)
+        self._activity.set()
+
+
+def _socket_action(multi_handle, sock_fd, curl_events):
+    status, dummy_running = multi_handle.socket_action(sock_fd, curl_events)
+    # if socket_action returns E_CALL_MULTI_PERFORM it requires to be called
+    # once again right away
+    while status == pycurl.E_CALL_MULTI_PERFORM:
+        status, dummy_running = multi_handle.socket_action(
+            sock_fd, curl_events
+        )
 
 
 class CommunicatorLoggerInterface():
@@ -466,6 +763,18 @@ def _get_auth_cookies(user, group_list):
     return cookies
 
 
+def _get_host_key(request):
+    """
+    Return a key identifying a host the request is going to connect to
+
+    Request request -- request specification
+    """
+    return (
+        request.dest.addr,
+        request.dest.port if request.dest.port else settings.pcsd_default_port,
+    )
+
+
 def _create_request_handle(request, cookies, timeout):
     """
     Returns Curl object (easy handle) which is set up witc specified parameters.
@@ -493,7 +802,7 @@ def _create_request_handle(request, cookies, timeout):
 
     output = io.BytesIO()
     debug_output = io.BytesIO()
-    cookies.update(request.cookies)
+    cookies = dict(cookies, **request.cookies)
     handle = pycurl.Curl()
     handle.setopt(pycurl.PROTOCOLS, pycurl.PROTO_HTTPS)
     handle.setopt(pycurl.TIMEOUT, timeout)
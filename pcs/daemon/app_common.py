@@ -1,6 +1,7 @@
-from tornado.web import RequestHandler
+from tornado.iostream import StreamClosedError
+from tornado.web import HTTPError, RequestHandler
 
-from pcs.daemon import ruby_pcsd
+from pcs.daemon import log, ruby_pcsd
 
 class EnhanceHeadersMixin:
     """
@@ -65,11 +66,28 @@ class Sinatra(BaseHandler):
         #pylint: disable=arguments-differ
         self.__ruby_pcsd_wrapper = ruby_pcsd_wrapper
 
-    def send_sinatra_result(self, result: ruby_pcsd.SinatraResult):
-        for name, value in result.headers.items():
-            self.set_header(name, value)
-        self.set_status(result.status)
-        self.write(result.body)
+    async def send_sinatra_result(self, result: ruby_pcsd.SinatraResult):
+        # The body is sent to the client as it comes from ruby pcsd so that it
+        # is never kept whole in memory.
+        try:
+            for name, value in result.headers.items():
+                self.set_header(name, value)
+            self.set_status(result.status)
+            async for chunk in result.body:
+                self.write(chunk)
+                await self.flush()
+        except StreamClosedError:
+            # the client has closed the connection
+            return
+        except ruby_pcsd.RubyProcessError as e:
+            log.pcsd.error(e)
+            if not self._headers_written:
+                raise HTTPError(500)
+            # It is too late to send an error. Finishing the response would
+            # make the client take the truncated body for a complete one.
+            self.request.connection.close()
+        finally:
+            result.body.close()
 
     @property
     def ruby_pcsd_wrapper(self):
@@ -49,7 +49,7 @@ class SinatraGui(app_session.Mixin, Sinatra):
                 self.session.groups,
                 self.session.is_authenticated,
             )
-            self.send_sinatra_result(result)
+            await self.send_sinatra_result(result)
 
     async def get(self, *args, **kwargs):
         await self.handle_sinatra_request()
@@ -154,7 +154,7 @@ class Logout(app_session.Mixin, AjaxMixin, BaseHandler):
     """
     async def get(self, *args, **kwargs):
         await self.init_session()
-        self.session_logout()
+        await self.session_logout()
         self.sid_to_cookies()
         self.enhance_headers()
         if self.is_ajax:
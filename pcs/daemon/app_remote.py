@@ -12,7 +12,7 @@ class SinatraRemote(Sinatra):
     """
     async def handle_sinatra_request(self):
         result = await self.ruby_pcsd_wrapper.request_remote(self.request)
-        self.send_sinatra_result(result)
+        await self.send_sinatra_result(result)
 
     async def get(self, *args, **kwargs):
         await self.handle_sinatra_request()
@@ -60,7 +60,7 @@ class SetCerts(SinatraRemote):
         result = await self.ruby_pcsd_wrapper.request_remote(self.request)
         if result.status == 200:
             self.__https_server_manage.reload_certs()
-        self.send_sinatra_result(result)
+        await self.send_sinatra_result(result)
 
 class Auth(SinatraRemote):
     async def auth(self):
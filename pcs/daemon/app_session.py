@@ -1,8 +1,21 @@
+from inspect import isawaitable
+
 from pcs.daemon.session import Storage
-from pcs.daemon.auth import check_user_groups, authorize_user
+from pcs.daemon.auth import (
+    authorize_user,
+    check_user_groups,
+    user_groups_cache,
+)
 
 PCSD_SESSION = "pcsd.sid"
 
+async def _resolved(result):
+    # A storage shared by pcsd workers returns awaitables, so that its calls
+    # do not block the ioloop.
+    if isawaitable(result):
+        return await result
+    return result
+
 class Mixin:
     __session = None
     """
@@ -12,17 +25,21 @@ class Mixin:
         self.__storage = session_storage
 
     async def init_session(self):
-        self.__session = self.__storage.provide(self.__sid_from_client)
+        self.__session = await _resolved(
+            self.__storage.provide(self.__sid_from_client)
+        )
         if self.__session.is_authenticated:
-            self.__refresh_auth(
+            await self.__refresh_auth(
                 await check_user_groups(self.__session.username),
                 ajax_id=self.__session.ajax_id
             )
 
     async def session_auth_user(self, username, password, sign_rejection=True):
         # initialize session since it should be used without `init_session`
-        self.__session = self.__storage.provide(self.__sid_from_client)
-        self.__refresh_auth(
+        self.__session = await _resolved(
+            self.__storage.provide(self.__sid_from_client)
+        )
+        await self.__refresh_auth(
             await authorize_user(username, password),
             sign_rejection=sign_rejection
         )
@@ -40,15 +57,23 @@ class Mixin:
         """
         Expired sessions are removed before each request that uses sessions (it
         means before each request that is handled by descendant of this mixin).
+        Only the expired sessions are visited, so it is cheap. Sessions are
+        removed periodically as well, see pcs.daemon.run. A storage shared by
+        pcsd workers removes expired sessions by itself.
         """
         self.__storage.drop_expired()
 
-    def session_logout(self):
+    async def session_logout(self):
+        if self.__session is None and self.__sid_from_client is not None:
+            self.__session = await _resolved(
+                self.__storage.provide(self.__sid_from_client)
+            )
         if self.__session is not None:
-            self.__storage.destroy(self.__session.sid)
-        elif self.__sid_from_client is not None:
-            self.__storage.destroy(self.__sid_from_client)
-        self.__session = self.__storage.provide()
+            if self.__session.is_authenticated:
+                # Groups of the user are determined again on the next login.
+                user_groups_cache.invalidate(self.__session.username)
+            await _resolved(self.__storage.destroy(self.__session.sid))
+        self.__session = await _resolved(self.__storage.provide())
 
     def sid_to_cookies(self):
         """
@@ -73,18 +98,24 @@ class Mixin:
     def __sid_from_client(self):
         return self.get_cookie(PCSD_SESSION, default=None)
 
-    def __refresh_auth(self, user_auth_info, sign_rejection=True, ajax_id=None):
+    async def __refresh_auth(
+        self, user_auth_info, sign_rejection=True, ajax_id=None
+    ):
         if user_auth_info.is_authorized:
-            self.__session = self.__storage.login(
-                self.__session.sid,
-                user_auth_info.name,
-                user_auth_info.groups,
-                ajax_id,
+            self.__session = await _resolved(
+                self.__storage.login(
+                    self.__session.sid,
+                    user_auth_info.name,
+                    user_auth_info.groups,
+                    ajax_id,
+                )
             )
             self.sid_to_cookies()
         elif sign_rejection:
-            self.__session = self.__storage.rejected_user(
-                self.__session.sid,
-                user_auth_info.name,
+            self.__session = await _resolved(
+                self.__storage.rejected_user(
+                    self.__session.sid,
+                    user_auth_info.name,
+                )
             )
             self.sid_to_cookies()
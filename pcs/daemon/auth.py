@@ -1,13 +1,19 @@
 from collections import namedtuple
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from ctypes import byref, cast, CDLL, CFUNCTYPE, POINTER, sizeof, Structure
 from ctypes import c_char, c_char_p, c_int, c_uint, c_void_p
 from ctypes.util import find_library
+from datetime import timedelta
 import grp
+import os
 import pwd
+import signal
+from time import monotonic
 
-from tornado.gen import coroutine
+from tornado.gen import coroutine, TimeoutError as GenTimeoutError, with_timeout
 
+from pcs import settings
 from pcs.daemon import log
 
 # pylint: disable=invalid-name, too-few-public-methods
@@ -86,16 +92,17 @@ def authenticate_by_pam(username, password):
     return returncode == PAM_SUCCESS
 
 def get_user_groups_sync(username):
-    return tuple([
-        group.gr_name
-        for group in grp.getgrall()
-        if username in group.gr_mem
-    ] + [
-        # `group.gr_mem` does not contain the `username` when `group` is
-        # primary for the `username` (the same is in /etc/group). So it is
-        # necessary to add the primary group.
-        grp.getgrgid(pwd.getpwnam(username).pw_gid).gr_name
-    ])
+    # getgrouplist asks for groups of the user only. Listing all groups is very
+    # slow when groups are provided by LDAP, SSSD and such. The primary group
+    # of the user is included.
+    groups = []
+    for gid in os.getgrouplist(username, pwd.getpwnam(username).pw_gid):
+        try:
+            groups.append(grp.getgrgid(gid).gr_name)
+        except KeyError:
+            # a group without a name cannot be the ha admin group anyway
+            pass
+    return tuple(groups)
 
 UserAuthInfo = namedtuple("UserAuthInfo", "name groups is_authorized")
 
@@ -150,7 +157,9 @@ def check_user_groups_sync(username, logger) -> UserAuthInfo:
     except KeyError as e:
         logger.unable_determine_groups(username, e)
         return UserAuthInfo(username, [], is_authorized=False)
+    return check_groups(username, groups, logger)
 
+def check_groups(username, groups, logger) -> UserAuthInfo:
     if HA_ADM_GROUP not in groups:
         logger.not_ha_adm_member(username, HA_ADM_GROUP)
         return UserAuthInfo(username, groups, is_authorized=False)
@@ -169,6 +178,168 @@ def authorize_user_sync(username, password) -> UserAuthInfo:
 
     return check_user_groups_sync(username, LoginLogger())
 
+class AuthWorkerPoolError(Exception):
+    pass
+
+def _run_with_alarm(timeout, sync_fn, *args):
+    """
+    Run sync_fn in a worker process, the worker is killed when it gets stuck
+
+    int timeout -- seconds after which the worker process is killed
+    callable sync_fn -- a picklable function
+    """
+    # SIGALRM terminates the process by default. A stuck worker would
+    # otherwise keep the slot of the executor forever.
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.alarm(timeout)
+    try:
+        return sync_fn(*args)
+    finally:
+        signal.alarm(0)
+
+class AuthWorkerPool:
+    """
+    AuthWorkerPool runs authentication functions in long-lived worker
+    processes, so that authenticating a user does not pay for starting a new
+    process.
+
+    Requests wait for a free worker in a queue of a limited length. Requests
+    which do not fit into the queue or are not finished in time are rejected.
+    Workers stuck on a request kill themselves and are replaced by new ones.
+    """
+    def __init__(self, size, max_queued, timeout):
+        """
+        int size -- number of worker processes
+        int max_queued -- number of requests allowed to wait for a free worker
+        int timeout -- seconds after which a request is rejected
+        """
+        self.__size = size
+        self.__max_queued = max_queued
+        self.__timeout_seconds = timeout
+        self.__timeout = timedelta(seconds=timeout)
+        self.__executor = None
+        self.__pending_count = 0
+
+    @property
+    def pending_count(self):
+        return self.__pending_count
+
+    @coroutine
+    def run(self, sync_fn, *args):
+        """
+        Run sync_fn in a worker process and return its result
+
+        callable sync_fn -- a picklable function
+        """
+        if self.__pending_count >= self.__size + self.__max_queued:
+            raise AuthWorkerPoolError("Too many pending requests")
+        executor = self.__get_executor()
+        self.__pending_count += 1
+        try:
+            future = executor.submit(
+                _run_with_alarm, self.__timeout_seconds, sync_fn, *args
+            )
+            result = yield with_timeout(
+                self.__timeout,
+                future,
+                # a stuck request fails once its worker is terminated
+                quiet_exceptions=BrokenProcessPool,
+            )
+        except GenTimeoutError:
+            if not future.cancel():
+                # The request is being processed, the worker got stuck. It
+                # kills itself by its alarm, the executor is abandoned.
+                self.__terminate(executor)
+            raise AuthWorkerPoolError("Request timed out")
+        except BrokenProcessPool:
+            self.__terminate(executor)
+            raise AuthWorkerPoolError("Worker exited unexpectedly")
+        finally:
+            self.__pending_count -= 1
+        return result
+
+    def terminate(self):
+        if self.__executor is not None:
+            self.__terminate(self.__executor)
+
+    def __get_executor(self):
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.__size)
+        return self.__executor
+
+    def __terminate(self, executor):
+        # New requests get a new executor. Idle workers of the abandoned
+        # executor exit on shutdown, busy workers exit once their request is
+        # done or their alarm goes off.
+        if executor is self.__executor:
+            self.__executor = None
+        executor.shutdown(wait=False)
+
+class UserGroupsCache:
+    """
+    UserGroupsCache keeps groups of users for a limited time, so that groups
+    of a user are not determined on each request of the user
+    """
+    def __init__(self, ttl, max_size=1000):
+        """
+        int ttl -- seconds for which groups of a user are kept
+        int max_size -- maximal number of users kept
+        """
+        self.__ttl = ttl
+        self.__max_size = max_size
+        self.__groups = {}
+
+    def get(self, username):
+        """
+        Return cached groups of the user, None if they are not cached
+        """
+        item = self.__groups.get(username)
+        if item is None:
+            return None
+        expires_at, groups = item
+        if expires_at <= monotonic():
+            del self.__groups[username]
+            return None
+        return groups
+
+    def set(self, username, groups):
+        self.__groups.pop(username, None)
+        if len(self.__groups) >= self.__max_size:
+            self.__remove_expired()
+        if len(self.__groups) >= self.__max_size:
+            # remove the oldest item
+            del self.__groups[next(iter(self.__groups))]
+        self.__groups[username] = (monotonic() + self.__ttl, groups)
+
+    def invalidate(self, username=None):
+        """
+        Forget groups of the user, of all users if no user is specified
+        """
+        if username is None:
+            self.__groups.clear()
+        else:
+            self.__groups.pop(username, None)
+
+    def __remove_expired(self):
+        now = monotonic()
+        for username, (expires_at, dummy_groups) in list(self.__groups.items()):
+            if expires_at <= now:
+                del self.__groups[username]
+
+worker_pool = AuthWorkerPool(
+    settings.pcsd_auth_workers,
+    settings.pcsd_auth_max_queued_requests,
+    settings.pcsd_auth_timeout_seconds,
+)
+user_groups_cache = UserGroupsCache(settings.pcsd_user_groups_cache_ttl_seconds)
+
+def cache_user_groups(user_auth_info):
+    if user_auth_info.groups:
+        user_groups_cache.set(user_auth_info.name, user_auth_info.groups)
+    else:
+        # The user does not exist or has not been authenticated.
+        user_groups_cache.invalidate(user_auth_info.name)
+
 # TODO async/await version - how to do it?
 # When async/await is used then the problem is:
 # "TypeError: object Future can't be used in 'await' expression" is raised even
@@ -176,17 +347,32 @@ def authorize_user_sync(username, password) -> UserAuthInfo:
 # http://www.tornadoweb.org/en/stable/guide/coroutines.html#python-3-5-async-and-await
 @coroutine
 def run_in_process(sync_fn, *args):
-    pool = ProcessPoolExecutor(max_workers=1)
-    result = yield pool.submit(sync_fn, *args)
-    pool.shutdown()
+    result = yield worker_pool.run(sync_fn, *args)
     return result
 
 @coroutine
 def authorize_user(username, password) -> UserAuthInfo:
-    user = yield run_in_process(authorize_user_sync, username, password)
+    try:
+        user = yield run_in_process(authorize_user_sync, username, password)
+    except AuthWorkerPoolError as e:
+        log.pcsd.error("Unable to authenticate user '%s': %s", username, e)
+        return UserAuthInfo(username, [], is_authorized=False)
+    cache_user_groups(user)
     return user
 
 @coroutine
 def check_user_groups(username) -> UserAuthInfo:
-    user = yield run_in_process(check_user_groups_sync, username, PlainLogger())
+    groups = user_groups_cache.get(username)
+    if groups is not None:
+        return check_groups(username, groups, PlainLogger())
+    try:
+        user = yield run_in_process(
+            check_user_groups_sync, username, PlainLogger()
+        )
+    except AuthWorkerPoolError as e:
+        log.pcsd.error(
+            "Unable to determine groups of user '%s': %s", username, e
+        )
+        return UserAuthInfo(username, [], is_authorized=False)
+    cache_user_groups(user)
     return user
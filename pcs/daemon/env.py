@@ -32,6 +32,10 @@ PCSD_CMDLINE_ENTRY = "PCSD_CMDLINE_ENTRY"
 PCSD_STATIC_FILES_DIR = "PCSD_STATIC_FILES_DIR"
 HTTPS_PROXY = "HTTPS_PROXY"
 NO_PROXY = "NO_PROXY"
+PCSD_RUBY_WORKERS = "PCSD_RUBY_WORKERS"
+PCSD_RUBY_WORKER_MAX_REQUESTS = "PCSD_RUBY_WORKER_MAX_REQUESTS"
+PCSD_COMMAND_SERVER = "PCSD_COMMAND_SERVER"
+PCSD_WORKERS = "PCSD_WORKERS"
 
 Env = namedtuple("Env", [
     PCSD_PORT,
@@ -48,6 +52,10 @@ Env = namedtuple("Env", [
     HTTPS_PROXY,
     NO_PROXY,
     PCSD_DEV,
+    PCSD_RUBY_WORKERS,
+    PCSD_RUBY_WORKER_MAX_REQUESTS,
+    PCSD_COMMAND_SERVER,
+    PCSD_WORKERS,
     "has_errors",
 ])
 
@@ -68,6 +76,10 @@ def prepare_env(environ, logger=None):
         loader.https_proxy(),
         loader.no_proxy(),
         loader.pcsd_dev(),
+        loader.ruby_workers(),
+        loader.ruby_worker_max_requests(),
+        loader.command_server(),
+        loader.workers(),
         loader.has_errors(),
     )
     if logger:
@@ -170,6 +182,36 @@ class EnvLoader:
             )
             return session_lifetime
 
+    def ruby_workers(self):
+        return self.__non_negative_int(
+            PCSD_RUBY_WORKERS,
+            settings.pcsd_ruby_workers
+        )
+
+    def ruby_worker_max_requests(self):
+        max_requests = self.__non_negative_int(
+            PCSD_RUBY_WORKER_MAX_REQUESTS,
+            settings.pcsd_ruby_worker_max_requests
+        )
+        if max_requests == 0:
+            self.errors.append(
+                f"Invalid {PCSD_RUBY_WORKER_MAX_REQUESTS} value '0'"
+                " (it must be a positive integer)"
+            )
+        return max_requests
+
+    def command_server(self):
+        return self.__has_true_in_environ(PCSD_COMMAND_SERVER)
+
+    def workers(self):
+        workers = self.__non_negative_int(PCSD_WORKERS, settings.pcsd_workers)
+        if workers == 0:
+            self.errors.append(
+                f"Invalid {PCSD_WORKERS} value '0'"
+                " (it must be a positive integer)"
+            )
+        return workers
+
     def pcsd_debug(self):
         return self.__has_true_in_environ(PCSD_DEBUG)
 
@@ -217,5 +259,19 @@ class EnvLoader:
             self.errors.append(f"{description} '{in_pcsd_path}' does not exist")
         return in_pcsd_path
 
+    def __non_negative_int(self, environ_key, default):
+        value = self.environ.get(environ_key, default)
+        try:
+            int_value = int(value)
+            if int_value >= 0:
+                return int_value
+        except ValueError:
+            pass
+        self.errors.append(
+            f"Invalid {environ_key} value '{value}'"
+            " (it must be a non-negative integer)"
+        )
+        return value
+
     def __has_true_in_environ(self, environ_key):
         return self.environ.get(environ_key, "").lower() == "true"
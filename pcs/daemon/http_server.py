@@ -1,7 +1,7 @@
 from tornado.httpserver import HTTPServer
 from tornado.netutil import bind_sockets
 
-from pcs.daemon.ssl import PcsdSSL
+from pcs.daemon.ssl import PcsdSSL, SSLCertKeyException
 from pcs.daemon import log
 
 class HttpsServerManageException(Exception):
@@ -19,8 +19,8 @@ class HttpsServerManage:
     # For this purpose an application, which handles http requests, gets
     # a reference to the HttpsServerManage instance. When new certificates
     # arrive via a request the application asks the HttpsServerManage instance
-    # for necessary steps (it stops listening of the current HTTPServer and
-    # starts a new one with updated certificates).
+    # to load them. The HTTPServer keeps listening, new connections use the new
+    # certificates and the current connections are not interrupted.
 
     def __init__(self, make_app, port, bind_addresses, ssl: PcsdSSL):
         self.__make_app = make_app
@@ -28,6 +28,7 @@ class HttpsServerManage:
         self.__bind_addresses = bind_addresses
 
         self.__server = None
+        self.__sockets = None
         self.__ssl = ssl
         self.__server_is_running = False
 
@@ -49,21 +50,31 @@ class HttpsServerManage:
             ssl_options=self.__ssl.create_context()
         )
 
+        if self.__sockets is None:
+            self.bind_sockets()
+        self.__server.add_sockets(self.__sockets)
         # It is necessary to bind sockets for every new HTTPServer since
         # HTTPServer.stop calls sock.close() inside.
-        sockets = []
+        self.__sockets = None
+
+        log.pcsd.info("Server is listening")
+        self.__server_is_running = True
+        return self
+
+    def bind_sockets(self):
+        """
+        Bind listening sockets used by the server started next
+
+        Pcsd workers forked after binding the sockets share them.
+        """
+        self.__sockets = []
         for address in self.__bind_addresses:
             log.pcsd.info(
                 "Binding socket for address '%s' and port '%s'",
                 address if address is not None else "*",
                 self.__port
             )
-            sockets.extend(bind_sockets(self.__port, address))
-
-        self.__server.add_sockets(sockets)
-
-        log.pcsd.info("Server is listening")
-        self.__server_is_running = True
+            self.__sockets.extend(bind_sockets(self.__port, address))
         return self
 
     def reload_certs(self):
@@ -71,6 +82,22 @@ class HttpsServerManage:
             raise HttpsServerManageException(
                 "Could not reload certificates, server is not running"
             )
-        log.pcsd.info("Stopping server to reload ssl certificates...")
-        self.stop()
-        self.start()
+        log.pcsd.info("Reloading ssl certificates...")
+        try:
+            self.__ssl.guarantee_valid_certs()
+            self.__ssl.reload_context()
+        except SSLCertKeyException as e:
+            for error in e.args:
+                log.pcsd.error(error)
+            log.pcsd.error(
+                "Invalid SSL certificate and/or key, using the previous ones"
+            )
+            return
+        log.pcsd.info("Ssl certificates reloaded")
+
+    def reload_certs_if_changed(self):
+        """
+        Reload certificates if they have been changed, e.g. by another worker
+        """
+        if self.server_is_running and self.__ssl.have_certs_changed():
+            self.reload_certs()
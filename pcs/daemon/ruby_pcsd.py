@@ -1,11 +1,17 @@
 import json
 import logging
 import os.path
-from base64 import b64decode
 from collections import namedtuple
+from datetime import timedelta
 from time import time as now
 
-from tornado.gen import Task, multi, convert_yielded
+from tornado.gen import (
+    TimeoutError as GenTimeoutError,
+    convert_yielded,
+    with_timeout,
+)
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError, UnsatisfiableReadError
 from tornado.web import HTTPError
 from tornado.httputil import split_host_and_port, HTTPServerRequest
 from tornado.process import Subprocess
@@ -16,8 +22,13 @@ from pcs.daemon import log
 SINATRA_GUI = "sinatra_gui"
 SINATRA_REMOTE = "sinatra_remote"
 SYNC_CONFIGS = "sync_configs"
+PING = "ping"
 
 DEFAULT_SYNC_CONFIG_DELAY = 5
+DEFAULT_WORKER_MAX_REQUESTS = 200
+WORKER_HEALTH_CHECK_TIMEOUT = timedelta(seconds=10)
+# A frame header is a decimal length of the payload terminated by a newline.
+FRAME_HEADER_MAX_BYTES = 32
 RUBY_LOG_LEVEL_MAP = {
     "UNKNOWN": logging.NOTSET,
     "FATAL": logging.CRITICAL,
@@ -28,13 +39,13 @@ RUBY_LOG_LEVEL_MAP = {
 }
 
 class SinatraResult(namedtuple("SinatraResult", "headers, status, body")):
+    """
+    SinatraResult is a response of the Sinatra. Its body is a RubyResponse
+    providing chunks of the body as they are read from ruby pcsd.
+    """
     @classmethod
-    def from_response(cls, response):
-        return cls(
-            response["headers"],
-            response["status"],
-            b64decode(response["body"])
-        )
+    def from_response(cls, response, body):
+        return cls(response["headers"], response["status"], body)
 
 def log_group_id_generator():
     group_id = 0
@@ -58,16 +69,302 @@ def process_response_logs(rb_log_list):
             group_id=group_id
         )
 
-def log_communication(request_json, stdout, stderr):
+def log_communication(request_json, response_json, stderr):
     log.pcsd.debug("Request for ruby pcsd wrapper: '%s'", request_json)
-    log.pcsd.debug("Response stdout from ruby pcsd wrapper: '%s'", stdout)
+    log.pcsd.debug("Response from ruby pcsd wrapper: '%s'", response_json)
     log.pcsd.debug("Response stderr from ruby pcsd wrapper: '%s'", stderr)
 
+def format_frame(payload):
+    return str.encode(f"{len(payload)}\n") + payload
+
+class RubyProcessError(Exception):
+    pass
+
+class RubyProcess:
+    """
+    RubyProcess is a ruby pcsd process serving framed requests until its stdin
+    is closed
+
+    A frame is a decimal length of a payload terminated by a newline followed
+    by the payload itself. A request consists of a frame with the request in
+    json and a frame with a request body. A response consists of a frame with
+    the response in json and frames with chunks of a response body terminated
+    by an empty frame.
+    """
+    def __init__(self, cmdline, env):
+        self.__process = Subprocess(
+            cmdline,
+            stdin=Subprocess.STREAM,
+            stdout=Subprocess.STREAM,
+            stderr=Subprocess.STREAM,
+            env=env
+        )
+        self.__exit_future = self.__process.wait_for_exit(raise_error=False)
+        self.__stderr = []
+        # Stderr must be drained continuously otherwise the process blocks when
+        # the pipe is full.
+        IOLoop.current().spawn_callback(self.__read_stderr)
+
+    @property
+    def pid(self):
+        return self.__process.pid
+
+    @property
+    def is_alive(self):
+        return not self.__exit_future.done()
+
+    async def send(self, request_json, body=b""):
+        """
+        Send a request to the process
+
+        string request_json -- a request for ruby pcsd in json
+        bytes body -- a body of an http request passed to the Sinatra
+        """
+        try:
+            await self.__process.stdin.write(
+                format_frame(str.encode(request_json)) + format_frame(body)
+            )
+        except StreamClosedError as e:
+            raise self.__error(e)
+
+    async def read_frame(self):
+        try:
+            header = await self.__process.stdout.read_until(
+                b"\n",
+                max_bytes=FRAME_HEADER_MAX_BYTES
+            )
+            return await self.__process.stdout.read_bytes(int(header))
+        except (StreamClosedError, UnsatisfiableReadError, ValueError) as e:
+            raise self.__error(e)
+
+    async def communicate(self, request_json):
+        """
+        Send a request to the process and return its response without a body
+
+        string request_json -- a request for ruby pcsd in json
+        """
+        await self.send(request_json)
+        response_json = await self.read_frame()
+        while await self.read_frame():
+            pass
+        return response_json, self.take_stderr()
+
+    def take_stderr(self):
+        stderr = b"".join(self.__stderr)
+        self.__stderr = []
+        return stderr
+
+    def close_stdin(self):
+        self.__process.stdin.close()
+
+    def close(self):
+        for stream in (self.__process.stdin, self.__process.stdout):
+            stream.close()
+
+    def terminate(self):
+        if self.is_alive:
+            self.__process.proc.terminate()
+        self.close()
+        self.__process.stderr.close()
+
+    def __error(self, reason):
+        return RubyProcessError(
+            f"Communication with ruby pcsd process {self.pid} failed: "
+            f"'{reason}'"
+        )
+
+    async def __read_stderr(self):
+        try:
+            while True:
+                self.__stderr.append(
+                    await self.__process.stderr.read_bytes(
+                        65536,
+                        partial=True
+                    )
+                )
+        except StreamClosedError:
+            pass
+
+class RubyWorker(RubyProcess):
+    """
+    RubyWorker is a long-lived ruby pcsd process serving requests one by one
+    """
+    def __init__(self, cmdline, env):
+        super().__init__(cmdline, env)
+        self.__served_requests = 0
+
+    @property
+    def served_requests(self):
+        return self.__served_requests
+
+    async def send(self, request_json, body=b""):
+        self.__served_requests += 1
+        await super().send(request_json, body)
+
+    async def ping(self):
+        response_json, dummy_stderr = await with_timeout(
+            WORKER_HEALTH_CHECK_TIMEOUT,
+            convert_yielded(self.communicate(json.dumps({"type": PING}))),
+        )
+        try:
+            return json.loads(response_json).get("pong", False)
+        except json.JSONDecodeError:
+            return False
+
+class RubyResponse:
+    """
+    RubyResponse is a response of ruby pcsd read from a ruby process frame by
+    frame. Iterating over it provides chunks of the response body. It must be
+    closed once it has been read or abandoned.
+    """
+    def __init__(self, process, release):
+        """
+        RubyProcess process -- the process sending the response
+        callable release -- takes the process and a flag whether the whole
+            response has been read from it
+        """
+        self.__process = process
+        self.__release = release
+        self.__complete = False
+        self.__closed = False
+
+    async def read_head(self):
+        """
+        Return the response in json
+        """
+        return await self.__process.read_frame()
+
+    def take_stderr(self):
+        return self.__process.take_stderr()
+
+    async def __aiter__(self):
+        while not self.__complete:
+            chunk = await self.__process.read_frame()
+            if chunk:
+                yield chunk
+            else:
+                self.__complete = True
+
+    def close(self):
+        if not self.__closed:
+            self.__closed = True
+            self.__release(self.__process, self.__complete)
+
+def release_oneshot_process(process, complete):
+    if complete:
+        # the process exits by itself once it has served its only request
+        process.close()
+    else:
+        process.terminate()
+
+class RubyWorkerPool:
+    """
+    RubyWorkerPool keeps long-lived ruby pcsd workers so that requests do not
+    pay for the ruby interpreter start and pcsd loading.
+
+    When all workers are busy the pool does not provide any worker and the
+    caller is expected to fall back to a one-shot ruby process. Waiting for
+    a worker could deadlock pcsd: ruby code sends requests to the local pcsd
+    as well.
+    """
+    def __init__(self, create_worker, size, max_requests):
+        """
+        callable create_worker -- returns a new RubyWorker
+        int size -- maximal number of workers kept by the pool
+        int max_requests -- number of requests after which a worker is recycled
+        """
+        self.__create_worker = create_worker
+        self.__size = size
+        self.__max_requests = max_requests
+        self.__idle_workers = []
+        self.__busy_workers = set()
+
+    @property
+    def worker_count(self):
+        return len(self.__idle_workers) + len(self.__busy_workers)
+
+    def acquire(self):
+        """
+        Return an available worker or None if there is no worker available.
+        The worker must be given back by the release method.
+        """
+        while self.__idle_workers:
+            worker = self.__idle_workers.pop()
+            if worker.is_alive:
+                self.__busy_workers.add(worker)
+                return worker
+            log.pcsd.warning(
+                "Ruby pcsd worker %s exited unexpectedly", worker.pid
+            )
+            worker.terminate()
+        if self.worker_count >= self.__size:
+            return None
+        try:
+            worker = self.__create_worker()
+        except OSError as e:
+            log.pcsd.error("Unable to start ruby pcsd worker: %s", e)
+            return None
+        self.__busy_workers.add(worker)
+        return worker
+
+    def release(self, worker, reusable=True):
+        """
+        Give back a worker provided by the acquire method
+
+        RubyWorker worker -- the worker
+        bool reusable -- False if the worker may be in the middle of a response
+        """
+        if worker not in self.__busy_workers:
+            # the pool has been terminated meanwhile
+            reusable = False
+        self.__busy_workers.discard(worker)
+        if (
+            not reusable
+            or
+            not worker.is_alive
+            or
+            worker.served_requests >= self.__max_requests
+        ):
+            worker.terminate()
+            return
+        self.__idle_workers.append(worker)
+
+    async def check_health(self):
+        """
+        Ping idle workers and get rid of the ones which do not respond
+
+        Workers are pinged one by one so that the others stay available for
+        requests meanwhile. Workers acquired for a request during the check
+        are not pinged.
+        """
+        for worker in list(self.__idle_workers):
+            if worker not in self.__idle_workers:
+                continue
+            self.__idle_workers.remove(worker)
+            self.__busy_workers.add(worker)
+            try:
+                healthy = worker.is_alive and await worker.ping()
+            except (RubyProcessError, GenTimeoutError):
+                healthy = False
+            if not healthy:
+                log.pcsd.warning(
+                    "Ruby pcsd worker %s is not healthy, terminating it",
+                    worker.pid
+                )
+            self.release(worker, reusable=healthy)
+
+    def terminate(self):
+        for worker in self.__idle_workers + list(self.__busy_workers):
+            worker.terminate()
+        self.__idle_workers = []
+        self.__busy_workers = set()
+
 class Wrapper:
     # pylint: disable=too-many-instance-attributes
     def __init__(
         self, pcsd_cmdline_entry, gem_home=None, debug=False,
-        ruby_executable="ruby", https_proxy=None, no_proxy=None
+        ruby_executable="ruby", https_proxy=None, no_proxy=None,
+        worker_pool_size=0, worker_max_requests=DEFAULT_WORKER_MAX_REQUESTS,
     ):
         self.__gem_home = gem_home
         self.__pcsd_cmdline_entry = pcsd_cmdline_entry
@@ -76,6 +373,13 @@ class Wrapper:
         self.__debug = debug
         self.__https_proxy = https_proxy
         self.__no_proxy = no_proxy
+        self.__worker_pool = None
+        if worker_pool_size > 0:
+            self.__worker_pool = RubyWorkerPool(
+                lambda: RubyWorker(self.__get_cmdline(), self.__get_env()),
+                worker_pool_size,
+                worker_max_requests,
+            )
 
     @staticmethod
     def get_sinatra_request(request: HTTPServerRequest):
@@ -99,58 +403,87 @@ class Wrapper:
             "HTTPS": "on" if request.protocol == "https" else "off",
             "HTTP_VERSION": request.version,
             "REQUEST_PATH": request.path,
-            "rack.input": request.body.decode("utf8"),
         }}
 
-    async def send_to_ruby(self, request_json):
-        env = {
-            "PCSD_DEBUG": "true" if self.__debug else "false"
-        }
-        if self.__gem_home is not None:
-            env["GEM_HOME"] = self.__gem_home
+    async def send_to_ruby(self, request_json, body=b""):
+        """
+        Send a request to a ruby pcsd worker or to a new ruby pcsd process if
+        there is no worker available, return RubyResponse
 
-        if self.__no_proxy is not None:
-            env["NO_PROXY"] = self.__no_proxy
-        if self.__https_proxy is not None:
-            env["HTTPS_PROXY"] = self.__https_proxy
+        string request_json -- a request for ruby pcsd in json
+        bytes body -- a body of an http request passed to the Sinatra
+        """
+        worker = None
+        if self.__worker_pool is not None:
+            worker = self.__worker_pool.acquire()
+        if worker is not None:
+            try:
+                await worker.send(request_json, body)
+                return RubyResponse(worker, self.__worker_pool.release)
+            except RubyProcessError as e:
+                # The worker may have exited after it has been acquired.
+                self.__worker_pool.release(worker, reusable=False)
+                log.pcsd.warning(
+                    "%s, sending the request to a new ruby pcsd process", e
+                )
+        process = RubyProcess(self.__get_cmdline(), self.__get_env())
+        try:
+            await process.send(request_json, body)
+        except RubyProcessError as e:
+            release_oneshot_process(process, False)
+            log.pcsd.error(e)
+            raise HTTPError(500)
+        process.close_stdin()
+        return RubyResponse(process, release_oneshot_process)
 
-        pcsd_ruby = Subprocess(
-            [
-                self.__ruby_executable, "-I",
-                self.__pcsd_dir,
-                self.__pcsd_cmdline_entry
-            ],
-            stdin=Subprocess.STREAM,
-            stdout=Subprocess.STREAM,
-            stderr=Subprocess.STREAM,
-            env=env
-        )
-        await Task(pcsd_ruby.stdin.write, str.encode(request_json))
-        pcsd_ruby.stdin.close()
-        return await multi([
-            Task(pcsd_ruby.stdout.read_until_close),
-            Task(pcsd_ruby.stderr.read_until_close),
-            pcsd_ruby.wait_for_exit(raise_error=False),
-        ])
+    async def request_ruby(self, request_type, request=None, body=b""):
+        """
+        Send a request to ruby pcsd, return the response and RubyResponse
+        providing the response body. The RubyResponse must be closed.
 
-    async def run_ruby(self, request_type, request=None):
+        string request_type -- type of the request for ruby pcsd
+        dict request -- the request for ruby pcsd
+        bytes body -- a body of an http request passed to the Sinatra
+        """
         request = request or {}
         request.update({"type": request_type})
         request_json = json.dumps(request)
-        stdout, stderr, dummy_status = await self.send_to_ruby(request_json)
+        ruby_response = await self.send_to_ruby(request_json, body)
         try:
-            response = json.loads(stdout)
+            response_json = await ruby_response.read_head()
+            response = json.loads(response_json)
+        except RubyProcessError as e:
+            ruby_response.close()
+            log.pcsd.error(e)
+            raise HTTPError(500)
         except json.JSONDecodeError as e:
+            ruby_response.close()
             self.__log_bad_response(
                 f"Cannot decode json from ruby pcsd wrapper: '{e}'",
-                request_json, stdout, stderr
+                request_json, response_json, ruby_response.take_stderr()
+            )
+            raise HTTPError(500)
+        if self.__debug:
+            log_communication(
+                request_json, response_json, ruby_response.take_stderr()
             )
+        process_response_logs(response.get("logs"))
+        return response, ruby_response
+
+    async def run_ruby(self, request_type, request=None):
+        response, ruby_response = await self.request_ruby(
+            request_type,
+            request
+        )
+        try:
+            async for dummy_chunk in ruby_response:
+                pass
+        except RubyProcessError as e:
+            log.pcsd.error(e)
             raise HTTPError(500)
-        else:
-            if self.__debug:
-                log_communication(request_json, stdout, stderr)
-            process_response_logs(response["logs"])
-            return response
+        finally:
+            ruby_response.close()
+        return response
 
     async def request_gui(
         self, request: HTTPServerRequest, user, groups, is_authenticated
@@ -166,18 +499,18 @@ class Wrapper:
                 "is_authenticated": is_authenticated,
             }
         })
-        response = await convert_yielded(self.run_ruby(
+        return await self.__request_sinatra(
             SINATRA_GUI,
-            sinatra_request
-        ))
-        return SinatraResult.from_response(response)
+            sinatra_request,
+            request.body
+        )
 
     async def request_remote(self, request: HTTPServerRequest) -> SinatraResult:
-        response = await convert_yielded(self.run_ruby(
+        return await self.__request_sinatra(
             SINATRA_REMOTE,
-            self.get_sinatra_request(request)
-        ))
-        return SinatraResult.from_response(response)
+            self.get_sinatra_request(request),
+            request.body
+        )
 
     async def sync_configs(self):
         try:
@@ -187,7 +520,50 @@ class Wrapper:
             log.pcsd.error("Config synchronization failed")
             return int(now()) + DEFAULT_SYNC_CONFIG_DELAY
 
-    def __log_bad_response(self, error_message, request_json, stdout, stderr):
+    async def check_workers_health(self):
+        if self.__worker_pool is not None:
+            await self.__worker_pool.check_health()
+
+    def terminate_workers(self):
+        if self.__worker_pool is not None:
+            self.__worker_pool.terminate()
+
+    async def __request_sinatra(self, request_type, sinatra_request, body):
+        response, ruby_response = await convert_yielded(self.request_ruby(
+            request_type,
+            sinatra_request,
+            body
+        ))
+        try:
+            return SinatraResult.from_response(response, ruby_response)
+        except KeyError as e:
+            ruby_response.close()
+            log.pcsd.error("Unexpected response from ruby pcsd: missing %s", e)
+            raise HTTPError(500)
+
+    def __get_cmdline(self):
+        return [
+            self.__ruby_executable, "-I",
+            self.__pcsd_dir,
+            self.__pcsd_cmdline_entry
+        ]
+
+    def __get_env(self):
+        env = {
+            "PCSD_DEBUG": "true" if self.__debug else "false"
+        }
+        if self.__gem_home is not None:
+            env["GEM_HOME"] = self.__gem_home
+
+        if self.__no_proxy is not None:
+            env["NO_PROXY"] = self.__no_proxy
+        if self.__https_proxy is not None:
+            env["HTTPS_PROXY"] = self.__https_proxy
+        return env
+
+    def __log_bad_response(
+        self, error_message, request_json, response_json, stderr
+    ):
         log.pcsd.error(error_message)
         if self.__debug:
-            log_communication(request_json, stdout, stderr)
+            log_communication(request_json, response_json, stderr)
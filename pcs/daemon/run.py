@@ -1,29 +1,43 @@
 import os
+import random
 import signal
 import socket
+import time
 from pathlib import Path
 
-from tornado.ioloop import IOLoop
+from tornado.ioloop import IOLoop, PeriodicCallback
 from tornado.locks import Lock
 from tornado.web import Application
 
-from pcs import settings
+from pcs import command_server, settings
 from pcs.common.system import is_systemd
 from pcs.daemon import (
     app_gui,
     app_remote,
+    auth,
     log,
     ruby_pcsd,
     session,
     ssl,
     systemd,
+    workers,
 )
 from pcs.daemon.env import prepare_env
 from pcs.daemon.http_server import HttpsServerManage
 
+RUBY_WORKERS_HEALTH_CHECK_INTERVAL_MS = 60 * 1000
+SESSIONS_SWEEP_INTERVAL_MS = 60 * 1000
+CERTS_CHECK_INTERVAL_MS = 5 * 1000
+PARENT_CHECK_INTERVAL_MS = 5 * 1000
+WORKER_RESTART_DELAY_SECONDS = 1
+
 class SignalInfo:
     #pylint: disable=too-few-public-methods
     server_manage = None
+    ruby_pcsd_wrapper = None
+    command_server_pid = None
+    parent_pid = None
+    worker_pids = {}
     ioloop_started = False
 
 def handle_signal(incomming_signal, frame):
@@ -31,10 +45,31 @@ def handle_signal(incomming_signal, frame):
     log.pcsd.warning('Caught signal: %s, shutting down', incomming_signal)
     if SignalInfo.server_manage:
         SignalInfo.server_manage.stop()
+    if SignalInfo.ruby_pcsd_wrapper:
+        SignalInfo.ruby_pcsd_wrapper.terminate_workers()
+    auth.worker_pool.terminate()
+    if SignalInfo.command_server_pid:
+        try:
+            os.kill(SignalInfo.command_server_pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    stop_workers()
     if SignalInfo.ioloop_started:
         IOLoop.current().stop()
     raise SystemExit(0)
 
+def handle_reload_signal(incomming_signal, frame):
+    #pylint: disable=unused-argument
+    log.pcsd.info(
+        "Caught signal: %s, dropping cached groups of users", incomming_signal
+    )
+    auth.user_groups_cache.invalidate()
+    for pid in SignalInfo.worker_pids:
+        try:
+            os.kill(pid, incomming_signal)
+        except ProcessLookupError:
+            pass
+
 def sign_ioloop_started():
     SignalInfo.ioloop_started = True
 
@@ -79,9 +114,61 @@ def configure_app(
         return Application(routes, debug=debug)
     return make_app
 
+def fork_workers(count):
+    """
+    Fork pcsd workers, return the id of the worker in the workers
+
+    The main process does not return. It restarts workers which exit
+    unexpectedly until it is stopped by a signal.
+
+    int count -- number of workers
+    """
+    log.pcsd.info("Starting %s pcsd workers", count)
+    SignalInfo.parent_pid = os.getpid()
+    for worker_id in range(count):
+        if not fork_worker(worker_id):
+            return worker_id
+    while True:
+        pid, dummy_status = os.wait()
+        worker_id = SignalInfo.worker_pids.pop(pid, None)
+        if worker_id is None:
+            continue
+        log.pcsd.error(
+            "Pcsd worker %s exited unexpectedly, restarting it", worker_id
+        )
+        time.sleep(WORKER_RESTART_DELAY_SECONDS)
+        if not fork_worker(worker_id):
+            return worker_id
+
+def fork_worker(worker_id):
+    pid = os.fork()
+    if pid:
+        SignalInfo.worker_pids[pid] = worker_id
+        return pid
+    SignalInfo.worker_pids = {}
+    # The command server is stopped by the main process.
+    SignalInfo.command_server_pid = None
+    # Workers must not generate the same session ids.
+    random.seed()
+    return pid
+
+def stop_workers():
+    for pid in SignalInfo.worker_pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in SignalInfo.worker_pids:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    SignalInfo.worker_pids = {}
+
 def main():
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGHUP, handle_reload_signal)
 
     Path(settings.pcsd_log_location).touch(mode=0o600, exist_ok=True)
     log.setup(settings.pcsd_log_location)
@@ -93,7 +180,24 @@ def main():
     if env.PCSD_DEBUG:
         log.enable_debug()
 
-    sync_config_lock = Lock()
+    if env.PCSD_COMMAND_SERVER:
+        # Start the server before pcsd opens its sockets, so that the server
+        # does not inherit them.
+        SignalInfo.command_server_pid = command_server.start_server_process(
+            settings.pcs_command_server_socket
+        )
+
+    if env.PCSD_WORKERS > 1:
+        # Workers share the sessions and the lock. Start the session storage
+        # before pcsd opens its sockets, so that it does not inherit them.
+        sync_config_lock = workers.ProcessLock()
+        session_storage = workers.start_session_storage(
+            env.PCSD_SESSION_LIFETIME
+        )
+    else:
+        sync_config_lock = Lock()
+        session_storage = session.Storage(env.PCSD_SESSION_LIFETIME)
+
     ruby_pcsd_wrapper = ruby_pcsd.Wrapper(
         pcsd_cmdline_entry=env.PCSD_CMDLINE_ENTRY,
         gem_home=env.GEM_HOME,
@@ -101,9 +205,12 @@ def main():
         ruby_executable=settings.ruby_executable,
         https_proxy=env.HTTPS_PROXY,
         no_proxy=env.NO_PROXY,
+        worker_pool_size=env.PCSD_RUBY_WORKERS,
+        worker_max_requests=env.PCSD_RUBY_WORKER_MAX_REQUESTS,
     )
+    SignalInfo.ruby_pcsd_wrapper = ruby_pcsd_wrapper
     make_app = configure_app(
-        session.Storage(env.PCSD_SESSION_LIFETIME),
+        session_storage,
         ruby_pcsd_wrapper,
         sync_config_lock,
         env.PCSD_STATIC_FILES_DIR,
@@ -117,13 +224,21 @@ def main():
         ssl_options=env.PCSD_SSL_OPTIONS,
         ssl_ciphers=env.PCSD_SSL_CIPHERS,
     )
+    server_manage = HttpsServerManage(
+        make_app,
+        port=env.PCSD_PORT,
+        bind_addresses=env.PCSD_BIND_ADDR,
+        ssl=pcsd_ssl,
+    )
+    worker_id = None
     try:
-        SignalInfo.server_manage = HttpsServerManage(
-            make_app,
-            port=env.PCSD_PORT,
-            bind_addresses=env.PCSD_BIND_ADDR,
-            ssl=pcsd_ssl,
-        ).start()
+        # Check the certificates before forking workers, so that the workers
+        # do not fail one by one.
+        pcsd_ssl.guarantee_valid_certs()
+        server_manage.bind_sockets()
+        if env.PCSD_WORKERS > 1:
+            worker_id = fork_workers(env.PCSD_WORKERS)
+        SignalInfo.server_manage = server_manage.start()
     except socket.gaierror as e:
         log.pcsd.error(
             "Unable to bind to specific address(es), exiting: %s ",
@@ -141,7 +256,42 @@ def main():
 
     ioloop = IOLoop.current()
     ioloop.add_callback(sign_ioloop_started)
-    if is_systemd() and env.NOTIFY_SOCKET:
+    if is_systemd() and env.NOTIFY_SOCKET and not worker_id:
         ioloop.add_callback(systemd.notify, env.NOTIFY_SOCKET)
-    ioloop.add_callback(config_sync(sync_config_lock, ruby_pcsd_wrapper))
+    PeriodicCallback(
+        ruby_pcsd_wrapper.check_workers_health,
+        RUBY_WORKERS_HEALTH_CHECK_INTERVAL_MS,
+    ).start()
+    if not worker_id:
+        # shared by workers, it is enough to do it in the first one
+        ioloop.add_callback(config_sync(sync_config_lock, ruby_pcsd_wrapper))
+    if worker_id is None:
+        # the storage shared by workers drops expired sessions by itself
+        PeriodicCallback(
+            session_storage.drop_expired,
+            SESSIONS_SWEEP_INTERVAL_MS,
+        ).start()
+    if worker_id is not None:
+        PeriodicCallback(
+            server_manage.reload_certs_if_changed,
+            CERTS_CHECK_INTERVAL_MS,
+        ).start()
+        PeriodicCallback(
+            workers.exit_with_parent(SignalInfo.parent_pid),
+            PARENT_CHECK_INTERVAL_MS,
+        ).start()
+        run_worker_ioloop(ioloop)
     ioloop.start()
+
+def run_worker_ioloop(ioloop):
+    # Workers are forked by the main process. On exit, they must not run any
+    # cleanup registered by the main process, e.g. stopping the session
+    # storage shared by the workers.
+    exit_code = 1
+    try:
+        ioloop.start()
+        exit_code = 0
+    except SystemExit:
+        exit_code = 0
+    finally:
+        os._exit(exit_code) # pylint: disable=protected-access
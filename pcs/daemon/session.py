@@ -1,8 +1,20 @@
 import random
 import string
+from collections import OrderedDict
 from time import time as now
 
+from pcs import settings
+
 class Session:
+    __slots__ = (
+        "__sid",
+        "__username",
+        "__is_authenticated",
+        "__ajax_id",
+        "__groups",
+        "__last_access",
+    )
+
     def __init__(
         self, sid, username=None, groups=None, is_authenticated=False,
         ajax_id=None
@@ -27,36 +39,33 @@ class Session:
         # user is authenticated when the groups are loaded.
         self.__groups = groups or []
         # The moment of the last access. The only muttable attribute.
+        self.__last_access = None
         self.refresh()
 
     @property
     def is_authenticated(self):
-        self.refresh()
         return self.__is_authenticated
 
     @property
     def username(self):
-        self.refresh()
         return self.__username
 
     @property
     def sid(self):
-        self.refresh()
         return self.__sid
 
     @property
     def ajax_id(self):
-        self.refresh()
         return self.__ajax_id
 
     @property
     def groups(self):
-        self.refresh()
         return self.__groups
 
     def refresh(self):
         """
-        Set the time of last access to now.
+        Set the time of last access to now. Sessions are refreshed by Storage
+        when they are provided, Storage keeps them ordered by the last access.
         """
         self.__last_access = now()
         return self
@@ -65,26 +74,49 @@ class Session:
         return now() > self.__last_access + seconds
 
 class Storage:
-    def __init__(self, lifetime_seconds):
-        self.__sessions = {}
+    def __init__(self, lifetime_seconds, max_count=None):
+        """
+        int lifetime_seconds -- unused sessions expire after this time
+        int max_count -- maximal number of sessions, the least recently used
+            sessions are dropped to keep the limit, unauthenticated ones first
+        """
+        # Sessions are ordered from the least recently used one. All sessions
+        # have the same lifetime, so they are ordered by their expiration too.
+        self.__sessions = OrderedDict()
+        # Sids of unauthenticated sessions in the same order. A session is
+        # created for each request without a valid sid, so they must not push
+        # authenticated sessions out of the storage.
+        self.__unauthenticated_sids = OrderedDict()
         self.__lifetime_seconds = lifetime_seconds
+        self.__max_count = (
+            max_count if max_count is not None
+            else settings.gui_session_max_count
+        )
+
+    @property
+    def session_count(self):
+        return len(self.__sessions)
 
     def provide(self, sid=None) -> Session:
         if self.__is_valid_sid(sid):
+            self.__sessions.move_to_end(sid)
+            if sid in self.__unauthenticated_sids:
+                self.__unauthenticated_sids.move_to_end(sid)
             return self.__sessions[sid].refresh()
         return self.__register(self.__generate_sid())
 
     def drop_expired(self):
-        obsolete_sid_list = [
-            sid for sid, session in self.__sessions.items()
-            if session.was_unused_last(self.__lifetime_seconds)
-        ]
-        for sid in obsolete_sid_list:
-            del self.__sessions[sid]
+        while self.__sessions:
+            sid = next(iter(self.__sessions))
+            if not self.__sessions[sid].was_unused_last(
+                self.__lifetime_seconds
+            ):
+                break
+            self.__remove(sid)
 
     def destroy(self, sid):
         if sid in self.__sessions:
-            del self.__sessions[sid]
+            self.__remove(sid)
         return self
 
     def login(self, sid, username, groups, ajax_id=None) -> Session:
@@ -114,9 +146,25 @@ class Storage:
 
     def __register(self, *args, **kwargs) -> Session:
         session = Session(*args, **kwargs)
+        if session.sid in self.__sessions:
+            self.__remove(session.sid)
+        if len(self.__sessions) >= self.__max_count:
+            self.drop_expired()
+        while len(self.__sessions) >= self.__max_count:
+            self.__remove(
+                next(iter(self.__unauthenticated_sids))
+                if self.__unauthenticated_sids
+                else next(iter(self.__sessions))
+            )
         self.__sessions[session.sid] = session
+        if not session.is_authenticated:
+            self.__unauthenticated_sids[session.sid] = None
         return session
 
+    def __remove(self, sid):
+        del self.__sessions[sid]
+        self.__unauthenticated_sids.pop(sid, None)
+
     def __generate_sid(self):
         for _ in range(10):
             sid = ''.join(
@@ -98,8 +98,58 @@ class PcsdSSL:
         self.__ssl_options = ssl_options
         self.__ssl_ciphers = ssl_ciphers
         self.__ck_pair = CertKeyPair(cert_location, key_location)
+        self.__context = None
+        self.__files_stamp = None
 
     def create_context(self) -> ssl.SSLContext:
+        """
+        Return a context for an HTTP server
+
+        Each handshake switches to the context with the most recently loaded
+        certificate and key. So a running server uses certificates loaded by
+        reload_context for new connections without reopening its sockets.
+        """
+        ssl_context = self.__load_context()
+        if hasattr(ssl_context, "sni_callback"):
+            ssl_context.sni_callback = self.__use_current_context
+        else:
+            # python 3.6
+            ssl_context.set_servername_callback(self.__use_current_context)
+        self.__context = ssl_context
+        return ssl_context
+
+    def reload_context(self):
+        """
+        Load the certificate and key again and use them for new connections
+        """
+        try:
+            self.__context = self.__load_context()
+        except (OSError, ssl.SSLError) as e:
+            raise SSLCertKeyException(
+                f"Unable to load SSL certificate and/or key: {e}"
+            )
+
+    def have_certs_changed(self):
+        """
+        Tell if the certificate or key files changed since loaded or checked
+        """
+        files_stamp = self.__get_files_stamp()
+        changed = files_stamp != self.__files_stamp
+        self.__files_stamp = files_stamp
+        return changed
+
+    def __get_files_stamp(self):
+        stamp = []
+        for path in (self.__ck_pair.cert_location, self.__ck_pair.key_location):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def __load_context(self):
+        self.__files_stamp = self.__get_files_stamp()
         # pylint: disable=no-member
         ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
         ssl_context.set_ciphers(self.__ssl_ciphers)
@@ -110,6 +160,15 @@ class PcsdSSL:
         )
         return ssl_context
 
+    def __use_current_context(self, ssl_socket, server_name, ssl_context):
+        # The callback is called for each ClientHello, even if it does not
+        # contain a server name.
+        # pylint: disable=unused-argument
+        if self.__context is not ssl_context:
+            ssl_socket.context = self.__context
+        # continue the handshake
+        return None
+
     def guarantee_valid_certs(self):
         if not self.__ck_pair.exists():
             self.__ck_pair.regenerate(self.__server_name)
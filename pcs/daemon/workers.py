@@ -0,0 +1,193 @@
+"""
+Coordination of pcsd worker processes
+
+Pcsd optionally runs several worker processes serving requests. The workers
+are forked from the main pcsd process after it has bound the listening sockets,
+so all of them accept connections on the same sockets. State which must be
+shared by the workers is kept by means created before the workers are forked.
+"""
+import fcntl
+import os
+import signal
+import tempfile
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+from tornado.gen import sleep
+from tornado.ioloop import IOLoop
+from tornado.locks import Lock
+
+from pcs.daemon import session
+
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+SESSIONS_SWEEP_INTERVAL_SECONDS = 60
+
+
+class ProcessLock:
+    """
+    Lock for coroutines shared by all pcsd workers
+
+    It is a drop-in replacement of tornado.locks.Lock used with "async with".
+    A lock held by a worker is released when the worker exits.
+    """
+    def __init__(self):
+        # An unlinked file locked by flock. Each process opens the file anew,
+        # so that the processes do not share the lock.
+        self.__file = tempfile.TemporaryFile()
+        self.__fd = None
+        self.__pid = None
+        # Coroutines of one process wait for each other without polling.
+        self.__lock = Lock()
+
+    async def acquire(self):
+        await self.__lock.acquire()
+        try:
+            while not self.__try_lock():
+                await sleep(LOCK_POLL_INTERVAL_SECONDS)
+        except BaseException:
+            self.__lock.release()
+            raise
+
+    def release(self):
+        fcntl.flock(self.__fd, fcntl.LOCK_UN)
+        self.__lock.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __try_lock(self):
+        if self.__pid != os.getpid():
+            self.__fd = os.open(
+                f"/proc/self/fd/{self.__file.fileno()}",
+                os.O_RDWR | os.O_CLOEXEC
+            )
+            self.__pid = os.getpid()
+        try:
+            fcntl.flock(self.__fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+
+class _SynchronizedStorage:
+    """
+    Session storage used by several threads of the session manager process
+
+    Expired sessions are dropped periodically in the manager process, so that
+    the workers do not have to ask for it.
+    """
+    def __init__(self, lifetime_seconds, sweep_interval_seconds):
+        self.__storage = session.Storage(lifetime_seconds)
+        self.__lock = threading.Lock()
+        threading.Thread(
+            target=self.__drop_expired_periodically,
+            args=(sweep_interval_seconds,),
+            daemon=True,
+        ).start()
+
+    def provide(self, sid=None):
+        with self.__lock:
+            return self.__storage.provide(sid)
+
+    def drop_expired(self):
+        with self.__lock:
+            self.__storage.drop_expired()
+
+    def destroy(self, sid):
+        with self.__lock:
+            self.__storage.destroy(sid)
+
+    def login(self, sid, username, groups, ajax_id=None):
+        with self.__lock:
+            return self.__storage.login(sid, username, groups, ajax_id)
+
+    def rejected_user(self, sid, username):
+        with self.__lock:
+            return self.__storage.rejected_user(sid, username)
+
+    def __drop_expired_periodically(self, interval_seconds):
+        while True:
+            time.sleep(interval_seconds)
+            self.drop_expired()
+
+
+class SharedStorage:
+    """
+    Session storage shared by pcsd workers, kept by the session manager process
+
+    Calls of the manager are blocking, so they are run in threads and awaited
+    in order not to block the ioloop of a worker.
+    """
+    def __init__(self, storage_proxy):
+        self.__proxy = storage_proxy
+
+    async def provide(self, sid=None):
+        return await self.__call(self.__proxy.provide, sid)
+
+    def drop_expired(self):
+        # Expired sessions are dropped by the manager process.
+        pass
+
+    async def destroy(self, sid):
+        await self.__call(self.__proxy.destroy, sid)
+        return self
+
+    async def login(self, sid, username, groups, ajax_id=None):
+        return await self.__call(
+            self.__proxy.login, sid, username, groups, ajax_id
+        )
+
+    async def rejected_user(self, sid, username):
+        return await self.__call(self.__proxy.rejected_user, sid, username)
+
+    @staticmethod
+    async def __call(method, *args):
+        # A proxy opens a connection to the manager in each thread using it.
+        return await IOLoop.current().run_in_executor(None, method, *args)
+
+
+class _SessionManager(BaseManager):
+    pass
+
+_SessionManager.register("Storage", _SynchronizedStorage)
+
+
+def start_session_storage(
+    lifetime_seconds, sweep_interval_seconds=SESSIONS_SWEEP_INTERVAL_SECONDS
+):
+    """
+    Start a process keeping sessions of all workers, return a session storage
+    backed by the process
+
+    The storage provides copies of sessions. The process is stopped when the
+    calling process exits.
+
+    int lifetime_seconds -- unused sessions expire after this time
+    int sweep_interval_seconds -- how often expired sessions are dropped
+    """
+    manager = _SessionManager()
+    manager.start(_init_session_manager)
+    return SharedStorage(
+        manager.Storage(lifetime_seconds, sweep_interval_seconds)
+    )
+
+def _init_session_manager():
+    # The manager is stopped by the main pcsd process.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def exit_with_parent(parent_pid):
+    """
+    Return a callback terminating the worker when the main process has exited
+
+    int parent_pid -- pid of the main pcsd process
+    """
+    def check_parent():
+        if os.getppid() != parent_pid:
+            # shut down the same way as when stopped by systemd
+            os.kill(os.getpid(), signal.SIGTERM)
+    return check_parent
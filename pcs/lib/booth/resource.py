@@ -1,10 +1,5 @@
-from pcs.lib.cib.tools import find_unique_id
-
-
-def create_resource_id(resources_section, name, suffix):
-    return find_unique_id(
-        resources_section.getroottree(), "booth-{0}-{1}".format(name, suffix)
-    )
+def create_resource_id(id_provider, name, suffix):
+    return id_provider.allocate_id("booth-{0}-{1}".format(name, suffix))
 
 def is_ip_resource(resource_element):
     return resource_element.attrib.get("type", "") == "IPaddr2"
@@ -3,13 +3,11 @@ from lxml import etree
 
 from pcs.common import report_codes
 from pcs.lib import reports
-from pcs.lib.errors import ReportItemSeverity as Severities
+from pcs.lib.errors import LibraryError, ReportItemSeverity as Severities
 from pcs.lib.cib.nvpair import get_nvset
 from pcs.lib.cib.tools import (
-    check_new_id_applicable,
-    find_unique_id,
+    book_new_id,
     get_alerts,
-    validate_id_does_not_exist,
     find_element_by_tag_and_id,
 )
 from pcs.lib.xml_tools import get_sub_element
@@ -66,20 +64,21 @@ def ensure_recipient_value_is_unique(
         ))
 
 
-def create_alert(tree, alert_id, path, description=""):
+def create_alert(tree, id_provider, alert_id, path, description=""):
     """
     Create new alert element. Returns newly created element.
     Raises LibraryError if element with specified id already exists.
 
     tree -- cib etree node
+    id_provider -- elements' ids generator
     alert_id -- id of new alert, it will be generated if it is None
     path -- path to script
     description -- description
     """
     if alert_id:
-        check_new_id_applicable(tree, "alert-id", alert_id)
+        book_new_id(id_provider, "alert-id", alert_id)
     else:
-        alert_id = find_unique_id(tree, "alert")
+        alert_id = id_provider.allocate_id("alert")
 
     alert = etree.SubElement(get_alerts(tree), "alert", id=alert_id, path=path)
     if description:
@@ -121,6 +120,7 @@ def remove_alert(tree, alert_id):
 def add_recipient(
     reporter,
     tree,
+    id_provider,
     alert_id,
     recipient_value,
     recipient_id=None,
@@ -134,6 +134,7 @@ def add_recipient(
 
     reporter -- report processor
     tree -- cib etree node
+    id_provider -- elements' ids generator
     alert_id -- id of alert which should be parent of new recipient
     recipient_value -- value of recipient
     recipient_id -- id of new recipient, if None it will be generated
@@ -141,9 +142,13 @@ def add_recipient(
     allow_same_value -- if True unique recipient value is not required
     """
     if recipient_id is None:
-        recipient_id = find_unique_id(tree, "{0}-recipient".format(alert_id))
+        recipient_id = id_provider.allocate_id(
+            "{0}-recipient".format(alert_id)
+        )
     else:
-        validate_id_does_not_exist(tree, recipient_id)
+        report_list = id_provider.book_ids(recipient_id)
+        if report_list:
+            raise LibraryError(*report_list)
 
     alert = find_alert(get_alerts(tree), alert_id)
     ensure_recipient_value_is_unique(
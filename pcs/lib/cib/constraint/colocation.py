@@ -2,7 +2,7 @@ from functools import partial
 
 from pcs.lib import reports
 from pcs.lib.cib.constraint import constraint
-from pcs.lib.cib.tools import check_new_id_applicable
+from pcs.lib.cib.tools import book_new_id
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker.values import is_score, SCORE_INFINITY
 
@@ -10,12 +10,14 @@ TAG_NAME = 'rsc_colocation'
 DESCRIPTION = "constraint id"
 SCORE_NAMES = ("score", "score-attribute", "score-attribute-mangle")
 
-def prepare_options_with_set(cib, options, resource_set_list):
+def prepare_options_with_set(id_provider, options, resource_set_list):
     options = constraint.prepare_options(
         tuple(SCORE_NAMES),
         options,
-        partial(constraint.create_id, cib, TAG_NAME, resource_set_list),
-        partial(check_new_id_applicable, cib, DESCRIPTION),
+        partial(
+            constraint.create_id, id_provider, TAG_NAME, resource_set_list
+        ),
+        partial(book_new_id, id_provider, DESCRIPTION),
     )
 
     if "score" in options and not is_score(options["score"]):
@@ -4,10 +4,7 @@ from pcs.common import report_codes
 from pcs.lib import reports
 from pcs.lib.cib import resource
 from pcs.lib.cib.constraint import resource_set
-from pcs.lib.cib.tools import (
-    find_unique_id,
-    find_element_by_tag_and_id,
-)
+from pcs.lib.cib.tools import find_element_by_tag_and_id
 from pcs.lib.errors import LibraryError, ReportItemSeverity
 from pcs.lib.xml_tools import (
     export_attributes,
@@ -83,12 +80,12 @@ def export_with_set(element):
 def export_plain(element):
     return {"options": export_attributes(element)}
 
-def create_id(cib, type_prefix, resource_set_list):
+def create_id(id_provider, type_prefix, resource_set_list):
     _id = "pcs_" +type_prefix +"".join([
         "_set_"+"_".join(id_set)
         for id_set in resource_set.extract_id_set_list(resource_set_list)
     ])
-    return find_unique_id(cib, _id)
+    return id_provider.allocate_id(_id)
 
 def have_duplicate_resource_sets(element, other_element):
     get_id_set_list = lambda element: [
@@ -126,11 +123,13 @@ def check_is_without_duplication(
             else report_codes.FORCE_CONSTRAINT_DUPLICATE,
     ))
 
-def create_with_set(constraint_section, tag_name, options, resource_set_list):
+def create_with_set(
+    constraint_section, id_provider, tag_name, options, resource_set_list
+):
     if not resource_set_list:
         raise LibraryError(reports.empty_resource_set_list())
     element = etree.SubElement(constraint_section, tag_name)
     element.attrib.update(options)
     for resource_set_item in resource_set_list:
-        resource_set.create(element, resource_set_item)
+        resource_set.create(element, id_provider, resource_set_item)
     return element
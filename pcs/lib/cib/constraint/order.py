@@ -2,7 +2,7 @@ from functools import partial
 
 from pcs.lib import reports
 from pcs.lib.cib.constraint import constraint
-from pcs.lib.cib.tools import check_new_id_applicable
+from pcs.lib.cib.tools import book_new_id
 from pcs.lib.errors import LibraryError
 
 
@@ -13,14 +13,14 @@ ATTRIB = {
     "kind": ("Optional", "Mandatory", "Serialize"),
 }
 
-def prepare_options_with_set(cib, options, resource_set_list):
+def prepare_options_with_set(id_provider, options, resource_set_list):
     options = constraint.prepare_options(
         tuple(ATTRIB.keys()),
         options,
         create_id_fn=partial(
-            constraint.create_id, cib, TAG_NAME, resource_set_list
+            constraint.create_id, id_provider, TAG_NAME, resource_set_list
         ),
-        validate_id=partial(check_new_id_applicable, cib, DESCRIPTION),
+        validate_id=partial(book_new_id, id_provider, DESCRIPTION),
     )
 
     report_items = []
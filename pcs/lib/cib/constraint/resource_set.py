@@ -1,7 +1,6 @@
 from lxml import etree
 
 from pcs.lib import reports
-from pcs.lib.cib.tools import find_unique_id
 from pcs.lib.errors import LibraryError
 from pcs.lib.xml_tools import export_attributes
 
@@ -36,14 +35,14 @@ def validate_options(options):
 def extract_id_set_list(resource_set_list):
     return [resource_set["ids"] for resource_set in resource_set_list]
 
-def create(parent, resource_set):
+def create(parent, id_provider, resource_set):
     """
     parent - lxml element for append new resource_set
+    IdProvider id_provider -- elements' ids generator
     """
     element = etree.SubElement(parent, "resource_set")
     element.attrib.update(resource_set["options"])
-    element.attrib["id"] = find_unique_id(
-        parent.getroottree(),
+    element.attrib["id"] = id_provider.allocate_id(
         "pcs_rsc_set_{0}".format("_".join(resource_set["ids"]))
     )
 
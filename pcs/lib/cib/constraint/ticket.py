@@ -30,21 +30,20 @@ def _validate_options_common(options):
         options["loss-policy"] = loss_policy
     return report
 
-def _create_id(cib, ticket, resource_id, resource_role):
-    return tools.find_unique_id(
-        cib,
+def _create_id(id_provider, ticket, resource_id, resource_role):
+    return id_provider.allocate_id(
         "-".join(('ticket', ticket, resource_id))
         +("-{0}".format(resource_role) if resource_role else "")
     )
 
-def prepare_options_with_set(cib, options, resource_set_list):
+def prepare_options_with_set(id_provider, options, resource_set_list):
     options = constraint.prepare_options(
         tuple(ATTRIB.keys()),
         options,
         create_id_fn=partial(
-            constraint.create_id, cib, TAG_NAME, resource_set_list
+            constraint.create_id, id_provider, TAG_NAME, resource_set_list
         ),
-        validate_id=partial(tools.check_new_id_applicable, cib, DESCRIPTION),
+        validate_id=partial(tools.book_new_id, id_provider, DESCRIPTION),
     )
     report = _validate_options_common(options)
     if "ticket" not in options or not options["ticket"].strip():
@@ -53,7 +52,7 @@ def prepare_options_with_set(cib, options, resource_set_list):
         raise LibraryError(*report)
     return options
 
-def prepare_options_plain(cib, options, ticket, resource_id):
+def prepare_options_plain(id_provider, options, ticket, resource_id):
     options = options.copy()
 
     report = _validate_options_common(options)
@@ -85,12 +84,12 @@ def prepare_options_plain(cib, options, ticket, resource_id):
         options,
         partial(
             _create_id,
-            cib,
+            id_provider,
             options["ticket"],
             resource_id,
             options.get("rsc-role", "")
         ),
-        partial(tools.check_new_id_applicable, cib, DESCRIPTION)
+        partial(tools.book_new_id, id_provider, DESCRIPTION)
     )
 
 def create_plain(constraint_section, options):
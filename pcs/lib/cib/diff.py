@@ -0,0 +1,315 @@
+"""
+Compute CIB differences in the pacemaker patchset format
+
+The produced patchset is the same format crm_diff produces when run with the
+--no-version option (xml patchset format 2) and it is meant to be applied by
+cibadmin --patch. Only CIBs which can be addressed unambiguously by the paths
+used in the patchset are supported, DiffNotSupported is raised otherwise so the
+caller can fall back to crm_diff.
+"""
+from lxml import etree
+
+
+# Version attributes are not part of the diff, see crm_diff --no-version
+_VERSION_ATTRIBUTES = frozenset(("admin_epoch", "epoch", "num_updates"))
+# Characters which cannot be used in an id in a patchset path as pacemaker
+# does not escape them
+_ID_FORBIDDEN_CHARS = frozenset("/'[]")
+
+
+class DiffNotSupported(Exception):
+    """
+    The CIBs cannot be diffed natively, use crm_diff instead
+    """
+
+
+def diff_cibs(cib_old, cib_new):
+    """
+    Return xml diff of two CIBs, an empty string if they are the same
+
+    etree cib_old -- original CIB
+    etree cib_new -- modified CIB
+    """
+    cib_old = _get_root_element(cib_old)
+    cib_new = _get_root_element(cib_new)
+    if cib_old.tag != cib_new.tag:
+        raise DiffNotSupported(
+            "Root elements differ: '{0}', '{1}'".format(
+                cib_old.tag, cib_new.tag
+            )
+        )
+    _check_element(cib_old)
+    _check_element(cib_new)
+    delete_list = []
+    change_list = []
+    _diff_elements(
+        cib_old,
+        cib_new,
+        "/{0}".format(cib_new.tag),
+        delete_list,
+        change_list,
+        is_root=True
+    )
+    return _build_diff(delete_list, change_list)
+
+def diff_cib_subtrees(subtree_list):
+    """
+    Return xml diff of changed CIB subtrees, an empty string if they are the
+    same
+
+    The rest of the CIB must not have been changed. The subtrees must not
+    overlap.
+
+    iterable subtree_list -- (original subtree, changed subtree) tuples, the
+        changed subtrees are elements of the modified CIB
+    """
+    subtree_list = list(subtree_list)
+    original_dict = {
+        element: original for original, element in subtree_list
+    }
+    delete_list = []
+    change_list = []
+    for original, element in subtree_list:
+        _check_element(original)
+        _check_element(element)
+        if original.tag != element.tag:
+            raise DiffNotSupported(
+                "Elements differ: '{0}', '{1}'".format(
+                    original.tag, element.tag
+                )
+            )
+        parent = element.getparent()
+        if parent is None:
+            path = "/{0}".format(original.tag)
+        else:
+            path = _get_path(
+                _get_absolute_path(parent, original_dict),
+                original
+            )
+            _check_unique_among_siblings(element, original_dict)
+        _diff_elements(
+            original,
+            element,
+            path,
+            delete_list,
+            change_list,
+            is_root=(parent is None)
+        )
+    return _build_diff(delete_list, change_list)
+
+def _build_diff(delete_list, change_list):
+    if not delete_list and not change_list:
+        return ""
+    diff = etree.Element("diff", format="2")
+    for change in delete_list + change_list:
+        diff.append(change)
+    return etree.tostring(diff, encoding="unicode")
+
+def _get_absolute_path(element, original_dict):
+    """
+    Return a path of an unchanged element in a CIB
+
+    etree element -- an element which has not been changed
+    dict original_dict -- original copies of changed elements
+    """
+    path_list = []
+    while element.getparent() is not None:
+        _check_element(element)
+        _check_unique_among_siblings(element, original_dict)
+        path_list.append(_get_path("", element))
+        element = element.getparent()
+    path_list.append("/{0}".format(element.tag))
+    return "".join(reversed(path_list))
+
+def _check_unique_among_siblings(element, original_dict):
+    """
+    Make sure an element can be addressed unambiguously by its path both in
+    the original and the changed CIB
+    """
+    def get_keys(sibling):
+        keys = {(sibling.tag, sibling.get("id"))}
+        if sibling in original_dict:
+            original = original_dict[sibling]
+            keys.add((original.tag, original.get("id")))
+        return keys
+
+    element_keys = get_keys(element)
+    for sibling in element.getparent():
+        if sibling is element or not isinstance(sibling.tag, str):
+            continue
+        for tag, _id in get_keys(sibling):
+            for element_tag, element_id in element_keys:
+                if tag == element_tag and (
+                    _id == element_id or _id is None or element_id is None
+                ):
+                    raise DiffNotSupported(
+                        "Element '{0}' cannot be addressed unambiguously"
+                        .format(tag)
+                    )
+
+def _get_root_element(tree):
+    if isinstance(tree, etree._ElementTree):
+        return tree.getroot()
+    return tree
+
+def _check_element(element):
+    if element.tail and element.tail.strip():
+        raise DiffNotSupported("Text content is not supported")
+    if element.text and element.text.strip():
+        raise DiffNotSupported("Text content is not supported")
+    _id = element.get("id")
+    if _id is not None and _ID_FORBIDDEN_CHARS.intersection(_id):
+        raise DiffNotSupported("Unsupported id '{0}'".format(_id))
+
+def _get_children(element):
+    """
+    Return a list of child elements with their matching keys
+
+    etree element -- parent element
+    """
+    children = []
+    for child in element:
+        if not isinstance(child.tag, str):
+            # comments, processing instructions
+            raise DiffNotSupported("Only elements are supported")
+        _check_element(child)
+        children.append(((child.tag, child.get("id")), child))
+    return children
+
+def _check_keys(old_children, new_children):
+    """
+    Make sure each child can be addressed unambiguously by its path
+    """
+    tags_with_id = set()
+    tags_without_id = set()
+    for children in (old_children, new_children):
+        seen = set()
+        for key, dummy_child in children:
+            if key in seen:
+                raise DiffNotSupported(
+                    "Duplicate element '{0}' id '{1}'".format(*key)
+                )
+            seen.add(key)
+            if key[1] is None:
+                tags_without_id.add(key[0])
+            else:
+                tags_with_id.add(key[0])
+    if tags_without_id & tags_with_id:
+        raise DiffNotSupported(
+            "Element '{0}' without an id has siblings of the same name".format(
+                sorted(tags_without_id & tags_with_id)[0]
+            )
+        )
+
+def _get_path(parent_path, element):
+    _id = element.get("id")
+    if _id is None:
+        return "{0}/{1}".format(parent_path, element.tag)
+    return "{0}/{1}[@id='{2}']".format(parent_path, element.tag, _id)
+
+def _get_compared_attributes(element, is_root):
+    attributes = dict(element.attrib)
+    if is_root:
+        for name in _VERSION_ATTRIBUTES:
+            attributes.pop(name, None)
+    return attributes
+
+def _diff_elements(
+    element_old, element_new, path, delete_list, change_list, is_root=False
+):
+    # pylint: disable=too-many-arguments
+    attrs_old = _get_compared_attributes(element_old, is_root)
+    attrs_new = _get_compared_attributes(element_new, is_root)
+    if attrs_old != attrs_new:
+        change_list.append(_create_modify(
+            element_old, element_new, path, attrs_old, attrs_new, is_root
+        ))
+
+    old_children = _get_children(element_old)
+    new_children = _get_children(element_new)
+    _check_keys(old_children, new_children)
+    old_children_map = dict(old_children)
+    new_children_map = dict(new_children)
+
+    for key, child in old_children:
+        if key not in new_children_map:
+            delete_list.append(
+                _create_change("delete", _get_path(path, child))
+            )
+
+    # Simulate how pacemaker applies the changes. Deletes go first, then each
+    # child is created or moved to its final position from left to right.
+    # Children before the current position are already in place, so a moved
+    # child always moves towards the start.
+    current_keys = [
+        key for key, dummy_child in old_children if key in new_children_map
+    ]
+    for position, (key, child) in enumerate(new_children):
+        if key not in old_children_map:
+            current_keys.insert(position, key)
+            change = _create_change("create", path, position)
+            change.append(_copy_element(child))
+            change_list.append(change)
+            continue
+        child_path = _get_path(path, child)
+        if current_keys[position] != key:
+            current_keys.remove(key)
+            current_keys.insert(position, key)
+            change_list.append(
+                _create_change("move", child_path, position)
+            )
+        _diff_elements(
+            old_children_map[key], child, child_path, delete_list, change_list
+        )
+
+def _create_change(operation, path, position=None):
+    change = etree.Element("change", operation=operation, path=path)
+    if position is not None:
+        change.set("position", str(position))
+    return change
+
+def _create_modify(
+    element_old, element_new, path, attrs_old, attrs_new, is_root
+):
+    # pylint: disable=too-many-arguments
+    change = _create_change("modify", path)
+    change_list = etree.SubElement(change, "change-list")
+    for name, value in attrs_new.items():
+        if attrs_old.get(name) != value:
+            etree.SubElement(
+                change_list,
+                "change-attr",
+                name=name,
+                operation="set",
+                value=value
+            )
+    for name in attrs_old:
+        if name not in attrs_new:
+            etree.SubElement(
+                change_list, "change-attr", name=name, operation="unset"
+            )
+    # pacemaker replaces all attributes of the element with the attributes of
+    # the result element
+    result = etree.SubElement(
+        etree.SubElement(change, "change-result"), element_new.tag
+    )
+    for name, value in element_new.attrib.items():
+        if is_root and name in _VERSION_ATTRIBUTES:
+            continue
+        result.set(name, value)
+    if is_root:
+        for name in sorted(_VERSION_ATTRIBUTES):
+            if name in element_old.attrib:
+                result.set(name, element_old.get(name))
+    return change
+
+def _copy_element(element):
+    """
+    Return a copy of an element without whitespace text nodes
+    """
+    copy = etree.Element(element.tag)
+    for name, value in element.attrib.items():
+        copy.set(name, value)
+    for child in element:
+        copy.append(_copy_element(child))
+    return copy
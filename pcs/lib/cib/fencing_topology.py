@@ -8,13 +8,13 @@ from pcs.common.fencing_topology import (
 )
 from pcs.lib import reports
 from pcs.lib.cib.stonith import is_stonith_resource
-from pcs.lib.cib.tools import find_unique_id
 from pcs.lib.errors import ReportItemSeverity
 from pcs.lib.pacemaker.values import sanitize_id, validate_id
 
 def add_level(
-    reporter, topology_el, resources_el, level, target_type, target_value,
-    devices, cluster_status_nodes, force_device=False, force_node=False
+    reporter, topology_el, resources_el, id_provider, level, target_type,
+    target_value, devices, cluster_status_nodes, force_device=False,
+    force_node=False
 ):
     # pylint: disable=too-many-arguments
     """
@@ -23,6 +23,7 @@ def add_level(
     object reporter -- report processor
     etree topology_el -- etree element to add the level to
     etree resources_el -- etree element with resources definitions
+    IdProvider id_provider -- elements' ids generator
     int|string level -- level (index) of the new fencing level
     constant target_type -- the new fencing level target value type
     mixed target_value -- the new fencing level target value
@@ -42,7 +43,8 @@ def add_level(
     )
     reporter.send()
     _append_level_element(
-        topology_el, valid_level, target_type, target_value, devices
+        topology_el, id_provider, valid_level, target_type, target_value,
+        devices
     )
 
 def remove_all_levels(topology_el):
@@ -167,6 +169,7 @@ def verify(reporter, topology_el, resources_el, cluster_status_nodes):
     object reporter -- report processor
     etree topology_el -- etree element with fencing levels to check
     etree resources_el -- etree element with resources definitions
+    IdProvider id_provider -- elements' ids generator
     Iterable cluster_status_nodes -- list of status of existing cluster nodes
     """
     used_nodes = set()
@@ -233,7 +236,7 @@ def _validate_target_valuewise(
     if target_type == TARGET_TYPE_NODE:
         node_found = False
         for node in cluster_status_nodes:
-            if target_value == node.attrs.name:
+            if target_value == node.name:
                 node_found = True
                 break
         if not node_found:
@@ -287,7 +290,9 @@ def _validate_level_target_devices_does_not_exist(
             )
         )
 
-def _append_level_element(tree, level, target_type, target_value, devices):
+def _append_level_element(
+    tree, id_provider, level, target_type, target_value, devices
+):
     level_el = etree.SubElement(
         tree,
         "fencing-level",
@@ -306,7 +311,9 @@ def _append_level_element(tree, level, target_type, target_value, devices):
         id_part = target_value[0]
     level_el.set(
         "id",
-        find_unique_id(tree, sanitize_id("fl-{0}-{1}".format(id_part, level)))
+        id_provider.allocate_id(
+            sanitize_id("fl-{0}-{1}".format(id_part, level))
+        )
     )
     return level_el
 
@@ -0,0 +1,104 @@
+from copy import deepcopy
+
+
+class CibChangeJournal:
+    """
+    Keep original copies of CIB subtrees which are about to be changed
+
+    The journal allows to diff only the changed subtrees of a CIB instead of
+    the whole CIB. It is reliable only if each change of the CIB is announced
+    to the journal before it is done.
+    """
+    def __init__(self, cib):
+        """
+        etree cib -- the root element of the CIB to be changed
+        """
+        self.__cib = cib
+        self.__original_dict = {}
+
+    def record_change(self, element):
+        """
+        Announce that an element or its subtree is about to be changed
+
+        Adding or removing an element is a change of its parent. Moving an
+        element is a change of both its old and new parent.
+
+        etree element -- the element to be changed
+        """
+        if self.__is_recorded(element):
+            return
+        original = deepcopy(element)
+        # Descendants recorded earlier have already been changed. Put their
+        # original copies to the copy of the element.
+        for descendant in list(self.__original_dict):
+            index_path = _get_index_path(element, descendant)
+            if index_path is None:
+                continue
+            descendant_copy = original
+            for index in index_path:
+                descendant_copy = descendant_copy[index]
+            descendant_copy.getparent().replace(
+                descendant_copy, self.__original_dict.pop(descendant)
+            )
+        self.__original_dict[element] = original
+
+    @property
+    def changed_elements(self):
+        """
+        Return elements of the CIB which have been announced to be changed
+        """
+        return [
+            element for element in self.__original_dict
+            if self.__is_in_cib(element) and not self.__has_recorded_ancestor(
+                element
+            )
+        ]
+
+    def get_changed_subtrees(self):
+        """
+        Return a list of (original subtree, changed subtree) tuples
+        """
+        return [
+            (self.__original_dict[element], element)
+            for element in self.changed_elements
+        ]
+
+    def get_original(self, element):
+        """
+        Return an original copy of a changed element, None if not changed
+        """
+        return self.__original_dict.get(element, None)
+
+    def __is_recorded(self, element):
+        return (
+            element in self.__original_dict
+            or
+            self.__has_recorded_ancestor(element)
+        )
+
+    def __has_recorded_ancestor(self, element):
+        for ancestor in element.iterancestors():
+            if ancestor in self.__original_dict:
+                return True
+        return False
+
+    def __is_in_cib(self, element):
+        # removed elements still belong to the document, check the ancestors
+        for ancestor in element.iterancestors():
+            element = ancestor
+        return element is self.__cib
+
+
+def _get_index_path(ancestor, element):
+    """
+    Return positions leading from an ancestor to an element, None if the
+    ancestor is not an ancestor of the element
+    """
+    index_path = []
+    while element is not ancestor:
+        parent = element.getparent()
+        if parent is None:
+            return None
+        index_path.append(parent.index(element))
+        element = parent
+    return list(reversed(index_path))
@@ -73,11 +73,11 @@ def _ensure_node_exists(tree, node_name, state_nodes=None):
     node_el = _get_node_by_uname(tree, node_name)
     if node_el is None and state_nodes:
         for node_state in state_nodes:
-            if node_state.attrs.name == node_name:
+            if node_state.name == node_name:
                 node_el = _create_node(
-                    node_state.attrs.id,
-                    node_state.attrs.name,
-                    node_state.attrs.type
+                    node_state.id,
+                    node_state.name,
+                    node_state.type
                 )
                 break
     if node_el is None:
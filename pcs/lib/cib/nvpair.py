@@ -19,13 +19,15 @@ def _append_new_nvpair(nvset_element, name, value, id_provider):
     string value is value attribute of new nvpair
     IdProvider id_provider -- elements' ids generator
     """
-    etree.SubElement(
+    nvpair = etree.SubElement(
         nvset_element,
         "nvpair",
         id=create_subelement_id(nvset_element, name, id_provider),
         name=name,
         value=value
     )
+    # the value may be an id as well, e.g. the name of a guest node
+    id_provider.register_element(nvpair)
 
 def set_nvpair_in_nvset(nvset_element, name, value, id_provider):
     """
@@ -44,11 +46,13 @@ def set_nvpair_in_nvset(nvset_element, name, value, id_provider):
     else:
         if value:
             nvpair.set("value", value)
+            id_provider.register_element(nvpair)
         else:
             nvset_element.remove(nvpair)
 
 def arrange_first_nvset(
-    tag_name, context_element, nvpair_dict, id_provider, new_id=None
+    tag_name, context_element, nvpair_dict, id_provider, new_id=None,
+    journal=None
 ):
     """
     Put nvpairs to the first tag_name nvset in the context_element.
@@ -64,10 +68,14 @@ def arrange_first_nvset(
     etree context_element -- parent element of nvset
     dict nvpair_dict -- dictionary of nvpairs
     IdProvider id_provider -- elements' ids generator
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
     if not nvpair_dict:
         return
 
+    if journal is not None:
+        journal.record_change(context_element)
+
     nvset_element = get_sub_element(
         context_element,
         tag_name,
@@ -76,6 +84,8 @@ def arrange_first_nvset(
         )),
         append_if_missing=False
     )
+    if new_id:
+        id_provider.register_element(nvset_element)
     update_nvset(nvset_element, nvpair_dict, id_provider)
     append_when_useful(context_element, nvset_element, index=0)
 
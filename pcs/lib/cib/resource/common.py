@@ -127,30 +127,36 @@ def find_resources_to_enable(resource_el):
         to_enable.append(parent)
     return to_enable
 
-def enable(resource_el, id_provider):
+def enable(resource_el, id_provider, journal=None):
     """
     Enable specified resource
     etree resource_el -- resource element
+    IdProvider id_provider -- elements' ids generator
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
     nvpair.arrange_first_meta_attributes(
         resource_el,
         {
             "target-role": "",
         },
-        id_provider
+        id_provider,
+        journal=journal
     )
 
-def disable(resource_el, id_provider):
+def disable(resource_el, id_provider, journal=None):
     """
     Disable specified resource
     etree resource_el -- resource element
+    IdProvider id_provider -- elements' ids generator
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
     nvpair.arrange_first_meta_attributes(
         resource_el,
         {
             "target-role": "Stopped",
         },
-        id_provider
+        id_provider,
+        journal=journal
     )
 
 def find_resources_to_manage(resource_el):
@@ -246,30 +252,36 @@ def find_resources_to_unmanage(resource_el):
         return [resource_el]
     return []
 
-def manage(resource_el, id_provider):
+def manage(resource_el, id_provider, journal=None):
     """
     Set the resource to be managed by the cluster
     etree resource_el -- resource element
+    IdProvider id_provider -- elements' ids generator
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
     nvpair.arrange_first_meta_attributes(
         resource_el,
         {
             "is-managed": "",
         },
-        id_provider
+        id_provider,
+        journal=journal
     )
 
-def unmanage(resource_el, id_provider):
+def unmanage(resource_el, id_provider, journal=None):
     """
     Set the resource not to be managed by the cluster
     etree resource_el -- resource element
+    IdProvider id_provider -- elements' ids generator
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
     nvpair.arrange_first_meta_attributes(
         resource_el,
         {
             "is-managed": "false",
         },
-        id_provider
+        id_provider,
+        journal=journal
     )
 
 def validate_move(resource_element, master):
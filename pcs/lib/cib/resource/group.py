@@ -16,13 +16,14 @@ def append_new(resources_section, group_id):
 # DEPRECATED: combines validation + searching for an existing group
 # (find_element_by_tag_and_id) with group creation; use
 # pcs.lib.cib.tools.ElementSearcher + append_new instead
-def provide_group(resources_section, group_id):
+def provide_group(resources_section, group_id, id_provider):
     """
     Provide group with id=group_id. Create new group if group with id=group_id
     does not exists.
 
     etree.Element resources_section is place where new group will be appended
     string group_id is id of group
+    IdProvider id_provider -- keeps track of the id of a new group
     """
     group_element = find_element_by_tag_and_id(
         TAG,
@@ -32,6 +33,7 @@ def provide_group(resources_section, group_id):
     )
     if group_element is None:
         group_element = etree.SubElement(resources_section, TAG, id=group_id)
+        id_provider.register_element(group_element)
     return group_element
 
 def place_resource(
@@ -6,10 +6,7 @@ from pcs.common import report_codes
 from pcs.lib import reports, validate
 from pcs.lib.resource_agent import get_default_interval, complete_all_intervals
 from pcs.lib.cib.nvpair import append_new_instance_attributes
-from pcs.lib.cib.tools import (
-    create_subelement_id,
-    does_id_exist,
-)
+from pcs.lib.cib.tools import create_subelement_id
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker.values import (
     is_true,
@@ -302,8 +299,9 @@ def append_new_operation(operations_element, id_provider, options):
         if key not in OPERATION_NVPAIR_ATTRIBUTES
     )
     if "id" in attribute_map:
-        if does_id_exist(operations_element, attribute_map["id"]):
-            raise LibraryError(reports.id_already_exists(attribute_map["id"]))
+        report_list = id_provider.book_ids(attribute_map["id"])
+        if report_list:
+            raise LibraryError(*report_list)
     else:
         attribute_map.update({
             "id": create_id(
@@ -342,18 +340,24 @@ def get_resource_operations(resource_el, names=None):
         if not names or op_el.attrib.get("name", "") in names
     ]
 
-def disable(operation_element):
+def disable(operation_element, journal=None):
     """
     Disable the specified operation
     etree operation_element -- the operation
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
+    if journal is not None:
+        journal.record_change(operation_element)
     operation_element.attrib["enabled"] = "false"
 
-def enable(operation_element):
+def enable(operation_element, journal=None):
     """
     Enable the specified operation
     etree operation_element -- the operation
+    CibChangeJournal journal -- announce changes to the journal if specified
     """
+    if journal is not None:
+        journal.record_change(operation_element)
     operation_element.attrib.pop("enabled", None)
 
 def is_enabled(operation_element):
@@ -141,6 +141,7 @@ def append_new(
     if provider:
         attributes["provider"] = provider
     primitive_element = etree.SubElement(resources_section, TAG, attributes)
+    id_provider.register_element(primitive_element)
 
     if instance_attributes:
         append_new_instance_attributes(
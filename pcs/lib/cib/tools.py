@@ -1,5 +1,7 @@
 import re
 
+from lxml import etree
+
 from pcs.common import report_codes
 from pcs.common.tools import Version
 from pcs.lib import reports
@@ -13,6 +15,147 @@ from pcs.lib.xml_tools import get_root, get_sub_element
 
 VERSION_FORMAT = r"(?P<major>\d+)\.(?P<minor>\d+)(\.(?P<rev>\d+))?$"
 
+# Elements defining ids in a CIB, see does_id_exist for details. The value of
+# a remote-node nvpair is an id as well.
+_ID_ELEMENTS_XPATH = """
+    (
+        /cib/*[name()!="status"]
+        |
+        /*[name()!="cib"]
+    )
+    //*[
+        (
+            name()!="acl_target"
+            and
+            name()!="role"
+            and
+            @id
+        ) or (
+            name()="nvpair"
+            and
+            @name="remote-node"
+            and
+            parent::meta_attributes[parent::primitive]
+        )
+    ]
+"""
+
+def _is_primitive_meta_attributes(element):
+    return (
+        element is not None
+        and
+        element.tag == "meta_attributes"
+        and
+        element.getparent() is not None
+        and
+        element.getparent().tag == "primitive"
+    )
+
+class IdIndex:
+    """
+    Index of ids used in a CIB, allows to check and allocate ids without
+    searching the whole CIB for each of them
+
+    The index is built once, it is the only source of truth afterwards. Ids of
+    elements put to the CIB later must be booked or added to the index, removed
+    elements are detected when checking an id. Suffixes freed by removing
+    elements are not reused by find_unique_id.
+    """
+    def __init__(self, cib_element):
+        """
+        etree cib_element -- any element of the xml to be indexed
+        """
+        self._booked_ids = set()
+        # id -> list of (element, attribute) defining the id
+        self._defined_ids = {}
+        # id -> the last suffix used by find_unique_id
+        self._suffix_counters = {}
+        for element in get_root(cib_element).xpath(_ID_ELEMENTS_XPATH):
+            self._add_element_ids(element)
+
+    def _add_element_ids(self, element):
+        if element.get("id") is not None and element.tag not in (
+            "acl_target", "role"
+        ):
+            self._add_defined_id(element.get("id"), element, "id")
+        if (
+            element.tag == "nvpair"
+            and
+            element.get("name") == "remote-node"
+            and
+            element.get("value") is not None
+            and
+            _is_primitive_meta_attributes(element.getparent())
+        ):
+            self._add_defined_id(element.get("value"), element, "value")
+
+    def _add_defined_id(self, _id, element, attribute):
+        definition_list = self._defined_ids.setdefault(_id, [])
+        if (element, attribute) not in definition_list:
+            definition_list.append((element, attribute))
+
+    def add_element(self, element):
+        """
+        Add ids defined by an element and its descendants to the index
+        etree element -- an element put to the CIB
+        """
+        for descendant in element.iter(etree.Element):
+            self._add_element_ids(descendant)
+
+    @staticmethod
+    def _is_defined(_id, element, attribute):
+        if element.get(attribute) != _id:
+            return False
+        # removed elements still belong to the document, check the ancestors
+        for ancestor in element.iterancestors():
+            element = ancestor
+        return element is element.getroottree().getroot()
+
+    def is_used(self, _id):
+        """
+        Check if the id exists in the CIB or has been booked
+        string _id -- id to check
+        """
+        if _id in self._booked_ids:
+            return True
+        if _id not in self._defined_ids:
+            return False
+        definition_list = [
+            definition for definition in self._defined_ids[_id]
+            if self._is_defined(_id, *definition)
+        ]
+        if definition_list:
+            self._defined_ids[_id] = definition_list
+            return True
+        # the id has been removed from the CIB and it is free again
+        del self._defined_ids[_id]
+        return False
+
+    def book(self, _id):
+        """
+        Mark the id as used
+        string _id -- id to book
+        """
+        self._booked_ids.add(_id)
+
+    def find_unique_id(self, check_id):
+        """
+        Return check_id if it is not used, otherwise the first not used id
+        created by adding a numeric suffix to it
+        string check_id -- id to check
+        """
+        if not self.is_used(check_id):
+            return check_id
+        # All suffixes lower than the saved one have been used already
+        counter = self._suffix_counters.get(check_id, 1)
+        temp_id = "{0}-{1}".format(check_id, counter)
+        while self.is_used(temp_id):
+            counter += 1
+            temp_id = "{0}-{1}".format(check_id, counter)
+        self._suffix_counters[check_id] = counter
+        return temp_id
+
+
 class IdProvider:
     """
     Book ids for future use in the CIB and generate new ids accordingly
@@ -22,17 +165,34 @@ class IdProvider:
         etree cib_element -- any element of the xml to being check against
         """
         self._cib = get_root(cib_element)
-        self._booked_ids = set()
+        self._id_index = None
+
+    def _get_id_index(self):
+        # Build the index when it is needed for the first time so it contains
+        # all elements added to the CIB before that.
+        if self._id_index is None:
+            self._id_index = IdIndex(self._cib)
+        return self._id_index
 
     def allocate_id(self, proposed_id):
         """
         Generate a new unique id based on the proposal and keep track of it
         string proposed_id -- requested id
         """
-        final_id = find_unique_id(self._cib, proposed_id, self._booked_ids)
-        self._booked_ids.add(final_id)
+        final_id = self._get_id_index().find_unique_id(proposed_id)
+        self._get_id_index().book(final_id)
         return final_id
 
+    def register_element(self, element):
+        """
+        Keep track of ids of an element put to the CIB with ids which have not
+        been allocated or booked by this provider
+        etree element -- the element put to the CIB
+        """
+        # an index built later finds the element in the CIB by itself
+        if self._id_index is not None:
+            self._id_index.add_element(element)
+
     def book_ids(self, *id_list):
         """
         Check if the ids are not already used and reserve them for future use
@@ -43,11 +203,11 @@ class IdProvider:
         for _id in id_list:
             if _id in reported_ids:
                 continue
-            if _id in self._booked_ids or does_id_exist(self._cib, _id):
+            if self._get_id_index().is_used(_id):
                 report_list.append(reports.id_already_exists(_id))
                 reported_ids.add(_id)
                 continue
-            self._booked_ids.add(_id)
+            self._get_id_index().book(_id)
         return report_list
 
 
@@ -284,6 +444,19 @@ def check_new_id_applicable(tree, description, _id):
     validate_id(_id, description)
     validate_id_does_not_exist(tree, _id)
 
+def book_new_id(id_provider, description, _id):
+    """
+    Check that the id is valid and not used and book it, raise LibraryError if
+    it cannot be used
+    IdProvider id_provider -- ids uniqueness checker
+    string description -- id description for reports
+    string _id -- id to check
+    """
+    validate_id(_id, description)
+    report_list = id_provider.book_ids(_id)
+    if report_list:
+        raise LibraryError(*report_list)
+
 def get_configuration(tree):
     """
     Return 'configuration' element from tree, raise LibraryError if missing
@@ -36,7 +36,9 @@ def create_alert(
 
     cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
     id_provider = IdProvider(cib)
-    alert_el = alert.create_alert(cib, alert_id, path, description)
+    alert_el = alert.create_alert(
+        cib, id_provider, alert_id, path, description
+    )
     arrange_first_instance_attributes(
         alert_el, instance_attribute_dict, id_provider
     )
@@ -131,6 +133,7 @@ def add_recipient(
     recipient = alert.add_recipient(
         lib_env.report_processor,
         cib,
+        id_provider,
         alert_id,
         recipient_value,
         recipient_id=recipient_id,
@@ -173,11 +173,7 @@ def create_in_cluster(env, ip, allow_absent_resource_agent=False):
     if resource.find_for_config(resources_section, booth_config_file_path):
         raise LibraryError(booth_reports.booth_already_in_cib(name))
 
-    create_id = partial(
-        resource.create_resource_id,
-        resources_section,
-        name
-    )
+    create_id = partial(resource.create_resource_id, id_provider, name)
     get_agent = partial(
         find_valid_resource_agent_by_name,
         env.report_processor,
@@ -192,7 +188,9 @@ def create_in_cluster(env, ip, allow_absent_resource_agent=False):
     )
     into_booth_group = partial(
         group.place_resource,
-        group.provide_group(resources_section, create_id("group")),
+        group.provide_group(
+            resources_section, create_id("group"), id_provider
+        ),
     )
 
     into_booth_group(create_primitive(
@@ -147,7 +147,7 @@ def verify(env, verbose=False):
         env.report_processor,
         get_fencing_topology(cib),
         get_resources(cib),
-        ClusterState(get_cluster_status_xml(runner)).node_section.nodes
+        ClusterState(get_cluster_status_xml(runner)).nodes
     )
     #can raise
     env.report_processor.send()
@@ -6,7 +6,7 @@ client.
 from functools import partial
 
 from pcs.lib.cib.constraint import constraint, resource_set
-from pcs.lib.cib.tools import get_constraints
+from pcs.lib.cib.tools import get_constraints, IdProvider
 
 
 def create_with_set(
@@ -18,8 +18,8 @@ def create_with_set(
     """
     string tag_name is constraint tag name
     callable prepare_options takes
-        cib(Element), options(dict), resource_set_list and return corrected
-        options or if options not usable raises error
+        id_provider(IdProvider), options(dict), resource_set_list and return
+        corrected options or if options not usable raises error
     env is library environment
     list resource_set_list is description of resource set, for example:
         {"ids": ["A", "B"], "options": {"sequential": "true"}},
@@ -31,6 +31,7 @@ def create_with_set(
         duplicates
     """
     cib = env.get_cib()
+    id_provider = IdProvider(cib)
 
     find_valid_resource_id = partial(
         constraint.find_valid_resource_id,
@@ -40,8 +41,11 @@ def create_with_set(
     constraint_section = get_constraints(cib)
     constraint_element = constraint.create_with_set(
         constraint_section,
+        id_provider,
         tag_name,
-        options=prepare_options(cib, constraint_options, resource_set_list),
+        options=prepare_options(
+            id_provider, constraint_options, resource_set_list
+        ),
         resource_set_list=[
              resource_set.prepare_set(find_valid_resource_id, resource_set_item)
              for resource_set_item in resource_set_list
@@ -1,7 +1,7 @@
 from functools import partial
 
 from pcs.lib.cib.constraint import constraint, ticket
-from pcs.lib.cib.tools import get_constraints
+from pcs.lib.cib.tools import get_constraints, IdProvider
 import pcs.lib.commands.constraint.common
 
 
@@ -38,7 +38,7 @@ def create(
     cib = env.get_cib()
 
     options = ticket.prepare_options_plain(
-        cib,
+        IdProvider(cib),
         options,
         ticket_key,
         constraint.find_valid_resource_id(
@@ -7,6 +7,7 @@ from pcs.lib.cib import fencing_topology as cib_fencing_topology
 from pcs.lib.cib.tools import (
     get_fencing_topology,
     get_resources,
+    IdProvider,
 )
 from pcs.lib.pacemaker.live import get_cluster_status_xml
 from pcs.lib.pacemaker.state import ClusterState
@@ -37,13 +38,14 @@ def add_level(
         lib_env.report_processor,
         get_fencing_topology(cib),
         get_resources(cib),
+        IdProvider(cib),
         level,
         target_type,
         target_value,
         devices,
         ClusterState(
             get_cluster_status_xml(lib_env.cmd_runner())
-        ).node_section.nodes,
+        ).nodes,
         force_device,
         force_node
     )
@@ -111,6 +113,6 @@ def verify(lib_env):
         get_resources(cib),
         ClusterState(
             get_cluster_status_xml(lib_env.cmd_runner())
-        ).node_section.nodes
+        ).nodes
     )
     lib_env.report_processor.send()
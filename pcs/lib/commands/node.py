@@ -18,7 +18,7 @@ def cib_runner_nodes(lib_env, wait):
 
     state_nodes = ClusterState(
         get_cluster_status_xml(runner)
-    ).node_section.nodes
+    ).nodes
 
     yield (lib_env.get_cib(), runner, state_nodes)
     lib_env.push_cib(wait=wait)
@@ -143,7 +143,7 @@ def _set_instance_attrs_local_node(lib_env, attrs, wait):
 
 def _set_instance_attrs_node_list(lib_env, attrs, node_names, wait):
     with cib_runner_nodes(lib_env, wait) as (cib, dummy_runner, state_nodes):
-        known_nodes = [node.attrs.name for node in state_nodes]
+        known_nodes = [node.name for node in state_nodes]
         report = []
         for node in node_names:
             if node not in known_nodes:
@@ -162,7 +162,7 @@ def _set_instance_attrs_node_list(lib_env, attrs, node_names, wait):
 
 def _set_instance_attrs_all_nodes(lib_env, attrs, wait):
     with cib_runner_nodes(lib_env, wait) as (cib, dummy_runner, state_nodes):
-        for node in [node.attrs.name for node in state_nodes]:
+        for node in [node.name for node in state_nodes]:
             update_node_instance_attrs(
                 cib,
                 IdProvider(cib),
@@ -170,7 +170,9 @@ def _prepare_pacemaker_remote_environment(
 
 def _ensure_resource_running(env, resource_id):
     env.report_processor.process(
-        state.ensure_resource_running(env.get_cluster_state(), resource_id)
+        state.ensure_resource_running(
+            env.get_cluster_state(trusted_source=True), resource_id
+        )
     )
 
 def node_add_remote(
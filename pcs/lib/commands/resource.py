@@ -24,7 +24,6 @@ from pcs.lib.pacemaker.live import (
     resource_ban,
     resource_move,
     resource_unmove_unban,
-    wait_for_idle,
 )
 from pcs.lib.pacemaker.state import (
     ensure_resource_state,
@@ -48,13 +47,28 @@ def resource_environment(
     wait=False,
     wait_for_resource_ids=None,
     resource_state_reporter=info_resource_state,
-    required_cib_version=None
+    required_cib_version=None,
+    track_changes=False,
+    wait_state_reached=None,
 ):
+    """
+    callable wait_state_reached -- takes a ClusterState, returns True if the
+        resources have reached their final state and waiting can end before
+        the cluster settles, the state is checked only once the status of
+        wait_for_resource_ids changes
+    """
     env.ensure_wait_satisfiable(wait)
-    yield get_resources(env.get_cib(required_cib_version))
-    env.push_cib(wait=wait)
+    yield get_resources(
+        env.get_cib(required_cib_version, track_changes=track_changes)
+    )
+    state = env.push_cib(
+        wait=wait,
+        wait_state_reached=wait_state_reached,
+        wait_state_resource_ids=wait_for_resource_ids,
+    )
     if wait is not False and wait_for_resource_ids:
-        state = env.get_cluster_state()
+        if state is None:
+            state = env.get_cluster_state(trusted_source=True)
         env.report_processor.process_list([
             resource_state_reporter(state, res_id)
             for res_id in wait_for_resource_ids
@@ -69,6 +83,17 @@ def _ensure_disabled_after_wait(disabled_after_wait):
         )
     return inner
 
+def _all_stopped(resource_ids):
+    # Stopped resources are in their final state, unlike started resources
+    # which may still be starting on other nodes.
+    def inner(state):
+        for res_id in resource_ids:
+            report = ensure_resource_state(False, state, res_id)
+            if report.severity == severities.ERROR:
+                return False
+        return True
+    return inner
+
 def _validate_remote_connection(
     resource_agent, existing_nodes_addrs, resource_id, instance_attributes,
     allow_not_suitable_command
@@ -428,7 +453,9 @@ def create_in_group(
             resource.common.disable(primitive_element, id_provider)
         validate_id(group_id, "group name")
         resource.group.place_resource(
-            resource.group.provide_group(resources_section, group_id),
+            resource.group.provide_group(
+                resources_section, group_id, id_provider
+            ),
             primitive_element,
             adjacent_resource_id,
             put_after_adjacent,
@@ -753,7 +780,12 @@ def disable(env, resource_ids, wait):
     mixed wait -- False: no wait, None: wait default timeout, int: wait timeout
     """
     with resource_environment(
-        env, wait, resource_ids, _ensure_disabled_after_wait(True)
+        env,
+        wait,
+        resource_ids,
+        _ensure_disabled_after_wait(True),
+        track_changes=True,
+        wait_state_reached=_all_stopped(resource_ids),
     ) as resources_section:
         id_provider = IdProvider(resources_section)
         resource_el_list = _find_resources_or_raise(
@@ -765,7 +797,8 @@ def disable(env, resource_ids, wait):
                 resource_el_list,
                 resource.common.disable,
                 id_provider,
-                env.get_cluster_state()
+                env.get_cluster_state(),
+                env.cib_journal
             )
         )
 
@@ -777,7 +810,11 @@ def enable(env, resource_ids, wait):
     mixed wait -- False: no wait, None: wait default timeout, int: wait timeout
     """
     with resource_environment(
-        env, wait, resource_ids, _ensure_disabled_after_wait(False)
+        env,
+        wait,
+        resource_ids,
+        _ensure_disabled_after_wait(False),
+        track_changes=True,
     ) as resources_section:
         id_provider = IdProvider(resources_section)
         resource_el_list = _find_resources_or_raise(
@@ -790,12 +827,13 @@ def enable(env, resource_ids, wait):
                 resource_el_list,
                 resource.common.enable,
                 id_provider,
-                env.get_cluster_state()
+                env.get_cluster_state(),
+                env.cib_journal
             )
         )
 
 def _resource_list_enable_disable(
-    resource_el_list, func, id_provider, cluster_state
+    resource_el_list, func, id_provider, cluster_state, journal=None
 ):
     report_list = []
     for resource_el in resource_el_list:
@@ -803,7 +841,7 @@ def _resource_list_enable_disable(
         try:
             if not is_resource_managed(cluster_state, res_id):
                 report_list.append(reports.resource_is_unmanaged(res_id))
-            func(resource_el, id_provider)
+            func(resource_el, id_provider, journal=journal)
         except ResourceNotFound:
             report_list.append(
                 reports.id_not_found(
@@ -820,7 +858,7 @@ def unmanage(env, resource_ids, with_monitor=False):
     strings resource_ids -- ids of the resources to become unmanaged
     bool with_monitor -- disable resources' monitor operations
     """
-    with resource_environment(env) as resources_section:
+    with resource_environment(env, track_changes=True) as resources_section:
         id_provider = IdProvider(resources_section)
         resource_el_list = _find_resources_or_raise(
             resources_section,
@@ -830,7 +868,9 @@ def unmanage(env, resource_ids, with_monitor=False):
         primitives = []
 
         for resource_el in resource_el_list:
-            resource.common.unmanage(resource_el, id_provider)
+            resource.common.unmanage(
+                resource_el, id_provider, journal=env.cib_journal
+            )
             if with_monitor:
                 primitives.extend(
                     resource.common.find_primitives(resource_el)
@@ -841,7 +881,7 @@ def unmanage(env, resource_ids, with_monitor=False):
                 resource_el,
                 ["monitor"]
             ):
-                resource.operations.disable(op)
+                resource.operations.disable(op, journal=env.cib_journal)
 
 def manage(env, resource_ids, with_monitor=False):
     """
@@ -850,7 +890,7 @@ def manage(env, resource_ids, with_monitor=False):
     strings resource_ids -- ids of the resources to become managed
     bool with_monitor -- enable resources' monitor operations
     """
-    with resource_environment(env) as resources_section:
+    with resource_environment(env, track_changes=True) as resources_section:
         id_provider = IdProvider(resources_section)
         report_list = []
         resource_el_list = _find_resources_or_raise(
@@ -861,7 +901,9 @@ def manage(env, resource_ids, with_monitor=False):
         primitives = []
 
         for resource_el in resource_el_list:
-            resource.common.manage(resource_el, id_provider)
+            resource.common.manage(
+                resource_el, id_provider, journal=env.cib_journal
+            )
             primitives.extend(
                 resource.common.find_primitives(resource_el)
             )
@@ -876,7 +918,7 @@ def manage(env, resource_ids, with_monitor=False):
             )
             if with_monitor:
                 for op in op_list:
-                    resource.operations.enable(op)
+                    resource.operations.enable(op, journal=env.cib_journal)
             else:
                 monitor_enabled = False
                 for op in op_list:
@@ -1068,7 +1110,7 @@ class _MoveBanTemplate():
         # get current status for wait processing
         if wait is not False:
             resource_running_on_before = get_resource_state(
-                env.get_cluster_state(),
+                env.get_cluster_state(trusted_source=True),
                 resource_id
             )
 
@@ -1095,9 +1137,21 @@ class _MoveBanTemplate():
 
         # process wait
         if wait is not False:
-            wait_for_idle(env.cmd_runner(), env.get_wait_timeout(wait))
+            def is_moved(state):
+                return self._report_wait_result(
+                    resource_id,
+                    node,
+                    resource_running_on_before,
+                    get_resource_state(state, resource_id),
+                ).severity == severities.INFO
             resource_running_on_after = get_resource_state(
-                env.get_cluster_state(),
+                env.wait_for_cluster_state(
+                    wait,
+                    # A stopped resource stays stopped, there is nothing to
+                    # watch for. Wait for the cluster to settle instead.
+                    is_moved if resource_running_on_before else None,
+                    [resource_id],
+                ),
                 resource_id
             )
             env.report_processor.process(
@@ -1253,9 +1307,8 @@ def unmove_unban(
 
     # process wait
     if wait is not False:
-        wait_for_idle(env.cmd_runner(), env.get_wait_timeout(wait))
         env.report_processor.process(
-            info_resource_state(env.get_cluster_state(), resource_id)
+            info_resource_state(env.wait_for_cluster_state(wait), resource_id)
         )
 
 def _find_resources_or_raise(
@@ -1,4 +1,6 @@
-from pcs.lib import resource_agent
+from pcs import settings
+from pcs.lib import reports, resource_agent
+from pcs.lib.errors import LibraryError
 
 
 def list_standards(lib_env):
@@ -69,6 +71,31 @@ def list_agents(lib_env, describe=True, search=None):
     )
 
 
+def refresh_metadata_cache(lib_env):
+    """
+    Drop all cached metadata of agents and cache metadata of resource and
+        stonith agents installed on the local host
+    """
+    metadata_cache = resource_agent.Agent.get_metadata_cache()
+    if metadata_cache is None:
+        raise LibraryError(reports.agent_metadata_cache_disabled())
+    metadata_cache.clear()
+    runner = lib_env.cmd_runner()
+    # loading descriptions of the agents puts their metadata to the cache
+    list_agents(lib_env, describe=True)
+    _complete_agent_list(
+        runner,
+        resource_agent.list_stonith_agents(runner),
+        True,
+        None,
+        resource_agent.StonithAgent
+    )
+    try:
+        resource_agent.FencedMetadata(runner).get_parameters()
+    except resource_agent.ResourceAgentError:
+        pass
+
+
 def _complete_agent_list(
     runner, agent_names, describe, search, metadata_class
 ):
@@ -79,31 +106,44 @@ def _complete_agent_list(
             name for name in agent_names if search_lower in name.lower()
         ]
 
-    # complete the output and load descriptions if requested
     agent_list = []
     for name in agent_names:
         try:
-            agent_metadata = metadata_class(runner, name)
+            agent_list.append(metadata_class(runner, name))
+        except resource_agent.ResourceAgentError:
+            #InvalidResourceAgentName - invalid name cannot be used with a new
+            #resource. The list of names is gained from "crm_resource" whilst
+            #pcs is doing the validation. So there can be a name that pcs does
+            #not recognize as valid.
+            pass
+
+    if describe:
+        # load the descriptions at once instead of one agent after another
+        resource_agent.prefetch_metadata(
+            runner,
+            agent_list,
+            settings.agent_metadata_max_parallel_processes
+        )
+
+    # complete the output
+    agent_info_list = []
+    for agent in agent_list:
+        try:
             if describe:
-                agent_list.append(agent_metadata.get_description_info())
+                agent_info_list.append(agent.get_description_info())
             else:
-                agent_list.append(agent_metadata.get_name_info())
+                agent_info_list.append(agent.get_name_info())
         except resource_agent.ResourceAgentError:
             #we don't return it in the list:
             #
             #UnableToGetAgentMetadata - if we cannot get valid metadata, it's
             #not a resource agent
             #
-            #InvalidResourceAgentName - invalid name cannot be used with a new
-            #resource. The list of names is gained from "crm_resource" whilst
-            #pcs is doing the validation. So there can be a name that pcs does
-            #not recognize as valid.
-            #
             #Providing a warning is not the way (currently). Other components
             #read this list and do not expect warnings there. Using the stderr
             #(to separate warnings) is currently difficult.
             pass
-    return agent_list
+    return agent_info_list
 
 
 def describe_agent(lib_env, agent_name):
@@ -156,7 +156,9 @@ def create_in_group(
             resource.common.disable(stonith_element, id_provider)
         validate_id(group_id, "group name")
         resource.group.place_resource(
-            resource.group.provide_group(resources_section, group_id),
+            resource.group.provide_group(
+                resources_section, group_id, id_provider
+            ),
             stonith_element,
             adjacent_resource_id,
             put_after_adjacent,
@@ -1,7 +1,16 @@
-from pcs.common.node_communicator import NodeCommunicatorFactory
+from pcs.common.node_communicator import (
+    ConnectionPool,
+    NodeCommunicatorFactory,
+)
 from pcs.common.tools import Version
 from pcs.lib import reports
 from pcs.lib.booth.env import BoothEnv
+from pcs.lib.cib.diff import (
+    DiffNotSupported,
+    diff_cib_subtrees,
+    diff_cibs,
+)
+from pcs.lib.cib.journal import CibChangeJournal
 from pcs.lib.cib.tools import get_cib_crm_feature_set
 from pcs.lib.node import get_existing_nodes_names
 from pcs.lib.pacemaker.env import PacemakerEnv
@@ -29,17 +38,18 @@ from pcs.lib.node_communication import (
     NodeTargetLibFactory,
 )
 from pcs.lib.pacemaker.live import (
+    CibPatchRejectedException,
     diff_cibs_xml,
     ensure_cib_version,
     ensure_wait_for_idle_support,
     get_cib,
     get_cib_xml,
-    get_cluster_status_xml,
+    get_cluster_state,
     push_cib_diff_xml,
     replace_cib_configuration,
     wait_for_idle,
+    wait_for_state,
 )
-from pcs.lib.pacemaker.state import get_cluster_state_dom
 from pcs.lib.pacemaker.values import get_valid_timeout_seconds
 from pcs.lib.tools import write_tmpfile
 from pcs.lib.xml_tools import etree_to_str
@@ -60,7 +70,14 @@ class LibraryEnvironment:
         booth=None,
         known_hosts_getter=None,
         request_timeout=None,
+        defer_cib_push=False,
     ):
+        """
+        bool defer_cib_push -- keep a modified mocked CIB in memory instead of
+            pushing it by pacemaker tools, the CIB is neither loaded nor
+            validated by pacemaker tools then; for callers pushing the final
+            CIB once all their changes are done
+        """
         # pylint: disable=too-many-arguments
         self._logger = logger
         self._report_processor = report_processor
@@ -82,14 +99,20 @@ class LibraryEnvironment:
         self._known_hosts = None
         self._cib_upgrade_reported = False
         self._cib_data_tmp_file = None
+        self._defer_cib_push = defer_cib_push
         self.__loaded_cib_diff_source = None
         self.__loaded_cib_diff_source_feature_set = None
         self.__loaded_cib_to_modify = None
+        self.__loaded_cib_journal = None
+        # Connections to nodes are reused by all requests done within this
+        # environment, i.e. by all communication rounds of a library command.
+        self._connection_pool = ConnectionPool()
         self._communicator_factory = NodeCommunicatorFactory(
             LibCommunicatorLogger(self.logger, self.report_processor),
             self.user_login,
             self.user_groups,
-            self._request_timeout
+            self._request_timeout,
+            connection_pool=self._connection_pool,
         )
 
         self.__timeout_cache = {}
@@ -110,10 +133,21 @@ class LibraryEnvironment:
     def user_groups(self):
         return self._user_groups
 
-    def get_cib(self, minimal_version=None):
+    def get_cib(self, minimal_version=None, track_changes=False):
+        """
+        Load the CIB
+
+        Version minimal_version -- upgrade the CIB to at least this version
+        bool track_changes -- create a journal of changes of the CIB, the
+            caller is responsible for announcing all changes to it, see
+            cib_journal
+        """
         if self.__loaded_cib_diff_source is not None:
             raise AssertionError("CIB has already been loaded")
-        self.__loaded_cib_diff_source = get_cib_xml(self.cmd_runner())
+        if self.__is_cib_push_deferred:
+            self.__loaded_cib_diff_source = self.final_mocked_cib_content
+        else:
+            self.__loaded_cib_diff_source = get_cib_xml(self.cmd_runner())
         self.__loaded_cib_to_modify = get_cib(self.__loaded_cib_diff_source)
         if minimal_version is not None:
             upgraded_cib = ensure_cib_version(
@@ -137,6 +171,10 @@ class LibraryEnvironment:
             or
             Version(0, 0, 0)
         )
+        if track_changes:
+            self.__loaded_cib_journal = CibChangeJournal(
+                self.__loaded_cib_to_modify
+            )
         return self.__loaded_cib_to_modify
 
     @property
@@ -145,8 +183,25 @@ class LibraryEnvironment:
             raise AssertionError("CIB has not been loaded")
         return self.__loaded_cib_to_modify
 
-    def get_cluster_state(self):
-        return get_cluster_state_dom(get_cluster_status_xml(self.cmd_runner()))
+    @property
+    def cib_journal(self):
+        """
+        Return a journal of changes of the loaded CIB, None if not tracked
+        """
+        if self.__loaded_cib_diff_source is None:
+            raise AssertionError("CIB has not been loaded")
+        return self.__loaded_cib_journal
+
+    def get_cluster_state(self, trusted_source=False):
+        """
+        Return the current cluster state
+
+        bool trusted_source -- skip validation of crm_mon output, useful when
+            the state is loaded repeatedly
+        """
+        return get_cluster_state(
+            self.cmd_runner(), trusted_source=trusted_source
+        )
 
     def get_wait_timeout(self, wait):
         if wait is False:
@@ -168,24 +223,66 @@ class LibraryEnvironment:
         """
         self.get_wait_timeout(wait)
 
-    def push_cib(self, custom_cib=None, wait=False):
+    def wait_for_cluster_state(
+        self, wait, state_reached=None, resource_ids=None
+    ):
+        """
+        Wait for the cluster to settle, return the resulting cluster state
+
+        The waiting ends early when the cluster state satisfies state_reached.
+        The cluster state is loaded once the waiting ends only if it is not
+        known already.
+
+        mixed wait -- None: wait default timeout, int: wait timeout
+        callable state_reached -- takes a ClusterState, returns True if the
+            waiting is done; None means wait for the cluster to settle
+        iterable resource_ids -- ids of resources state_reached depends on, the
+            cluster state is checked only once their status changes
+        """
+        timeout = self.get_wait_timeout(wait)
+        if state_reached is not None:
+            cluster_state = wait_for_state(
+                self.cmd_runner(), timeout, state_reached, resource_ids
+            )
+            if cluster_state is not None:
+                return cluster_state
+        else:
+            wait_for_idle(self.cmd_runner(), timeout)
+        return self.get_cluster_state(trusted_source=True)
+
+    def push_cib(
+        self, custom_cib=None, wait=False, wait_state_reached=None,
+        wait_state_resource_ids=None
+    ):
         """
         Push previously loaded instance of CIB or a custom CIB
 
+        Return the cluster state which ended the waiting early, None if the
+        waiting did not end early.
+
         etree custom_cib -- push a custom CIB instead of a loaded instance
             (allows to push an externally provided CIB and replace the one in
             the cluster completely)
         mixed wait -- how many seconds to wait for pacemaker to process new CIB
             or False for not waiting at all
+        callable wait_state_reached -- takes a ClusterState, returns True if
+            the waiting can end before pacemaker processes the new CIB
+            completely
+        iterable wait_state_resource_ids -- ids of resources wait_state_reached
+            depends on, the cluster state is checked only once their status
+            changes
         """
+        wait_state = (wait_state_reached, wait_state_resource_ids)
         if custom_cib is not None:
             if self.__loaded_cib_diff_source is not None:
                 raise AssertionError(
                     "CIB has been loaded, cannot push custom CIB"
                 )
-            return self.__push_cib_full(custom_cib, wait)
+            return self.__push_cib_full(custom_cib, wait, wait_state)
         if self.__loaded_cib_diff_source is None:
             raise AssertionError("CIB has not been loaded")
+        if self.__is_cib_push_deferred:
+            return self.__keep_cib_in_memory(wait)
         # Push by diff works with crm_feature_set > 3.0.8, see
         # https://bugzilla.redhat.com/show_bug.cgi?id=1488044 for details. We
         # only check the version if a CIB has been loaded, otherwise the push
@@ -202,49 +299,168 @@ class LibraryEnvironment:
                     self.__loaded_cib_diff_source_feature_set
                 )
             )
-            return self.__push_cib_full(self.__loaded_cib_to_modify, wait=wait)
-        return self.__push_cib_diff(wait=wait)
+            return self.__push_cib_full(
+                self.__loaded_cib_to_modify, wait, wait_state
+            )
+        return self.__push_cib_diff(wait, wait_state)
+
+    def push_cib_changes(self, cib_original_xml, cib_modified_xml):
+        """
+        Push changes made to a CIB outside of this environment
+
+        Only the differences between the two CIBs are pushed, so changes made
+        to the CIB meanwhile by others are kept.
+
+        string cib_original_xml -- the CIB the changes have been made to
+        string cib_modified_xml -- the CIB containing the changes
+        """
+        if self.__loaded_cib_diff_source is not None:
+            raise AssertionError("CIB has been loaded, cannot push CIB changes")
+        cmd_runner = self.cmd_runner()
+        cib_original = get_cib(cib_original_xml)
+        cib_modified = get_cib(cib_modified_xml)
+        feature_set = (
+            get_cib_crm_feature_set(cib_original, none_if_missing=True)
+            or
+            Version(0, 0, 0)
+        )
+        if feature_set < MIN_FEATURE_SET_VERSION_FOR_DIFF:
+            self.report_processor.process(
+                reports.cib_push_forced_full_due_to_crm_feature_set(
+                    MIN_FEATURE_SET_VERSION_FOR_DIFF, feature_set
+                )
+            )
+            replace_cib_configuration(cmd_runner, cib_modified)
+            return
+        self.__push_cib_diff_xml(
+            cmd_runner,
+            lambda: diff_cibs(cib_original, cib_modified),
+            cib_original_xml,
+            lambda: cib_modified_xml,
+        )
 
-    def __push_cib_full(self, cib_to_push, wait=False):
+    def __push_cib_full(self, cib_to_push, wait, wait_state):
         cmd_runner = self.cmd_runner()
-        self.__do_push_cib(
+        return self.__do_push_cib(
             cmd_runner,
             lambda: replace_cib_configuration(cmd_runner, cib_to_push),
-            wait
+            wait,
+            wait_state
         )
 
-    def __push_cib_diff(self, wait=False):
+    def __push_cib_diff(self, wait, wait_state):
         cmd_runner = self.cmd_runner()
-        self.__do_push_cib(
+        return self.__do_push_cib(
             cmd_runner,
             lambda: self.__main_push_cib_diff(cmd_runner),
-            wait
+            wait,
+            wait_state
         )
 
     def __main_push_cib_diff(self, cmd_runner):
+        cib_to_modify = self.__loaded_cib_to_modify
+        self.__push_cib_diff_xml(
+            cmd_runner,
+            self.__get_native_cib_diff,
+            self.__loaded_cib_diff_source,
+            lambda: etree_to_str(cib_to_modify),
+        )
+
+    def __get_native_cib_diff(self):
+        if self.__loaded_cib_journal is not None:
+            # Only the changed parts of the CIB need to be compared
+            return diff_cib_subtrees(
+                self.__loaded_cib_journal.get_changed_subtrees()
+            )
+        return diff_cibs(
+            get_cib(self.__loaded_cib_diff_source),
+            self.__loaded_cib_to_modify
+        )
+
+    def __push_cib_diff_xml(
+        self, cmd_runner, get_native_diff, cib_old_xml, get_cib_new_xml
+    ):
+        """
+        Push a diff of CIBs, let crm_diff produce it if needed
+
+        The diff is computed natively. Crm_diff is used if the native diff
+        cannot express the changes or if pacemaker cannot apply the native
+        diff.
+
+        callable get_native_diff -- returns the native diff, raises
+            DiffNotSupported
+        string cib_old_xml -- the original CIB
+        callable get_cib_new_xml -- returns the modified CIB as a string
+        """
+        try:
+            cib_diff_xml = get_native_diff()
+        except DiffNotSupported:
+            cib_diff_xml = None
+        if cib_diff_xml is not None:
+            if not cib_diff_xml:
+                return
+            try:
+                push_cib_diff_xml(cmd_runner, cib_diff_xml)
+                return
+            except CibPatchRejectedException as e:
+                # Do not fail due to a flaw in the native diff. Other errors,
+                # e.g. the CIB has been changed meanwhile, are not recoverable
+                # by using crm_diff.
+                for report in e.args:
+                    self.report_processor.process(
+                        reports.cib_push_native_diff_rejected(
+                            report.info["reason"]
+                        )
+                    )
         cib_diff_xml = diff_cibs_xml(
             cmd_runner,
             self.report_processor,
-            self.__loaded_cib_diff_source,
-            etree_to_str(self.__loaded_cib_to_modify)
+            cib_old_xml,
+            get_cib_new_xml()
         )
         if cib_diff_xml:
             push_cib_diff_xml(cmd_runner, cib_diff_xml)
 
-    def __do_push_cib(self, cmd_runner, push_strategy, wait):
-        timeout = self.get_wait_timeout(wait)
-        push_strategy()
+    def __keep_cib_in_memory(self, wait):
+        # raises if waiting has been requested as the CIB is not live
+        self.get_wait_timeout(wait)
+        self._cib_data = etree_to_str(self.__loaded_cib_to_modify)
+        if self._cib_data_tmp_file:
+            # the file holds the previous CIB, a new one is created on demand
+            self._cib_data_tmp_file.close()
+            self._cib_data_tmp_file = None
+        self.__forget_loaded_cib()
+
+    def __forget_loaded_cib(self):
         self._cib_upgrade_reported = False
         self.__loaded_cib_diff_source = None
         self.__loaded_cib_diff_source_feature_set = None
         self.__loaded_cib_to_modify = None
+        self.__loaded_cib_journal = None
+
+    def __do_push_cib(
+        self, cmd_runner, push_strategy, wait, wait_state
+    ):
+        timeout = self.get_wait_timeout(wait)
+        push_strategy()
+        self.__forget_loaded_cib()
         if self.is_cib_live and timeout is not False:
+            state_reached, resource_ids = wait_state
+            if state_reached is not None:
+                return wait_for_state(
+                    cmd_runner, timeout, state_reached, resource_ids
+                )
             wait_for_idle(cmd_runner, timeout)
+        return None
 
     @property
     def is_cib_live(self):
         return self._cib_data is None
 
+    @property
+    def __is_cib_push_deferred(self):
+        return self._defer_cib_push and not self.is_cib_live
+
     @property
     def final_mocked_cib_content(self):
         if self.is_cib_live:
@@ -371,6 +587,12 @@ class LibraryEnvironment:
             request_timeout=request_timeout
         )
 
+    def close_node_connections(self):
+        """
+        Release connections to nodes kept for reuse
+        """
+        self._connection_pool.close()
+
     def get_node_target_factory(self):
         return NodeTargetLibFactory(
             self.__get_known_hosts(), self.report_processor
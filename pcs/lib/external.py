@@ -1,7 +1,13 @@
+import collections
+import io
+import logging
+import os
 import re
+import selectors
 from shlex import quote as shell_quote
 import signal
 import subprocess
+import time
 
 from pcs import settings
 from pcs.common.system import is_systemd as is_systemctl
@@ -293,6 +299,193 @@ class CommandRunner:
     def run(
         self, args, stdin_string=None, env_extend=None, binary_output=False
     ):
+        log_args, env_vars = self._log_start(args, stdin_string, env_extend)
+        try:
+            process = self._start_process(
+                args, env_vars, stdin_string is not None, not binary_output
+            )
+            out_std, out_err = process.communicate(stdin_string)
+            retval = process.returncode
+        except OSError as e:
+            raise LibraryError(
+                reports.run_external_process_error(log_args, e.strerror)
+            )
+        self._log_finish(log_args, retval, out_std, out_err)
+        return out_std, out_err, retval
+
+    def run_parallel(self, command_list, max_processes):
+        """
+        Run commands concurrently, return a list of (stdout, stderr, retval)
+            tuples in the order of the commands
+
+        iterable command_list -- (args, env_extend) tuple for each command
+        int max_processes -- maximal number of commands running at the same
+            time
+        """
+        command_list = list(command_list)
+        max_processes = max(1, max_processes)
+        result_list = [None] * len(command_list)
+        waiting_list = collections.deque(enumerate(command_list))
+        running_dict = {}
+        selector = selectors.DefaultSelector()
+        try:
+            while waiting_list or running_dict:
+                while waiting_list and len(running_dict) < max_processes:
+                    index, (args, env_extend) = waiting_list.popleft()
+                    log_args, env_vars = self._log_start(args, None, env_extend)
+                    try:
+                        process = self._start_process(
+                            args, env_vars, False, False
+                        )
+                    except OSError as e:
+                        raise LibraryError(
+                            reports.run_external_process_error(
+                                log_args, e.strerror
+                            )
+                        )
+                    output_dict = {process.stdout: [], process.stderr: []}
+                    running_dict[index] = (process, log_args, output_dict)
+                    for stream in output_dict:
+                        selector.register(stream, selectors.EVENT_READ, index)
+                for key, dummy_events in selector.select():
+                    process, log_args, output_dict = running_dict[key.data]
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        output_dict[key.fileobj].append(chunk)
+                        continue
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    if not all(stream.closed for stream in output_dict):
+                        continue
+                    del running_dict[key.data]
+                    retval = process.wait()
+                    out_std = _decode_output(output_dict[process.stdout])
+                    out_err = _decode_output(output_dict[process.stderr])
+                    self._log_finish(log_args, retval, out_std, out_err)
+                    result_list[key.data] = (out_std, out_err, retval)
+        finally:
+            selector.close()
+            for process, dummy_log_args, output_dict in running_dict.values():
+                for stream in output_dict:
+                    stream.close()
+                process.kill()
+                process.wait()
+        return result_list
+
+    def run_interruptible(
+        self, args, interrupt_check, check_interval, max_check_interval=None
+    ):
+        """
+        Run a command, stop it as soon as interrupt_check returns True
+
+        Return (stdout, stderr, retval, interrupted) tuple, where interrupted
+        tells if the command has been stopped before it finished.
+
+        list args -- the command and its arguments
+        callable interrupt_check -- called repeatedly while the command is
+            running, returns True if the command is to be stopped
+        float check_interval -- seconds between two calls of interrupt_check
+        float max_check_interval -- if specified, the interval is doubled after
+            each call of interrupt_check up to this number of seconds
+        """
+        log_args, env_vars = self._log_start(args, None, None)
+        try:
+            process = self._start_process(args, env_vars, False, False)
+        except OSError as e:
+            raise LibraryError(
+                reports.run_external_process_error(log_args, e.strerror)
+            )
+        output_dict = {process.stdout: [], process.stderr: []}
+        interrupted = False
+        selector = selectors.DefaultSelector()
+        try:
+            for stream in output_dict:
+                selector.register(stream, selectors.EVENT_READ)
+            next_check = time.monotonic() + check_interval
+            while selector.get_map():
+                for key, dummy_events in selector.select(
+                    max(0, next_check - time.monotonic())
+                ):
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        output_dict[key.fileobj].append(chunk)
+                    else:
+                        selector.unregister(key.fileobj)
+                if not selector.get_map() or time.monotonic() < next_check:
+                    continue
+                if interrupt_check():
+                    interrupted = True
+                    break
+                if max_check_interval is not None:
+                    check_interval = min(2 * check_interval, max_check_interval)
+                next_check = time.monotonic() + check_interval
+        finally:
+            selector.close()
+            for stream in output_dict:
+                stream.close()
+            if process.poll() is None:
+                process.terminate()
+            retval = process.wait()
+        out_std = _decode_output(output_dict[process.stdout])
+        out_err = _decode_output(output_dict[process.stderr])
+        self._log_finish(log_args, retval, out_std, out_err)
+        return out_std, out_err, retval, interrupted
+
+    def run_streaming(self, args, stdout_sink, env_extend=None):
+        """
+        Run a command, pass its stdout to a sink as it is being read
+
+        Return (stdout_preview, stderr, retval) tuple. The stdout is not kept
+        in memory, only its beginning is returned and reported for debugging.
+        The stderr is captured up to the same length.
+
+        list args -- the command and its arguments
+        callable stdout_sink -- called with each chunk of the stdout as bytes,
+            e.g. the feed method of an lxml parser
+        dict env_extend -- variables added to the command's environment
+        """
+        log_args, env_vars = self._log_start(args, None, env_extend)
+        try:
+            process = self._start_process(args, env_vars, False, False)
+        except OSError as e:
+            raise LibraryError(
+                reports.run_external_process_error(log_args, e.strerror)
+            )
+        output_dict = {
+            process.stdout: _OutputPreview(
+                settings.external_process_output_preview_length
+            ),
+            process.stderr: _OutputPreview(
+                settings.external_process_output_preview_length
+            ),
+        }
+        selector = selectors.DefaultSelector()
+        try:
+            for stream in output_dict:
+                selector.register(stream, selectors.EVENT_READ)
+            while selector.get_map():
+                for key, dummy_events in selector.select():
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    output_dict[key.fileobj].add(chunk)
+                    if key.fileobj is process.stdout:
+                        stdout_sink(chunk)
+        finally:
+            selector.close()
+            for stream in output_dict:
+                stream.close()
+            # the sink failed, nobody reads the rest of the output
+            if process.poll() is None:
+                process.kill()
+            retval = process.wait()
+        out_std = output_dict[process.stdout].get_text()
+        out_err = output_dict[process.stderr].get_text()
+        self._log_finish(log_args, retval, out_std, out_err)
+        return out_std, out_err, retval
+
+    def _log_start(self, args, stdin_string, env_extend):
         # Allow overriding default settings. If a piece of code really wants to
         # set own PATH or CIB_file, we must allow it. I.e. it wants to run
         # a pacemaker tool on a CIB in a file but cannot afford the risk of
@@ -303,69 +496,104 @@ class CommandRunner:
         )
 
         log_args = " ".join([shell_quote(x) for x in args])
-        self._logger.debug(
-            "Running: {args}\nEnvironment:{env_vars}{stdin_string}".format(
-                args=log_args,
-                stdin_string=("" if not stdin_string else (
-                    "\n--Debug Input Start--\n{0}\n--Debug Input End--"
-                    .format(stdin_string)
-                )),
-                env_vars=("" if not env_vars else (
-                    "\n" + "\n".join([
-                        "  {0}={1}".format(key, val)
-                        for key, val in sorted(env_vars.items())
-                    ])
-                ))
+        # The input may be a whole CIB, do not format it for nothing.
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "Running: {args}\nEnvironment:{env_vars}{stdin_string}".format(
+                    args=log_args,
+                    stdin_string=("" if not stdin_string else (
+                        "\n--Debug Input Start--\n{0}\n--Debug Input End--"
+                        .format(stdin_string)
+                    )),
+                    env_vars=("" if not env_vars else (
+                        "\n" + "\n".join([
+                            "  {0}={1}".format(key, val)
+                            for key, val in sorted(env_vars.items())
+                        ])
+                    ))
+                )
             )
-        )
         self._reporter.process(
             reports.run_external_process_started(
-                log_args, stdin_string, env_vars
+                log_args, _get_preview(stdin_string), env_vars
             )
         )
+        return log_args, env_vars
+
+    @staticmethod
+    def _start_process(args, env_vars, use_stdin, text_output):
+        # pylint: disable=subprocess-popen-preexec-fn
+        # this is OK as pcs is only single-threaded application
+        return subprocess.Popen(
+            args,
+            # Some commands react differently if they get anything via stdin
+            stdin=(subprocess.PIPE if use_stdin else subprocess.DEVNULL),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=(
+                lambda: signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+            ),
+            close_fds=True,
+            shell=False,
+            env=env_vars,
+            # decodes newlines and in python3 also converts bytes to str
+            universal_newlines=text_output
+        )
 
-        try:
-            # pylint: disable=subprocess-popen-preexec-fn
-            # this is OK as pcs is only single-threaded application
-            process = subprocess.Popen(
-                args,
-                # Some commands react differently if they get anything via stdin
-                stdin=(
-                    subprocess.PIPE
-                    if stdin_string is not None
-                    else subprocess.DEVNULL
-                ),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=(
-                    lambda: signal.signal(signal.SIGPIPE, signal.SIG_DFL)
-                ),
-                close_fds=True,
-                shell=False,
-                env=env_vars,
-                # decodes newlines and in python3 also converts bytes to str
-                universal_newlines=(not binary_output)
-            )
-            out_std, out_err = process.communicate(stdin_string)
-            retval = process.returncode
-        except OSError as e:
-            raise LibraryError(
-                reports.run_external_process_error(log_args, e.strerror)
-            )
-
-        self._logger.debug(
-            (
-                "Finished running: {args}\nReturn value: {retval}"
-                + "\n--Debug Stdout Start--\n{out_std}\n--Debug Stdout End--"
-                + "\n--Debug Stderr Start--\n{out_err}\n--Debug Stderr End--"
-            ).format(
-                args=log_args,
-                retval=retval,
-                out_std=out_std,
-                out_err=out_err
+    def _log_finish(self, log_args, retval, out_std, out_err):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                (
+                    "Finished running: {args}\nReturn value: {retval}"
+                    "\n--Debug Stdout Start--\n{out_std}\n--Debug Stdout End--"
+                    "\n--Debug Stderr Start--\n{out_err}\n--Debug Stderr End--"
+                ).format(
+                    args=log_args,
+                    retval=retval,
+                    out_std=out_std,
+                    out_err=out_err
+                )
             )
-        )
         self._reporter.process(reports.run_external_process_finished(
-            log_args, retval, out_std, out_err
+            log_args, retval, _get_preview(out_std), _get_preview(out_err)
         ))
-        return out_std, out_err, retval
+
+
+class _OutputPreview:
+    """
+    Beginning of an output of a process read in chunks
+    """
+    def __init__(self, max_length):
+        self.__max_length = max_length
+        self.__chunk_list = []
+        self.__length = 0
+        self.__truncated = False
+
+    def add(self, chunk):
+        if self.__length + len(chunk) > self.__max_length:
+            chunk = chunk[:self.__max_length - self.__length]
+            self.__truncated = True
+        if chunk:
+            self.__chunk_list.append(chunk)
+            self.__length += len(chunk)
+
+    def get_text(self):
+        # the preview may end in the middle of a multibyte character
+        text = io.TextIOWrapper(
+            io.BytesIO(b"".join(self.__chunk_list)), errors="replace"
+        ).read()
+        return text + _TRUNCATION_NOTE if self.__truncated else text
+
+
+_TRUNCATION_NOTE = "\n... (truncated)"
+
+def _get_preview(text):
+    max_length = settings.external_process_output_preview_length
+    if text is None or len(text) <= max_length:
+        return text
+    return text[:max_length] + _TRUNCATION_NOTE
+
+
+def _decode_output(chunk_list):
+    # decode the output the same way universal_newlines does in Popen
+    return io.TextIOWrapper(io.BytesIO(b"".join(chunk_list))).read()
@@ -9,13 +9,17 @@ from pcs.common.tools import (
 from pcs.lib import reports
 from pcs.lib.cib.tools import get_pacemaker_version_by_which_cib_was_validated
 from pcs.lib.errors import LibraryError
-from pcs.lib.pacemaker.state import ClusterState
+from pcs.lib.pacemaker.state import ClusterStateParser
 from pcs.lib.tools import write_tmpfile
 from pcs.lib.xml_tools import etree_to_str
 
 
 __EXITCODE_WAIT_TIMEOUT = 124
 __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT = 105
+# cibadmin --patch exit codes meaning the patch could not be applied or the
+# patched CIB is not valid: data error, configuration error and diff failed in
+# pacemaker 2, schema validation error and diff failed in pacemaker 1.1
+__EXITCODE_CIB_PATCH_REJECTED_LIST = (65, 78, 104, 203, 206)
 __RESOURCE_REFRESH_OPERATION_COUNT_THRESHOLD = 100
 
 class CrmMonErrorException(LibraryError):
@@ -24,18 +28,43 @@ class CrmMonErrorException(LibraryError):
 class FenceHistoryCommandErrorException(Exception):
     pass
 
+class CibPatchRejectedException(LibraryError):
+    pass
+
 ### status
 
 def get_cluster_status_xml(runner):
-    stdout, stderr, retval = runner.run(
-        [__exec("crm_mon"), "--one-shot", "--as-xml", "--inactive"]
-    )
+    stdout, stderr, retval = runner.run(_get_crm_mon_args())
     if retval != 0:
         raise CrmMonErrorException(
             reports.cluster_state_cannot_load(join_multilines([stderr, stdout]))
         )
     return stdout
 
+def get_cluster_state(runner, trusted_source=False):
+    """
+    Return the current cluster state
+
+    The crm_mon xml is processed while it is being read, it is not held in
+    memory.
+
+    CommandRunner runner
+    bool trusted_source -- skip validation of crm_mon output, useful when
+        the state is loaded repeatedly
+    """
+    parser = ClusterStateParser(trusted_source)
+    stdout, stderr, retval = runner.run_streaming(
+        _get_crm_mon_args(), parser.feed
+    )
+    if retval != 0:
+        raise CrmMonErrorException(
+            reports.cluster_state_cannot_load(join_multilines([stderr, stdout]))
+        )
+    return parser.close()
+
+def _get_crm_mon_args():
+    return [__exec("crm_mon"), "--one-shot", "--as-xml", "--inactive"]
+
 ### cib
 def get_cib_xml_cmd_results(runner, scope=None):
     command = [__exec("cibadmin"), "--local", "--query"]
@@ -109,6 +138,8 @@ def push_cib_diff_xml(runner, cib_diff_xml):
         "--xml-pipe",
     ]
     stdout, stderr, retval = runner.run(cmd, stdin_string=cib_diff_xml)
+    if retval in __EXITCODE_CIB_PATCH_REJECTED_LIST:
+        raise CibPatchRejectedException(reports.cib_push_error(stderr, stdout))
     if retval != 0:
         raise LibraryError(reports.cib_push_error(stderr, stdout))
 
@@ -215,10 +246,100 @@ def wait_for_idle(runner, timeout=None):
     runner is preconfigured object for running external programs
     string timeout is waiting timeout
     """
+    stdout, stderr, retval = runner.run(_get_wait_for_idle_args(timeout))
+    _ensure_wait_for_idle_success(stdout, stderr, retval)
+
+def wait_for_state(runner, timeout, state_reached, resource_ids=None):
+    """
+    Wait until the cluster settles or until its state satisfies a condition
+
+    The cluster state is checked repeatedly while waiting for the cluster to
+    settle. Return the cluster state which satisfied the condition or None if
+    the waiting ended because the cluster settled. Raise LibraryError if the
+    waiting failed.
+
+    CommandRunner runner
+    string timeout -- waiting timeout
+    callable state_reached -- takes a ClusterState, returns True if the
+        waiting is done
+    iterable resource_ids -- ids of resources the condition depends on, the
+        cluster state is checked only once their operation history changes;
+        None means the operation history of all resources is watched
+    """
+    reached_state_list = []
+    checked_history = None
+    def check_state():
+        nonlocal checked_history
+        # Loading the cluster state is expensive. Skip it if no operation of
+        # the watched resources has been recorded since the last check.
+        history = _get_resource_operation_history(runner, resource_ids)
+        if history is not None and history == checked_history:
+            return False
+        try:
+            cluster_state = get_cluster_state(runner, trusted_source=True)
+        except LibraryError:
+            # the cluster may be busy, try again later
+            return False
+        checked_history = history
+        if state_reached(cluster_state):
+            reached_state_list.append(cluster_state)
+            return True
+        return False
+
+    stdout, stderr, retval, interrupted = runner.run_interruptible(
+        _get_wait_for_idle_args(timeout),
+        check_state,
+        settings.wait_state_check_interval,
+        settings.wait_state_check_max_interval,
+    )
+    if interrupted:
+        return reached_state_list[0]
+    _ensure_wait_for_idle_success(stdout, stderr, retval)
+    return None
+
+def _get_resource_operation_history(runner, resource_ids=None):
+    """
+    Return the operation history of resources from the CIB status as a string,
+    None on error
+
+    Only lrm_resource elements are loaded, which is cheap compared to the
+    whole CIB or the cluster state. Unlike the CIB version, the history does
+    not change on node attribute updates.
+
+    CommandRunner runner
+    iterable resource_ids -- ids of resources to get the history of, their
+        primitives are looked up in the CIB configuration; all resources if
+        not specified
+    """
+    xpath = "/cib/status/node_state/lrm/lrm_resources/lrm_resource"
+    if resource_ids:
+        # Clone instances are recorded as "id:instance", strip the instance.
+        # Implicit resources of bundles are not watched, the history of the
+        # bundled primitive is.
+        xpath += (
+            "[substring-before(concat(@id, ':'), ':')"
+            " = /cib/configuration/resources//*[{0}]"
+            "/descendant-or-self::primitive/@id]"
+        ).format(" or ".join(
+            "@id='{0}'".format(res_id) for res_id in sorted(resource_ids)
+        ))
+    stdout, dummy_stderr, retval = runner.run(
+        [__exec("cibadmin"), "--local", "--query", "--xpath", xpath]
+    )
+    if retval == __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT:
+        # no operation has been recorded yet
+        return ""
+    if retval != 0:
+        return None
+    return stdout
+
+def _get_wait_for_idle_args(timeout):
     args = [__exec("crm_resource"), "--wait"]
     if timeout is not None:
         args.append("--timeout={0}".format(timeout))
-    stdout, stderr, retval = runner.run(args)
+    return args
+
+def _ensure_wait_for_idle_success(stdout, stderr, retval):
     if retval != 0:
         # Usefull info goes to stderr - not only error messages, a list of
         # pending actions in case of timeout goes there as well.
@@ -247,25 +368,34 @@ def get_local_node_name(runner):
         )
     return stdout.strip()
 
-def get_local_node_status(runner):
+def get_local_node_status(runner, trusted_source=False):
+    """
+    Return the pacemaker status of the local node
+
+    CommandRunner runner
+    bool trusted_source -- skip validation of crm_mon output, useful when
+        the status is polled
+    """
     try:
-        cluster_status = ClusterState(get_cluster_status_xml(runner))
+        cluster_status = get_cluster_state(
+            runner, trusted_source=trusted_source
+        )
     except CrmMonErrorException:
         return {"offline": True}
     node_name = get_local_node_name(runner)
-    for node_status in cluster_status.node_section.nodes:
-        if node_status.attrs.name == node_name:
-            result = {
-                "offline": False,
-            }
-            for attr in (
-                'id', 'name', 'type', 'online', 'standby', 'standby_onfail',
-                'maintenance', 'pending', 'unclean', 'shutdown', 'expected_up',
-                'is_dc', 'resources_running',
-            ):
-                result[attr] = getattr(node_status.attrs, attr)
-            return result
-    raise LibraryError(reports.node_not_found(node_name))
+    node_status = cluster_status.get_node(node_name)
+    if node_status is None:
+        raise LibraryError(reports.node_not_found(node_name))
+    result = {
+        "offline": False,
+    }
+    for attr in (
+        'id', 'name', 'type', 'online', 'standby', 'standby_onfail',
+        'maintenance', 'pending', 'unclean', 'shutdown', 'expected_up',
+        'is_dc', 'resources_running',
+    ):
+        result[attr] = getattr(node_status, attr)
+    return result
 
 def remove_node(runner, node_name):
     stdout, stderr, retval = runner.run([
@@ -312,8 +442,8 @@ def resource_cleanup(
 
 def resource_refresh(runner, resource=None, node=None, full=False, force=None):
     if not force and not node and not resource:
-        summary = ClusterState(get_cluster_status_xml(runner)).summary
-        operations = summary.nodes.attrs.count * summary.resources.attrs.count
+        summary = get_cluster_state(runner).summary
+        operations = summary.nodes_count * summary.resources_count
         if operations > __RESOURCE_REFRESH_OPERATION_COUNT_THRESHOLD:
             raise LibraryError(
                 reports.resource_refresh_too_time_consuming(
@@ -2,191 +2,381 @@
 The intention is put there knowledge about cluster state structure.
 Hide information about underlaying xml is desired too.
 '''
-import os.path
 from collections import defaultdict
 
 from lxml import etree
 
 from pcs import settings
-from pcs.common.tools import xml_fromstring
-from pcs.lib import reports
+from pcs.lib import reports, xml_schema
 from pcs.lib.errors import LibraryError, ReportItemSeverity as severities
 from pcs.lib.pacemaker.values import (
     is_false,
     is_true,
 )
-from pcs.lib.xml_tools import find_parent
 
 class ResourceNotFound(Exception):
     pass
 
-class _Attrs:
-    def __init__(self, owner_name, attrib, required_attrs):
-        '''
-        attrib lxml.etree._Attrib - wrapped attribute collection
-        required_attrs dict of required atribute names object_name:xml_attribute
-        '''
-        self.owner_name = owner_name
-        self.attrib = attrib
-        self.required_attrs = required_attrs
-
-    def __getattr__(self, name):
-        if name in self.required_attrs.keys():
-            try:
-                attr_specification = self.required_attrs[name]
-                if isinstance(attr_specification, tuple):
-                    attr_name, attr_transform = attr_specification
-                    return attr_transform(self.attrib[attr_name])
-                return self.attrib[attr_specification]
-            except KeyError:
-                raise AttributeError(
-                    "Missing attribute '{0}' ('{1}' in source) in '{2}'"
-                    .format(name, self.required_attrs[name], self.owner_name)
-                )
-
-        raise AttributeError(
-            "'{0}' does not declare attribute '{1}'"
-            .format(self.owner_name, name)
-        )
-
-class _Children:
-    def __init__(self, owner_name, dom_part, children, sections):
-        self.owner_name = owner_name
-        self.dom_part = dom_part
-        self.children = children
-        self.sections = sections
-
-    def __getattr__(self, name):
-        if name in self.children.keys():
-            element_name, wrapper = self.children[name]
-            return [
-                wrapper(element)
-                for element in self.dom_part.findall('.//' + element_name)
-            ]
-
-        if name in self.sections.keys():
-            element_name, wrapper = self.sections[name]
-            return wrapper(self.dom_part.findall('.//' + element_name)[0])
-
-        raise AttributeError(
-            "'{0}' does not declare child or section '{1}'"
-            .format(self.owner_name, name)
-        )
+class _Summary:
+    __slots__ = ("nodes_count", "resources_count")
 
-class _Element:
-    required_attrs = {}
-    children = {}
-    sections = {}
-
-    def __init__(self, dom_part):
-        self.dom_part = dom_part
-        self.attrs = _Attrs(
-            self.__class__.__name__,
-            self.dom_part.attrib,
-            self.required_attrs
-        )
-        self.children_access = _Children(
-            self.__class__.__name__,
-            self.dom_part,
-            self.children,
-            self.sections,
-        )
-
-    def __getattr__(self, name):
-        return getattr(self.children_access, name)
-
-class _SummaryNodes(_Element):
-    required_attrs = {
-        'count': ('number', int),
-    }
+    def __init__(self):
+        self.nodes_count = 0
+        self.resources_count = 0
 
-class _SummaryResources(_Element):
-    required_attrs = {
-        'count': ('number', int),
-    }
+class _Node:
+    __slots__ = (
+        "id", "name", "type", "online", "standby", "standby_onfail",
+        "maintenance", "pending", "unclean", "shutdown", "expected_up",
+        "is_dc", "resources_running",
+    )
 
-class _SummarySection(_Element):
-    sections = {
-        'nodes': ('nodes_configured', _SummaryNodes),
-        'resources': ('resources_configured', _SummaryResources),
-    }
+    def __init__(self, attrib):
+        self.id = attrib["id"]
+        self.name = attrib["name"]
+        self.type = attrib["type"]
+        self.online = is_true(attrib["online"])
+        self.standby = is_true(attrib["standby"])
+        self.standby_onfail = is_true(attrib["standby_onfail"])
+        self.maintenance = is_true(attrib["maintenance"])
+        self.pending = is_true(attrib["pending"])
+        self.unclean = is_true(attrib["unclean"])
+        self.shutdown = is_true(attrib["shutdown"])
+        self.expected_up = is_true(attrib["expected_up"])
+        self.is_dc = is_true(attrib["is_dc"])
+        self.resources_running = int(attrib["resources_running"])
+
+class _Primitive:
+    __slots__ = (
+        "id", "role", "failed", "managed", "node_names", "parent", "position",
+    )
 
-class _Node(_Element):
-    required_attrs = {
-        'id': 'id',
-        'name': 'name',
-        'type': 'type',
-        'online': ('online', is_true),
-        'standby': ('standby', is_true),
-        'standby_onfail': ('standby_onfail', is_true),
-        'maintenance': ('maintenance', is_true),
-        'pending': ('pending', is_true),
-        'unclean': ('unclean', is_true),
-        'shutdown': ('shutdown', is_true),
-        'expected_up': ('expected_up', is_true),
-        'is_dc': ('is_dc', is_true),
-        'resources_running': ('resources_running', int),
-    }
+    def __init__(self, attrib, parent, position):
+        self.id = attrib.get("id", "")
+        self.role = attrib.get("role", "")
+        self.failed = is_true(attrib.get("failed", ""))
+        self.managed = not is_false(attrib.get("managed", ""))
+        self.node_names = []
+        self.parent = parent
+        # position in the document, keeps results in the order of the xml
+        self.position = position
+
+class _Group:
+    __slots__ = ("id", "primitive_list", "parent")
+
+    def __init__(self, attrib, parent):
+        self.id = attrib.get("id", "")
+        self.primitive_list = []
+        self.parent = parent
+
+class _Clone:
+    __slots__ = ("id", "managed", "member_list", "parent")
+
+    def __init__(self, attrib, parent):
+        self.id = attrib.get("id", "")
+        self.managed = not is_false(attrib.get("managed", ""))
+        # primitives or groups
+        self.member_list = []
+        self.parent = parent
+
+class _Bundle:
+    __slots__ = ("id", "managed", "replica_list", "parent")
+
+    def __init__(self, attrib, parent):
+        self.id = attrib.get("id", "")
+        self.managed = not is_false(attrib.get("managed", ""))
+        # each replica is a list of primitives
+        self.replica_list = []
+        self.parent = parent
+
+class _ClusterStateBuilder:
+    """
+    Build a cluster state model from events of a streaming xml parser
+    """
+    def __init__(self):
+        self.summary = _Summary()
+        self.node_list = []
+        self.primitive_index = defaultdict(list)
+        self.group_index = defaultdict(list)
+        self.clone_bundle_index = defaultdict(list)
+        # models of resource elements which are being parsed
+        self.__open_list = []
+        self.__position = 0
+
+    def start(self, element):
+        parent_element = element.getparent()
+        parent_tag = parent_element.tag if parent_element is not None else None
+        container = self.__open_list[-1] if self.__open_list else None
+        if element.tag in ("nodes_configured", "resources_configured"):
+            if parent_tag == "summary":
+                count = int(element.attrib["number"])
+                if element.tag == "nodes_configured":
+                    self.summary.nodes_count = count
+                else:
+                    self.summary.resources_count = count
+        elif element.tag == "node":
+            if parent_tag == "nodes":
+                self.node_list.append(_Node(element.attrib))
+            elif parent_tag == "resource" and container is not None:
+                container.node_names.append(element.attrib["name"])
+        elif element.tag == "resource":
+            primitive = _Primitive(element.attrib, container, self.__position)
+            self.__position += 1
+            if isinstance(container, _Group):
+                container.primitive_list.append(primitive)
+            elif isinstance(container, _Clone):
+                container.member_list.append(primitive)
+            elif (
+                isinstance(container, _Bundle)
+                and
+                parent_tag == "replica"
+                and
+                container.replica_list
+            ):
+                container.replica_list[-1].append(primitive)
+            self.primitive_index[_get_base_id(primitive.id)].append(primitive)
+            self.__open_list.append(primitive)
+        elif element.tag == "group":
+            group = _Group(element.attrib, container)
+            if isinstance(container, _Clone):
+                container.member_list.append(group)
+            self.group_index[_get_base_id(group.id)].append(group)
+            self.__open_list.append(group)
+        elif element.tag in ("clone", "bundle"):
+            model_class = _Clone if element.tag == "clone" else _Bundle
+            resource = model_class(element.attrib, container)
+            self.clone_bundle_index[resource.id].append(resource)
+            self.__open_list.append(resource)
+        elif element.tag == "replica" and isinstance(container, _Bundle):
+            container.replica_list.append([])
+
+    def end(self, element):
+        if element.tag in ("resource", "group", "clone", "bundle"):
+            self.__open_list.pop()
+
+class ClusterState:
+    """
+    Cluster state loaded from crm_mon xml
 
-class _NodeSection(_Element):
-    children = {
-        'nodes': ('node', _Node),
-    }
+    The xml is processed in one pass which builds lists of nodes and resources
+    and indexes them by node names and resource ids, so queries do not need
+    to search the xml.
+    """
+    __slots__ = (
+        "summary",
+        "nodes",
+        "__node_index",
+        "__primitive_index",
+        "__group_index",
+        "__clone_bundle_index",
+    )
 
-def get_cluster_state_dom(xml):
-    try:
-        dom = xml_fromstring(xml)
-        if os.path.isfile(settings.crm_mon_schema):
-            etree.RelaxNG(file=settings.crm_mon_schema).assertValid(dom)
-        return dom
-    except (etree.XMLSyntaxError, etree.DocumentInvalid):
-        raise LibraryError(reports.cluster_state_invalid_format())
-
-class ClusterState(_Element):
-    sections = {
-        'summary': ('summary', _SummarySection),
-        'node_section': ('nodes', _NodeSection),
-    }
+    def __init__(self, xml, trusted_source=False):
+        """
+        string xml -- crm_mon xml output
+        bool trusted_source -- the xml comes directly from crm_mon, skip its
+            validation against the crm_mon schema
+        """
+        parser = ClusterStateParser(trusted_source)
+        # If the xml contains an encoding declaration, lxml refuses to parse
+        # it from a unicode string, so the xml is encoded to bytes.
+        parser.feed(xml.encode("utf-8"))
+        # pylint: disable=protected-access
+        self.__set_up(parser._close_builder())
+
+    @classmethod
+    def _from_builder(cls, builder):
+        cluster_state = cls.__new__(cls)
+        # pylint: disable=protected-access
+        cluster_state.__set_up(builder)
+        return cluster_state
+
+    def __set_up(self, builder):
+        self.summary = builder.summary
+        self.nodes = builder.node_list
+        self.__node_index = {}
+        for node in self.nodes:
+            self.__node_index.setdefault(node.name, node)
+        self.__primitive_index = dict(builder.primitive_index)
+        self.__group_index = dict(builder.group_index)
+        self.__clone_bundle_index = dict(builder.clone_bundle_index)
+
+    def get_node(self, node_name):
+        """
+        Return a node with the specified name, None if not found
+        """
+        return self.__node_index.get(node_name)
+
+    def get_primitives(self, resource_id):
+        """
+        Return primitives with the specified id including clone instances
+
+        string resource_id -- id of a primitive, without an instance number
+            it matches all instances of the primitive
+        """
+        return _filter_by_id(self.__primitive_index, resource_id)
+
+    def get_groups(self, resource_id):
+        """
+        Return groups with the specified id including clone instances
+
+        string resource_id -- id of a group, without an instance number it
+            matches all instances of the group
+        """
+        return _filter_by_id(self.__group_index, resource_id)
+
+    def get_clones_and_bundles(self, resource_id):
+        """
+        Return clones and bundles with the specified id
+        """
+        return self.__clone_bundle_index.get(resource_id, [])
+
+class ClusterStateParser:
+    """
+    Build a cluster state from crm_mon xml fed to the parser in chunks
 
-    def __init__(self, xml):
-        self.dom = get_cluster_state_dom(xml)
-        super(ClusterState, self).__init__(self.dom)
+    Unless the xml is validated, its elements are dropped as soon as they have
+    been processed, so the whole xml is never held in memory.
+    """
+    def __init__(self, trusted_source=False):
+        """
+        bool trusted_source -- the xml comes directly from crm_mon, skip its
+            validation against the crm_mon schema
+        """
+        self.__builder = _ClusterStateBuilder()
+        self.__schema = (
+            None if trusted_source
+            else xml_schema.registry.get_schema(settings.crm_mon_schema)
+        )
+        self.__parser = etree.XMLPullParser(
+            events=("start", "end"),
+            #it raises on a huge xml without the flag huge_tree=True
+            #see https://bugzilla.redhat.com/show_bug.cgi?id=1506864
+            huge_tree=True,
+        )
+        self.__failed = False
+
+    def feed(self, data):
+        """
+        bytes data -- next chunk of the xml
+        """
+        # An error is reported when the parser is closed. The parser may be
+        # fed by a running command which is not to be interrupted.
+        if self.__failed:
+            return
+        try:
+            self.__parser.feed(data)
+            self.__process_events()
+        except (etree.XMLSyntaxError, KeyError, ValueError):
+            self.__failed = True
+
+    def close(self):
+        """
+        Return the cluster state, raise LibraryError if the xml is not valid
+        """
+        return ClusterState._from_builder(self._close_builder())
+
+    def _close_builder(self):
+        try:
+            if self.__failed:
+                raise LibraryError(reports.cluster_state_invalid_format())
+            root = self.__parser.close()
+            self.__process_events()
+            if self.__schema is not None:
+                self.__schema.assertValid(root)
+        except (
+            etree.XMLSyntaxError, etree.DocumentInvalid, KeyError, ValueError
+        ):
+            raise LibraryError(reports.cluster_state_invalid_format())
+        return self.__builder
+
+    def __process_events(self):
+        for event, element in self.__parser.read_events():
+            if event == "start":
+                self.__builder.start(element)
+            else:
+                self.__builder.end(element)
+                if self.__schema is None:
+                    # the tree is not needed for validation, free the memory
+                    element.clear()
+
+def _get_base_id(resource_id):
+    # instances of cloned resources have ids like "id:0"
+    return resource_id.split(":", 1)[0]
+
+def _filter_by_id(index, resource_id):
+    return [
+        resource
+        for resource in index.get(_get_base_id(resource_id), [])
+        if (
+            resource.id == resource_id
+            or
+            resource.id.startswith(resource_id + ":")
+        )
+    ]
 
-def _id_xpath_predicate(resource_id):
-    return """(@id="{0}" or starts-with(@id, "{0}:"))""".format(resource_id)
+def _get_group_edge_primitives(group, expected_running):
+    # A group is running when its last primitive is running and it is stopped
+    # when its first primitive is stopped.
+    if not group.primitive_list:
+        return []
+    return [group.primitive_list[-1 if expected_running else 0]]
+
+def _get_clone_bundle_primitives(resource):
+    if isinstance(resource, _Bundle):
+        return [
+            primitive
+            for replica in resource.replica_list
+            for primitive in replica
+        ]
+    primitive_list = []
+    for member in resource.member_list:
+        if isinstance(member, _Group):
+            primitive_list.extend(member.primitive_list)
+        else:
+            primitive_list.append(member)
+    return primitive_list
+
+def _get_parent_clone_bundle(primitive):
+    parent = primitive.parent
+    while parent is not None and not isinstance(parent, (_Clone, _Bundle)):
+        parent = parent.parent
+    return parent
 
 def _get_primitives_for_state_check(
     cluster_state, resource_id, expected_running
 ):
-    primitives = cluster_state.xpath("""
-        .//resource[{predicate_id}]
-        |
-        .//group[{predicate_id}]/resource[{predicate_position}]
-        |
-        .//clone[@id="{id}"]/resource
-        |
-        .//clone[@id="{id}"]/group/resource[{predicate_position}]
-        |
-        .//bundle[@id="{id}"]/replica/resource
-    """.format(
-        id=resource_id,
-        predicate_id=_id_xpath_predicate(resource_id),
-        predicate_position=("last()" if expected_running else "1")
-    ))
+    primitive_list = list(cluster_state.get_primitives(resource_id))
+    for group in cluster_state.get_groups(resource_id):
+        primitive_list.extend(
+            _get_group_edge_primitives(group, expected_running)
+        )
+    for resource in cluster_state.get_clones_and_bundles(resource_id):
+        if isinstance(resource, _Bundle):
+            primitive_list.extend(_get_clone_bundle_primitives(resource))
+            continue
+        for member in resource.member_list:
+            if isinstance(member, _Group):
+                primitive_list.extend(
+                    _get_group_edge_primitives(member, expected_running)
+                )
+            else:
+                primitive_list.append(member)
+    # keep each primitive once and in the order of the xml
+    primitive_dict = {
+        primitive.position: primitive for primitive in primitive_list
+    }
     return [
-        element for element in primitives
-            if not is_true(element.attrib.get("failed", ""))
+        primitive_dict[position] for position in sorted(primitive_dict)
+        if not primitive_dict[position].failed
     ]
 
-def _get_primitive_roles_with_nodes(primitive_el_list):
-    # Clone resources are represented by multiple primitive elements.
+def _get_primitive_roles_with_nodes(primitive_list):
+    # Clone resources are represented by multiple primitives.
     roles_with_nodes = defaultdict(set)
-    for resource_element in primitive_el_list:
-        if resource_element.attrib["role"] in ["Started", "Master", "Slave"]:
-            roles_with_nodes[resource_element.attrib["role"]].update([
-                node.attrib["name"]
-                for node in resource_element.findall(".//node")
-            ])
+    for primitive in primitive_list:
+        if primitive.role in ["Started", "Master", "Slave"]:
+            roles_with_nodes[primitive.role].update(primitive.node_names)
     return {role: sorted(nodes) for role, nodes in roles_with_nodes.items()}
 
 def get_resource_state(cluster_state, resource_id):
@@ -241,39 +431,26 @@ def is_resource_managed(cluster_state, resource_id):
     """
     Check if the resource is managed
 
-    etree cluster_state -- status of the cluster
+    ClusterState cluster_state -- status of the cluster
     string resource_id -- id of the resource
     """
-    primitive_list = cluster_state.xpath("""
-        .//resource[{predicate_id}]
-        |
-        .//group[{predicate_id}]/resource
-        """.format(predicate_id=_id_xpath_predicate(resource_id))
-    )
+    primitive_list = list(cluster_state.get_primitives(resource_id))
+    for group in cluster_state.get_groups(resource_id):
+        primitive_list.extend(group.primitive_list)
     if primitive_list:
         for primitive in primitive_list:
-            if is_false(primitive.attrib.get("managed", "")):
+            if not primitive.managed:
                 return False
-            parent = find_parent(primitive, ["clone", "bundle"])
-            if (
-                parent is not None
-                and
-                is_false(parent.attrib.get("managed", ""))
-            ):
+            parent = _get_parent_clone_bundle(primitive)
+            if parent is not None and not parent.managed:
                 return False
         return True
 
-    parent_list = cluster_state.xpath("""
-        .//clone[@id="{0}"]
-        |
-        .//bundle[@id="{0}"]
-        """.format(resource_id)
-    )
-    for parent in parent_list:
-        if is_false(parent.attrib.get("managed", "")):
+    for resource in cluster_state.get_clones_and_bundles(resource_id):
+        if not resource.managed:
             return False
-        for primitive in parent.xpath(".//resource"):
-            if is_false(primitive.attrib.get("managed", "")):
+        for primitive in _get_clone_bundle_primitives(resource):
+            if not primitive.managed:
                 return False
         return True
 
@@ -1790,6 +1790,18 @@ def cib_push_error(reason, pushed_cib):
         }
     )
 
+def cib_push_native_diff_rejected(reason):
+    """
+    pacemaker could not apply a natively computed CIB diff, crm_diff is used
+    string reason -- error description
+    """
+    return ReportItem.debug(
+        report_codes.CIB_PUSH_NATIVE_DIFF_REJECTED,
+        info={
+            "reason": reason,
+        }
+    )
+
 def cib_save_tmp_error(reason):
     """
     cannot save CIB into a temporary file
@@ -2381,6 +2393,14 @@ def agent_name_guessed(entered_name, guessed_name):
         }
     )
 
+def agent_metadata_cache_disabled():
+    """
+    Caching metadata of agents is turned off, there is no cache to work with
+    """
+    return ReportItem.error(
+        report_codes.AGENT_METADATA_CACHE_DISABLED,
+    )
+
 def agent_name_guess_found_more_than_one(agent, possible_agents):
     """
     More than one agents found based on the search string, specify one of them
@@ -1,3 +1,4 @@
+import os
 import re
 from collections import namedtuple
 from lxml import etree
@@ -348,6 +349,7 @@ class Agent():
     Base class for providing convinient access to an agent's metadata
     """
     _agent_type_label = "agent"
+    _metadata_cache = None
 
     def __init__(self, runner):
         """
@@ -356,6 +358,19 @@ class Agent():
         """
         self._runner = runner
         self._metadata = None
+        self._metadata_error = None
+
+    @classmethod
+    def set_metadata_cache(cls, metadata_cache):
+        """
+        Set a cache for sharing metadata of all agents among pcs processes
+        AgentMetadataCache metadata_cache -- the cache, None disables caching
+        """
+        Agent._metadata_cache = metadata_cache
+
+    @classmethod
+    def get_metadata_cache(cls):
+        return Agent._metadata_cache
 
 
     def get_name(self):
@@ -722,15 +737,109 @@ class Agent():
         Raise UnableToGetAgentMetadata if agent doesn't exist or unable to get
             or parse its metadata
         """
+        if self._metadata_error is not None:
+            raise self._metadata_error
         if self._metadata is None:
-            self._metadata = self._parse_metadata(self._load_metadata())
+            metadata = self._get_cached_metadata()
+            if metadata is not None:
+                self._metadata = self._parse_metadata(metadata)
+            else:
+                self._set_loaded_metadata(self._load_metadata())
         return self._metadata
 
+    def get_metadata_prefetch_command(self):
+        """
+        Return (args, env_extend) of a command printing the metadata if they
+        are to be loaded by running the command, None otherwise
+
+        Metadata which have been loaded already or which are cached are not
+        loaded again. An error of loading the metadata is kept in the agent
+        and raised once the metadata are requested.
+        """
+        if self._metadata is not None or self._metadata_error is not None:
+            return None
+        command = self._get_metadata_command()
+        if command is None:
+            return None
+        try:
+            metadata = self._get_cached_metadata()
+            if metadata is not None:
+                self._metadata = self._parse_metadata(metadata)
+                return None
+        except UnableToGetAgentMetadata as e:
+            self._metadata_error = e
+            return None
+        return command
+
+    def set_metadata_prefetch_output(self, stdout, stderr, retval):
+        """
+        Load the metadata from an output of the metadata prefetch command
+
+        An error of loading the metadata is kept in the agent and raised once
+        the metadata are requested.
+        """
+        try:
+            self._set_loaded_metadata(
+                self._get_metadata_from_output(stdout, stderr, retval)
+            )
+        except UnableToGetAgentMetadata as e:
+            self._metadata_error = e
+
+
+    def _get_cached_metadata(self):
+        cache = Agent._metadata_cache
+        source_file_list = self._get_metadata_source_files()
+        if cache is None or not source_file_list:
+            return None
+        return cache.get(self._get_metadata_cache_name(), source_file_list)
+
+
+    def _set_loaded_metadata(self, metadata):
+        self._metadata = self._parse_metadata(metadata)
+        # only metadata which have been parsed successfully are cached
+        cache = Agent._metadata_cache
+        source_file_list = self._get_metadata_source_files()
+        if cache is not None and source_file_list:
+            cache.set(
+                self._get_metadata_cache_name(), source_file_list, metadata
+            )
+
+
+    def _get_metadata_command(self):
+        """
+        Return (args, env_extend) of a command printing the metadata, None if
+        the metadata are not obtained by running a command
+        """
+        # pylint: disable=no-self-use
+        return None
+
+
+    def _get_metadata_from_output(self, stdout, stderr, retval):
+        """
+        Return metadata from an output of the metadata command
+        """
+        raise NotImplementedError()
+
 
     def _load_metadata(self):
         raise NotImplementedError()
 
 
+    def _get_metadata_source_files(self):
+        """
+        Return paths of files the metadata are generated from
+
+        Metadata of an agent are cached only if the agent provides the files
+        and only until any of the files changes.
+        """
+        # pylint: disable=no-self-use
+        return []
+
+
+    def _get_metadata_cache_name(self):
+        return self.get_name()
+
+
     def _parse_metadata(self, metadata):
         try:
             dom = xml_fromstring(metadata)
@@ -738,8 +847,7 @@ class Agent():
             # the validation for now. We want to enable it once the schema
             # and/or agents are fixed.
             # When enabling this check for overrides in child classes.
-            #if os.path.isfile(settings.agent_metadata_schema):
-            #    etree.DTD(file=settings.agent_metadata_schema).assertValid(dom)
+            #xml_schema.registry.validate(settings.agent_metadata_schema, dom)
             return dom
         except (etree.XMLSyntaxError, etree.DocumentInvalid) as e:
             raise UnableToGetAgentMetadata(self.get_name(), str(e))
@@ -796,15 +904,24 @@ class FencedMetadata(FakeAgentMetadata):
 
 
     def _load_metadata(self):
-        stdout, stderr, dummy_retval = self._runner.run(
-            [settings.pacemaker_fenced, "metadata"]
-        )
+        args, dummy_env_extend = self._get_metadata_command()
+        return self._get_metadata_from_output(*self._runner.run(args))
+
+    def _get_metadata_command(self):
+        return [settings.pacemaker_fenced, "metadata"], None
+
+    def _get_metadata_from_output(self, stdout, stderr, retval):
+        # pylint: disable=unused-argument
         metadata = stdout.strip()
         if not metadata:
             raise UnableToGetAgentMetadata(self.get_name(), stderr.strip())
         return metadata
 
 
+    def _get_metadata_source_files(self):
+        return [settings.pacemaker_fenced]
+
+
 class CrmAgent(Agent):
     #pylint:disable=abstract-method
     def __init__(self, runner, name):
@@ -849,6 +966,12 @@ class CrmAgent(Agent):
         return self
 
     def _load_metadata(self):
+        args, env_extend = self._get_metadata_command()
+        return self._get_metadata_from_output(
+            *self._runner.run(args, env_extend=env_extend)
+        )
+
+    def _get_metadata_command(self):
         env_path = ":".join([
             # otherwise pacemaker cannot run RHEL fence agents to get their
             # metadata
@@ -858,20 +981,46 @@ class CrmAgent(Agent):
             # otherwise heartbeat and cluster-glue agents don't work
             "/usr/bin/",
         ])
-        stdout, stderr, retval = self._runner.run(
+        return (
             [
                 settings.crm_resource_binary,
                 "--show-metadata",
                 self._get_full_name(),
             ],
-            env_extend={
+            {
                 "PATH": env_path,
             }
         )
+
+    def _get_metadata_from_output(self, stdout, stderr, retval):
         if retval != 0:
             raise UnableToGetAgentMetadata(self.get_name(), stderr.strip())
         return stdout.strip()
 
+    def _get_metadata_source_files(self):
+        standard = self.get_standard()
+        if standard == "ocf":
+            agent_path = os.path.join(
+                settings.ocf_root,
+                "resource.d",
+                self.get_provider(),
+                self.get_type()
+            )
+        elif standard == "stonith":
+            agent_path = os.path.join(
+                settings.fence_agent_binaries, self.get_type()
+            )
+        else:
+            # metadata of lsb, systemd and other agents are generated by
+            # pacemaker, there is no agent file to check for changes
+            return []
+        # crm_resource binary is a part of the key so that pacemaker upgrades
+        # invalidate the cache
+        return [agent_path, settings.crm_resource_binary]
+
+    def _get_metadata_cache_name(self):
+        return self._get_full_name()
+
 
 class ResourceAgent(CrmAgent):
     """
@@ -960,6 +1109,14 @@ class AbsentAgentMixin():
     def _load_metadata(self):
         return "<resource-agent/>"
 
+    def _get_metadata_command(self):
+        # pylint: disable=no-self-use
+        return None
+
+    def _get_metadata_source_files(self):
+        # pylint: disable=no-self-use
+        return []
+
     def validate_parameters_create(self, parameters, force=False):
         # pylint: disable=unused-argument
         return []
@@ -1129,6 +1286,32 @@ class AbsentStonithAgent(AbsentAgentMixin, StonithAgent):
         return []
 
 
+def prefetch_metadata(runner, agent_list, max_processes):
+    """
+    Load metadata of agents running several metadata commands at a time
+
+    The metadata are kept in the agents and stored in the metadata cache.
+    Agents which do not provide valid metadata keep the error and raise it once
+    their metadata are requested.
+
+    CommandRunner runner
+    iterable agent_list -- Agent instances
+    int max_processes -- maximal number of commands running at the same time
+    """
+    to_load_list = []
+    for agent in agent_list:
+        command = agent.get_metadata_prefetch_command()
+        if command is not None:
+            to_load_list.append((agent, command))
+    if not to_load_list:
+        return
+    output_list = runner.run_parallel(
+        [command for dummy_agent, command in to_load_list], max_processes
+    )
+    for (agent, dummy_command), output in zip(to_load_list, output_list):
+        agent.set_metadata_prefetch_output(*output)
+
+
 def resource_agent_error_to_report_item(
     e, severity=ReportItemSeverity.ERROR, forceable=False
 ):
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+from urllib.parse import quote
+
+
+CURRENT_FORMAT = 1
+_ENTRY_SUFFIX = ".json"
+
+
+class AgentMetadataCache():
+    """
+    Agent metadata stored on disk and shared by all pcs processes
+
+    Each entry holds metadata of one agent together with identities (path,
+    mtime, size) of files the metadata have been obtained from. An entry is
+    valid only as long as all of its files stay unchanged, so upgrading an
+    agent invalidates its entry. Reading or writing the cache never fails,
+    an unusable cache behaves as an empty one.
+    """
+    def __init__(self, dir_path, max_entries):
+        """
+        string dir_path -- directory to store the cache entries in
+        int max_entries -- number of entries to keep, the least recently used
+            entries are removed when the limit is exceeded
+        """
+        self.__dir_path = dir_path
+        self.__max_entries = max_entries
+
+    @property
+    def dir_path(self):
+        return self.__dir_path
+
+    def get(self, agent_name, source_file_list):
+        """
+        Return cached metadata of an agent, None if not cached or outdated
+
+        string agent_name -- full name of the agent
+        iterable source_file_list -- paths of files the metadata depend on
+        """
+        entry_path = self.__get_entry_path(agent_name)
+        try:
+            source_id_list = _get_source_id_list(source_file_list)
+            with open(entry_path) as entry_file:
+                entry = json.load(entry_file)
+            if (
+                entry["format_version"] != CURRENT_FORMAT
+                or
+                entry["agent"] != agent_name
+                or
+                entry["sources"] != source_id_list
+            ):
+                return None
+            metadata = entry["metadata"]
+            # mark the entry as recently used
+            os.utime(entry_path)
+        except (EnvironmentError, ValueError, KeyError, TypeError):
+            return None
+        return metadata
+
+    def set(self, agent_name, source_file_list, metadata):
+        """
+        Store metadata of an agent
+
+        string agent_name -- full name of the agent
+        iterable source_file_list -- paths of files the metadata depend on
+        string metadata -- the metadata to be stored
+        """
+        try:
+            text = json.dumps({
+                "format_version": CURRENT_FORMAT,
+                "agent": agent_name,
+                "sources": _get_source_id_list(source_file_list),
+                "metadata": metadata,
+            })
+            os.makedirs(self.__dir_path, mode=0o700, exist_ok=True)
+            tmp_fd, tmp_path = tempfile.mkstemp(
+                dir=self.__dir_path, prefix=".", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(tmp_fd, "w") as tmp_file:
+                    tmp_file.write(text)
+                os.replace(tmp_path, self.__get_entry_path(agent_name))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.__evict()
+        except EnvironmentError:
+            pass
+
+    def clear(self):
+        """
+        Remove all entries from the cache
+        """
+        for entry_path in self.__list_entries():
+            _remove(entry_path)
+
+    def __evict(self):
+        entry_list = []
+        for entry_path in self.__list_entries():
+            try:
+                mtime = os.stat(entry_path).st_mtime_ns
+            except EnvironmentError:
+                continue
+            entry_list.append((mtime, entry_path))
+        if len(entry_list) <= self.__max_entries:
+            return
+        entry_list.sort()
+        remove_count = len(entry_list) - self.__max_entries
+        for dummy_mtime, entry_path in entry_list[:remove_count]:
+            _remove(entry_path)
+
+    def __list_entries(self):
+        try:
+            file_list = os.listdir(self.__dir_path)
+        except EnvironmentError:
+            return []
+        return [
+            os.path.join(self.__dir_path, file_name)
+            for file_name in file_list
+            if file_name.endswith(_ENTRY_SUFFIX)
+        ]
+
+    def __get_entry_path(self, agent_name):
+        return os.path.join(
+            self.__dir_path, quote(agent_name, safe="") + _ENTRY_SUFFIX
+        )
+
+
+def _get_source_id_list(source_file_list):
+    """
+    Return [path, mtime, size] of each file, raise EnvironmentError if a file
+    does not exist
+    """
+    source_id_list = []
+    for path in source_file_list:
+        stat = os.stat(path)
+        source_id_list.append([path, stat.st_mtime_ns, stat.st_size])
+    return source_id_list
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except EnvironmentError:
+        pass
@@ -0,0 +1,63 @@
+import os.path
+
+from lxml import etree
+
+
+class SchemaRegistry():
+    """
+    Compiled xml schemas shared by all their users in a process
+
+    Compiling a schema takes much longer than validating a document with it.
+    Each schema is compiled once and the compiled schema is reused as long as
+    its file does not change.
+    """
+    def __init__(self):
+        self.__schema_dict = {}
+
+    def get_schema(self, schema_path):
+        """
+        Return a compiled schema, None if the schema file does not exist
+
+        string schema_path -- path to a RelaxNG (.rng) or DTD (.dtd) schema
+        """
+        if not os.path.isfile(schema_path):
+            return None
+        mtime = os.path.getmtime(schema_path)
+        cached = self.__schema_dict.get(schema_path, None)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        schema = _compile_schema(schema_path)
+        self.__schema_dict[schema_path] = (mtime, schema)
+        return schema
+
+    def validate(self, schema_path, dom, trusted_source=False):
+        """
+        Validate a document, raise etree.DocumentInvalid if it is not valid
+
+        A document is not validated if the schema file does not exist.
+
+        string schema_path -- path to a RelaxNG (.rng) or DTD (.dtd) schema
+        etree dom -- the document to be validated
+        bool trusted_source -- the document comes from a source producing
+            valid documents, skip the validation
+        """
+        if trusted_source:
+            return
+        schema = self.get_schema(schema_path)
+        if schema is not None:
+            schema.assertValid(dom)
+
+    def clear(self):
+        """
+        Forget all compiled schemas
+        """
+        self.__schema_dict = {}
+
+
+def _compile_schema(schema_path):
+    if schema_path.endswith(".dtd"):
+        return etree.DTD(file=schema_path)
+    return etree.RelaxNG(file=schema_path)
+
+
+registry = SchemaRegistry()
@@ -175,7 +175,9 @@ def node_pacemaker_status(lib, argv, modifiers):
     del argv
     del modifiers
     print(json.dumps(
-        lib_pacemaker.get_local_node_status(utils.cmd_runner())
+        lib_pacemaker.get_local_node_status(
+            utils.cmd_runner(), trusted_source=True
+        )
     ))
 
 def attribute_show_cmd(filter_node=None, filter_attr=None):
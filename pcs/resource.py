@@ -39,7 +39,7 @@ from pcs.lib.commands.resource import(
 from pcs.lib.errors import LibraryError, ReportItemSeverity
 import pcs.lib.pacemaker.live as lib_pacemaker
 from pcs.lib.pacemaker.state import (
-    get_cluster_state_dom,
+    ClusterState,
     get_resource_state,
 )
 from pcs.lib.pacemaker.values import (
@@ -598,12 +598,16 @@ def resource_providers(lib, argv, modifiers):
 
 def resource_agents(lib, argv, modifiers):
     """
-    Options: no options
+    Options:
+      * --refresh-cache - refresh the agent metadata cache before listing
     """
-    modifiers.ensure_only_supported()
+    modifiers.ensure_only_supported("--refresh-cache")
     if len(argv) > 1:
         raise CmdLineInputError()
 
+    if modifiers.get("--refresh-cache"):
+        lib.resource_agent.refresh_metadata_cache()
+
     standard = argv[0] if argv else None
 
     agents = lib.resource_agent.list_agents_for_standard_and_provider(standard)
@@ -1384,8 +1388,9 @@ def resource_remove(resource_id, output=True, is_remove_remote_context=False):
     """
     def is_bundle_running(bundle_id):
         roles_with_nodes = get_resource_state(
-            get_cluster_state_dom(
-                lib_pacemaker.get_cluster_status_xml(utils.cmd_runner())
+            ClusterState(
+                lib_pacemaker.get_cluster_status_xml(utils.cmd_runner()),
+                trusted_source=True
             ),
             bundle_id
         )
@@ -28,6 +28,7 @@ booth_authkey_file_mode = 0o600
 booth_authkey_bytes = 64
 cluster_conf_file = "/etc/cluster/cluster.conf"
 fence_agent_binaries = "/usr/sbin/"
+ocf_root = "/usr/lib/ocf/"
 pacemaker_schedulerd = "/usr/libexec/pacemaker/pacemaker-schedulerd"
 pacemaker_controld = "/usr/libexec/pacemaker/pacemaker-controld"
 pacemaker_based = "/usr/libexec/pacemaker/pacemaker-based"
@@ -42,8 +43,26 @@ pcsd_cert_location = "/var/lib/pcsd/pcsd.crt"
 pcsd_key_location = "/var/lib/pcsd/pcsd.key"
 pcsd_users_conf_location = "/var/lib/pcsd/pcs_users.conf"
 pcsd_settings_conf_location = "/var/lib/pcsd/pcs_settings.conf"
+pcsd_known_hosts_location = "/var/lib/pcsd/known-hosts"
+pcsd_user_known_hosts_location = "~/.pcs/known-hosts"
+# Set to None to disable caching metadata of resource and stonith agents
+agent_metadata_cache_location = "/var/lib/pcsd/agent-metadata/"
+agent_metadata_cache_max_entries = 1000
+# Limit of the number of agents' metadata commands running at the same time
+# when loading metadata of many agents
+agent_metadata_max_parallel_processes = 8
+# Seconds between checks of resources' state when waiting for resources to
+# reach a state after their configuration has been changed. The interval is
+# doubled after each check up to the max interval.
+wait_state_check_interval = 0.5
+wait_state_check_max_interval = 8
+# Output and input of external processes in debug reports and stderr captured
+# from processes with streamed stdout are truncated to this many characters
+external_process_output_preview_length = 65536
 pcsd_exec_location = "/usr/lib/pcsd/"
 pcsd_log_location = "/var/log/pcsd/pcsd.log"
+# Socket of the pcs command server, which is started by pcsd if enabled
+pcs_command_server_socket = "/var/run/pcsd/pcs-command-server.socket"
 pcsd_default_port = 2224
 pcsd_config = "/etc/sysconfig/pcsd"
 cib_dir = "/var/lib/pacemaker/cib/"
@@ -60,6 +79,10 @@ pacemaker_wait_timeout_status = 124
 booth_config_dir = "/etc/booth"
 booth_binary = "/usr/sbin/booth"
 default_request_timeout = 60
+# Limits of the number of requests to nodes running at the same time. Other
+# requests wait until some of the running requests finish.
+node_communicator_max_parallel_requests = 32
+node_communicator_max_parallel_requests_per_host = 4
 pcs_bundled_dir = "/usr/lib/pcs/bundled/"
 pcs_bundled_pacakges_dir = os.path.join(pcs_bundled_dir, "packages")
 
@@ -83,5 +106,25 @@ default_ssl_options = ",".join([
 # not exists.
 pcsd_gem_path = "vendor/bundle/ruby"
 ruby_executable = "/usr/bin/ruby"
+# Number of long-lived ruby pcsd workers, 0 means a new ruby process is started
+# for each request
+pcsd_ruby_workers = 2
+# Number of requests after which a ruby pcsd worker is replaced by a new one
+pcsd_ruby_worker_max_requests = 200
+# Number of pcsd processes serving requests
+pcsd_workers = 1
+# Number of long-lived processes authenticating pcsd users
+pcsd_auth_workers = 2
+# Number of authentication requests allowed to wait for a free auth worker,
+# requests over the limit are rejected
+pcsd_auth_max_queued_requests = 32
+# Authentication requests not finished in this time are rejected, auth workers
+# stuck on them are replaced
+pcsd_auth_timeout_seconds = 30
+# For how long groups of a user are reused instead of asking the system again
+pcsd_user_groups_cache_ttl_seconds = 60
 
 gui_session_lifetime_seconds = 60 * 60
+# The least recently used pcsd GUI sessions are dropped when there are more
+# sessions than this
+gui_session_max_count = 10000
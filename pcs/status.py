@@ -7,6 +7,7 @@ from pcs import (
 )
 from pcs.cli.common.console_report import indent
 from pcs.cli.common.errors import CmdLineInputError
+from pcs.common.node_communicator import RequestData
 from pcs.lib import reports
 from pcs.lib.node import get_existing_nodes_names
 from pcs.lib.errors import LibraryError
@@ -209,9 +210,9 @@ def nodes_status(lib, argv, modifiers):
             corosync_nodes = []
         try:
             pacemaker_nodes = sorted([
-                node.attrs.name for node
-                in ClusterState(utils.getClusterStateXml()).node_section.nodes
-                if node.attrs.type != 'remote'
+                node.name for node
+                in ClusterState(utils.getClusterStateXml()).nodes
+                if node.type != 'remote'
             ])
         except LibraryError as e:
             utils.process_library_reports(e.args)
@@ -395,8 +396,9 @@ def check_nodes(node_list, prefix=""):
         3: 'Unable to authenticate'
     }
     status_list = []
-    def report(node, returncode, output):
-        del output
+    for node, returncode, dummy_output in utils.send_http_requests(
+        node_list, RequestData("remote/check_auth")
+    ):
         print("{0}{1}: {2}".format(
             prefix,
             node,
@@ -404,11 +406,6 @@ def check_nodes(node_list, prefix=""):
         ))
         status_list.append(returncode)
 
-    utils.read_known_hosts_file() # cache known hosts
-    utils.run_parallel(
-        utils.create_task_list(report, utils.checkAuthorization, node_list)
-    )
-
     return any([status != online_code for status in status_list])
 
 # If no arguments get current cluster node status, otherwise get listed
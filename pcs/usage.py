@@ -22,6 +22,7 @@ def full_usage():
     out += strip_extras(host([], False))
     out += strip_extras(alert([], False))
     out += strip_extras(client([], False))
+    out += strip_extras(batch([], False))
     print(out.strip())
     print("Examples:\n" + examples.replace(r" \ ", ""))
 
@@ -106,29 +107,62 @@ def dict_depth(d, depth=0):
         return depth
     return max(dict_depth(v, depth+1) for k, v in d.items())
 
+def _get_completion_usage_list():
+    return [
+        ("resource", resource),
+        ("cluster", cluster),
+        ("stonith", stonith),
+        ("property", property),
+        ("acl", acl),
+        ("constraint", constraint),
+        ("qdevice", qdevice),
+        ("quorum", quorum),
+        ("status", status),
+        ("config", config),
+        ("pcsd", pcsd),
+        ("host", host),
+        ("node", node),
+        ("alert", alert),
+        ("booth", booth),
+        ("client", client),
+        ("batch", batch),
+    ]
+
 def generate_completion_tree_from_usage():
     tree = {}
-    tree["resource"] = generate_tree(resource([], False))
-    tree["cluster"] = generate_tree(cluster([], False))
-    tree["stonith"] = generate_tree(stonith([], False))
-    tree["property"] = generate_tree(property([], False))
-    tree["acl"] = generate_tree(acl([], False))
-    tree["constraint"] = generate_tree(constraint([], False))
-    tree["qdevice"] = generate_tree(qdevice([], False))
-    tree["quorum"] = generate_tree(quorum([], False))
-    tree["status"] = generate_tree(status([], False))
-    tree["config"] = generate_tree(config([], False))
-    tree["pcsd"] = generate_tree(pcsd([], False))
-    tree["host"] = generate_tree(host([], False))
-    tree["node"] = generate_tree(node([], False))
-    tree["alert"] = generate_tree(alert([], False))
-    tree["booth"] = generate_tree(booth([], False))
-    tree["client"] = generate_tree(client([], False))
+    for name, usage_func in _get_completion_usage_list():
+        tree[name] = generate_tree(usage_func([], False))
     return tree
 
+def generate_completion_arguments_from_usage():
+    """
+    Return a dict command -> description of its arguments from usage
+
+    Only the first description of each command is returned, e.g.
+    {"resource enable": "<resource id>... [--wait[=n]]"}
+    """
+    arguments = {}
+    for name, usage_func in _get_completion_usage_list():
+        for words, args in _get_usage_commands(usage_func([], False)):
+            if args:
+                arguments.setdefault(" ".join([name] + words), " ".join(args))
+    return arguments
+
 def generate_tree(usage_txt):
-    ignore = True
     ret_hash = {}
+    for words, dummy_args in _get_usage_commands(usage_txt):
+        cur_hash = ret_hash
+        for arg in words:
+            if not arg in cur_hash:
+                cur_hash[arg] = {}
+            cur_hash = cur_hash[arg]
+    return ret_hash
+
+def _get_usage_commands(usage_txt):
+    """
+    Yield (command words, arguments) for each command described in usage
+    """
+    ignore = True
     for line in usage_txt.split('\n'):
         if line.startswith("Commands:"):
             ignore = False
@@ -142,17 +176,10 @@ def generate_tree(usage_txt):
 
         if re.match(r"^    \w", line):
             args = line.split()
-            arg = args.pop(0)
-            if not arg in ret_hash:
-                ret_hash[arg] = {}
-            cur_hash = ret_hash[arg]
-            for arg in args:
-                if arg.startswith('[') or arg.startswith('<'):
-                    break
-                if not arg in cur_hash:
-                    cur_hash[arg] = {}
-                cur_hash = cur_hash[arg]
-    return ret_hash
+            words = []
+            while args and not args[0].startswith(('[', '<')):
+                words.append(args.pop(0))
+            yield words, args
 
 def main(pout=True):
     output = """
@@ -188,6 +215,7 @@ Commands:
     node        Manage cluster nodes.
     alert       Manage pacemaker alerts.
     client      Manage pcsd client configuration.
+    batch       Run several pcs commands as one CIB transaction.
 """
 # Advanced usage to possibly add later
 #  --corosync_conf=<corosync file> Specify alternative corosync.conf file
@@ -359,8 +387,13 @@ Commands:
     providers
         List available OCF resource agent providers.
 
-    agents [standard[:provider]]
+    agents [standard[:provider]] [--refresh-cache]
         List available agents optionally filtered by standard and provider.
+        Metadata of agents are cached in /var/lib/pcsd/agent-metadata and
+        a cache entry is updated automatically when its agent changes. If
+        --refresh-cache is specified, the whole cache is dropped and metadata
+        of all resource and stonith agents installed on the local node are
+        cached again before listing the agents.
 
     update <resource id> [resource options] [op [<operation action>
            <operation options>]...] [meta <meta operations>...] [--wait[=n]]
@@ -1952,10 +1985,36 @@ Commands:
     return output
 
 
+def batch(args=(), pout=True):
+    output = """
+Usage: pcs batch [<file>]
+Run several pcs commands as one CIB transaction.
+
+Commands:
+    [<file>]
+        Run pcs commands read from the specified file or from the standard
+        input if no file or '-' is specified. Each line holds one command
+        without the leading 'pcs'. A line ending with a backslash continues on
+        the next line, empty lines and comments starting with '#' are skipped.
+        All commands work with one copy of the CIB. Changes made by the
+        commands are validated and pushed to the cluster (or to the file
+        specified by -f) at once when all the commands succeed. If any of the
+        commands fails, the batch stops and no changes are pushed. Only
+        commands which work with the CIB and support -f are meant to be used
+        in a batch. Options -f and --corosync_conf cannot be specified for
+        a command in a batch.
+"""
+    if pout:
+        print(sub_usage(args, output))
+        return None
+    return output
+
+
 def show(main_usage_name, rest_usage_names):
     usage_map = {
         "acl": acl,
         "alert": alert,
+        "batch": batch,
         "booth": booth,
         "client": client,
         "cluster": cluster,
@@ -14,7 +14,6 @@ from io import BytesIO
 import tarfile
 import getpass
 import base64
-import threading
 import logging
 from functools import lru_cache
 from urllib.parse import urlencode
@@ -25,13 +24,25 @@ from pcs.common import (
     pcs_pycurl as pycurl,
     report_codes,
 )
-from pcs.common.host import PcsKnownHost
+from pcs.common.known_hosts import (
+    KnownHostsError,
+    KnownHostsStore,
+    get_default_file_path as get_known_hosts_file_path,
+)
+from pcs.common.node_communicator import (
+    Communicator,
+    NodeTargetFactory,
+    Request,
+    RequestData,
+    send_requests,
+)
 from pcs.common.tools import join_multilines
 
 from pcs.cli.common import (
     console_report,
     middleware,
 )
+from pcs.cli.common.cib_snapshot import CibSnapshot
 from pcs.cli.common.env_cli import Env
 from pcs.cli.common.lib_wrapper import Library
 from pcs.cli.common.parse_args import InputModifiers
@@ -45,6 +56,7 @@ import pcs.cli.booth.env
 from pcs.lib import reports, sbd
 from pcs.lib.env import LibraryEnvironment
 from pcs.lib.errors import LibraryError
+from pcs.lib.node_communication import LibCommunicatorLogger
 from pcs.lib.external import (
     CommandRunner,
     disable_service,
@@ -160,14 +172,6 @@ def checkStatus(node):
     """
     return sendHTTPRequest(node, 'remote/status', None, False, False)
 
-# Check and see if we're authorized (faster than a status check)
-def checkAuthorization(node):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return sendHTTPRequest(node, 'remote/check_auth', None, False, False)
-
 def get_uid_gid_file_name(uid, gid):
     """
     Commandline options: no options
@@ -273,50 +277,23 @@ def remove_uid_gid_file(uid, gid):
     return file_removed
 
 @lru_cache()
-def read_known_hosts_file():
+def get_known_hosts_store():
     """
     Commandline options: no options
     """
-    output, retval = run_pcsdcli("read_known_hosts")
-    data = {}
-    if (
-        retval == 0
-        and
-        output['status'] == 'ok'
-        and
-        output['data']
-        and
-        output['data'].get('known_hosts')
-    ):
-        try:
-            data = {
-                name: PcsKnownHost.from_known_host_file_dict(name, host)
-                for name, host in output['data']['known_hosts'].items()
-            }
-        except KeyError:
-            print("Warning: Unable to parse known host file.")
-    return data
+    return KnownHostsStore(get_known_hosts_file_path())
 
-def repeat_if_timeout(send_http_request_function, repeat_count=15):
+def read_known_hosts_file():
     """
     Commandline options: no options
-    NOTE: callback send_http_request_function may use --request-timeout
     """
-    def repeater(node, *args, **kwargs):
-        repeats_left = repeat_count
-        while True:
-            retval, output = send_http_request_function(node, *args, **kwargs)
-            if (
-                retval != 2 or "Operation timed out" not in output
-                or
-                repeats_left < 1
-            ):
-                # did not timed out OR repeat limit exceeded
-                return retval, output
-            repeats_left = repeats_left - 1
-            if "--debug" in pcs_options:
-                print("{0}: {1}, trying again...". format(node, output))
-    return repeater
+    try:
+        return get_known_hosts_store().get_all()
+    except KnownHostsError as e:
+        if "--debug" in pcs_options:
+            print(e)
+        print("Warning: Unable to parse known host file.")
+        return {}
 
 # Set the corosync.conf file on the specified node
 def getCorosyncConfig(node):
@@ -336,69 +313,22 @@ def setCorosyncConfig(node, config):
     if status != 0:
         err("Unable to set corosync config: {0}".format(data))
 
-def getPacemakerNodeStatus(node):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return sendHTTPRequest(
-        node, "remote/pacemaker_node_status", None, False, False
-    )
-
-def startCluster(node, quiet=False, timeout=None):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return sendHTTPRequest(
-        node,
-        "remote/cluster_start",
-        printResult=False,
-        printSuccess=not quiet,
-        timeout=timeout
-    )
-
-def stopPacemaker(node, quiet=False, force=True):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return stopCluster(
-        node, pacemaker=True, corosync=False, quiet=quiet, force=force
-    )
-
-def stopCorosync(node, quiet=False, force=True):
+def get_stop_cluster_request(pacemaker=True, corosync=True, force=True):
     """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return stopCluster(
-        node, pacemaker=False, corosync=True, quiet=quiet, force=force
-    )
+    Return RequestData for stopping cluster services and a default timeout
 
-def stopCluster(node, quiet=False, pacemaker=True, corosync=True, force=True):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
+    Commandline options: no options
     """
-    data = dict()
+    data = []
     timeout = None
     if pacemaker and not corosync:
-        data["component"] = "pacemaker"
+        data.append(("component", "pacemaker"))
         timeout = 2 * 60
     elif corosync and not pacemaker:
-        data["component"] = "corosync"
+        data.append(("component", "corosync"))
     if force:
-        data["force"] = 1
-    data = urlencode(data)
-    return sendHTTPRequest(
-        node,
-        'remote/cluster_stop',
-        data,
-        printResult=False,
-        printSuccess=not quiet,
-        timeout=timeout
-    )
+        data.append(("force", 1))
+    return RequestData("remote/cluster_stop", data), timeout
 
 def enableCluster(node):
     """
@@ -414,15 +344,6 @@ def disableCluster(node):
     """
     return sendHTTPRequest(node, 'remote/cluster_disable', None, False, True)
 
-def destroyCluster(node, quiet=False):
-    """
-    Commandline options:
-      * --request-timeout - timeout for HTTP requests
-    """
-    return sendHTTPRequest(
-        node, 'remote/cluster_destroy', None, not quiet, not quiet
-    )
-
 def restoreConfig(node, tarball_data):
     """
     Commandline options:
@@ -537,30 +458,7 @@ def sendHTTPRequest(
             print("--Debug Communication Output End--")
             print()
 
-        if response_code == 401:
-            output = (
-                3,
-                (
-                    "Unable to authenticate to {node} - (HTTP error: {code}), "
-                    "try running 'pcs host auth {node}'"
-                ).format(node=host, code=response_code)
-            )
-        elif response_code == 403:
-            output = (
-                4,
-                "{node}: Permission denied - (HTTP error: {code})".format(
-                    node=host, code=response_code
-                )
-            )
-        elif response_code >= 400:
-            output = (
-                1,
-                "Error connecting to {node} - (HTTP error: {code})".format(
-                    node=host, code=response_code
-                )
-            )
-        else:
-            output = (0, response_data)
+        output = __get_http_result(host, response_code, response_data)
 
         if printResult and output[0] != 0:
             print(output[1])
@@ -576,13 +474,118 @@ def sendHTTPRequest(
         dummy_errno, reason = e.args
         if "--debug" in pcs_options:
             print("Response Reason: {0}".format(reason))
-        msg = (
+        output = __get_connection_error_result(host, reason)
+        if printResult:
+            print(output[1])
+        return output
+
+def __get_http_result(host, response_code, response_data):
+    """
+    Commandline options: no options
+    """
+    if response_code == 401:
+        return (
+            3,
+            (
+                "Unable to authenticate to {node} - (HTTP error: {code}), "
+                "try running 'pcs host auth {node}'"
+            ).format(node=host, code=response_code)
+        )
+    if response_code == 403:
+        return (
+            4,
+            "{node}: Permission denied - (HTTP error: {code})".format(
+                node=host, code=response_code
+            )
+        )
+    if response_code >= 400:
+        return (
+            1,
+            "Error connecting to {node} - (HTTP error: {code})".format(
+                node=host, code=response_code
+            )
+        )
+    return (0, response_data)
+
+def __get_connection_error_result(host, reason):
+    """
+    Commandline options: no options
+    """
+    return (
+        2,
+        (
             "Unable to connect to {host}, try setting higher timeout in "
             "--request-timeout option ({reason})"
         ).format(host=host, reason=reason)
-        if printResult:
-            print(msg)
-        return (2, msg)
+    )
+
+def send_http_requests(
+    host_list, request_data, timeout=None, repeat_on_timeout=0
+):
+    """
+    Send a request to all hosts in parallel, yield tuples (host, status, data)
+    as the requests finish. Status and data have the same meaning as the values
+    returned by sendHTTPRequest.
+
+    iterable host_list -- names of hosts to send the request to
+    RequestData request_data -- the request to send
+    int timeout -- request timeout, overridden by --request-timeout
+    int repeat_on_timeout -- how many times to repeat a timed out request
+
+    Commandline options:
+      * --request-timeout - timeout for HTTP requests
+      * --debug
+    """
+    target_factory = NodeTargetFactory(read_known_hosts_file())
+    user, groups = get_cib_user_groups()
+    communicator = Communicator(
+        LibCommunicatorLogger(
+            logging.getLogger("pcs"), get_report_processor()
+        ),
+        user,
+        groups,
+        request_timeout=pcs_options.get(
+            "--request-timeout", timeout or settings.default_request_timeout
+        ),
+    )
+    request_list = [
+        Request(target_factory.get_target_from_hostname(host), request_data)
+        for host in host_list
+    ]
+    for response in send_requests(
+        communicator, request_list, repeat_on_timeout=repeat_on_timeout
+    ):
+        host = response.request.host_label
+        if response.was_connected:
+            status, data = __get_http_result(
+                host, response.response_code, response.data
+            )
+        else:
+            status, data = __get_connection_error_result(
+                host, response.error_msg
+            )
+        yield host, status, data
+
+def send_http_request_to_nodes(
+    node_list, request_data, timeout=None, repeat_on_timeout=0
+):
+    """
+    Send a request to all nodes in parallel, print results, return a dict
+    node -> error message for nodes the request failed on
+
+    Commandline options:
+      * --request-timeout - timeout for HTTP requests
+      * --debug
+    """
+    node_errors = dict()
+    for node, status, output in send_http_requests(
+        node_list, request_data, timeout, repeat_on_timeout
+    ):
+        message = "{0}: {1}".format(node, output.strip())
+        print(message)
+        if status != 0:
+            node_errors[node] = message
+    return node_errors
 
 
 def __get_cookie_list(token):
@@ -628,8 +631,8 @@ def getNodeAttributesFromPacemaker():
     """
     try:
         return [
-            node.attrs
-            for node in ClusterState(getClusterStateXml()).node_section.nodes
+            node
+            for node in ClusterState(getClusterStateXml()).nodes
         ]
     except LibraryError as e:
         process_library_reports(e.args)
@@ -753,6 +756,8 @@ def run(
     if usefile:
         env_var["CIB_file"] = filename
         touch_cib_file(filename)
+    if not __is_cib_query(args):
+        invalidate_cib_snapshot()
 
     command = args[0]
     if (
@@ -802,6 +807,27 @@ def run(
 
     return output, returnVal
 
+def __is_cib_query(args):
+    """
+    Commandline options: no options
+    """
+    return (
+        os.path.basename(args[0]) == "cibadmin"
+        and
+        ("-Q" in args or "--query" in args)
+    )
+
+
+class _CibSnapshotInvalidatingRunner(CommandRunner):
+    """
+    Any command run by legacy code may change the CIB
+    """
+    def run(self, args, *rest_args, **kwargs):
+        # pylint: disable=arguments-differ
+        invalidate_cib_snapshot()
+        return super().run(args, *rest_args, **kwargs)
+
+
 @lru_cache()
 def cmd_runner():
     """
@@ -813,7 +839,7 @@ def cmd_runner():
         env_vars["CIB_file"] = filename
     env_vars.update(os.environ)
     env_vars["LC_ALL"] = "C"
-    return CommandRunner(
+    return _CibSnapshotInvalidatingRunner(
         logging.getLogger("pcs"),
         get_report_processor(),
         env_vars
@@ -984,62 +1010,15 @@ def map_for_error_list(callab, iterab):
             error_list.append(error)
     return error_list
 
-def run_parallel(worker_list, wait_seconds=1):
-    """
-    Commandline options: no options
-    """
-    thread_list = []
-    for worker in worker_list:
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
-        thread_list.append(thread)
-
-    while thread_list:
-        for thread in thread_list:
-            thread.join(wait_seconds)
-            if not thread.is_alive():
-                thread_list.remove(thread)
-
-def create_task(report, action, node, *args, **kwargs):
-    """
-    Commandline options: no options
-    """
-    def worker():
-        returncode, output = action(node, *args, **kwargs)
-        report(node, returncode, output)
-    return worker
-
-def create_task_list(report, action, node_list, *args, **kwargs):
-    """
-    Commandline options: no options
-    """
-    return [
-        create_task(report, action, node, *args, **kwargs) for node in node_list
-    ]
-
-def parallel_for_nodes(action, node_list, *args, **kwargs):
-    """
-    Commandline options: no options
-    NOTE: callback 'action' may use some cmd options
-    """
-    node_errors = dict()
-    def report(node, returncode, output):
-        message = '{0}: {1}'.format(node, output.strip())
-        print(message)
-        if returncode != 0:
-            node_errors[node] = message
-    run_parallel(
-        create_task_list(report, action, node_list, *args, **kwargs)
-    )
-    return node_errors
-
 # Check if something exists in the CIB
 def does_exist(xpath_query):
     """
     Commandline options:
       * -f - CIB file
     """
+    element_list = __cib_snapshot_xpath(xpath_query)
+    if element_list is not None:
+        return bool(element_list)
     args = ["cibadmin", "-Q", "--xpath", xpath_query]
     dummy_output, retval = run(args)
     if retval != 0:
@@ -1500,17 +1479,68 @@ def get_cib_xpath(xpath_query):
     Commandline options:
       * -f - CIB file
     """
+    element_list = __cib_snapshot_xpath(xpath_query)
+    if element_list is not None:
+        if not element_list:
+            return ""
+        if len(element_list) == 1:
+            return element_list[0]
+        # the same format cibadmin uses for multiple matches
+        return "<xpath-query>\n{0}\n</xpath-query>\n".format(
+            "\n".join(element_list)
+        )
     args = ["cibadmin", "-Q", "--xpath", xpath_query]
     output, retval = run(args)
     if retval != 0:
         return ""
     return output
 
+# All legacy commands in one pcs run share one loaded CIB until the process
+# runs any command which may change it.
+cib_snapshot = CibSnapshot()
+
+def __get_cib_source():
+    """
+    Commandline options:
+      * -f - CIB file
+    """
+    return filename if usefile else None
+
+def __load_cib_for_snapshot():
+    """
+    Commandline options:
+      * -f - CIB file
+    """
+    output, retval = run(["cibadmin", "-l", "-Q"])
+    return output if retval == 0 else None
+
+def __cib_snapshot_xpath(xpath_query):
+    """
+    Commandline options:
+      * -f - CIB file
+    """
+    return cib_snapshot.xpath(
+        __get_cib_source(), __load_cib_for_snapshot, xpath_query
+    )
+
+def invalidate_cib_snapshot():
+    """
+    Commandline options: no options
+    """
+    cib_snapshot.invalidate()
+
 def get_cib(scope=None):
     """
     Commandline options:
       * -f - CIB file
     """
+    if not scope:
+        output = cib_snapshot.get_xml(
+            __get_cib_source(), __load_cib_for_snapshot
+        )
+        if output is None:
+            err("unable to get cib")
+        return output
     command = ["cibadmin", "-l", "-Q"]
     if scope:
         command.append("--scope=%s" % scope)
@@ -2642,7 +2672,11 @@ def get_middleware_factory():
       * -f
     """
     return middleware.create_middleware_factory(
-        cib=middleware.cib(filename if usefile else None, touch_cib_file),
+        cib=middleware.cib(
+            filename if usefile else None,
+            touch_cib_file,
+            on_finished=invalidate_cib_snapshot,
+        ),
         corosync_conf_existing=middleware.corosync_conf_existing(
             pcs_options.get("--corosync_conf", None)
         ),
@@ -0,0 +1,148 @@
+"""
+Duration of listing agents with their descriptions
+
+A stub crm_resource lists the specified number of ocf and stonith agents and
+prints metadata of each of them after a delay simulating an agent start. The
+listing of resource agents and stonith agents with descriptions is measured
+when:
+* loading metadata of one agent after another
+* loading metadata of several agents at a time
+* loading metadata from a warm metadata cache
+
+Usage: python3 -m pcs_test.benchmark.agent_metadata [agents] [delay] [rounds]
+"""
+import logging
+import os
+import stat
+import sys
+import tempfile
+from unittest import mock
+
+from pcs_test.benchmark.tools import format_percentiles, measure
+from pcs_test.tools.custom_mock import MockLibraryReportProcessor
+
+from pcs import settings
+from pcs.lib.commands import resource_agent, stonith_agent
+from pcs.lib.env import LibraryEnvironment
+from pcs.lib.resource_agent import Agent
+from pcs.lib.resource_agent_cache import AgentMetadataCache
+
+
+CRM_RESOURCE_STUB = """#!/bin/sh
+case "$1" in
+    --list-standards)
+        echo ocf
+        echo stonith
+        ;;
+    --list-ocf-providers)
+        echo bench
+        ;;
+    --list-agents)
+        prefix=agent
+        if [ "$2" = "stonith" ]; then
+            prefix=fence_bench
+        fi
+        i=0
+        while [ $i -lt {agents} ]; do
+            echo $prefix$i
+            i=$((i + 1))
+        done
+        ;;
+    --show-metadata)
+        sleep {delay}
+        echo "<resource-agent name='$2'>"
+        echo "<shortdesc>Agent $2</shortdesc><longdesc>Agent $2</longdesc>"
+        echo "<parameters/><actions/></resource-agent>"
+        ;;
+esac
+"""
+
+
+def _create_agent_files(dir_path, agents):
+    """
+    Create files standing for the agents so that their metadata can be cached
+    """
+    ocf_dir = os.path.join(dir_path, "ocf", "resource.d", "bench")
+    fence_dir = os.path.join(dir_path, "sbin")
+    os.makedirs(ocf_dir)
+    os.makedirs(fence_dir)
+    for i in range(agents):
+        for path in (
+            os.path.join(ocf_dir, "agent{0}".format(i)),
+            os.path.join(fence_dir, "fence_bench{0}".format(i)),
+        ):
+            with open(path, "w") as agent_file:
+                agent_file.write("agent")
+    return os.path.join(dir_path, "ocf"), fence_dir
+
+
+def _list_agents(lib_env):
+    resource_agent.list_agents(lib_env, describe=True)
+    stonith_agent.list_agents(lib_env, describe=True)
+
+
+def main():
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    lib_env = LibraryEnvironment(
+        logging.getLogger("pcs.benchmark"), MockLibraryReportProcessor()
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        crm_resource = os.path.join(tmp_dir, "crm_resource")
+        with open(crm_resource, "w") as stub_file:
+            stub_file.write(
+                CRM_RESOURCE_STUB.format(agents=agents, delay=delay)
+            )
+        os.chmod(crm_resource, stat.S_IRWXU)
+        ocf_root, fence_agent_binaries = _create_agent_files(tmp_dir, agents)
+
+        print(
+            "{0} resource and {0} stonith agents, {1}s per metadata, "
+            "{2} rounds".format(agents, delay, rounds)
+        )
+        with mock.patch.multiple(
+            settings,
+            crm_resource_binary=crm_resource,
+            ocf_root=ocf_root,
+            fence_agent_binaries=fence_agent_binaries,
+        ):
+            for label, max_processes in (
+                ("sequential", 1),
+                (
+                    "parallel ({0} processes)".format(
+                        settings.agent_metadata_max_parallel_processes
+                    ),
+                    settings.agent_metadata_max_parallel_processes,
+                ),
+            ):
+                with mock.patch.object(
+                    settings,
+                    "agent_metadata_max_parallel_processes",
+                    max_processes
+                ):
+                    print(format_percentiles(
+                        label,
+                        measure(lambda: _list_agents(lib_env), rounds),
+                        unit_ms=True
+                    ))
+
+            Agent.set_metadata_cache(AgentMetadataCache(
+                os.path.join(tmp_dir, "cache"),
+                settings.agent_metadata_cache_max_entries
+            ))
+            try:
+                # fill the cache
+                _list_agents(lib_env)
+                print(format_percentiles(
+                    "metadata cache",
+                    measure(lambda: _list_agents(lib_env), rounds),
+                    unit_ms=True
+                ))
+            finally:
+                Agent.set_metadata_cache(None)
+
+
+if __name__ == "__main__":
+    main()
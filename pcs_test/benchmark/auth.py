@@ -0,0 +1,97 @@
+"""
+Throughput of pcsd user authentication
+
+Concurrent requests check groups of a user the same way pcsd does for each
+request of a logged in user. The requests are run in a new process each, by
+the auth worker pool, and by the auth worker pool with cached groups. If a
+username and a password are specified, logins by PAM are measured as well.
+
+Usage: python3 -m pcs_test.benchmark.auth [requests [username password]]
+"""
+import getpass
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from tornado.gen import coroutine, multi
+from tornado.ioloop import IOLoop
+
+from pcs.daemon import auth
+
+
+CONCURRENCY = 10
+
+
+@coroutine
+def _run_in_new_process(sync_fn, *args):
+    # how pcsd used to authenticate users
+    pool = ProcessPoolExecutor(max_workers=1)
+    result = yield pool.submit(sync_fn, *args)
+    pool.shutdown()
+    return result
+
+def _check_groups_in_new_process(username):
+    return _run_in_new_process(
+        auth.check_user_groups_sync, username, auth.PlainLogger()
+    )
+
+def _check_groups_by_pool(username):
+    auth.user_groups_cache.invalidate()
+    return auth.check_user_groups(username)
+
+def _login_by_pool(username, password):
+    auth.user_groups_cache.invalidate()
+    return auth.authorize_user(username, password)
+
+def _measure_throughput(request, request_count):
+    """
+    Return requests per second of request_count requests run concurrently
+
+    callable request -- returns a future of one request
+    """
+    @coroutine
+    def run_requests():
+        for dummy_i in range(0, request_count, CONCURRENCY):
+            yield multi([request() for dummy_j in range(CONCURRENCY)])
+    start = perf_counter()
+    IOLoop.current().run_sync(run_requests, timeout=600)
+    return request_count / (perf_counter() - start)
+
+def main():
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    if len(sys.argv) > 3:
+        username, password = sys.argv[2], sys.argv[3]
+    else:
+        username, password = getpass.getuser(), None
+
+    print("{0} requests, {1} at a time".format(request_count, CONCURRENCY))
+    measurement_list = [
+        (
+            "group check, process per request",
+            lambda: _check_groups_in_new_process(username),
+        ),
+        (
+            "group check, worker pool",
+            lambda: _check_groups_by_pool(username),
+        ),
+        (
+            "group check, worker pool and cache",
+            lambda: auth.check_user_groups(username),
+        ),
+    ]
+    if password is not None:
+        measurement_list.append((
+            "login, worker pool",
+            lambda: _login_by_pool(username, password),
+        ))
+    try:
+        for label, request in measurement_list:
+            print("{0:<40} {1:.1f} requests/s".format(
+                label, _measure_throughput(request, request_count)
+            ))
+    finally:
+        auth.worker_pool.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Latency of pcs commands run in-process and by the pcs command server
+
+Each command is run as a new process the same way a user or pcsd runs pcs. The
+process either loads pcs and runs the command itself or forwards the command
+to a running command server. The commands do not need a cluster, so that only
+the overhead of starting pcs is measured. Must be run as root.
+
+Usage: python3 -m pcs_test.benchmark.command_server [rounds]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pcs_test.benchmark.tools import format_percentiles, measure
+
+from pcs import command_server
+
+
+PACKAGE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+IN_PROCESS = (
+    "import sys; sys.path.insert(0, {package_dir!r}); "
+    "from pcs import app; app.main(sys.argv[1:])"
+)
+BY_SERVER = (
+    "import sys; sys.path.insert(0, {package_dir!r}); "
+    "from pcs import command_server; "
+    "sys.exit(command_server.run_by_server({socket_path!r}, sys.argv[1:]))"
+)
+COMMAND_LIST = (
+    ["--version"],
+    ["resource", "--help"],
+    ["constraint", "ticket", "--help"],
+)
+
+
+def _run(code, argv):
+    subprocess.run(
+        [sys.executable, "-c", code] + argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+
+def _wait_for_socket(socket_path):
+    for dummy_i in range(100):
+        if os.path.exists(socket_path):
+            return
+        time.sleep(0.1)
+    raise RuntimeError("The command server has not started")
+
+def main():
+    if os.geteuid() != 0:
+        sys.exit("The command server serves root only, run as root")
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "pcs-command-server.socket")
+        server_pid = command_server.start_server_process(socket_path)
+        try:
+            _wait_for_socket(socket_path)
+            print("{0} rounds".format(rounds))
+            for argv in COMMAND_LIST:
+                for label, code in (
+                    ("in-process", IN_PROCESS),
+                    ("command server", BY_SERVER),
+                ):
+                    code = code.format(
+                        package_dir=PACKAGE_DIR, socket_path=socket_path
+                    )
+                    print(format_percentiles(
+                        "pcs {0} ({1})".format(" ".join(argv), label),
+                        measure(lambda: _run(code, argv), rounds),
+                        unit_ms=True
+                    ))
+        finally:
+            os.kill(server_pid, 15)
+            os.waitpid(server_pid, 0)
+
+
+if __name__ == "__main__":
+    main()
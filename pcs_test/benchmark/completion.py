@@ -0,0 +1,106 @@
+"""
+Latency of shell completion of pcs commands
+
+Each completion runs pcs as a new process the same way bash does on a TAB
+press. Completing a command reads the completion index, completing a resource
+id reads values cached by a previous completion as well. Building the index
+from usage is measured for comparison.
+
+Usage: python3 -m pcs_test.benchmark.completion [rounds]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pcs_test.benchmark.tools import format_percentiles, measure
+
+from pcs.cli.common import completion
+
+
+PACKAGE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+COMPLETE = (
+    "import sys; sys.path.insert(0, {package_dir!r}); "
+    "from pcs import command_server; command_server.main()"
+)
+RESOURCE_COUNT = 500
+
+
+def _complete(cache_home, word_list):
+    env = dict(
+        os.environ,
+        XDG_CACHE_HOME=cache_home,
+        COMP_WORDS=" ".join(word_list),
+        COMP_LENGTHS=" ".join(str(len(word)) for word in word_list),
+        COMP_CWORD=str(len(word_list) - 1),
+        PCS_AUTO_COMPLETE="1",
+    )
+    subprocess.run(
+        [sys.executable, "-c", COMPLETE.format(package_dir=PACKAGE_DIR)],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+def _cache_resources(cache_home):
+    cache_path = completion.get_cache_path(
+        {"XDG_CACHE_HOME": cache_home}, "completion-values.json"
+    )
+    with open(cache_path, "w") as cache_file:
+        json.dump(
+            {
+                "cib": {
+                    # long enough not to expire during the benchmark
+                    "timestamp": time.time() + 3600,
+                    "values": {
+                        "resource": [
+                            "resource-{0}".format(i)
+                            for i in range(RESOURCE_COUNT)
+                        ],
+                        "stonith": [],
+                        "node": [],
+                    },
+                },
+            },
+            cache_file
+        )
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    cache_home = tempfile.mkdtemp()
+    try:
+        print("{0} rounds".format(rounds))
+        print(format_percentiles(
+            "build index from usage",
+            measure(completion.build_completion_index, rounds),
+            unit_ms=True
+        ))
+        # the first completion caches the index
+        _complete(cache_home, ["pcs", ""])
+        _cache_resources(cache_home)
+        for label, word_list in (
+            ("pcs <TAB>", ["pcs", ""]),
+            ("pcs resource m<TAB>", ["pcs", "resource", "m"]),
+            (
+                "pcs resource enable <TAB> ({0} ids)".format(RESOURCE_COUNT),
+                ["pcs", "resource", "enable", ""]
+            ),
+        ):
+            print(format_percentiles(
+                label,
+                measure(lambda: _complete(cache_home, word_list), rounds),
+                unit_ms=True
+            ))
+    finally:
+        shutil.rmtree(cache_home)
+
+
+if __name__ == "__main__":
+    main()
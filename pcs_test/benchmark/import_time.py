@@ -0,0 +1,132 @@
+"""
+Time spent importing pcs modules a pcs command starts with
+
+Each module is imported in a new python process run with '-X importtime', the
+cumulative import time of the module is reported. Pcs imports modules of the
+command being run only, so the import time of pcs.app is what every pcs
+command pays before it starts to do its job.
+
+`pcs --version` is measured as well. It must not import modules needed by
+commands only, so the benchmark fails when the median time spent importing pcs
+modules by `pcs --version` exceeds VERSION_MAX_MS.
+
+Usage: python3 -m pcs_test.benchmark.import_time [rounds [max_ms]]
+
+If max_ms is specified, the benchmark fails when the median import time of
+pcs.app exceeds it.
+"""
+import os
+import subprocess
+import sys
+
+from pcs_test.benchmark.tools import format_percentiles, percentiles
+
+
+PACKAGE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+MODULE_LIST = (
+    # the entry point of the pcs command, it answers shell completion itself
+    "pcs.command_server",
+    "pcs.cli.common.completion",
+    "pcs.app",
+    "pcs.utils",
+    "pcs.cli.common.lib_wrapper",
+)
+GUARDED_MODULE = "pcs.app"
+# pcs --version imports about 30ms worth of modules, importing pcs.utils and
+# pcs.usage would take more than 100ms
+VERSION_MAX_MS = 60
+
+
+def import_time(module_name):
+    """
+    Return the cumulative import time of a module in seconds
+    """
+    for name, cumulative_time in _run_with_importtime(
+        "import sys; sys.path.insert(0, {0!r}); import {1}".format(
+            PACKAGE_DIR, module_name
+        )
+    ):
+        if name == module_name:
+            return cumulative_time
+    raise RuntimeError(
+        "Import time of '{0}' has not been reported".format(module_name)
+    )
+
+def version_import_time():
+    """
+    Return the time spent importing pcs modules by pcs --version in seconds
+    """
+    return sum(
+        cumulative_time
+        for name, cumulative_time in _run_with_importtime(
+            "import sys; sys.path.insert(0, {0!r}); from pcs import app; "
+            "app.main(['--version'])".format(PACKAGE_DIR)
+        )
+        # top level imports only, nested ones are included in their parents
+        if name == "pcs" or name.startswith("pcs.")
+    )
+
+def _run_with_importtime(code):
+    """
+    Return a list of (module name, cumulative import time in seconds) of
+    modules imported by the code, nested imports have indented names
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    module_list = []
+    # import time: self [us] | cumulative | imported package
+    for line in result.stderr.decode().splitlines():
+        columns = line.split("|")
+        if len(columns) == 3 and columns[1].strip().isdigit():
+            module_list.append(
+                (columns[2].rstrip()[1:], int(columns[1]) / 1000000)
+            )
+    return module_list
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    max_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("{0} rounds".format(rounds))
+    sample_map = {}
+    for module_name in MODULE_LIST:
+        sample_map[module_name] = [
+            import_time(module_name) for dummy_i in range(rounds)
+        ]
+        print(format_percentiles(
+            "import {0}".format(module_name),
+            sample_map[module_name],
+            unit_ms=True
+        ))
+
+    version_sample_list = [version_import_time() for dummy_i in range(rounds)]
+    print(format_percentiles(
+        "pcs --version", version_sample_list, unit_ms=True
+    ))
+
+    error_list = []
+    version_median_ms = percentiles(version_sample_list)[50] * 1000
+    if version_median_ms > VERSION_MAX_MS:
+        error_list.append(
+            "Median import time of pcs --version is {0:.2f}ms, more than "
+            "{1:.2f}ms".format(version_median_ms, VERSION_MAX_MS)
+        )
+    if max_ms is not None:
+        median_ms = percentiles(sample_map[GUARDED_MODULE])[50] * 1000
+        if median_ms > max_ms:
+            error_list.append(
+                "Median import time of {0} is {1:.2f}ms, more than {2:.2f}ms"
+                .format(GUARDED_MODULE, median_ms, max_ms)
+            )
+    if error_list:
+        sys.exit("\n".join(error_list))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Latency of node communication rounds against a local HTTPS stub server
+
+Each round sends one request to each of the simulated nodes and waits for all
+the responses, the same way library commands communicate with cluster nodes.
+Percentiles of a round duration are reported for:
+* the former polling engine (perform and select with a fixed timeout)
+* the event-driven engine of Communicator
+* the event-driven engine reusing connections via ConnectionPool
+* AsyncCommunicator driven by an asyncio event loop
+
+Usage: python3 -m pcs_test.benchmark.node_communicator [nodes] [rounds]
+"""
+import asyncio
+import sys
+from unittest import mock
+
+from pcs_test.benchmark.tools import (
+    HttpsStubServer,
+    format_percentiles,
+    measure,
+)
+
+from pcs.common import pcs_pycurl as pycurl
+from pcs.common.host import Destination
+from pcs.common.node_communicator import (
+    AsyncCommunicator,
+    Communicator,
+    CommunicatorLoggerInterface,
+    ConnectionPool,
+    Request,
+    RequestData,
+    RequestTarget,
+)
+
+
+class _PollingEvents:
+    """
+    The way Communicator used to wait for curl before using socket callbacks
+    """
+    select_timeout_default = 0.8
+
+    def __init__(self, multi_handle):
+        self._multi_handle = multi_handle
+
+    def process_events(self):
+        status = pycurl.E_CALL_MULTI_PERFORM
+        while status == pycurl.E_CALL_MULTI_PERFORM:
+            status, dummy_num_handles = self._multi_handle.perform()
+        while True:
+            timeout = self._multi_handle.timeout()
+            if timeout == 0:
+                return
+            timeout = (
+                timeout / 1000.0 if timeout > 0
+                else self.select_timeout_default
+            )
+            if self._multi_handle.select(timeout) != -1:
+                return
+
+
+class _PollingCommunicator(Communicator):
+    def _create_curl_events(self):
+        return _PollingEvents(self._multi_handle)
+
+
+def _get_requests(server, node_count):
+    return [
+        Request(
+            RequestTarget(
+                "node{0}".format(i),
+                dest_list=[Destination(server.address, server.port)],
+            ),
+            RequestData("remote/check_auth"),
+        )
+        for i in range(node_count)
+    ]
+
+def _run_sync_round(communicator, request_list):
+    communicator.add_requests(request_list)
+    for response in communicator.start_loop():
+        if response.response_code != 200:
+            raise AssertionError(response)
+
+def _measure_sync(communicator_factory, server, node_count, rounds):
+    return measure(
+        lambda: _run_sync_round(
+            communicator_factory(), _get_requests(server, node_count)
+        ),
+        rounds
+    )
+
+def _measure_async(server, node_count, rounds):
+    async def run_round():
+        communicator = AsyncCommunicator(logger, None, None)
+        communicator.add_requests(_get_requests(server, node_count))
+        async for response in communicator.start_loop():
+            if response.response_code != 200:
+                raise AssertionError(response)
+
+    logger = mock.Mock(spec_set=CommunicatorLoggerInterface)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return measure(lambda: loop.run_until_complete(run_round()), rounds)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+def main(argv):
+    node_count = int(argv[0]) if argv else 16
+    rounds = int(argv[1]) if len(argv) > 1 else 50
+    logger = mock.Mock(spec_set=CommunicatorLoggerInterface)
+    connection_pool = ConnectionPool()
+    print(
+        "{0} rounds, {1} requests per round".format(rounds, node_count)
+    )
+    with HttpsStubServer() as server:
+        for label, factory in [
+            (
+                "polling",
+                lambda: _PollingCommunicator(logger, None, None),
+            ),
+            (
+                "event-driven",
+                lambda: Communicator(logger, None, None),
+            ),
+            (
+                "event-driven, connection pool",
+                lambda: Communicator(
+                    logger, None, None, connection_pool=connection_pool
+                ),
+            ),
+        ]:
+            print(format_percentiles(
+                label, _measure_sync(factory, server, node_count, rounds)
+            ))
+        print(format_percentiles(
+            "asyncio", _measure_async(server, node_count, rounds)
+        ))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,265 @@
+"""
+Load test of the pcsd remote API
+
+Pcsd is started with a stub in place of ruby pcsd, so that the overhead of
+pcsd itself is measured: TLS, HTTP, passing requests to ruby workers and
+processing their responses. Client processes send requests to the remote API
+for a given time. Pcsd is run with one worker process and with the specified
+number of worker processes. Clients either keep their connections or open
+a new connection for each request. Time to the first byte and peak memory of
+pcsd are measured for large responses as well.
+
+Usage: python3 -m pcs_test.benchmark.pcsd_load [workers [clients [seconds]]]
+"""
+import http.client
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pcs_test.benchmark.tools import format_percentiles
+
+
+PACKAGE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+RUN_PCSD = """
+import sys
+sys.path.insert(0, {package_dir!r})
+from pcs import settings
+settings.pcsd_exec_location = {tmp_dir!r}
+settings.pcsd_gem_path = None
+settings.pcsd_log_location = {tmp_dir!r} + "/pcsd.log"
+settings.pcsd_cert_location = {tmp_dir!r} + "/pcsd.crt"
+settings.pcsd_key_location = {tmp_dir!r} + "/pcsd.key"
+settings.ruby_executable = {tmp_dir!r} + "/ruby"
+from pcs.daemon import run
+run.main()
+"""
+# Ruby pcsd is run as "<ruby> -I <pcsd dir> <entry script>" and serves framed
+# requests until its stdin is closed.
+RUBY_PCSD_STUB = """#!{python}
+import json, sys, time
+
+CHUNK_BYTES = 65536
+
+def respond(request):
+    if request["type"] == "ping":
+        return {{"pong": True, "logs": []}}, b""
+    if request["type"] == "sync_configs":
+        return {{"next": int(time.time()) + 3600, "logs": []}}, b""
+    if request["env"]["PATH_INFO"] == {large_path!r}:
+        body = b"x" * {large_body_bytes}
+    else:
+        body = b"x" * 2048
+    return {{
+        "status": 200,
+        "headers": {{"Content-Type": "application/octet-stream"}},
+        "logs": [],
+    }}, body
+
+def read_frame():
+    header = sys.stdin.buffer.readline()
+    return sys.stdin.buffer.read(int(header)) if header else None
+
+def write_frame(payload):
+    sys.stdout.buffer.write(str(len(payload)).encode() + b"\\n" + payload)
+    sys.stdout.buffer.flush()
+
+while True:
+    request_json = read_frame()
+    if request_json is None:
+        break
+    read_frame()
+    response, body = respond(json.loads(request_json))
+    write_frame(json.dumps(response).encode())
+    for offset in range(0, len(body), CHUNK_BYTES):
+        write_frame(body[offset:offset + CHUNK_BYTES])
+    write_frame(b"")
+"""
+REQUEST_PATH = "/remote/status?version=2"
+LARGE_REQUEST_PATH = "/remote/get_cib"
+LARGE_BODY_BYTES = 64 * 1024 * 1024
+LARGE_REQUEST_ROUNDS = 5
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _prepare_pcsd_dir(tmp_dir):
+    ruby_path = os.path.join(tmp_dir, "ruby")
+    with open(ruby_path, "w") as ruby_file:
+        ruby_file.write(RUBY_PCSD_STUB.format(
+            python=sys.executable,
+            large_path=LARGE_REQUEST_PATH,
+            large_body_bytes=LARGE_BODY_BYTES,
+        ))
+    os.chmod(ruby_path, 0o755)
+    # pcsd checks that its ruby entry script exists
+    open(os.path.join(tmp_dir, "sinatra_cmdline_wrapper.rb"), "w").close()
+
+def _start_pcsd(tmp_dir, port, workers):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            RUN_PCSD.format(package_dir=PACKAGE_DIR, tmp_dir=tmp_dir),
+        ],
+        env=dict(
+            os.environ,
+            PCSD_PORT=str(port),
+            PCSD_BIND_ADDR="127.0.0.1",
+            PCSD_DISABLE_GUI="true",
+            PCSD_WORKERS=str(workers),
+            PCSD_RUBY_WORKERS="2",
+        ),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for dummy_i in range(100):
+        if process.poll() is not None:
+            raise RuntimeError(
+                "Pcsd has exited, see {0}/pcsd.log".format(tmp_dir)
+            )
+        try:
+            _request(_connect(port))
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Pcsd has not started")
+
+def _stop_pcsd(process):
+    process.terminate()
+    process.wait()
+
+def _connect(port):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return http.client.HTTPSConnection("127.0.0.1", port, context=context)
+
+def _request(connection, path=REQUEST_PATH):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError("Unexpected status {0}".format(response.status))
+
+def _request_large(port):
+    """
+    Return the time to the first byte of a large response body and the time to
+    its end
+    """
+    connection = _connect(port)
+    start = time.perf_counter()
+    connection.request("GET", LARGE_REQUEST_PATH)
+    response = connection.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - start
+    while response.read(65536):
+        pass
+    end = time.perf_counter() - start
+    connection.close()
+    return first_byte, end
+
+def _get_peak_memory_kib(pid):
+    with open("/proc/{0}/status".format(pid)) as status_file:
+        for line in status_file:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return None
+
+def _run_client(port, seconds, keep_connection):
+    """
+    Send requests for the given time, return a list of their durations
+    """
+    duration_list = []
+    connection = _connect(port)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        if not keep_connection:
+            connection = _connect(port)
+        _request(connection)
+        if not keep_connection:
+            connection.close()
+        duration_list.append(time.perf_counter() - start)
+    connection.close()
+    return duration_list
+
+def _load(port, clients, seconds, keep_connection):
+    with ProcessPoolExecutor(max_workers=clients) as executor:
+        futures = [
+            executor.submit(_run_client, port, seconds, keep_connection)
+            for dummy_i in range(clients)
+        ]
+        duration_list = []
+        for future in futures:
+            duration_list.extend(future.result())
+    return duration_list
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 2 * workers
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        _prepare_pcsd_dir(tmp_dir)
+        port = _get_free_port()
+        process = _start_pcsd(tmp_dir, port, 1)
+        try:
+            memory_before = _get_peak_memory_kib(process.pid)
+            first_byte_list, end_list = zip(*[
+                _request_large(port) for dummy_i in range(LARGE_REQUEST_ROUNDS)
+            ])
+            print("{0} MiB responses, {1} rounds".format(
+                LARGE_BODY_BYTES // 1024 // 1024, LARGE_REQUEST_ROUNDS
+            ))
+            print(format_percentiles(
+                "  time to first byte", first_byte_list, unit_ms=True
+            ))
+            print(format_percentiles("  time total", end_list, unit_ms=True))
+            print("  pcsd peak memory {0} MiB, {1} MiB before".format(
+                _get_peak_memory_kib(process.pid) // 1024,
+                memory_before // 1024,
+            ))
+        finally:
+            _stop_pcsd(process)
+
+        print("{0} clients, {1} seconds each".format(clients, seconds))
+        for worker_count in sorted({1, workers}):
+            port = _get_free_port()
+            process = _start_pcsd(tmp_dir, port, worker_count)
+            try:
+                for keep_connection in (True, False):
+                    label = "{0} worker(s), {1}".format(
+                        worker_count,
+                        "keep-alive" if keep_connection else "new connections",
+                    )
+                    duration_list = _load(
+                        port, clients, seconds, keep_connection
+                    )
+                    print("{0:<40} {1:.1f} requests/s".format(
+                        label, len(duration_list) / seconds
+                    ))
+                    print(format_percentiles(
+                        "  latency", duration_list, unit_ms=True
+                    ))
+            finally:
+                _stop_pcsd(process)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os.path
+import ssl
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from time import perf_counter
+
+from pcs.common.ssl import dump_cert, dump_key, generate_cert, generate_key
+
+
+def percentiles(sample_list, percentile_list=(50, 90, 99)):
+    """
+    Return a dict percentile -> value and the maximum under the key "max"
+
+    iterable sample_list -- measured values
+    iterable percentile_list -- percentiles to compute
+    """
+    sample_list = sorted(sample_list)
+    result = {}
+    for percentile in percentile_list:
+        index = min(
+            len(sample_list) - 1,
+            int(round(percentile / 100 * (len(sample_list) - 1)))
+        )
+        result[percentile] = sample_list[index]
+    result["max"] = sample_list[-1]
+    return result
+
+def format_percentiles(label, sample_list, unit_ms=True):
+    result = percentiles(sample_list)
+    scale = 1000 if unit_ms else 1
+    return "{label:<40} {values}".format(
+        label=label,
+        values=" ".join(
+            "{0}={1:.2f}{2}".format(
+                "p{0}".format(key) if key != "max" else key,
+                value * scale,
+                "ms" if unit_ms else "",
+            )
+            for key, value in result.items()
+        )
+    )
+
+def measure(func, repeat):
+    """
+    Run func repeatedly and return a list of durations of the runs in seconds
+    """
+    duration_list = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        duration_list.append(perf_counter() - start)
+    return duration_list
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    response_body = b"{}"
+
+    def do_GET(self):
+        # pylint: disable=invalid-name
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.response_body)))
+        self.end_headers()
+        self.wfile.write(self.response_body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        # pylint: disable=arguments-differ
+        pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class HttpsStubServer:
+    """
+    A local HTTPS server answering all requests with an empty json object. It
+    serves as a stand-in for pcsd when measuring the client side.
+    """
+    def __init__(self, address="127.0.0.1", port=0):
+        self.__tmp_dir = tempfile.TemporaryDirectory()
+        cert_path = os.path.join(self.__tmp_dir.name, "stub.crt")
+        key_path = os.path.join(self.__tmp_dir.name, "stub.key")
+        key = generate_key(2048)
+        with open(cert_path, "wb") as cert_file:
+            cert_file.write(dump_cert(generate_cert(key, "localhost")))
+        with open(key_path, "wb") as key_file:
+            key_file.write(dump_key(key))
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        self.__server = _ThreadingHTTPServer((address, port), _StubHandler)
+        self.__server.socket = context.wrap_socket(
+            self.__server.socket, server_side=True
+        )
+        self.__thread = threading.Thread(target=self.__server.serve_forever)
+        self.__thread.daemon = True
+
+    @property
+    def address(self):
+        return self.__server.server_address[0]
+
+    @property
+    def port(self):
+        return self.__server.server_address[1]
+
+    def __enter__(self):
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__tmp_dir.cleanup()
@@ -0,0 +1,86 @@
+from unittest import mock, TestCase
+
+from pcs.cli.common.cib_snapshot import CibSnapshot
+
+
+CIB = """
+<cib>
+  <configuration>
+    <resources>
+      <primitive id="R1"/>
+      <primitive id="R2"/>
+    </resources>
+  </configuration>
+</cib>
+"""
+
+class CibSnapshotTest(TestCase):
+    def setUp(self):
+        self.snapshot = CibSnapshot()
+        self.load = mock.Mock(return_value=CIB)
+
+    def assert_counters(self, hits, misses):
+        self.assertEqual(
+            (hits, misses), (self.snapshot.hits, self.snapshot.misses)
+        )
+
+    def test_load_once(self):
+        self.assertEqual(CIB, self.snapshot.get_xml("live", self.load))
+        self.assertEqual(CIB, self.snapshot.get_xml("live", self.load))
+        self.snapshot.xpath("live", self.load, "//primitive")
+        self.load.assert_called_once_with()
+        self.assert_counters(2, 1)
+
+    def test_invalidate(self):
+        self.snapshot.get_xml("live", self.load)
+        self.snapshot.invalidate()
+        self.snapshot.get_xml("live", self.load)
+        self.assertEqual(2, self.load.call_count)
+        self.assert_counters(0, 2)
+
+    def test_source_changed(self):
+        self.snapshot.get_xml("live", self.load)
+        self.snapshot.get_xml("file.xml", self.load)
+        self.assertEqual(2, self.load.call_count)
+
+    def test_load_failed(self):
+        self.load.return_value = None
+        self.assertIsNone(self.snapshot.get_xml("live", self.load))
+        self.assertIsNone(self.snapshot.xpath("live", self.load, "//cib"))
+        self.assertEqual(2, self.load.call_count)
+
+    def test_xpath(self):
+        self.assertEqual(
+            ['<primitive id="R1"/>', '<primitive id="R2"/>'],
+            self.snapshot.xpath("live", self.load, "//primitive")
+        )
+        self.assertEqual(
+            ['<primitive id="R2"/>'],
+            self.snapshot.xpath("live", self.load, '//primitive[@id="R2"]')
+        )
+        self.assertEqual(
+            [], self.snapshot.xpath("live", self.load, "//group")
+        )
+
+    def test_xpath_after_invalidate(self):
+        self.snapshot.xpath("live", self.load, "//primitive")
+        self.snapshot.invalidate()
+        self.load.return_value = "<cib><configuration/></cib>"
+        self.assertEqual(
+            [], self.snapshot.xpath("live", self.load, "//primitive")
+        )
+
+    def test_xpath_not_elements(self):
+        self.assertIsNone(
+            self.snapshot.xpath("live", self.load, "//primitive/@id")
+        )
+        self.assertIsNone(
+            self.snapshot.xpath("live", self.load, "count(//primitive)")
+        )
+
+    def test_xpath_invalid(self):
+        self.assertIsNone(self.snapshot.xpath("live", self.load, "//["))
+
+    def test_invalid_cib(self):
+        self.load.return_value = "<cib"
+        self.assertIsNone(self.snapshot.xpath("live", self.load, "//cib"))
@@ -1,8 +1,18 @@
-from unittest import TestCase
+import json
+import os.path
+import shutil
+import tempfile
+import time
+from unittest import mock, TestCase
 
 from pcs.cli.common.completion import (
     _find_suggestions,
+    build_completion_index,
+    complete,
+    get_cache_path,
+    get_completion_index,
     has_applicable_environment,
+    INDEX_FORMAT,
     make_suggestions,
     _split_words,
 )
@@ -127,6 +137,200 @@ class MakeSuggestionsEnvironment(TestCase):
             )
         )
 
+class GetCachePath(TestCase):
+    def test_xdg_cache_home(self):
+        self.assertEqual(
+            "/cache/pcs/completion-index.json",
+            get_cache_path({"XDG_CACHE_HOME": "/cache"})
+        )
+
+    @mock.patch("pcs.cli.common.completion.os.path.expanduser")
+    def test_home(self, mock_expanduser):
+        mock_expanduser.return_value = "/home/user"
+        self.assertEqual(
+            "/home/user/.cache/pcs/values.json",
+            get_cache_path({"XDG_CACHE_HOME": ""}, "values.json")
+        )
+
+class BuildCompletionIndex(TestCase):
+    def setUp(self):
+        self.index = build_completion_index()
+
+    def test_tree(self):
+        self.assertEqual({}, self.index["tree"]["resource"]["enable"])
+        self.assertIn("add", self.index["tree"]["resource"]["op"])
+        self.assertEqual({}, self.index["tree"]["batch"])
+
+    def test_arguments(self):
+        arguments = self.index["arguments"]
+        self.assertEqual("resource", arguments["resource enable"])
+        self.assertEqual("resource", arguments["resource group add"])
+        self.assertEqual("stonith", arguments["stonith disable"])
+        self.assertEqual("node", arguments["stonith fence"])
+        self.assertEqual("resource_agent", arguments["resource describe"])
+        self.assertEqual("stonith_agent", arguments["stonith describe"])
+
+    def test_no_arguments_of_new_values(self):
+        arguments = self.index["arguments"]
+        self.assertNotIn("resource create", arguments)
+        self.assertNotIn("cluster node add", arguments)
+
+@mock.patch("pcs.cli.common.completion.PACKAGED_INDEX_PATH", "/nonexistent")
+@mock.patch("pcs.cli.common.completion.settings.pcs_version", "1.2.3")
+@mock.patch("pcs.cli.common.completion.build_completion_index")
+class GetCompletionIndex(TestCase):
+    def setUp(self):
+        self.cache_home = tempfile.mkdtemp()
+        self.environment = {"XDG_CACHE_HOME": self.cache_home}
+        self.cache_path = get_cache_path(self.environment)
+        self.index = {
+            "format": INDEX_FORMAT,
+            "pcs_version": "1.2.3",
+            "tree": tree,
+            "arguments": {"resource clone": "resource"},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_home)
+
+    def write_cache(self, content):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, "w") as cache_file:
+            cache_file.write(content)
+
+    def read_cache(self):
+        with open(self.cache_path) as cache_file:
+            return json.load(cache_file)
+
+    def test_build_and_cache(self, mock_build):
+        mock_build.return_value = self.index
+        self.assertEqual(self.index, get_completion_index(self.environment))
+        self.assertEqual(self.index, self.read_cache())
+
+    def test_use_cache(self, mock_build):
+        self.write_cache(json.dumps(self.index))
+        self.assertEqual(self.index, get_completion_index(self.environment))
+        mock_build.assert_not_called()
+
+    def test_use_packaged_index(self, mock_build):
+        index_path = os.path.join(self.cache_home, "packaged.json")
+        with open(index_path, "w") as index_file:
+            json.dump(self.index, index_file)
+        with mock.patch(
+            "pcs.cli.common.completion.PACKAGED_INDEX_PATH", index_path
+        ):
+            self.assertEqual(
+                self.index, get_completion_index(self.environment)
+            )
+        mock_build.assert_not_called()
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_outdated_cache(self, mock_build):
+        mock_build.return_value = self.index
+        self.write_cache(json.dumps(dict(self.index, pcs_version="1.2.2")))
+        self.assertEqual(self.index, get_completion_index(self.environment))
+        self.assertEqual("1.2.3", self.read_cache()["pcs_version"])
+
+    def test_other_format(self, mock_build):
+        mock_build.return_value = self.index
+        self.write_cache(json.dumps(dict(self.index, format=INDEX_FORMAT + 1)))
+        self.assertEqual(self.index, get_completion_index(self.environment))
+        self.assertEqual(INDEX_FORMAT, self.read_cache()["format"])
+
+    def test_broken_cache(self, mock_build):
+        mock_build.return_value = self.index
+        self.write_cache("{not json")
+        self.assertEqual(self.index, get_completion_index(self.environment))
+        self.assertEqual(self.index, self.read_cache())
+
+    def test_cache_not_writable(self, mock_build):
+        mock_build.return_value = self.index
+        # the cache directory cannot be created, a file is in its way
+        with open(os.path.join(self.cache_home, "pcs"), "w"):
+            pass
+        self.assertEqual(self.index, get_completion_index(self.environment))
+
+@mock.patch("pcs.cli.common.completion._run")
+@mock.patch("pcs.cli.common.completion.get_completion_index")
+class Complete(TestCase):
+    cib = """
+        <cib><configuration>
+            <nodes><node id="1" uname="node1"/></nodes>
+            <resources>
+                <primitive id="R1" class="ocf"/>
+                <group id="G1"><primitive id="R2" class="ocf"/></group>
+                <primitive id="F1" class="stonith"/>
+            </resources>
+        </configuration></cib>
+    """
+
+    def setUp(self):
+        self.cache_home = tempfile.mkdtemp()
+        self.index = {
+            "format": INDEX_FORMAT,
+            "pcs_version": "1.2.3",
+            "tree": tree,
+            "arguments": {
+                "resource clone": "resource",
+                "stonith disable": "stonith",
+            },
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_home)
+
+    def complete(self, words, cword):
+        return complete({
+            "XDG_CACHE_HOME": self.cache_home,
+            "COMP_WORDS": " ".join(words),
+            "COMP_LENGTHS": " ".join(str(len(word)) for word in words),
+            "COMP_CWORD": str(cword),
+            "PCS_AUTO_COMPLETE": "1",
+        })
+
+    def test_commands(self, mock_index, mock_run):
+        mock_index.return_value = self.index
+        self.assertEqual("clone\nop", self.complete(["pcs", "resource"], 2))
+        mock_run.assert_not_called()
+
+    def test_argument_values(self, mock_index, mock_run):
+        mock_index.return_value = self.index
+        mock_run.return_value = (self.cib, 0)
+        self.assertEqual(
+            "G1\nR1\nR2", self.complete(["pcs", "resource", "clone"], 3)
+        )
+        self.assertEqual(
+            "R1\nR2", self.complete(["pcs", "resource", "clone", "R"], 3)
+        )
+        self.assertEqual(
+            "F1", self.complete(["pcs", "stonith", "disable"], 3)
+        )
+        # all values come from one cached cib
+        self.assertEqual(1, mock_run.call_count)
+
+    def test_expired_values(self, mock_index, mock_run):
+        mock_index.return_value = self.index
+        mock_run.return_value = (self.cib, 0)
+        self.complete(["pcs", "resource", "clone"], 3)
+        with mock.patch(
+            "pcs.cli.common.completion.time.time",
+            return_value=time.time() + 60
+        ):
+            self.complete(["pcs", "resource", "clone"], 3)
+        self.assertEqual(2, mock_run.call_count)
+
+    def test_cluster_not_running(self, mock_index, mock_run):
+        mock_index.return_value = self.index
+        mock_run.return_value = ("", 1)
+        self.assertEqual("", self.complete(["pcs", "resource", "clone"], 3))
+
+    def test_no_argument_values(self, mock_index, mock_run):
+        mock_index.return_value = self.index
+        self.assertEqual(
+            "", self.complete(["pcs", "resource", "op", "defaults"], 4)
+        )
+        mock_run.assert_not_called()
+
 class SplitWordsTest(TestCase):
     def test_return_word_list_on_compatible_words_and_lenght(self):
         self.assertEqual(
@@ -438,6 +438,13 @@ class FormatOptionalTest(TestCase):
         self.assertEqual("DEFAULT", format_optional("", "{0}: ", "DEFAULT"))
 
 
+class AgentMetadataCacheDisabledTest(NameBuildTest):
+    code = codes.AGENT_METADATA_CACHE_DISABLED
+    def test_success(self):
+        self.assert_message_from_info(
+            "Caching metadata of agents is disabled"
+        )
+
 class AgentNameGuessedTest(NameBuildTest):
     code = codes.AGENT_NAME_GUESSED
     def test_build_message_with_data(self):
@@ -2591,6 +2598,19 @@ class IdNotFound(NameBuildTest):
         )
 
 
+class CibPushNativeDiffRejected(NameBuildTest):
+    code = codes.CIB_PUSH_NATIVE_DIFF_REJECTED
+    def test_success(self):
+        self.assert_message_from_info(
+            (
+                "Unable to apply the CIB diff, trying again with a diff from "
+                "crm_diff: Update does not conform to the configured schema"
+            ),
+            {
+                "reason": "Update does not conform to the configured schema",
+            }
+        )
+
 class CibPushForcedFullDueToCrmFeatureSet(NameBuildTest):
     code = codes.CIB_PUSH_FORCED_FULL_DUE_TO_CRM_FEATURE_SET
     def test_success(self):
@@ -32,3 +32,29 @@ class MiddlewareBuildTest(TestCase):
             'mdw2 done',
             'mdw1 done',
         ])
+
+
+class CibTest(TestCase):
+    def test_on_finished_called(self):
+        log = []
+        def command(env):
+            log.append("command {0}".format(env))
+            return "result"
+
+        apply = middleware.cib(
+            None, lambda filename: None, lambda: log.append("finished")
+        )
+        self.assertEqual("result", apply(command, "env"))
+        self.assertEqual(["command env", "finished"], log)
+
+    def test_on_finished_called_on_error(self):
+        log = []
+        def command(env):
+            raise Exception(env)
+
+        apply = middleware.cib(
+            None, lambda filename: None, lambda: log.append("finished")
+        )
+        with self.assertRaises(Exception):
+            apply(command, "env")
+        self.assertEqual(["finished"], log)
@@ -587,6 +587,7 @@ class InputModifiersTest(TestCase):
             "--nodesc",
             "--off",
             "--pacemaker",
+            "--refresh-cache",
             "--skip-offline",
             "--start",
         ]
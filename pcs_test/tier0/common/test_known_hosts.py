@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from pcs.common.host import (
+    Destination,
+    PcsKnownHost,
+)
+from pcs.common.known_hosts import (
+    KnownHostsError,
+    KnownHostsStore,
+)
+
+
+def fixture_file_content(data_version=1, format_version=1, known_hosts=None):
+    return json.dumps({
+        "format_version": format_version,
+        "data_version": data_version,
+        "known_hosts": (
+            known_hosts if known_hosts is not None
+            else {
+                "node1": {
+                    "token": "token1",
+                    "dest_list": [{"addr": "10.0.0.1", "port": 2224}],
+                },
+                "node2": {
+                    "token": "token2",
+                    "dest_list": [
+                        {"addr": "10.0.0.2", "port": 2225},
+                        {"addr": "10.0.1.2", "port": 2226},
+                    ],
+                },
+            }
+        ),
+    })
+
+NODE1 = PcsKnownHost("node1", "token1", [Destination("10.0.0.1", 2224)])
+NODE2 = PcsKnownHost(
+    "node2",
+    "token2",
+    [Destination("10.0.0.2", 2225), Destination("10.0.1.2", 2226)],
+)
+
+
+class KnownHostsStoreTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.file_path = os.path.join(self.tmp_dir, "known-hosts")
+        self.store = KnownHostsStore(self.file_path)
+
+    def write_file(self, content):
+        with open(self.file_path, "w") as known_hosts_file:
+            known_hosts_file.write(content)
+
+    def test_missing_file(self):
+        self.assertEqual({}, self.store.get_all())
+        self.assertEqual(0, self.store.data_version)
+        self.assertEqual(0, self.store.load_count)
+
+    def test_empty_file(self):
+        self.write_file("")
+        self.assertEqual({}, self.store.get_all())
+
+    def test_load(self):
+        self.write_file(fixture_file_content(data_version=5))
+        self.assertEqual(
+            {"node1": NODE1, "node2": NODE2}, self.store.get_all()
+        )
+        self.assertEqual(5, self.store.data_version)
+
+    def test_parse_once(self):
+        self.write_file(fixture_file_content())
+        for _ in range(3):
+            self.store.get_all()
+        self.assertEqual(1, self.store.load_count)
+
+    def test_reload_changed_file(self):
+        self.write_file(fixture_file_content())
+        self.store.get_all()
+        self.write_file(fixture_file_content(known_hosts={}))
+        self.assertEqual({}, self.store.get_all())
+        self.assertEqual(2, self.store.load_count)
+
+    def test_removed_file(self):
+        self.write_file(fixture_file_content())
+        self.store.get_all()
+        os.unlink(self.file_path)
+        self.assertEqual({}, self.store.get_all())
+
+    def test_returned_dict_is_a_copy(self):
+        self.write_file(fixture_file_content())
+        self.store.get_all().clear()
+        self.assertEqual(2, len(self.store.get_all()))
+
+    def test_parse_error_reported_once(self):
+        self.write_file("not a json")
+        with self.assertRaises(KnownHostsError):
+            self.store.get_all()
+        self.assertEqual({}, self.store.get_all())
+
+    def test_missing_destination(self):
+        self.write_file(fixture_file_content(
+            known_hosts={"node1": {"token": "token1", "dest_list": []}}
+        ))
+        with self.assertRaises(KnownHostsError):
+            self.store.get_all()
+
+    def test_unsupported_format(self):
+        self.write_file(fixture_file_content(format_version=2))
+        with self.assertRaises(KnownHostsError):
+            self.store.get_all()
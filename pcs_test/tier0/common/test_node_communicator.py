@@ -1,4 +1,6 @@
+import asyncio
 import io
+import socket
 from unittest import mock, TestCase
 
 from pcs_test.tools.custom_mock import (
@@ -487,6 +489,340 @@ class CommunicatorMultiTest(CommunicatorBaseTest):
         com._multi_handle.assert_no_handle_left()
 
 
+@mock.patch("pcs.common.node_communicator.pycurl.CurlShare")
+class ConnectionPoolTest(TestCase):
+    def test_share_created_once(self, mock_share):
+        pool = lib.ConnectionPool()
+        handle1, handle2 = MockCurl(), MockCurl()
+        pool.use_for(handle1)
+        pool.use_for(handle2)
+        mock_share.assert_called_once_with()
+        share = mock_share.return_value
+        self.assertIs(handle1.opts[pycurl.SHARE], share)
+        self.assertIs(handle2.opts[pycurl.SHARE], share)
+        share.setopt.assert_has_calls([
+            mock.call(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS),
+            mock.call(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION),
+            mock.call(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT),
+        ])
+
+    def test_connection_sharing_not_supported(self, mock_share):
+        def setopt(option, value):
+            if option == pycurl.SH_SHARE and value == pycurl.LOCK_DATA_CONNECT:
+                raise pycurl.error("not supported")
+        mock_share.return_value.setopt.side_effect = setopt
+        handle = MockCurl()
+        lib.ConnectionPool().use_for(handle)
+        self.assertIs(handle.opts[pycurl.SHARE], mock_share.return_value)
+
+    def test_new_share_after_close(self, mock_share):
+        mock_share.side_effect = lambda: mock.Mock()
+        pool = lib.ConnectionPool()
+        handle1, handle2 = MockCurl(), MockCurl()
+        pool.use_for(handle1)
+        pool.close()
+        pool.use_for(handle2)
+        self.assertEqual(2, mock_share.call_count)
+        self.assertIsNot(handle1.opts[pycurl.SHARE], handle2.opts[pycurl.SHARE])
+
+
+@mock.patch(
+    "pcs.common.node_communicator.pycurl.CurlMulti",
+    side_effect=lambda: MockCurlMulti([1])
+)
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorConnectionPoolTest(CommunicatorBaseTest):
+    def test_handles_use_pool(self, mock_create_handle, _):
+        pool = mock.Mock(spec_set=lib.ConnectionPool)
+        handle = MockCurl()
+        mock_create_handle.return_value = handle
+        factory = lib.NodeCommunicatorFactory(
+            self.mock_com_log, None, None, None, connection_pool=pool
+        )
+        com = factory.get_communicator()
+        request = fixture_request()
+        handle.request_obj = request
+        com.add_requests([request])
+        response_list = list(com.start_loop())
+        self.assertEqual(1, len(response_list))
+        pool.use_for.assert_called_once_with(handle)
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorParallelLimitTest(CommunicatorBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.multi_patcher = mock.patch(
+            "pcs.common.node_communicator.pycurl.CurlMulti",
+            side_effect=lambda: MockCurlMulti([1, 1, 1, 1])
+        )
+        self.multi_patcher.start()
+        self.addCleanup(self.multi_patcher.stop)
+
+    def assert_processed(self, com, request_list, expected_log_list):
+        com.add_requests(request_list)
+        list(com.start_loop())
+        log_list = []
+        for name, args, dummy_kwargs in self.mock_com_log.mock_calls:
+            if name == "log_response":
+                log_list.append((name, args[0].request))
+            else:
+                log_list.append((name, args[0]))
+        self.assertEqual(expected_log_list, log_list)
+        # pylint: disable=no-member, protected-access
+        com._multi_handle.assert_no_handle_left()
+
+    def test_max_parallel_requests(self, mock_create_handle):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = lib.Communicator(
+            self.mock_com_log, None, None, max_parallel_requests=2
+        )
+        request_list = [fixture_request(i) for i in range(4)]
+        self.assert_processed(com, request_list, [
+            ("log_request_start", request_list[0]),
+            ("log_request_start", request_list[1]),
+            ("log_response", request_list[0]),
+            ("log_request_start", request_list[2]),
+            ("log_response", request_list[1]),
+            ("log_request_start", request_list[3]),
+            ("log_response", request_list[2]),
+            ("log_response", request_list[3]),
+        ])
+
+    def test_max_parallel_requests_per_host(self, mock_create_handle):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = lib.Communicator(
+            self.mock_com_log, None, None, max_parallel_requests_per_host=1
+        )
+        request_list = [
+            fixture_request(1, "action1"),
+            fixture_request(1, "action2"),
+            fixture_request(1, "action3"),
+            fixture_request(2, "action1"),
+        ]
+        self.assert_processed(com, request_list, [
+            ("log_request_start", request_list[0]),
+            ("log_request_start", request_list[3]),
+            ("log_response", request_list[0]),
+            ("log_request_start", request_list[1]),
+            ("log_response", request_list[3]),
+            ("log_response", request_list[1]),
+            ("log_request_start", request_list[2]),
+            ("log_response", request_list[2]),
+        ])
+
+
+class FakeMultiHandle:
+    def __init__(self):
+        self.opts = {}
+        self.socket_action_calls = []
+
+    def setopt(self, opt, val):
+        self.opts[opt] = val
+
+    def socket_action(self, sock_fd, ev_bitmask):
+        self.socket_action_calls.append((sock_fd, ev_bitmask))
+        return (0, 1)
+
+    def watch_socket(self, event, sock_fd):
+        self.opts[pycurl.M_SOCKETFUNCTION](event, sock_fd, self, None)
+
+    def set_timer(self, timeout_ms):
+        self.opts[pycurl.M_TIMERFUNCTION](timeout_ms)
+
+
+class CurlEventsSelectorTest(TestCase):
+    # pylint: disable=protected-access
+    def setUp(self):
+        self.multi = FakeMultiHandle()
+        self.events = lib._CurlEventsSelector(self.multi)
+        self.sock_read, self.sock_write = socket.socketpair()
+        self.addCleanup(self.sock_read.close)
+        self.addCleanup(self.sock_write.close)
+
+    def test_timer_expired(self):
+        self.multi.set_timer(0)
+        self.events.process_events()
+        self.assertEqual(
+            [(pycurl.SOCKET_TIMEOUT, 0)], self.multi.socket_action_calls
+        )
+
+    def test_nothing_to_wait_for(self):
+        self.events.process_events()
+        self.assertEqual(
+            [(pycurl.SOCKET_TIMEOUT, 0)], self.multi.socket_action_calls
+        )
+
+    def test_socket_ready(self):
+        self.multi.watch_socket(pycurl.POLL_IN, self.sock_read.fileno())
+        self.multi.set_timer(60000)
+        self.sock_write.send(b"data")
+        self.events.process_events()
+        self.assertEqual(
+            [(self.sock_read.fileno(), pycurl.CSELECT_IN)],
+            self.multi.socket_action_calls
+        )
+
+    def test_socket_removed(self):
+        self.multi.watch_socket(pycurl.POLL_INOUT, self.sock_read.fileno())
+        self.multi.watch_socket(pycurl.POLL_REMOVE, self.sock_read.fileno())
+        self.sock_write.send(b"data")
+        self.multi.set_timer(0)
+        self.events.process_events()
+        self.assertEqual(
+            [(pycurl.SOCKET_TIMEOUT, 0)], self.multi.socket_action_calls
+        )
+
+
+class CurlEventsAsyncioTest(TestCase):
+    # pylint: disable=protected-access
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.multi = FakeMultiHandle()
+        self.sock_read, self.sock_write = socket.socketpair()
+        self.addCleanup(self.sock_read.close)
+        self.addCleanup(self.sock_write.close)
+
+    def process_events(self, prepare):
+        async def run():
+            events = lib._CurlEventsAsyncio(self.multi, self.loop)
+            prepare()
+            await asyncio.wait_for(events.process_events(), 5)
+        self.loop.run_until_complete(run())
+
+    def test_timer_expired(self):
+        self.process_events(lambda: self.multi.set_timer(10))
+        self.assertEqual(
+            [(pycurl.SOCKET_TIMEOUT, 0)], self.multi.socket_action_calls
+        )
+
+    def test_nothing_to_wait_for(self):
+        self.process_events(lambda: None)
+        self.assertEqual(
+            [(pycurl.SOCKET_TIMEOUT, 0)], self.multi.socket_action_calls
+        )
+
+    def test_socket_ready(self):
+        def prepare():
+            self.multi.watch_socket(pycurl.POLL_IN, self.sock_read.fileno())
+            self.multi.set_timer(60000)
+            self.sock_write.send(b"data")
+        self.process_events(prepare)
+        # the socket stays readable until curl reads the data, so it may be
+        # reported repeatedly before the waiting coroutine resumes
+        self.assertEqual(
+            {(self.sock_read.fileno(), pycurl.CSELECT_IN)},
+            set(self.multi.socket_action_calls)
+        )
+
+
+@mock.patch(
+    "pcs.common.node_communicator.pycurl.CurlMulti",
+    side_effect=lambda: MockCurlMulti([1, 1])
+)
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class AsyncCommunicatorTest(CommunicatorBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def get_responses(self, com):
+        async def run():
+            return [response async for response in com.start_loop()]
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        return self.loop.run_until_complete(run())
+
+    def test_responses(self, mock_create_handle, _):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = lib.AsyncCommunicator(self.mock_com_log, None, None)
+        request_list = [fixture_request(i) for i in range(2)]
+        com.add_requests(request_list)
+        response_list = self.get_responses(com)
+        self.assertEqual(request_list, [r.request for r in response_list])
+        self.assertTrue(all(r.was_connected for r in response_list))
+        # pylint: disable=no-member, protected-access
+        com._multi_handle.assert_no_handle_left()
+
+    def test_multiaddress_retry(self, mock_create_handle, _):
+        error_list = [(pycurl.E_SEND_ERROR, "reason"), None]
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request, error=error_list.pop(0)
+        )
+        com = lib.AsyncMultiaddressCommunicator(self.mock_com_log, None, None)
+        request = lib.Request(
+            lib.RequestTarget(
+                "label", dest_list=_addr_list_to_dest(["host0", "host1"])
+            ),
+            lib.RequestData("action")
+        )
+        com.add_requests([request])
+        response_list = self.get_responses(com)
+        self.assertEqual(1, len(response_list))
+        self.assertTrue(response_list[0].was_connected)
+        self.assertEqual(Destination("host1", None), request.dest)
+
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class SendRequestsTest(CommunicatorBaseTest):
+    def fixture_handles(self, mock_create_handle, error_list):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request, error=error_list.pop(0)
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([2, 1])
+    )
+    def test_repeat_on_timeout(self, _, mock_create_handle):
+        timeout_error = (pycurl.E_OPERATION_TIMEDOUT, "timed out")
+        self.fixture_handles(
+            mock_create_handle, [timeout_error, None, timeout_error]
+        )
+        request_list = [fixture_request(i) for i in range(2)]
+        response_list = list(lib.send_requests(
+            self.get_communicator(), request_list, repeat_on_timeout=1
+        ))
+        self.assertEqual(
+            [request_list[1], request_list[0]],
+            [response.request for response in response_list]
+        )
+        self.assertTrue(response_list[0].was_connected)
+        self.assertEqual(
+            pycurl.E_OPERATION_TIMEDOUT, response_list[1].errno
+        )
+        self.assertEqual(3, mock_create_handle.call_count)
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([2])
+    )
+    def test_do_not_repeat_other_errors(self, _, mock_create_handle):
+        self.fixture_handles(
+            mock_create_handle, [(pycurl.E_SEND_ERROR, "reason"), None]
+        )
+        request_list = [fixture_request(i) for i in range(2)]
+        response_list = list(lib.send_requests(
+            self.get_communicator(), request_list, repeat_on_timeout=1
+        ))
+        errno_dict = {
+            response.request: response.errno for response in response_list
+        }
+        self.assertEqual(
+            {request_list[0]: pycurl.E_SEND_ERROR, request_list[1]: None},
+            errno_dict
+        )
+        self.assertEqual(2, mock_create_handle.call_count)
+
 def fixture_logger_request_retry_calls(response, hostname):
     return [
         mock.call.log_request_start(response.request),
@@ -1,4 +1,3 @@
-from base64 import b64encode
 from pprint import pformat
 from urllib.parse import urlencode
 
@@ -12,6 +11,22 @@ USER = "user"
 GROUPS = ["group1", "group2"]
 PASSWORD = "password"
 
+class RubyResponse:
+    def __init__(self, body, failing_chunk=None):
+        self.body = body
+        self.failing_chunk = failing_chunk
+        self.closed = False
+
+    async def __aiter__(self):
+        # the body is streamed in more chunks
+        for i in range(0, len(self.body), 4):
+            if i // 4 == self.failing_chunk:
+                raise ruby_pcsd.RubyProcessError("ruby pcsd died")
+            yield self.body[i:i+4]
+
+    def close(self):
+        self.closed = True
+
 class RubyPcsdWrapper(ruby_pcsd.Wrapper):
     def __init__(self, request_type):
         #pylint: disable=super-init-not-called
@@ -19,18 +34,19 @@ class RubyPcsdWrapper(ruby_pcsd.Wrapper):
         self.status_code = 200
         self.headers = {"Some": "value"}
         self.body = b"Success action"
+        # index of a body chunk at which ruby pcsd fails
+        self.failing_chunk = None
+        self.responses = []
 
-    async def run_ruby(self, request_type, request=None):
+    async def request_ruby(self, request_type, request=None, body=b""):
         if request_type != self.request_type:
             raise AssertionError(
                 f"Wrong request type: expected '{self.request_type}'"
                 f" but was {request_type}"
             )
-        return {
-            "headers": self.headers,
-            "status": self.status_code,
-            "body": b64encode(self.body),
-        }
+        response = RubyResponse(self.body, self.failing_chunk)
+        self.responses.append(response)
+        return {"headers": self.headers, "status": self.status_code}, response
 
 class AppTest(AsyncHTTPTestCase):
     # pylint: disable=abstract-method
@@ -71,6 +87,9 @@ class AppTest(AsyncHTTPTestCase):
         self.assertEqual(response.code, self.wrapper.status_code)
         self.assert_headers_contains(response.headers, self.wrapper.headers)
         self.assertEqual(response.body, self.wrapper.body)
+        self.assertTrue(
+            all(ruby_response.closed for ruby_response in self.wrapper.responses)
+        )
 
 class UserAuthInfo:
     # pylint: disable=too-few-public-methods
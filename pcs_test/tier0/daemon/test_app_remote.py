@@ -70,6 +70,19 @@ class SinatraRemote(AppTest):
     def test_take_result_from_ruby(self):
         self.assert_wrappers_response(self.get("/remote/"))
 
+    def test_ruby_failure_before_body(self):
+        self.wrapper.failing_chunk = 0
+        response = self.get("/remote/status")
+        self.assertEqual(500, response.code)
+        self.assertTrue(self.wrapper.responses[0].closed)
+
+    def test_ruby_failure_in_the_middle_of_body(self):
+        self.wrapper.failing_chunk = 1
+        response = self.get("/remote/status")
+        # the connection is closed without finishing the response
+        self.assertEqual(599, response.code)
+        self.assertTrue(self.wrapper.responses[0].closed)
+
 class SyncConfigMutualExclusive(AppTest):
     def fetch_set_sync_options(self, method):
         kwargs = (
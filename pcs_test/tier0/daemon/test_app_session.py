@@ -12,7 +12,7 @@ from pcs_test.tier0.daemon.fixtures_app import(
 )
 from pcs_test.tools.misc import create_setup_patch_mixin
 
-from pcs.daemon import session, app_session
+from pcs.daemon import app_session, auth, session
 
 # pylint: disable=too-many-ancestors
 
@@ -167,7 +167,7 @@ class CanLoginAndLogout(MixinTest):
     async def on_handle(self, handler):
         await handler.session_auth_user(USER, PASSWORD)
         self.assert_authenticated_session(handler.session, USER, GROUPS)
-        handler.session_logout()
+        await handler.session_logout()
         self.assert_vanila_session(handler.session)
 
 class FailedLoginAttempt(MixinTest):
@@ -190,9 +190,26 @@ class CanLogoutWithoutSessionAccess(MixinTest):
     init_session = VANILLA_SESSION
     auto_init_session = False
     async def on_handle(self, handler):
-        handler.session_logout()
+        await handler.session_logout()
         self.assertNotEqual(self.sid, handler.session.sid)
 
+class LogoutDropsCachedGroups(MixinTest):
+    init_session = AUTHENTICATED_SESSION
+    auto_init_session = False
+    def setUp(self):
+        super().setUp()
+        self.user_groups_cache = self.setup_patch(
+            "user_groups_cache", auth.UserGroupsCache(ttl=60)
+        )
+        self.user_groups_cache.set(USER, GROUPS)
+        self.user_groups_cache.set("user2", GROUPS)
+
+    async def on_handle(self, handler):
+        await handler.session_logout()
+        self.assertNotIn(self.sid, self.session_dict)
+        self.assertIsNone(self.user_groups_cache.get(USER))
+        self.assertEqual(GROUPS, self.user_groups_cache.get("user2"))
+
 class AuthUpdatedByGroupCheck(MixinTest):
     init_session = AUTHENTICATED_SESSION
     groups_valid = True
@@ -1,5 +1,10 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 import logging
+import os
+import time
+
+from tornado.gen import coroutine, sleep as gen_sleep
+from tornado.testing import AsyncTestCase, gen_test
 
 from pcs_test.tools.misc import create_setup_patch_mixin
 
@@ -7,6 +12,7 @@ from pcs.daemon import auth
 
 USER = "user"
 PASSWORD = "password"
+GROUPS = (auth.HA_ADM_GROUP, "wheel")
 
 # Don't write errors to test output.
 logging.getLogger("pcsd.daemon").setLevel(logging.CRITICAL)
@@ -38,3 +44,195 @@ class AuthorizeUserSync(TestCase, create_setup_patch_mixin(auth)):
         user_auth_info = auth.authorize_user_sync(USER, PASSWORD)
         self.assertEqual(user_auth_info.name, USER)
         self.assertFalse(user_auth_info.is_authorized)
+
+class GetUserGroupsSync(TestCase, create_setup_patch_mixin(auth)):
+    def setUp(self):
+        self.getpwnam = self.setup_patch("pwd.getpwnam")
+        self.getpwnam.return_value = mock.Mock(pw_gid=1000)
+        self.getgrouplist = self.setup_patch("os.getgrouplist")
+        self.getgrouplist.return_value = [1000, 189, 1001]
+        self.getgrgid = self.setup_patch("grp.getgrgid")
+        group_names = {1000: USER, 189: auth.HA_ADM_GROUP}
+        self.getgrgid.side_effect = lambda gid: mock.Mock(
+            gr_name=group_names[gid]
+        )
+
+    def test_groups(self):
+        self.assertEqual(
+            (USER, auth.HA_ADM_GROUP), auth.get_user_groups_sync(USER)
+        )
+        self.getgrouplist.assert_called_once_with(USER, 1000)
+
+    def test_unknown_user(self):
+        self.getpwnam.side_effect = KeyError(USER)
+        self.assertRaises(KeyError, auth.get_user_groups_sync, USER)
+
+
+class UserGroupsCache(TestCase):
+    def setUp(self):
+        self.now = 100
+        patcher = mock.patch("pcs.daemon.auth.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = auth.UserGroupsCache(ttl=10, max_size=2)
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get(USER))
+        self.cache.set(USER, GROUPS)
+        self.now = 109
+        self.assertEqual(GROUPS, self.cache.get(USER))
+
+    def test_expired(self):
+        self.cache.set(USER, GROUPS)
+        self.now = 110
+        self.assertIsNone(self.cache.get(USER))
+
+    def test_invalidate(self):
+        self.cache.set(USER, GROUPS)
+        self.cache.set("user2", GROUPS)
+        self.cache.invalidate(USER)
+        self.assertIsNone(self.cache.get(USER))
+        self.assertEqual(GROUPS, self.cache.get("user2"))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get("user2"))
+
+    def test_max_size_expired_removed(self):
+        self.cache.set(USER, GROUPS)
+        self.now = 105
+        self.cache.set("user2", GROUPS)
+        self.now = 111
+        self.cache.set("user3", GROUPS)
+        self.assertEqual(GROUPS, self.cache.get("user2"))
+        self.assertEqual(GROUPS, self.cache.get("user3"))
+
+    def test_max_size_oldest_removed(self):
+        self.cache.set(USER, GROUPS)
+        self.cache.set("user2", GROUPS)
+        self.cache.set("user3", GROUPS)
+        self.assertIsNone(self.cache.get(USER))
+        self.assertEqual(GROUPS, self.cache.get("user2"))
+        self.assertEqual(GROUPS, self.cache.get("user3"))
+
+
+def get_pid():
+    return os.getpid()
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+def exit_process():
+    os._exit(1) # pylint: disable=protected-access
+
+class AuthWorkerPool(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = auth.AuthWorkerPool(size=1, max_queued=1, timeout=1)
+
+    def tearDown(self):
+        self.pool.terminate()
+        super().tearDown()
+
+    @gen_test
+    def test_worker_reused(self):
+        pid = yield self.pool.run(get_pid)
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertEqual(pid, (yield self.pool.run(get_pid)))
+        self.assertEqual(0, self.pool.pending_count)
+
+    @gen_test
+    def test_too_many_requests(self):
+        first = self.pool.run(sleep, 0.2)
+        second = self.pool.run(sleep, 0.1)
+        with self.assertRaises(auth.AuthWorkerPoolError):
+            yield self.pool.run(sleep, 0)
+        self.assertEqual([0.2, 0.1], (yield [first, second]))
+
+    @gen_test(timeout=10)
+    def test_stuck_worker_replaced(self):
+        pid = yield self.pool.run(get_pid)
+        with self.assertRaises(auth.AuthWorkerPoolError):
+            yield self.pool.run(sleep, 5)
+        new_pid = yield self.pool.run(get_pid)
+        self.assertNotEqual(pid, new_pid)
+
+    @gen_test(timeout=10)
+    def test_stuck_worker_killed(self):
+        pid = yield self.pool.run(get_pid)
+        with self.assertRaises(auth.AuthWorkerPoolError):
+            yield self.pool.run(sleep, 5)
+        # the worker kills itself by its alarm
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and pid_exists(pid):
+            yield gen_sleep(0.1)
+        self.assertFalse(pid_exists(pid))
+
+    @gen_test(timeout=10)
+    def test_worker_exited(self):
+        with self.assertRaises(auth.AuthWorkerPoolError):
+            yield self.pool.run(exit_process)
+        self.assertNotEqual(os.getpid(), (yield self.pool.run(get_pid)))
+
+
+class CheckUserGroups(AsyncTestCase, create_setup_patch_mixin(auth)):
+    def setUp(self):
+        super().setUp()
+        self.setup_patch("user_groups_cache", auth.UserGroupsCache(ttl=60))
+        self.run_in_process = self.setup_patch("run_in_process")
+        self.run_in_process.side_effect = self.fixture_run_in_process
+        self.user_auth_info = auth.UserAuthInfo(
+            USER, GROUPS, is_authorized=True
+        )
+
+    @coroutine
+    def fixture_run_in_process(self, sync_fn, *args):
+        # pylint: disable=unused-argument
+        if isinstance(self.user_auth_info, Exception):
+            raise self.user_auth_info
+        return self.user_auth_info
+
+    @gen_test
+    def test_groups_cached(self):
+        user = yield auth.check_user_groups(USER)
+        self.assertTrue(user.is_authorized)
+        user = yield auth.check_user_groups(USER)
+        self.assertTrue(user.is_authorized)
+        self.assertEqual(GROUPS, user.groups)
+        self.assertEqual(1, self.run_in_process.call_count)
+
+    @gen_test
+    def test_cached_groups_checked(self):
+        auth.user_groups_cache.set(USER, ("wheel",))
+        user = yield auth.check_user_groups(USER)
+        self.assertFalse(user.is_authorized)
+        self.run_in_process.assert_not_called()
+
+    @gen_test
+    def test_login_refreshes_cache(self):
+        auth.user_groups_cache.set(USER, ("wheel",))
+        user = yield auth.authorize_user(USER, PASSWORD)
+        self.assertTrue(user.is_authorized)
+        self.assertEqual(GROUPS, auth.user_groups_cache.get(USER))
+
+    @gen_test
+    def test_failed_login_invalidates_cache(self):
+        auth.user_groups_cache.set(USER, GROUPS)
+        self.user_auth_info = auth.UserAuthInfo(USER, [], is_authorized=False)
+        user = yield auth.authorize_user(USER, PASSWORD)
+        self.assertFalse(user.is_authorized)
+        self.assertIsNone(auth.user_groups_cache.get(USER))
+
+    @gen_test
+    def test_pool_error(self):
+        self.user_auth_info = auth.AuthWorkerPoolError("Request timed out")
+        with self.assertLogs("pcs.daemon", "ERROR"):
+            user = yield auth.check_user_groups(USER)
+        self.assertFalse(user.is_authorized)
+        self.assertIsNone(auth.user_groups_cache.get(USER))
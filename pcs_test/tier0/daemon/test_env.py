@@ -47,6 +47,12 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             env.HTTPS_PROXY: None,
             env.NO_PROXY: None,
             env.PCSD_DEV: False,
+            env.PCSD_RUBY_WORKERS: settings.pcsd_ruby_workers,
+            env.PCSD_RUBY_WORKER_MAX_REQUESTS:
+                settings.pcsd_ruby_worker_max_requests
+            ,
+            env.PCSD_COMMAND_SERVER: False,
+            env.PCSD_WORKERS: settings.pcsd_workers,
             "has_errors": False,
         }
         if specific_env_values is None:
@@ -80,6 +86,10 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             env.HTTPS_PROXY: "proxy1",
             env.NO_PROXY: "host",
             env.PCSD_DEV: "true",
+            env.PCSD_RUBY_WORKERS: "0",
+            env.PCSD_RUBY_WORKER_MAX_REQUESTS: "10",
+            env.PCSD_COMMAND_SERVER: "true",
+            env.PCSD_WORKERS: "4",
         }
         self.assert_environ_produces_modified_pcsd_env(
             environ=environ,
@@ -102,6 +112,10 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
                 env.HTTPS_PROXY: environ[env.HTTPS_PROXY],
                 env.NO_PROXY: environ[env.NO_PROXY],
                 env.PCSD_DEV: True,
+                env.PCSD_RUBY_WORKERS: 0,
+                env.PCSD_RUBY_WORKER_MAX_REQUESTS: 10,
+                env.PCSD_COMMAND_SERVER: True,
+                env.PCSD_WORKERS: 4,
             },
         )
 
@@ -116,6 +130,39 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             ]
         )
 
+    def test_error_on_invalid_ruby_workers(self):
+        environ = {env.PCSD_RUBY_WORKERS: "-1"}
+        self.assert_environ_produces_modified_pcsd_env(
+            environ,
+            specific_env_values={**environ, "has_errors": True},
+            errors=[
+                "Invalid PCSD_RUBY_WORKERS value '-1'"
+                " (it must be a non-negative integer)"
+            ]
+        )
+
+    def test_error_on_zero_ruby_worker_max_requests(self):
+        self.assert_environ_produces_modified_pcsd_env(
+            {env.PCSD_RUBY_WORKER_MAX_REQUESTS: "0"},
+            specific_env_values={
+                env.PCSD_RUBY_WORKER_MAX_REQUESTS: 0,
+                "has_errors": True,
+            },
+            errors=[
+                "Invalid PCSD_RUBY_WORKER_MAX_REQUESTS value '0'"
+                " (it must be a positive integer)"
+            ]
+        )
+
+    def test_error_on_zero_workers(self):
+        self.assert_environ_produces_modified_pcsd_env(
+            {env.PCSD_WORKERS: "0"},
+            specific_env_values={env.PCSD_WORKERS: 0, "has_errors": True},
+            errors=[
+                "Invalid PCSD_WORKERS value '0'"
+                " (it must be a positive integer)"
+            ]
+        )
 
     def test_report_invalid_ssl_ciphers(self):
         environ = {env.PCSD_SSL_CIPHERS: "invalid ;@{}+ ciphers"}
@@ -7,7 +7,7 @@ from tornado.httpserver import HTTPServer
 from pcs_test.tools.misc import create_setup_patch_mixin
 
 from pcs.daemon import http_server
-from pcs.daemon.ssl import PcsdSSL
+from pcs.daemon.ssl import PcsdSSL, SSLCertKeyException
 
 PORT = 1234
 BIND_ADDRESSES = ["addr1", "addr2"]
@@ -61,9 +61,38 @@ class ManageTest(TestCase, create_setup_patch_mixin(http_server)):
             self.https_server_manage.reload_certs,
         )
 
-    def test_reload_certs_exchanges_servers(self):
+    def test_reload_certs_keeps_server_running(self):
         self.https_server_manage.start()
         self.https_server_manage.reload_certs()
-        self.server_list[0].stop.assert_called_once()
-        self.server_list[1].add_sockets.assert_called_once_with(BIND_SOCKETS)
+        self.assertEqual(1, len(self.server_list))
+        self.server_list[0].stop.assert_not_called()
+        self.pcsd_ssl.reload_context.assert_called_once_with()
+        self.assertTrue(self.https_server_manage.server_is_running)
+
+    def test_reload_certs_keeps_previous_certs_when_invalid(self):
+        self.https_server_manage.start()
+        self.pcsd_ssl.guarantee_valid_certs.side_effect = SSLCertKeyException(
+            "Invalid SSL certificate"
+        )
+        self.https_server_manage.reload_certs()
+        self.server_list[0].stop.assert_not_called()
+        self.pcsd_ssl.reload_context.assert_not_called()
         self.assertTrue(self.https_server_manage.server_is_running)
+
+    def test_started_server_uses_bound_sockets(self):
+        bind_sockets = self.setup_patch(
+            "bind_sockets", side_effect=lambda port, addr: addr2sock([addr])
+        )
+        self.https_server_manage.bind_sockets()
+        self.https_server_manage.start()
+        self.server_list[0].add_sockets.assert_called_once_with(BIND_SOCKETS)
+        self.assertEqual(len(BIND_ADDRESSES), bind_sockets.call_count)
+
+    def test_reload_certs_if_changed(self):
+        self.https_server_manage.start()
+        self.pcsd_ssl.have_certs_changed.return_value = False
+        self.https_server_manage.reload_certs_if_changed()
+        self.pcsd_ssl.reload_context.assert_not_called()
+        self.pcsd_ssl.have_certs_changed.return_value = True
+        self.https_server_manage.reload_certs_if_changed()
+        self.pcsd_ssl.reload_context.assert_called_once_with()
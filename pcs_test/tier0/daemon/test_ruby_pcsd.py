@@ -1,10 +1,12 @@
 import json
 import logging
-from base64 import b64encode
+import sys
 from unittest import TestCase, mock
 from urllib.parse import urlencode
 
+from tornado.gen import sleep
 from tornado.httputil import HTTPServerRequest
+from tornado.process import Subprocess
 from tornado.testing import AsyncTestCase, gen_test
 from tornado.web import HTTPError
 
@@ -54,44 +56,144 @@ class GetSinatraRequest(TestCase):
                     'SERVER_NAME': 'pcsd-host',
                     'SERVER_PORT': 2224,
                     'SERVER_PROTOCOL': 'HTTP/1.0',
-                    'rack.input': 'post-key=post-value'
                 }
             }
         )
 
 patch_ruby_pcsd = create_patcher(ruby_pcsd)
 
+class FakeProcess:
+    # pylint: disable=unused-argument
+    def __init__(self, cmdline=None, env=None, frames=None):
+        self.frames = list(frames or [])
+        self.sent = []
+        self.served_requests = 0
+        self.pong = True
+        self.is_alive = True
+        self.stdin_closed = False
+        self.closed = False
+        self.terminated = False
+        self.pid = 1
+
+    async def send(self, request_json, body=b""):
+        if not self.is_alive:
+            raise ruby_pcsd.RubyProcessError()
+        self.served_requests += 1
+        self.sent.append((json.loads(request_json), body))
+
+    async def read_frame(self):
+        if not self.frames:
+            raise ruby_pcsd.RubyProcessError()
+        return self.frames.pop(0)
+
+    async def ping(self):
+        return self.pong
+
+    def take_stderr(self):
+        return b""
+
+    def close_stdin(self):
+        self.stdin_closed = True
+
+    def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.terminated = True
+
+# Serves framed requests the same way ruby pcsd does, responds with the request
+# and sends the request body back in two chunks.
+ECHO_PROCESS = """
+import sys
+def read_frame():
+    header = sys.stdin.buffer.readline()
+    return sys.stdin.buffer.read(int(header)) if header else None
+def write_frame(payload):
+    sys.stdout.buffer.write(str(len(payload)).encode() + b"\\n" + payload)
+    sys.stdout.buffer.flush()
+while True:
+    request = read_frame()
+    if request is None:
+        break
+    body = read_frame()
+    write_frame(request)
+    for chunk in (body[:1], body[1:]):
+        if chunk:
+            write_frame(chunk)
+    write_frame(b"")
+"""
+
+class RubyProcess(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.process = ruby_pcsd.RubyProcess(
+            [sys.executable, "-c", ECHO_PROCESS],
+            env={}
+        )
+
+    def tearDown(self):
+        self.process.terminate()
+        # let the process object notice its streams are closed
+        self.io_loop.run_sync(lambda: sleep(0))
+        Subprocess.uninitialize()
+        super().tearDown()
+
+    @gen_test
+    def test_send_request_with_body(self):
+        yield self.process.send('{"type": "x"}', b"\x00\xff")
+        response = ruby_pcsd.RubyResponse(self.process, mock.Mock())
+        self.assertEqual((yield response.read_head()), b'{"type": "x"}')
+        self.assertEqual(
+            (yield self.collect(response)),
+            [b"\x00", b"\xff"]
+        )
+
+    @gen_test
+    def test_communicate(self):
+        for dummy_i in range(2):
+            response_json, dummy_stderr = yield self.process.communicate(
+                '"ping"'
+            )
+            self.assertEqual(response_json, b'"ping"')
+
+    @gen_test
+    def test_error_when_process_closed(self):
+        self.process.close_stdin()
+        with self.assertRaises(ruby_pcsd.RubyProcessError):
+            yield self.process.read_frame()
+
+    @staticmethod
+    async def collect(response):
+        return [chunk async for chunk in response]
+
 class RunRuby(AsyncTestCase):
     def setUp(self):
-        self.stdout = ""
-        self.stderr = ""
-        self.exit_status = 0
-        self.request = self.create_request()
+        self.processes = []
+        self.frames = []
         self.wrapper = create_wrapper()
-        patcher = mock.patch.object(
-            self.wrapper,
-            "send_to_ruby",
-            self.send_to_ruby
-        )
+        patcher = patch_ruby_pcsd("RubyProcess", self.create_process)
         self.addCleanup(patcher.stop)
         patcher.start()
         super().setUp()
 
-    async def send_to_ruby(self, request_json):
-        self.assertEqual(json.loads(request_json), self.request)
-        return self.stdout, self.stderr, self.exit_status
-
-    @staticmethod
-    def create_request(_type=ruby_pcsd.SYNC_CONFIGS):
-        return {"type": _type}
+    def create_process(self, cmdline, env):
+        process = FakeProcess(cmdline, env, self.frames)
+        self.processes.append(process)
+        return process
 
-    def set_run_result(self, run_result):
-        self.stdout = json.dumps({**run_result, "logs": []})
+    def set_run_result(self, run_result, body_chunks=()):
+        self.frames = (
+            [str.encode(json.dumps({**run_result, "logs": []}))]
+            +
+            list(body_chunks)
+            +
+            [b""]
+        )
 
-    def assert_sinatra_result(self, result, headers, status, body):
-        self.assertEqual(result.headers, headers)
-        self.assertEqual(result.status, status)
-        self.assertEqual(result.body, str.encode(body))
+    def assert_sent(self, request, body=b""):
+        process, = self.processes
+        self.assertEqual(process.sent, [(request, body)])
+        self.assertTrue(process.stdin_closed)
 
     @gen_test
     def test_correct_sending(self):
@@ -99,11 +201,22 @@ class RunRuby(AsyncTestCase):
         self.set_run_result(run_result)
         result = yield self.wrapper.run_ruby(ruby_pcsd.SYNC_CONFIGS)
         self.assertEqual(result["next"], run_result["next"])
+        self.assert_sent({"type": ruby_pcsd.SYNC_CONFIGS})
+        self.assertTrue(self.processes[0].closed)
+        self.assertFalse(self.processes[0].terminated)
 
     @gen_test
     def test_error_from_ruby(self):
         with self.assertRaises(HTTPError):
             yield self.wrapper.run_ruby(ruby_pcsd.SYNC_CONFIGS)
+        self.assertTrue(self.processes[0].terminated)
+
+    @gen_test
+    def test_invalid_response(self):
+        self.frames = [b"not json", b""]
+        with self.assertRaises(HTTPError):
+            yield self.wrapper.run_ruby(ruby_pcsd.SYNC_CONFIGS)
+        self.assertTrue(self.processes[0].terminated)
 
     @gen_test
     def test_sync_config_shortcut_success(self):
@@ -119,56 +232,87 @@ class RunRuby(AsyncTestCase):
         result = yield self.wrapper.sync_configs()
         self.assertEqual(result, ruby_pcsd.DEFAULT_SYNC_CONFIG_DELAY)
 
+    async def read_body(self, result):
+        try:
+            return [chunk async for chunk in result.body]
+        finally:
+            result.body.close()
+
     @gen_test
     def test_request_remote(self):
         headers = {"some": "header"}
         status = 200
-        body = "content"
-        self.set_run_result({
-            "headers": headers,
-            "status": status,
-            "body": b64encode(str.encode(body)).decode(),
-        })
+        self.set_run_result(
+            {"headers": headers, "status": status},
+            [b"con", b"tent"]
+        )
         http_request = create_http_request()
-        self.request = {
-            **self.create_request(ruby_pcsd.SINATRA_REMOTE),
-            **self.wrapper.get_sinatra_request(http_request),
-        }
         result = yield self.wrapper.request_remote(http_request)
-        self.assert_sinatra_result(result, headers, status, body)
+        self.assertEqual(result.headers, headers)
+        self.assertEqual(result.status, status)
+        self.assertEqual((yield self.read_body(result)), [b"con", b"tent"])
+        self.assert_sent(
+            {
+                **self.wrapper.get_sinatra_request(http_request),
+                "type": ruby_pcsd.SINATRA_REMOTE,
+            },
+            http_request.body
+        )
+        self.assertTrue(self.processes[0].closed)
+        self.assertFalse(self.processes[0].terminated)
 
     @gen_test
     def test_request_gui(self):
         headers = {"some": "header"}
         status = 200
-        body = "content"
 
         user = "user"
         groups = ["hacluster"]
         is_authenticated = True
 
-        self.set_run_result({
-            "headers": headers,
-            "status": status,
-            "body": b64encode(str.encode(body)).decode(),
-        })
+        self.set_run_result(
+            {"headers": headers, "status": status},
+            [b"content"]
+        )
         http_request = create_http_request()
-        self.request = {
-            **self.create_request(ruby_pcsd.SINATRA_GUI),
-            **self.wrapper.get_sinatra_request(http_request),
-            "session": {
-                "username": user,
-                "groups": groups,
-                "is_authenticated": is_authenticated,
-            }
-        }
         result = yield self.wrapper.request_gui(
             http_request,
             user=user,
             groups=groups,
             is_authenticated=is_authenticated,
         )
-        self.assert_sinatra_result(result, headers, status, body)
+        self.assertEqual(result.headers, headers)
+        self.assertEqual(result.status, status)
+        self.assertEqual((yield self.read_body(result)), [b"content"])
+        self.assert_sent(
+            {
+                **self.wrapper.get_sinatra_request(http_request),
+                "type": ruby_pcsd.SINATRA_GUI,
+                "session": {
+                    "username": user,
+                    "groups": groups,
+                    "is_authenticated": is_authenticated,
+                }
+            },
+            http_request.body
+        )
+
+    @gen_test
+    def test_abandoned_body_terminates_process(self):
+        self.set_run_result(
+            {"headers": {}, "status": 200},
+            [b"content"]
+        )
+        result = yield self.wrapper.request_remote(create_http_request())
+        result.body.close()
+        self.assertTrue(self.processes[0].terminated)
+
+    @gen_test
+    def test_invalid_sinatra_response(self):
+        self.set_run_result({"error": "Unknown type"})
+        with self.assertRaises(HTTPError):
+            yield self.wrapper.request_remote(create_http_request())
+        self.assertTrue(self.processes[0].terminated)
 
 class ProcessResponseLog(TestCase):
     @patch_ruby_pcsd("log.from_external_source")
@@ -187,3 +331,165 @@ class ProcessResponseLog(TestCase):
             message="ruby_message",
             group_id=1,
         )
+
+class RubyWorkerPool(TestCase):
+    def setUp(self):
+        self.created_workers = []
+
+    def create_worker(self):
+        worker = FakeProcess()
+        self.created_workers.append(worker)
+        return worker
+
+    def create_pool(self, size=1, max_requests=10):
+        return ruby_pcsd.RubyWorkerPool(self.create_worker, size, max_requests)
+
+    def test_reuse_worker(self):
+        pool = self.create_pool()
+        worker = pool.acquire()
+        pool.release(worker)
+        self.assertIs(pool.acquire(), worker)
+        self.assertEqual(len(self.created_workers), 1)
+        self.assertEqual(pool.worker_count, 1)
+
+    def test_no_worker_when_all_busy(self):
+        pool = self.create_pool()
+        pool.acquire()
+        self.assertIsNone(pool.acquire())
+        self.assertEqual(len(self.created_workers), 1)
+
+    def test_recycle_worker_after_max_requests(self):
+        pool = self.create_pool(max_requests=2)
+        worker = pool.acquire()
+        worker.served_requests = 2
+        pool.release(worker)
+        self.assertIsNot(pool.acquire(), worker)
+        self.assertEqual(len(self.created_workers), 2)
+        self.assertTrue(self.created_workers[0].terminated)
+        self.assertFalse(self.created_workers[1].terminated)
+
+    def test_replace_crashed_worker(self):
+        pool = self.create_pool()
+        pool.release(pool.acquire())
+        self.created_workers[0].is_alive = False
+        pool.acquire()
+        self.assertEqual(len(self.created_workers), 2)
+        self.assertTrue(self.created_workers[0].terminated)
+        self.assertEqual(pool.worker_count, 1)
+
+    def test_release_not_reusable(self):
+        pool = self.create_pool()
+        pool.release(pool.acquire(), reusable=False)
+        self.assertTrue(self.created_workers[0].terminated)
+        self.assertEqual(pool.worker_count, 0)
+
+    def test_no_worker_when_worker_cannot_start(self):
+        pool = ruby_pcsd.RubyWorkerPool(
+            mock.Mock(side_effect=OSError("error")),
+            size=1,
+            max_requests=10
+        )
+        self.assertIsNone(pool.acquire())
+        self.assertEqual(pool.worker_count, 0)
+
+    def test_terminate(self):
+        pool = self.create_pool(size=2)
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+        pool.terminate()
+        self.assertTrue(idle.terminated)
+        self.assertTrue(busy.terminated)
+        self.assertEqual(pool.worker_count, 0)
+        pool.release(busy)
+        self.assertEqual(pool.worker_count, 0)
+
+class RubyWorkerPoolHealthCheck(AsyncTestCase):
+    @gen_test
+    def test_terminates_unhealthy_workers(self):
+        created_workers = []
+        def create_worker():
+            worker = FakeProcess()
+            created_workers.append(worker)
+            return worker
+        pool = ruby_pcsd.RubyWorkerPool(create_worker, 2, 10)
+        healthy, unhealthy = pool.acquire(), pool.acquire()
+        pool.release(healthy)
+        pool.release(unhealthy)
+        unhealthy.pong = False
+        yield pool.check_health()
+        self.assertFalse(healthy.terminated)
+        self.assertTrue(unhealthy.terminated)
+        self.assertEqual(pool.worker_count, 1)
+
+    @gen_test
+    def test_other_workers_available_while_pinging(self):
+        pool = ruby_pcsd.RubyWorkerPool(FakeProcess, 2, 10)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        acquired_while_pinging = []
+        async def ping():
+            worker = pool.acquire()
+            acquired_while_pinging.append(worker)
+            pool.release(worker)
+            return True
+        first.ping = ping
+        second.ping = ping
+        yield pool.check_health()
+        # while a worker is being pinged, the other one serves requests
+        self.assertEqual(acquired_while_pinging, [second, first])
+        self.assertFalse(first.terminated)
+        self.assertFalse(second.terminated)
+        self.assertEqual(pool.worker_count, 2)
+
+class SendToRubyWithWorkers(AsyncTestCase):
+    def setUp(self):
+        self.wrapper = ruby_pcsd.Wrapper(
+            rc("/path/to/pcsd/cmdline/entry"),
+            worker_pool_size=1,
+        )
+        self.worker = FakeProcess()
+        self.oneshot = FakeProcess()
+        for name, fake in (
+            ("RubyWorker", self.worker),
+            ("RubyProcess", self.oneshot),
+        ):
+            patcher = patch_ruby_pcsd(name, mock.Mock(return_value=fake))
+            self.addCleanup(patcher.stop)
+            patcher.start()
+        super().setUp()
+
+    @gen_test
+    def test_send_to_worker(self):
+        response = yield self.wrapper.send_to_ruby("{}", b"body")
+        response.close()
+        self.assertEqual(self.worker.sent, [({}, b"body")])
+        self.assertFalse(self.worker.stdin_closed)
+        # the response has not been read whole
+        self.assertTrue(self.worker.terminated)
+        self.assertEqual(self.oneshot.sent, [])
+
+    @gen_test
+    def test_fallback_to_oneshot(self):
+        ruby_pcsd.RubyWorker.side_effect = OSError("error")
+        response = yield self.wrapper.send_to_ruby("{}")
+        response.close()
+        self.assertEqual(self.oneshot.sent, [({}, b"")])
+        self.assertTrue(self.oneshot.stdin_closed)
+
+    @gen_test
+    def test_worker_failure(self):
+        self.worker.is_alive = False
+        response = yield self.wrapper.send_to_ruby("{}")
+        response.close()
+        self.assertTrue(self.worker.terminated)
+        self.assertEqual(self.oneshot.sent, [({}, b"")])
+
+    @gen_test
+    def test_oneshot_failure(self):
+        ruby_pcsd.RubyWorker.side_effect = OSError("error")
+        self.oneshot.is_alive = False
+        with self.assertRaises(HTTPError):
+            yield self.wrapper.send_to_ruby("{}")
+        self.assertTrue(self.oneshot.terminated)
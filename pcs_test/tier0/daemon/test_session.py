@@ -1,5 +1,4 @@
 from unittest import TestCase
-from contextlib import contextmanager
 
 from pcs_test.tools.misc import create_setup_patch_mixin
 
@@ -40,33 +39,30 @@ class SessionTest(TestCase, AssertMixin, PatchSessionMixin):
         self.assertTrue(self.session.was_unused_last(10))
         self.assertFalse(self.session.was_unused_last(11))
 
-    @contextmanager
-    def refresh_test(self):
+    def test_session_is_refreshable(self):
         self.now.return_value = 10.1
-        yield self.session
+        self.session.refresh()
         self.now.return_value = 11.2
         self.assertTrue(self.session.was_unused_last(1))
         self.assertFalse(self.session.was_unused_last(2))
 
-    def test_session_is_refreshable(self):
+    def test_attribute_access_does_not_refresh(self):
         # pylint: disable=pointless-statement
-        with self.refresh_test() as session1:
-            session1.refresh()
-        with self.refresh_test() as session1:
-            session1.is_authenticated
-        with self.refresh_test() as session1:
-            session1.username
-        with self.refresh_test() as session1:
-            session1.groups
-        with self.refresh_test() as session1:
-            session1.sid
-        with self.refresh_test() as session1:
-            session1.ajax_id
+        self.now.return_value = 10.1
+        self.session.is_authenticated
+        self.session.username
+        self.session.groups
+        self.session.sid
+        self.session.ajax_id
+        self.assertTrue(self.session.was_unused_last(10))
+
+    def test_has_slots_only(self):
+        self.assertFalse(hasattr(self.session, "__dict__"))
 
 class StorageTest(TestCase, AssertMixin, PatchSessionMixin):
     def setUp(self):
         self.now = self.setup_patch("now", return_value=0)
-        self.storage = session.Storage(lifetime_seconds=10)
+        self.storage = session.Storage(lifetime_seconds=10, max_count=3)
 
     def test_creates_vanilla_session_when_sid_not_specified(self):
         self.assert_vanila_session(self.storage.provide())
@@ -129,3 +125,75 @@ class StorageTest(TestCase, AssertMixin, PatchSessionMixin):
         session2 = self.storage.rejected_user(session1.sid, USER)
         self.assert_login_failed_session(session2, USER)
         self.assertEqual(session1.sid, session2.sid)
+
+    def test_provided_session_is_refreshed(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 8
+        self.storage.provide(session1.sid)
+        self.now.return_value = 15
+        self.assertIs(session1, self.storage.provide(session1.sid))
+
+    def test_drops_expired_sessions_in_order_of_last_access(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 2
+        session2 = self.storage.provide()
+        self.now.return_value = 4
+        self.storage.provide(session1.sid)
+        self.now.return_value = 13
+        self.storage.drop_expired()
+        self.assertEqual(1, self.storage.session_count)
+        self.assertIs(session1, self.storage.provide(session1.sid))
+        self.assertIsNot(session2, self.storage.provide(session2.sid))
+
+    def test_drops_least_recently_used_session_over_limit(self):
+        session1 = self.storage.provide()
+        session2 = self.storage.provide()
+        session3 = self.storage.provide()
+        self.storage.provide(session1.sid)
+        session4 = self.storage.provide()
+        self.assertEqual(3, self.storage.session_count)
+        for session_ in (session1, session3, session4):
+            self.assertIs(session_, self.storage.provide(session_.sid))
+        self.assertIsNot(session2, self.storage.provide(session2.sid))
+
+    def test_drops_expired_sessions_before_used_ones_over_limit(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 5
+        session2 = self.storage.provide()
+        session3 = self.storage.provide()
+        self.now.return_value = 11
+        session4 = self.storage.login(None, USER, GROUPS)
+        self.assertEqual(3, self.storage.session_count)
+        for session_ in (session2, session3, session4):
+            self.assertIs(session_, self.storage.provide(session_.sid))
+        self.assertIsNot(session1, self.storage.provide(session1.sid))
+
+    def test_drops_unauthenticated_sessions_before_authenticated_ones(self):
+        session1 = self.storage.login(None, USER, GROUPS)
+        session2 = self.storage.provide()
+        session3 = self.storage.login(None, USER, GROUPS)
+        for dummy_i in range(5):
+            self.storage.provide()
+        self.assertEqual(3, self.storage.session_count)
+        for session_ in (session1, session3):
+            self.assertIs(session_, self.storage.provide(session_.sid))
+        self.assertIsNot(session2, self.storage.provide(session2.sid))
+
+    def test_drops_authenticated_sessions_when_all_are_authenticated(self):
+        session1 = self.storage.login(None, USER, GROUPS)
+        session2 = self.storage.login(None, USER, GROUPS)
+        session3 = self.storage.login(None, USER, GROUPS)
+        self.storage.provide(session1.sid)
+        session4 = self.storage.provide()
+        self.assertEqual(3, self.storage.session_count)
+        for session_ in (session1, session3, session4):
+            self.assertIs(session_, self.storage.provide(session_.sid))
+        self.assertIsNot(session2, self.storage.provide(session2.sid))
+
+    def test_login_keeps_session_from_being_dropped_first(self):
+        session1 = self.storage.provide()
+        self.storage.provide()
+        self.storage.provide()
+        session1 = self.storage.login(session1.sid, USER, GROUPS)
+        self.storage.provide()
+        self.assertIs(session1, self.storage.provide(session1.sid))
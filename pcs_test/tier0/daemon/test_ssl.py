@@ -1,4 +1,5 @@
 import os
+import ssl
 from unittest import TestCase
 
 from pcs_test.tools.misc import get_test_resource as rc
@@ -117,3 +118,61 @@ class PcsdSSLTest(TestCase):
         self.pcsd_ssl.guarantee_valid_certs()
         ssl_context = self.pcsd_ssl.create_context()
         self.assertEqual(ssl_context.options, SSL_OPTIONS)
+
+    def handshake(self, server_context):
+        # Return the certificate of the server, the client does not send
+        # a server name.
+        client_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_context.check_hostname = False
+        client_context.verify_mode = ssl.CERT_NONE
+        bios = [ssl.MemoryBIO() for dummy_i in range(4)]
+        client = client_context.wrap_bio(bios[0], bios[1])
+        server = server_context.wrap_bio(bios[2], bios[3], server_side=True)
+        for dummy_i in range(10):
+            done = True
+            for ssl_object, bio_out, peer_bio_in in (
+                (client, bios[1], bios[2]),
+                (server, bios[3], bios[0]),
+            ):
+                try:
+                    ssl_object.do_handshake()
+                except ssl.SSLWantReadError:
+                    done = False
+                peer_bio_in.write(bio_out.read())
+            if done:
+                return client.getpeercert(binary_form=True)
+        raise AssertionError("Handshake has not finished")
+
+    def test_reloaded_certs_used_for_new_connections(self):
+        self.pcsd_ssl.guarantee_valid_certs()
+        ssl_context = self.pcsd_ssl.create_context()
+        original_cert = self.handshake(ssl_context)
+        remove_ssl_files()
+        self.pcsd_ssl.guarantee_valid_certs()
+        self.assertEqual(original_cert, self.handshake(ssl_context))
+
+        self.pcsd_ssl.reload_context()
+        new_cert = self.handshake(ssl_context)
+        self.assertNotEqual(original_cert, new_cert)
+        with open(CERT, "rb") as cert_file:
+            self.assertEqual(
+                ssl.PEM_cert_to_DER_cert(cert_file.read().decode()), new_cert
+            )
+
+    def test_reload_raises_when_ssl_files_are_missing(self):
+        self.pcsd_ssl.guarantee_valid_certs()
+        ssl_context = self.pcsd_ssl.create_context()
+        original_cert = self.handshake(ssl_context)
+        remove_ssl_files()
+        self.assertRaises(SSLCertKeyException, self.pcsd_ssl.reload_context)
+        self.assertEqual(original_cert, self.handshake(ssl_context))
+
+    def test_detects_changed_certs(self):
+        self.pcsd_ssl.guarantee_valid_certs()
+        self.pcsd_ssl.create_context()
+        self.assertFalse(self.pcsd_ssl.have_certs_changed())
+        remove_ssl_files()
+        self.assertTrue(self.pcsd_ssl.have_certs_changed())
+        self.assertFalse(self.pcsd_ssl.have_certs_changed())
+        self.pcsd_ssl.guarantee_valid_certs()
+        self.assertTrue(self.pcsd_ssl.have_certs_changed())
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from unittest import TestCase, mock
+
+from tornado.gen import sleep
+
+from pcs.daemon import workers
+
+USER = "user"
+GROUPS = ["group1", "group2"]
+
+# workers are forked
+mp_context = multiprocessing.get_context("fork")
+
+
+def hold_lock(lock, locked_event, release_event):
+    async def hold():
+        await lock.acquire()
+        locked_event.set()
+        while not release_event.is_set():
+            await sleep(0.01)
+        lock.release()
+    asyncio.run(hold())
+
+def exit_holding_lock(lock, locked_event):
+    async def hold():
+        await lock.acquire()
+        locked_event.set()
+        os._exit(0) # pylint: disable=protected-access
+    asyncio.run(hold())
+
+def login(storage, queue):
+    queue.put(asyncio.run(storage.login(None, USER, GROUPS)).sid)
+
+
+class ProcessLock(TestCase):
+    def setUp(self):
+        self.lock = workers.ProcessLock()
+        self.locked_event = mp_context.Event()
+        self.acquired = []
+
+    def acquire_lock(self, check_acquired):
+        async def acquire():
+            async with self.lock:
+                self.acquired.append(check_acquired())
+        asyncio.run(asyncio.wait_for(acquire(), timeout=5))
+
+    def test_excludes_processes(self):
+        release_event = mp_context.Event()
+        process = mp_context.Process(
+            target=hold_lock,
+            args=(self.lock, self.locked_event, release_event),
+        )
+        process.start()
+        self.assertTrue(self.locked_event.wait(5))
+        timer = threading.Timer(0.2, release_event.set)
+        timer.start()
+        self.acquire_lock(release_event.is_set)
+        process.join()
+        timer.join()
+        self.assertEqual([True], self.acquired)
+
+    def test_released_when_holder_exits(self):
+        process = mp_context.Process(
+            target=exit_holding_lock,
+            args=(self.lock, self.locked_event),
+        )
+        process.start()
+        self.assertTrue(self.locked_event.wait(5))
+        process.join()
+        self.acquire_lock(lambda: True)
+        self.assertEqual([True], self.acquired)
+
+    def test_excludes_coroutines(self):
+        async def hold(name):
+            async with self.lock:
+                self.acquired.append(f"{name} start")
+                await sleep(0.01)
+                self.acquired.append(f"{name} end")
+        async def run_both():
+            await asyncio.gather(hold("a"), hold("b"))
+        asyncio.run(asyncio.wait_for(run_both(), timeout=5))
+        self.assertEqual(
+            ["a start", "a end", "b start", "b end"], self.acquired
+        )
+
+
+class SessionStorage(TestCase):
+    def setUp(self):
+        self.storage = workers.start_session_storage(lifetime_seconds=10)
+
+    def test_sessions_shared_by_processes(self):
+        queue = mp_context.Queue()
+        process = mp_context.Process(target=login, args=(self.storage, queue))
+        process.start()
+        sid = queue.get(timeout=5)
+        process.join()
+        session = asyncio.run(self.storage.provide(sid))
+        self.assertEqual(sid, session.sid)
+        self.assertEqual(USER, session.username)
+        self.assertEqual(GROUPS, session.groups)
+        self.assertTrue(session.is_authenticated)
+
+    def test_destroy(self):
+        async def login_and_destroy():
+            sid = (await self.storage.login(None, USER, GROUPS)).sid
+            await self.storage.destroy(sid)
+            return sid, (await self.storage.provide(sid)).sid
+        sid, new_sid = asyncio.run(login_and_destroy())
+        self.assertNotEqual(sid, new_sid)
+
+
+class SlowStorageProxy:
+    def __init__(self):
+        self.threads = []
+
+    def provide(self, sid=None):
+        self.threads.append(threading.current_thread())
+        time.sleep(0.2)
+        return sid
+
+
+class SharedStorage(TestCase):
+    def test_calls_do_not_block_ioloop(self):
+        proxy = SlowStorageProxy()
+        storage = workers.SharedStorage(proxy)
+        ticks = []
+        async def tick():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        async def provide():
+            ticker = asyncio.ensure_future(tick())
+            sid = await storage.provide("sid")
+            ticker.cancel()
+            return sid
+        self.assertEqual("sid", asyncio.run(provide()))
+        self.assertNotEqual([threading.current_thread()], proxy.threads)
+        self.assertGreater(len(ticks), 5)
+
+
+class SessionStorageSweep(TestCase):
+    def test_expired_sessions_dropped_by_manager(self):
+        # pylint: disable=protected-access
+        storage = workers._SynchronizedStorage(
+            lifetime_seconds=0.05, sweep_interval_seconds=0.05
+        )
+        storage.provide()
+        inner_storage = storage._SynchronizedStorage__storage
+        self.assertEqual(1, inner_storage.session_count)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and inner_storage.session_count:
+            time.sleep(0.05)
+        self.assertEqual(0, inner_storage.session_count)
+
+
+class ExitWithParent(TestCase):
+    @mock.patch("pcs.daemon.workers.os.kill")
+    @mock.patch("pcs.daemon.workers.os.getppid", lambda: 1)
+    def test_parent_exited(self, mock_kill):
+        workers.exit_with_parent(1234)()
+        mock_kill.assert_called_once_with(os.getpid(), 15)
+
+    @mock.patch("pcs.daemon.workers.os.kill")
+    @mock.patch("pcs.daemon.workers.os.getppid", lambda: 1234)
+    def test_parent_running(self, mock_kill):
+        workers.exit_with_parent(1234)()
+        mock_kill.assert_not_called()
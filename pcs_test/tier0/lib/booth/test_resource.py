@@ -2,6 +2,7 @@ from unittest import mock, TestCase
 from lxml import etree
 
 import pcs.lib.booth.resource as booth_resource
+from pcs.lib.cib.tools import IdProvider
 
 
 def fixture_resources_with_booth(booth_config_file_path):
@@ -38,17 +39,17 @@ def fixture_ip_element(_id, ip=""):
     '''.format(_id, ip))
 
 class CreateResourceIdTest(TestCase):
-    @mock.patch("pcs.lib.booth.resource.find_unique_id")
-    def test_return_new_uinq_id(self, mock_find_unique_id):
-        resources_section = etree.fromstring('''<resources/>''')
-        mock_find_unique_id.side_effect = (
-            lambda resources_section, _id: "{0}-n".format(_id)
+    def test_return_new_uinq_id(self):
+        id_provider = IdProvider(etree.fromstring(
+            '''<resources><primitive id="booth-some-name-ip"/></resources>'''
+        ))
+        self.assertEqual(
+            "booth-some-name-ip-1",
+            booth_resource.create_resource_id(id_provider, "some-name", "ip")
         )
         self.assertEqual(
-            "booth-some-name-ip-n",
-            booth_resource.create_resource_id(
-                resources_section, "some-name", "ip"
-            )
+            "booth-some-name-ip-2",
+            booth_resource.create_resource_id(id_provider, "some-name", "ip")
         )
 
 class FindBoothResourceElementsTest(TestCase):
@@ -10,6 +10,7 @@ from pcs_test.tools.custom_mock import MockLibraryReportProcessor
 
 from pcs.common import report_codes
 from pcs.lib.cib import alert
+from pcs.lib.cib.tools import IdProvider
 from pcs.lib.errors import ReportItemSeverity as severities
 
 
@@ -113,6 +114,7 @@ class CreateAlertTest(TestCase):
             </cib>
             """
         )
+        self.id_provider = IdProvider(self.tree)
 
     def test_no_alerts(self):
         # pylint: disable=no-self-use
@@ -126,7 +128,9 @@ class CreateAlertTest(TestCase):
         assert_xml_equal(
             '<alert id="my-alert" path="/test/path"/>',
             etree.tostring(
-                alert.create_alert(tree, "my-alert", "/test/path")
+                alert.create_alert(
+                    tree, IdProvider(tree), "my-alert", "/test/path"
+                )
             ).decode()
         )
         assert_xml_equal(
@@ -146,7 +150,9 @@ class CreateAlertTest(TestCase):
         assert_xml_equal(
             '<alert id="my-alert" path="/test/path"/>',
             etree.tostring(
-                alert.create_alert(self.tree, "my-alert", "/test/path")
+                alert.create_alert(
+                    self.tree, self.id_provider, "my-alert", "/test/path"
+                )
             ).decode()
         )
         assert_xml_equal(
@@ -167,7 +173,8 @@ class CreateAlertTest(TestCase):
         assert_xml_equal(
             '<alert id="my-alert" path="/test/path" description="nothing"/>',
             etree.tostring(alert.create_alert(
-                self.tree, "my-alert", "/test/path", "nothing"
+                self.tree, self.id_provider, "my-alert", "/test/path",
+                "nothing"
             )).decode()
         )
         assert_xml_equal(
@@ -190,7 +197,9 @@ class CreateAlertTest(TestCase):
 
     def test_invalid_id(self):
         assert_raise_library_error(
-            lambda: alert.create_alert(self.tree, "1alert", "/path"),
+            lambda: alert.create_alert(
+                self.tree, self.id_provider, "1alert", "/path"
+            ),
             (
                 severities.ERROR,
                 report_codes.INVALID_ID,
@@ -205,7 +214,9 @@ class CreateAlertTest(TestCase):
 
     def test_id_exists(self):
         assert_raise_library_error(
-            lambda: alert.create_alert(self.tree, "alert", "/path"),
+            lambda: alert.create_alert(
+                self.tree, self.id_provider, "alert", "/path"
+            ),
             (
                 severities.ERROR,
                 report_codes.ID_ALREADY_EXISTS,
@@ -217,7 +228,9 @@ class CreateAlertTest(TestCase):
         assert_xml_equal(
             '<alert id="alert-1" path="/test/path"/>',
             etree.tostring(
-                alert.create_alert(self.tree, None, "/test/path")
+                alert.create_alert(
+                    self.tree, self.id_provider, None, "/test/path"
+                )
             ).decode()
         )
         assert_xml_equal(
@@ -412,14 +425,15 @@ class AddRecipientTest(TestCase):
             </cib>
             """
         )
+        self.id_provider = IdProvider(self.tree)
 
     def test_with_id(self):
         assert_xml_equal(
             '<recipient id="my-recipient" value="value1"/>',
             etree.tostring(
                 alert.add_recipient(
-                    self.mock_reporter, self.tree, "alert", "value1",
-                    "my-recipient"
+                    self.mock_reporter, self.tree, self.id_provider, "alert",
+                    "value1", "my-recipient"
                 )
             ).decode()
         )
@@ -445,7 +459,8 @@ class AddRecipientTest(TestCase):
             '<recipient id="alert-recipient-1" value="value1"/>',
             etree.tostring(
                 alert.add_recipient(
-                    self.mock_reporter, self.tree, "alert", "value1"
+                    self.mock_reporter, self.tree, self.id_provider, "alert",
+                    "value1"
                 )
             ).decode()
         )
@@ -469,8 +484,8 @@ class AddRecipientTest(TestCase):
     def test_id_exists(self):
         assert_raise_library_error(
             lambda: alert.add_recipient(
-                self.mock_reporter, self.tree, "alert", "value1",
-                "alert-recipient"
+                self.mock_reporter, self.tree, self.id_provider, "alert",
+                "value1", "alert-recipient"
             ),
             (
                 severities.ERROR,
@@ -492,7 +507,8 @@ class AddRecipientTest(TestCase):
         )
         assert_raise_library_error(
             lambda: alert.add_recipient(
-                self.mock_reporter, self.tree, "alert", "test_val"
+                self.mock_reporter, self.tree, self.id_provider, "alert",
+                "test_val"
             ),
             report_item
         )
@@ -506,7 +522,8 @@ class AddRecipientTest(TestCase):
             '<recipient id="alert-recipient-1" value="test_val"/>',
             etree.tostring(
                 alert.add_recipient(
-                    self.mock_reporter, self.tree, "alert", "test_val",
+                    self.mock_reporter, self.tree, self.id_provider, "alert",
+                    "test_val",
                     allow_same_value=True
                 )
             ).decode()
@@ -541,7 +558,8 @@ class AddRecipientTest(TestCase):
     def test_alert_not_exist(self):
         assert_raise_library_error(
             lambda: alert.add_recipient(
-                self.mock_reporter, self.tree, "alert1", "test_val"
+                self.mock_reporter, self.tree, self.id_provider, "alert1",
+                "test_val"
             ),
             (
                 severities.ERROR,
@@ -566,7 +584,8 @@ class AddRecipientTest(TestCase):
             />
             """,
             etree.tostring(alert.add_recipient(
-                self.mock_reporter, self.tree, "alert", "value1",
+                self.mock_reporter, self.tree, self.id_provider, "alert",
+                "value1",
                 description="desc"
             )).decode()
         )
@@ -13,6 +13,7 @@ from pcs_test.tools.assertions import (
 
 from pcs.common import report_codes
 from pcs.lib.cib.constraint import constraint
+from pcs.lib.cib.tools import IdProvider
 from pcs.lib.errors import ReportItemSeverity as severities
 
 # pylint: disable=no-self-use, redundant-keyword-arg
@@ -220,16 +221,18 @@ class CreateIdTest(TestCase):
     @mock.patch(
         "pcs.lib.cib.constraint.constraint.resource_set.extract_id_set_list"
     )
-    @mock.patch("pcs.lib.cib.constraint.constraint.find_unique_id")
-    def test_create_id_from_resource_set_list(self, mock_find_id, mock_extract):
+    def test_create_id_from_resource_set_list(self, mock_extract):
         mock_extract.return_value = [["A", "B"], ["C"]]
-        mock_find_id.return_value = "some_id"
+        id_provider = mock.Mock(spec_set=["allocate_id"])
+        id_provider.allocate_id.return_value = "some_id"
         self.assertEqual(
             "some_id",
-            constraint.create_id("cib", "PREFIX", "resource_set_list")
+            constraint.create_id(id_provider, "PREFIX", "resource_set_list")
         )
         mock_extract.assert_called_once_with("resource_set_list")
-        mock_find_id.assert_called_once_with("cib", "pcs_PREFIX_set_A_B_set_C")
+        id_provider.allocate_id.assert_called_once_with(
+            "pcs_PREFIX_set_A_B_set_C"
+        )
 
 def fixture_constraint_section(return_value):
     constraint_section = mock.MagicMock()
@@ -306,6 +309,7 @@ class CreateWithSetTest(TestCase):
         constraint_section = etree.Element("constraints")
         constraint.create_with_set(
             constraint_section,
+            IdProvider(constraint_section),
             "ticket",
             {"a": "b"},
             [{"ids": ["A", "B"], "options": {"c": "d"}}]
@@ -326,6 +330,7 @@ class CreateWithSetTest(TestCase):
         assert_raise_library_error(
             lambda: constraint.create_with_set(
                 constraint_section,
+                IdProvider(constraint_section),
                 "ticket",
                 {"a": "b"},
                 []
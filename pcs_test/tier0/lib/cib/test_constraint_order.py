@@ -7,16 +7,16 @@ from pcs.lib.cib.constraint import order
 from pcs.lib.errors import ReportItemSeverity as severities
 
 
-#Patch check_new_id_applicable is always desired when working with
+#Patch book_new_id is always desired when working with
 #prepare_options_with_set. Patched function raises when id not applicable
 #and do nothing when applicable - in this case tests do no actions with it
-@mock.patch("pcs.lib.cib.constraint.order.check_new_id_applicable")
+@mock.patch("pcs.lib.cib.constraint.order.book_new_id")
 class PrepareOptionsWithSetTest(TestCase):
     def setUp(self):
-        self.cib = "cib"
+        self.id_provider = "id_provider"
         self.resource_set_list = "resource_set_list"
         self.prepare = lambda options: order.prepare_options_with_set(
-            self.cib,
+            self.id_provider,
             options,
             self.resource_set_list,
         )
@@ -29,21 +29,21 @@ class PrepareOptionsWithSetTest(TestCase):
         expected_options.update({"id": "generated_id"})
         self.assertEqual(expected_options, self.prepare(options))
         mock_create_id.assert_called_once_with(
-            self.cib,
+            self.id_provider,
             order.TAG_NAME,
             self.resource_set_list
         )
 
-    def test_refuse_invalid_id(self, mock_check_new_id_applicable):
-        mock_check_new_id_applicable.side_effect = Exception()
+    def test_refuse_invalid_id(self, mock_book_new_id):
+        mock_book_new_id.side_effect = Exception()
         invalid_id = "invalid_id"
         self.assertRaises(Exception, lambda: self.prepare({
             "symmetrical": "true",
             "kind": "Optional",
             "id": invalid_id,
         }))
-        mock_check_new_id_applicable.assert_called_once_with(
-            self.cib,
+        mock_book_new_id.assert_called_once_with(
+            self.id_provider,
             order.DESCRIPTION,
             invalid_id
         )
@@ -12,11 +12,11 @@ from pcs.lib.cib.constraint import ticket
 from pcs.lib.errors import ReportItemSeverity as severities
 
 
-@mock.patch("pcs.lib.cib.constraint.ticket.tools.check_new_id_applicable")
+@mock.patch("pcs.lib.cib.constraint.ticket.tools.book_new_id")
 class PrepareOptionsPlainTest(TestCase):
     def setUp(self):
-        self.cib = "cib"
-        self.prepare = partial(ticket.prepare_options_plain, self.cib)
+        self.id_provider = "id_provider"
+        self.prepare = partial(ticket.prepare_options_plain, self.id_provider)
 
     @mock.patch("pcs.lib.cib.constraint.ticket._create_id")
     def test_prepare_correct_options(self, mock_create_id, _):
@@ -115,7 +115,7 @@ class PrepareOptionsPlainTest(TestCase):
         )
 
 
-    def test_refuse_unknown_lost_policy(self, mock_check_new_id_applicable):
+    def test_refuse_unknown_lost_policy(self, mock_book_new_id):
         # pylint: disable=unused-argument
         assert_raise_library_error(
             lambda: self.prepare(
@@ -149,23 +149,23 @@ class PrepareOptionsPlainTest(TestCase):
             resource_id,
         ))
         mock_create_id.assert_called_once_with(
-            self.cib,
+            self.id_provider,
             ticket_key,
             resource_id,
             "Master",
         )
 
 
-#Patch check_new_id_applicable is always desired when working with
+#Patch book_new_id is always desired when working with
 #prepare_options_with_set. Patched function raises when id not applicable
 #and do nothing when applicable - in this case tests do no actions with it
-@mock.patch("pcs.lib.cib.constraint.ticket.tools.check_new_id_applicable")
+@mock.patch("pcs.lib.cib.constraint.ticket.tools.book_new_id")
 class PrepareOptionsWithSetTest(TestCase):
     def setUp(self):
-        self.cib = "cib"
+        self.id_provider = "id_provider"
         self.resource_set_list = "resource_set_list"
         self.prepare = lambda options: ticket.prepare_options_with_set(
-            self.cib,
+            self.id_provider,
             options,
             self.resource_set_list,
         )
@@ -178,23 +178,23 @@ class PrepareOptionsWithSetTest(TestCase):
         expected_options.update({"id": "generated_id"})
         self.assertEqual(expected_options, self.prepare(options))
         mock_create_id.assert_called_once_with(
-            self.cib,
+            self.id_provider,
             ticket.TAG_NAME,
             self.resource_set_list
         )
 
-    def test_refuse_invalid_id(self, mock_check_new_id_applicable):
+    def test_refuse_invalid_id(self, mock_book_new_id):
         class SomeException(Exception):
             pass
-        mock_check_new_id_applicable.side_effect = SomeException()
+        mock_book_new_id.side_effect = SomeException()
         invalid_id = "invalid_id"
         self.assertRaises(SomeException, lambda: self.prepare({
             "loss-policy": "freeze",
             "ticket": "T",
             "id": invalid_id,
         }))
-        mock_check_new_id_applicable.assert_called_once_with(
-            self.cib,
+        mock_book_new_id.assert_called_once_with(
+            self.id_provider,
             ticket.DESCRIPTION,
             invalid_id
         )
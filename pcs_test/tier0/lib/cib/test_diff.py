@@ -0,0 +1,529 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from unittest import skipUnless, TestCase
+from lxml import etree
+
+from pcs_test.tools.assertions import assert_xml_equal
+from pcs_test.tools.misc import get_test_resource as rc
+
+from pcs import settings
+from pcs.lib.cib.diff import DiffNotSupported, diff_cibs
+
+CIBADMIN = os.path.join(settings.pacemaker_binaries, "cibadmin")
+CRM_DIFF = os.path.join(settings.pacemaker_binaries, "crm_diff")
+
+
+def _find(tree, path):
+    element = None
+    for tag, _id in re.findall(r"/([^/\[]+)(?:\[@id='([^']*)'\])?", path):
+        if element is None:
+            assert tree.tag == tag, path
+            element = tree
+            continue
+        candidates = [
+            child for child in element
+            if child.tag == tag and (not _id or child.get("id") == _id)
+        ]
+        assert candidates, path
+        element = candidates[0]
+    return element
+
+def _offset(element):
+    return element.getparent().index(element)
+
+def _apply_change(tree, change):
+    operation = change.get("operation")
+    match = _find(tree, change.get("path"))
+    if operation == "delete":
+        match.getparent().remove(match)
+    elif operation == "modify":
+        result = change.find("change-result")[0]
+        match.attrib.clear()
+        for name, value in result.attrib.items():
+            match.set(name, value)
+    elif operation == "create":
+        position = int(change.get("position"))
+        new_element = etree.fromstring(etree.tostring(change[0]))
+        if position < len(match):
+            match[position].addprevious(new_element)
+        else:
+            match.append(new_element)
+    elif operation == "move":
+        position = int(change.get("position"))
+        parent = match.getparent()
+        if position != _offset(match):
+            if position > _offset(match):
+                position += 1
+            if position < len(parent):
+                parent[position].addprevious(match)
+            else:
+                parent.append(match)
+
+def apply_patchset(cib, diff, sort_by_position):
+    """
+    Apply a patchset the way pacemaker does
+
+    bool sort_by_position -- apply creates and moves after other changes
+        sorted by their position as newer pacemaker versions do
+    """
+    tree = etree.fromstring(etree.tostring(cib))
+    change_list = list(etree.fromstring(diff))
+    if sort_by_position:
+        positioned = [
+            change for change in change_list
+            if change.get("operation") in ("create", "move")
+        ]
+        change_list = [
+            change for change in change_list if change not in positioned
+        ] + sorted(positioned, key=lambda change: int(change.get("position")))
+    for change in change_list:
+        _apply_change(tree, change)
+    return tree
+
+def _canonical(element):
+    return (
+        element.tag,
+        sorted(element.attrib.items()),
+        [_canonical(child) for child in element],
+    )
+
+def _parse(xml):
+    return etree.fromstring(
+        xml, etree.XMLParser(remove_blank_text=True)
+    )
+
+
+class DiffCibs(TestCase):
+    cib_old = """
+        <cib epoch="1" num_updates="2" admin_epoch="0" a="1">
+            <configuration>
+                <crm_config/>
+                <resources>
+                    <primitive id="R1" class="ocf" type="Dummy">
+                        <meta_attributes id="R1-meta">
+                            <nvpair id="R1-meta-a" name="a" value="1"/>
+                        </meta_attributes>
+                    </primitive>
+                    <primitive id="R2" class="ocf" type="Dummy"/>
+                    <primitive id="R3" class="ocf" type="Dummy"/>
+                </resources>
+                <constraints/>
+            </configuration>
+            <status/>
+        </cib>
+    """
+
+    def assert_diff(self, cib_new, expected_diff=None, cib_old=None):
+        tree_old = _parse(self.cib_old if cib_old is None else cib_old)
+        tree_new = _parse(cib_new)
+        diff = diff_cibs(tree_old, tree_new)
+        if expected_diff is not None:
+            assert_xml_equal(expected_diff, diff)
+        for sort_by_position in (False, True):
+            patched = apply_patchset(tree_old, diff, sort_by_position)
+            # version attributes are not part of the diff
+            for name in ("epoch", "num_updates", "admin_epoch"):
+                if name in tree_new.attrib:
+                    patched.set(name, tree_new.get(name))
+            self.assertEqual(_canonical(tree_new), _canonical(patched))
+
+    def test_no_change(self):
+        self.assertEqual(
+            "", diff_cibs(_parse(self.cib_old), _parse(self.cib_old))
+        )
+
+    def test_version_change_only(self):
+        self.assertEqual(
+            "",
+            diff_cibs(
+                _parse(self.cib_old),
+                _parse(self.cib_old.replace('epoch="1"', 'epoch="5"'))
+            )
+        )
+
+    def test_whitespace_and_attribute_order_ignored(self):
+        self.assertEqual(
+            "",
+            diff_cibs(
+                _parse(self.cib_old),
+                etree.fromstring(self.cib_old.replace(
+                    'class="ocf" type="Dummy"', 'type="Dummy" class="ocf"'
+                ))
+            )
+        )
+
+    def test_attributes(self):
+        self.assert_diff(
+            self.cib_old
+                .replace('name="a" value="1"', 'name="a" value="2"')
+                .replace('id="R2" class="ocf"', 'id="R2" new="x"')
+            ,
+            """
+            <diff format="2">
+                <change operation="modify"
+                    path="/cib/configuration/resources/primitive[@id='R1']/meta_attributes[@id='R1-meta']/nvpair[@id='R1-meta-a']"
+                >
+                    <change-list>
+                        <change-attr name="value" operation="set" value="2"/>
+                    </change-list>
+                    <change-result>
+                        <nvpair id="R1-meta-a" name="a" value="2"/>
+                    </change-result>
+                </change>
+                <change operation="modify"
+                    path="/cib/configuration/resources/primitive[@id='R2']"
+                >
+                    <change-list>
+                        <change-attr name="new" operation="set" value="x"/>
+                        <change-attr name="class" operation="unset"/>
+                    </change-list>
+                    <change-result>
+                        <primitive id="R2" new="x" type="Dummy"/>
+                    </change-result>
+                </change>
+            </diff>
+            """
+        )
+
+    def test_root_attributes(self):
+        self.assert_diff(
+            self.cib_old.replace('epoch="1"', 'epoch="7" b="2"'),
+            """
+            <diff format="2">
+                <change operation="modify" path="/cib">
+                    <change-list>
+                        <change-attr name="b" operation="set" value="2"/>
+                    </change-list>
+                    <change-result>
+                        <cib b="2" a="1" num_updates="2" admin_epoch="0"
+                            epoch="1"
+                        />
+                    </change-result>
+                </change>
+            </diff>
+            """
+        )
+
+    def test_create_and_delete(self):
+        self.assert_diff(
+            self.cib_old
+                .replace(
+                    '<primitive id="R2" class="ocf" type="Dummy"/>',
+                    '<group id="G"><primitive id="R4"/></group>'
+                )
+                .replace("<constraints/>", "<constraints><a id='c'/>"
+                    "</constraints>"
+                )
+            ,
+            """
+            <diff format="2">
+                <change operation="delete"
+                    path="/cib/configuration/resources/primitive[@id='R2']"
+                />
+                <change operation="create"
+                    path="/cib/configuration/resources" position="1"
+                >
+                    <group id="G"><primitive id="R4"/></group>
+                </change>
+                <change operation="create"
+                    path="/cib/configuration/constraints" position="0"
+                >
+                    <a id="c"/>
+                </change>
+            </diff>
+            """
+        )
+
+    def test_delete_subtree(self):
+        self.assert_diff(
+            self.cib_old.replace(
+                """<meta_attributes id="R1-meta">
+                            <nvpair id="R1-meta-a" name="a" value="1"/>
+                        </meta_attributes>""",
+                ""
+            ),
+            """
+            <diff format="2">
+                <change operation="delete"
+                    path="/cib/configuration/resources/primitive[@id='R1']/meta_attributes[@id='R1-meta']"
+                />
+            </diff>
+            """
+        )
+
+    def test_move(self):
+        self.assert_diff(
+            """
+            <cib epoch="1" num_updates="2" admin_epoch="0" a="1">
+                <configuration>
+                    <crm_config/>
+                    <resources>
+                        <primitive id="R3" class="ocf" type="Dummy"/>
+                        <primitive id="R1" class="ocf" type="Dummy">
+                            <meta_attributes id="R1-meta">
+                                <nvpair id="R1-meta-a" name="a" value="1"/>
+                            </meta_attributes>
+                        </primitive>
+                        <primitive id="R2" class="ocf" type="Dummy"/>
+                    </resources>
+                    <constraints/>
+                </configuration>
+                <status/>
+            </cib>
+            """,
+            """
+            <diff format="2">
+                <change operation="move"
+                    path="/cib/configuration/resources/primitive[@id='R3']"
+                    position="0"
+                />
+            </diff>
+            """
+        )
+
+    def test_reorder_with_create_and_delete(self):
+        self.assert_diff(
+            """
+            <cib>
+                <x id="8"/><x id="3"/><x id="9"/><x id="1"/><x id="6"/>
+                <x id="5"/>
+            </cib>
+            """,
+            cib_old="""
+            <cib>
+                <x id="1"/><x id="2"/><x id="3"/><x id="4"/><x id="5"/>
+                <x id="6"/>
+            </cib>
+            """
+        )
+
+    def test_reverse(self):
+        self.assert_diff(
+            "<cib>{0}</cib>".format(
+                "".join('<x id="{0}"/>'.format(i) for i in range(10, 0, -1))
+            ),
+            cib_old="<cib>{0}</cib>".format(
+                "".join('<x id="{0}"/>'.format(i) for i in range(1, 11))
+            ),
+        )
+
+    def test_nested_changes_in_moved_element(self):
+        self.assert_diff(
+            """
+            <cib>
+                <b id="b"><y id="y2" v="2"/><y id="y1"/></b>
+                <a id="a"><y id="y0"/></a>
+                <c/>
+            </cib>
+            """,
+            cib_old="""
+            <cib>
+                <a id="a"/>
+                <b id="b"><y id="y1"/><y id="y2" v="1"/></b>
+                <c/>
+            </cib>
+            """
+        )
+
+    def test_element_without_id(self):
+        self.assert_diff(
+            self.cib_old.replace("<crm_config/>", "<crm_config a='b'/>"),
+            """
+            <diff format="2">
+                <change operation="modify"
+                    path="/cib/configuration/crm_config"
+                >
+                    <change-list>
+                        <change-attr name="a" operation="set" value="b"/>
+                    </change-list>
+                    <change-result><crm_config a="b"/></change-result>
+                </change>
+            </diff>
+            """
+        )
+
+    def test_accepts_element_tree(self):
+        self.assertEqual(
+            "",
+            diff_cibs(
+                etree.ElementTree(_parse(self.cib_old)), _parse(self.cib_old)
+            )
+        )
+
+
+class DiffCibsNotSupported(TestCase):
+    def assert_not_supported(self, cib_old, cib_new):
+        self.assertRaises(
+            DiffNotSupported,
+            lambda: diff_cibs(_parse(cib_old), _parse(cib_new))
+        )
+
+    def test_comment(self):
+        self.assert_not_supported(
+            "<cib><a/></cib>", "<cib><a/><!-- comment --></cib>"
+        )
+
+    def test_text(self):
+        self.assert_not_supported("<cib><a/></cib>", "<cib><a>text</a></cib>")
+
+    def test_different_root(self):
+        self.assert_not_supported("<cib/>", "<cob/>")
+
+    def test_duplicate_id(self):
+        self.assert_not_supported(
+            "<cib><a id='1'/></cib>", "<cib><a id='1'/><a id='1'/></cib>"
+        )
+
+    def test_duplicate_element_without_id(self):
+        self.assert_not_supported("<cib><a/></cib>", "<cib><a/><a/></cib>")
+
+    def test_element_without_id_and_with_id(self):
+        self.assert_not_supported(
+            "<cib><a/></cib>", "<cib><a id='1'/><a/></cib>"
+        )
+
+    def test_id_unusable_in_path(self):
+        self.assert_not_supported(
+            "<cib><a/></cib>", "<cib><a/><b id=\"b'1\"/></cib>"
+        )
+
+
+def _primitive(_id, meta=None):
+    return """
+        <primitive id="{0}" class="ocf" provider="pacemaker" type="Dummy">
+            {1}
+        </primitive>
+    """.format(
+        _id,
+        "" if meta is None else """
+            <meta_attributes id="{0}-meta">
+                <nvpair id="{0}-meta-a" name="a" value="{1}"/>
+            </meta_attributes>
+        """.format(_id, meta)
+    )
+
+def _group(_id, *primitive_id_list):
+    return '<group id="{0}">{1}</group>'.format(
+        _id,
+        "".join(
+            _primitive(primitive_id) for primitive_id in primitive_id_list
+        )
+    )
+
+def _location(_id, resource_id):
+    return """
+        <rsc_location id="{0}" rsc="{1}" node="node1" score="INFINITY"/>
+    """.format(_id, resource_id)
+
+def _fixture_cib(resources, constraints=""):
+    with open(rc("cib-empty-2.0.xml")) as cib_file:
+        cib = _parse(cib_file.read())
+    cib.find("configuration/resources").extend(
+        _parse("<resources>{0}</resources>".format(resources))
+    )
+    cib.find("configuration/constraints").extend(
+        _parse("<constraints>{0}</constraints>".format(constraints))
+    )
+    return cib
+
+
+@skipUnless(
+    os.path.exists(CIBADMIN) and os.path.exists(CRM_DIFF),
+    "Pacemaker tools cibadmin and crm_diff are required"
+)
+class DiffCibsAppliedByPacemaker(TestCase):
+    """
+    Patchsets are applied by cibadmin, the result is compared to the result of
+    applying a patchset from crm_diff
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def write_cib(self, file_name, cib):
+        path = os.path.join(self.tmp_dir, file_name)
+        with open(path, "wb") as cib_file:
+            cib_file.write(etree.tostring(cib))
+        return path
+
+    def patch(self, cib, diff):
+        path = self.write_cib("patched.xml", cib)
+        result = subprocess.run(
+            [CIBADMIN, "--patch", "--xml-pipe"],
+            input=diff.encode(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=dict(os.environ, CIB_file=path),
+        )
+        self.assertEqual(0, result.returncode, result.stderr.decode())
+        with open(path) as cib_file:
+            return _parse(cib_file.read())
+
+    def crm_diff(self, cib_old, cib_new):
+        result = subprocess.run(
+            [
+                CRM_DIFF,
+                "--original", self.write_cib("old.xml", cib_old),
+                "--new", self.write_cib("new.xml", cib_new),
+                "--no-version",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # 1 means the CIBs differ
+        self.assertEqual(1, result.returncode, result.stderr.decode())
+        return result.stdout.decode()
+
+    def assert_applied(self, cib_old, cib_new):
+        expected = _canonical(cib_new.find("configuration"))
+        patched = self.patch(cib_old, diff_cibs(cib_old, cib_new))
+        self.assertEqual(expected, _canonical(patched.find("configuration")))
+        patched = self.patch(cib_old, self.crm_diff(cib_old, cib_new))
+        self.assertEqual(expected, _canonical(patched.find("configuration")))
+
+    def test_create(self):
+        self.assert_applied(
+            _fixture_cib(""),
+            _fixture_cib(
+                _primitive("R1", meta="1") + _group("G1", "R2", "R3"),
+                _location("L1", "R1"),
+            ),
+        )
+
+    def test_modify_and_delete(self):
+        self.assert_applied(
+            _fixture_cib(
+                _primitive("R1", meta="1") + _primitive("R2")
+                +
+                _primitive("R3"),
+                _location("L1", "R2"),
+            ),
+            _fixture_cib(
+                _primitive("R1", meta="2") + _primitive("R3")
+                +
+                _primitive("R4", meta="1")
+            ),
+        )
+
+    def test_reorder(self):
+        self.assert_applied(
+            _fixture_cib(
+                "".join(_primitive("R{0}".format(i)) for i in range(1, 7))
+            ),
+            _fixture_cib(
+                "".join(
+                    _primitive("R{0}".format(i)) for i in (6, 3, 7, 1, 5, 2)
+                )
+            ),
+        )
+
+    def test_move_to_group(self):
+        self.assert_applied(
+            _fixture_cib(
+                _primitive("R1") + _primitive("R2") + _group("G1", "R3")
+            ),
+            _fixture_cib(_group("G1", "R3", "R1") + _primitive("R2")),
+        )
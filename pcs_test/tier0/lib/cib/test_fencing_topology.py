@@ -21,6 +21,7 @@ from pcs.lib.errors import LibraryError, ReportItemSeverity as severity
 from pcs.lib.pacemaker.state import ClusterState
 
 from pcs.lib.cib import fencing_topology as lib
+from pcs.lib.cib.tools import IdProvider
 
 
 patch_lib = create_patcher("pcs.lib.cib.fencing_topology")
@@ -97,7 +98,7 @@ class StatusNodesMixin:
                     />
                 </nodes>
             </crm_mon>
-        """).node_section.nodes
+        """).nodes
 
 
 @patch_lib("_append_level_element")
@@ -136,8 +137,8 @@ class AddLevel(TestCase):
         self.assertRaises(
             LibraryError,
             lambda: lib.add_level(
-                self.reporter, "topology_el", "resources_el", "level",
-                "target_type", "target_value", "devices",
+                self.reporter, "topology_el", "resources_el", "id_provider",
+                "level", "target_type", "target_value", "devices",
                 "cluster_status_nodes", "force_device", "force_node"
             )
         )
@@ -152,16 +153,16 @@ class AddLevel(TestCase):
         mock_append
     ):
         lib.add_level(
-            self.reporter, "topology_el", "resources_el", "level",
-            "target_type", "target_value", "devices", "cluster_status_nodes",
-            "force_device", "force_node"
+            self.reporter, "topology_el", "resources_el", "id_provider",
+            "level", "target_type", "target_value", "devices",
+            "cluster_status_nodes", "force_device", "force_node"
         )
         self.assert_validators_called(
             mock_val_level, mock_val_target, mock_val_devices, mock_val_dupl
         )
         mock_append.assert_called_once_with(
-            "topology_el", "valid_level", "target_type", "target_value",
-            "devices"
+            "topology_el", "id_provider", "valid_level", "target_type",
+            "target_value", "devices"
         )
 
     def test_invalid_level(
@@ -863,10 +864,11 @@ class ValidateLevelTargetDevicesDoesNotExist(TestCase):
 class AppendLevelElement(TestCase):
     def setUp(self):
         self.tree = etree.fromstring("<fencing-topology />")
+        self.id_provider = IdProvider(self.tree)
 
     def test_node_name(self):
         lib._append_level_element(
-            self.tree, 1, TARGET_TYPE_NODE, "node1", ["d1"]
+            self.tree, self.id_provider, 1, TARGET_TYPE_NODE, "node1", ["d1"]
         )
         assert_xml_equal(
             """
@@ -880,9 +882,33 @@ class AppendLevelElement(TestCase):
             etree_to_str(self.tree)
         )
 
+    def test_id_used(self):
+        lib._append_level_element(
+            self.tree, self.id_provider, 1, TARGET_TYPE_NODE, "node1", ["d1"]
+        )
+        lib._append_level_element(
+            self.tree, self.id_provider, 1, TARGET_TYPE_NODE, "node1", ["d2"]
+        )
+        assert_xml_equal(
+            """
+            <fencing-topology>
+                <fencing-level
+                    id="fl-node1-1"
+                    devices="d1" index="1" target="node1"
+                />
+                <fencing-level
+                    id="fl-node1-1-1"
+                    devices="d2" index="1" target="node1"
+                />
+            </fencing-topology>
+            """,
+            etree_to_str(self.tree)
+        )
+
     def test_node_pattern(self):
         lib._append_level_element(
-            self.tree, "2", TARGET_TYPE_REGEXP, "node-\d+", ["d1", "d2"]
+            self.tree, self.id_provider, "2", TARGET_TYPE_REGEXP, "node-\d+",
+            ["d1", "d2"]
         )
         assert_xml_equal(
             """
@@ -898,7 +924,8 @@ class AppendLevelElement(TestCase):
 
     def test_node_attribute(self):
         lib._append_level_element(
-            self.tree, 3, TARGET_TYPE_ATTRIBUTE, ("name%@x", "val%@x"), ["d1"],
+            self.tree, self.id_provider, 3, TARGET_TYPE_ATTRIBUTE,
+            ("name%@x", "val%@x"), ["d1"],
         )
         assert_xml_equal(
             """
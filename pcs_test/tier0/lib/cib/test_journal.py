@@ -0,0 +1,195 @@
+from unittest import TestCase
+from lxml import etree
+
+from pcs_test.tier0.lib.cib.test_diff import apply_patchset
+from pcs_test.tools.assertions import assert_xml_equal
+from pcs_test.tools.xml import etree_to_str
+
+from pcs.lib.cib.diff import DiffNotSupported, diff_cib_subtrees, diff_cibs
+from pcs.lib.cib.journal import CibChangeJournal
+
+
+CIB = """
+    <cib epoch="1">
+        <configuration>
+            <resources>
+                <group id="G">
+                    <primitive id="R1">
+                        <meta_attributes id="R1-meta">
+                            <nvpair id="R1-meta-a" name="a" value="1"/>
+                        </meta_attributes>
+                    </primitive>
+                    <primitive id="R2"/>
+                </group>
+                <primitive id="R3"/>
+            </resources>
+            <constraints/>
+        </configuration>
+    </cib>
+"""
+
+def _parse(xml):
+    return etree.fromstring(xml, etree.XMLParser(remove_blank_text=True))
+
+
+class CibChangeJournalTest(TestCase):
+    def setUp(self):
+        self.cib_original = _parse(CIB)
+        self.cib = _parse(CIB)
+        self.journal = CibChangeJournal(self.cib)
+
+    def find(self, _id):
+        return self.cib.find(".//*[@id='{0}']".format(_id))
+
+    def assert_diff(self, expected_diff=None):
+        diff = diff_cib_subtrees(self.journal.get_changed_subtrees())
+        if expected_diff is not None:
+            assert_xml_equal(expected_diff, diff)
+        self.assertEqual(
+            etree_to_str(apply_patchset(self.cib_original, diff, False)),
+            etree_to_str(self.cib)
+        )
+
+    def test_nothing_changed(self):
+        self.assertEqual([], self.journal.changed_elements)
+        self.assertEqual("", diff_cib_subtrees([]))
+
+    def test_recorded_but_not_changed(self):
+        self.journal.record_change(self.find("R1"))
+        self.assertEqual(
+            "", diff_cib_subtrees(self.journal.get_changed_subtrees())
+        )
+
+    def test_attribute_change(self):
+        element = self.find("R1-meta-a")
+        self.journal.record_change(element)
+        element.set("value", "2")
+        self.assertEqual([element], self.journal.changed_elements)
+        self.assert_diff("""
+            <diff format="2">
+                <change operation="modify"
+                    path="/cib/configuration/resources/group[@id='G']/primitive[@id='R1']/meta_attributes[@id='R1-meta']/nvpair[@id='R1-meta-a']"
+                >
+                    <change-list>
+                        <change-attr name="value" operation="set" value="2"/>
+                    </change-list>
+                    <change-result>
+                        <nvpair id="R1-meta-a" name="a" value="2"/>
+                    </change-result>
+                </change>
+            </diff>
+        """)
+
+    def test_id_change(self):
+        element = self.find("R3")
+        self.journal.record_change(element)
+        element.set("id", "R4")
+        self.assert_diff("""
+            <diff format="2">
+                <change operation="modify"
+                    path="/cib/configuration/resources/primitive[@id='R3']"
+                >
+                    <change-list>
+                        <change-attr name="id" operation="set" value="R4"/>
+                    </change-list>
+                    <change-result><primitive id="R4"/></change-result>
+                </change>
+            </diff>
+        """)
+
+    def test_add_and_remove(self):
+        group = self.find("G")
+        self.journal.record_change(group)
+        group.remove(self.find("R2"))
+        etree.SubElement(group, "primitive", id="R5")
+        self.assert_diff("""
+            <diff format="2">
+                <change operation="delete"
+                    path="/cib/configuration/resources/group[@id='G']/primitive[@id='R2']"
+                />
+                <change operation="create"
+                    path="/cib/configuration/resources/group[@id='G']"
+                    position="1"
+                >
+                    <primitive id="R5"/>
+                </change>
+            </diff>
+        """)
+
+    def test_descendant_of_recorded_element(self):
+        group = self.find("G")
+        self.journal.record_change(group)
+        self.journal.record_change(self.find("R1"))
+        self.find("R1").set("a", "b")
+        self.assertEqual([group], self.journal.changed_elements)
+        self.assert_diff()
+
+    def test_ancestor_recorded_after_descendant(self):
+        nvpair = self.find("R1-meta-a")
+        self.journal.record_change(nvpair)
+        nvpair.set("value", "2")
+        group = self.find("G")
+        self.journal.record_change(group)
+        group.set("a", "b")
+        self.assertEqual([group], self.journal.changed_elements)
+        self.assert_diff()
+        self.assertEqual(
+            "1",
+            self.journal.get_original(group).find(
+                ".//nvpair[@id='R1-meta-a']"
+            ).get("value")
+        )
+
+    def test_move_between_parents(self):
+        group = self.find("G")
+        resources = self.find("R3").getparent()
+        primitive = self.find("R2")
+        self.journal.record_change(primitive)
+        primitive.set("a", "b")
+        self.journal.record_change(group)
+        self.journal.record_change(self.find("R3"))
+        group.remove(primitive)
+        self.find("R3").append(primitive)
+        self.assertEqual(
+            [group, self.find("R3")], self.journal.changed_elements
+        )
+        self.assertIs(resources, self.find("R3").getparent())
+        self.assert_diff()
+
+    def test_removed_element_not_diffed(self):
+        primitive = self.find("R2")
+        self.journal.record_change(primitive)
+        primitive.set("a", "b")
+        self.journal.record_change(self.find("G"))
+        self.find("G").remove(primitive)
+        self.assertEqual([self.find("G")], self.journal.changed_elements)
+        self.assert_diff()
+
+    def test_element_recorded_after_removal(self):
+        group = self.find("G")
+        primitive = self.find("R2")
+        self.journal.record_change(group)
+        group.remove(primitive)
+        self.journal.record_change(primitive)
+        primitive.set("a", "b")
+        self.assertEqual([group], self.journal.changed_elements)
+        self.assert_diff()
+
+    def test_root(self):
+        self.journal.record_change(self.cib)
+        self.cib.set("epoch", "2")
+        self.cib.set("a", "b")
+        self.find("R3").set("a", "b")
+        diff = diff_cib_subtrees(self.journal.get_changed_subtrees())
+        self.assertEqual(diff, diff_cibs(self.cib_original, self.cib))
+
+    def test_ambiguous_path(self):
+        resources = self.find("R3").getparent()
+        etree.SubElement(resources, "group", id="G")
+        element = self.find("R1-meta-a")
+        self.journal.record_change(element)
+        element.set("value", "2")
+        self.assertRaises(
+            DiffNotSupported,
+            lambda: diff_cib_subtrees(self.journal.get_changed_subtrees())
+        )
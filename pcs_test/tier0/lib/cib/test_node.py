@@ -222,7 +222,7 @@ class EnsureNodeExists(TestCase):
                     />
                 </nodes>
             </crm_mon>
-        """).node_section.nodes
+        """).nodes
 
     def test_node_already_exists(self):
         assert_xml_equal(
@@ -8,6 +8,7 @@ from pcs_test.tools.assertions import (
 
 from pcs.common import report_codes
 from pcs.lib.cib.resource import group
+from pcs.lib.cib.tools import IdProvider
 from pcs.lib.errors import ReportItemSeverity as severities
 
 
@@ -26,6 +27,7 @@ class ProvideGroup(TestCase):
         )
         self.group_element = self.cib.find('.//group')
         self.resources_section = self.cib.find('.//resources')
+        self.id_provider = IdProvider(self.cib)
 
     def test_search_in_whole_tree(self, find_element_by_tag_and_id):
         def find_group(*args, **kwargs):
@@ -36,14 +38,18 @@ class ProvideGroup(TestCase):
 
         self.assertEqual(
             self.group_element,
-            group.provide_group(self.resources_section, "g")
+            group.provide_group(self.resources_section, "g", self.id_provider)
         )
 
     def test_create_group_when_not_exists(self, find_element_by_tag_and_id):
         find_element_by_tag_and_id.return_value = None
-        group_element = group.provide_group(self.resources_section, "g2")
+        self.id_provider.allocate_id("other")
+        group_element = group.provide_group(
+            self.resources_section, "g2", self.id_provider
+        )
         self.assertEqual('group', group_element.tag)
         self.assertEqual('g2', group_element.attrib["id"])
+        self.assertEqual("g2-1", self.id_provider.allocate_id("g2"))
 
 class PlaceResource(TestCase):
     def setUp(self):
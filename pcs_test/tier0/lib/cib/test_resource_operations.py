@@ -8,6 +8,7 @@ from pcs_test.tools.misc import create_patcher
 
 from pcs.common import report_codes
 from pcs.lib.cib.resource import operations
+from pcs.lib.cib.tools import IdProvider
 from pcs.lib.errors import ReportItemSeverity as severities
 from pcs.lib.validate import ValuePair
 
@@ -409,3 +410,29 @@ class GetResourceOperations(TestCase):
             operations.get_resource_operations(self.resource_noop_el),
             []
         )
+
+class CreateOperations(TestCase):
+    def test_ids_unique_with_explicit_ids(self):
+        resources = etree.fromstring(
+            '<cib><configuration><resources><primitive id="R"/></resources>'
+            '</configuration></cib>'
+        )
+        primitive = resources.find(".//primitive")
+        id_provider = IdProvider(primitive)
+        id_provider.allocate_id("other")
+        operations.create_operations(
+            primitive,
+            id_provider,
+            [
+                {
+                    "name": "monitor",
+                    "interval": "10",
+                    "id": "R-stop-interval-0s",
+                },
+                {"name": "stop", "interval": "0s"},
+            ]
+        )
+        self.assertEqual(
+            ["R-stop-interval-0s", "R-stop-interval-0s-1"],
+            [op.get("id") for op in primitive.iterfind("operations/op")]
+        )
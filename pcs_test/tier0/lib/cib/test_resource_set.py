@@ -8,6 +8,7 @@ from pcs_test.tools.assertions import(
 
 from pcs.common import report_codes
 from pcs.lib.cib.constraint import resource_set
+from pcs.lib.cib.tools import IdProvider
 from pcs.lib.errors import ReportItemSeverity as severities
 
 # pylint: disable=no-self-use
@@ -70,6 +71,7 @@ class CreateTest(TestCase):
         constraint_element = etree.Element("constraint")
         resource_set.create(
             constraint_element,
+            IdProvider(constraint_element),
             {"ids": ["A", "B"], "options": {"sequential": "true"}},
         )
         assert_xml_equal(etree.tostring(constraint_element).decode(), """
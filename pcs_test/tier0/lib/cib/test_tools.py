@@ -129,6 +129,131 @@ class IdProviderAllocate(IdProviderTest):
         self.assertEqual("myId-2", self.provider.allocate_id("myId"))
 
 
+class IdProviderRegisterElement(IdProviderTest):
+    def test_registered_element(self):
+        self.assertEqual("myId", self.provider.allocate_id("myId"))
+        self.fixture_add_primitive_with_id("otherId")
+        self.provider.register_element(
+            self.cib.tree.find(".//primitive[@id='otherId']")
+        )
+        self.assertEqual("otherId-1", self.provider.allocate_id("otherId"))
+
+    def test_element_registered_before_index_built(self):
+        self.fixture_add_primitive_with_id("myId")
+        self.provider.register_element(
+            self.cib.tree.find(".//primitive[@id='myId']")
+        )
+        self.assertEqual("myId-1", self.provider.allocate_id("myId"))
+
+
+class IdIndexTest(CibToolsTest):
+    def test_existing_id(self):
+        self.fixture_add_primitive_with_id("myId")
+        index = lib.IdIndex(self.cib.tree)
+        self.assertTrue(index.is_used("myId"))
+        self.assertFalse(index.is_used("otherId"))
+
+    def test_same_ids_as_does_id_exist(self):
+        tree = etree.fromstring("""
+            <cib>
+                <configuration>
+                    <resources>
+                        <primitive id="b">
+                            <meta_attributes id="b-meta">
+                                <nvpair id="b-meta-r" name="remote-node"
+                                    value="a"
+                                />
+                            </meta_attributes>
+                        </primitive>
+                    </resources>
+                    <acls>
+                        <acl_target id="target1"><role id="role1"/></acl_target>
+                    </acls>
+                </configuration>
+                <status><node_state id="status-1"/></status>
+            </cib>
+        """)
+        index = lib.IdIndex(tree)
+        for _id in (
+            "a", "b", "b-meta", "b-meta-r", "target1", "role1", "status-1",
+            "c"
+        ):
+            self.assertEqual(
+                lib.does_id_exist(tree, _id), index.is_used(_id), _id
+            )
+
+    def test_book(self):
+        index = lib.IdIndex(self.cib.tree)
+        self.assertFalse(index.is_used("myId"))
+        index.book("myId")
+        self.assertTrue(index.is_used("myId"))
+
+    def test_removed_element(self):
+        self.fixture_add_primitive_with_id("myId")
+        index = lib.IdIndex(self.cib.tree)
+        primitive = self.cib.tree.find(".//primitive[@id='myId']")
+        primitive.getparent().remove(primitive)
+        self.assertFalse(index.is_used("myId"))
+
+    def test_changed_id(self):
+        self.fixture_add_primitive_with_id("myId")
+        index = lib.IdIndex(self.cib.tree)
+        self.cib.tree.find(".//primitive[@id='myId']").set("id", "newId")
+        self.assertFalse(index.is_used("myId"))
+
+    def test_added_element(self):
+        index = lib.IdIndex(self.cib.tree)
+        self.assertEqual("myId", index.find_unique_id("myId"))
+        self.fixture_add_primitive_with_id("myId")
+        index.add_element(self.cib.tree.find(".//primitive[@id='myId']"))
+        self.assertTrue(index.is_used("myId"))
+        self.assertEqual("myId-1", index.find_unique_id("myId"))
+
+    def test_added_remote_node(self):
+        index = lib.IdIndex(self.cib.tree)
+        self.cib.append_to_first_tag_name(
+            "resources",
+            '<primitive id="R"><meta_attributes id="R-meta">'
+            '<nvpair id="R-meta-r" name="remote-node" value="node"/>'
+            '<nvpair id="R-meta-a" name="remote-addr" value="addr"/>'
+            '</meta_attributes></primitive>'
+        )
+        index.add_element(self.cib.tree.find(".//primitive[@id='R']"))
+        self.assertTrue(index.is_used("node"))
+        self.assertTrue(index.is_used("R-meta-r"))
+        self.assertFalse(index.is_used("addr"))
+
+    def test_added_element_removed(self):
+        index = lib.IdIndex(self.cib.tree)
+        self.fixture_add_primitive_with_id("myId")
+        primitive = self.cib.tree.find(".//primitive[@id='myId']")
+        index.add_element(primitive)
+        primitive.getparent().remove(primitive)
+        self.assertFalse(index.is_used("myId"))
+
+    def test_find_unique_id(self):
+        self.fixture_add_primitive_with_id("myId")
+        self.fixture_add_primitive_with_id("myId-1")
+        self.fixture_add_primitive_with_id("myId-3")
+        index = lib.IdIndex(self.cib.tree)
+        self.assertEqual("other", index.find_unique_id("other"))
+        self.assertEqual("myId-2", index.find_unique_id("myId"))
+        index.book("myId-2")
+        self.assertEqual("myId-4", index.find_unique_id("myId"))
+
+    def test_find_unique_id_after_removal(self):
+        self.fixture_add_primitive_with_id("myId")
+        self.fixture_add_primitive_with_id("myId-1")
+        index = lib.IdIndex(self.cib.tree)
+        self.assertEqual("myId-2", index.find_unique_id("myId"))
+        index.book("myId-2")
+        primitive = self.cib.tree.find(".//primitive[@id='myId-1']")
+        primitive.getparent().remove(primitive)
+        # freed suffixes are not reused
+        self.assertEqual("myId-3", index.find_unique_id("myId"))
+        self.assertEqual("myId-1", index.find_unique_id("myId-1"))
+
+
 class DoesIdExistTest(CibToolsTest):
     def test_existing_id(self):
         self.fixture_add_primitive_with_id("myId")
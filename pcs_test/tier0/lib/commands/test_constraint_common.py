@@ -40,7 +40,7 @@ class CreateWithSetTest(TestCase):
     def create(self, duplication_alowed=False):
         constraint.create_with_set(
             "rsc_some",
-            lambda cib, options, resource_set_list: options,
+            lambda id_provider, options, resource_set_list: options,
             self.env,
             [
                 {"ids": ["A", "B"], "options": {"role": "Master"}},
@@ -143,7 +143,7 @@ class ShowTest(TestCase):
     def create(self, tag_name, resource_set_list):
         constraint.create_with_set(
             tag_name,
-            lambda cib, options, resource_set_list: options,
+            lambda id_provider, options, resource_set_list: options,
             self.env,
             resource_set_list,
             {"id":"some_id", "symmetrical": "true"},
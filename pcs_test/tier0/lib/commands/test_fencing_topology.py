@@ -26,6 +26,7 @@ patch_command = create_patcher("pcs.lib.commands.fencing_topology")
 
 
 @patch_command("cib_fencing_topology.add_level")
+@patch_command("IdProvider", lambda cib: "id_provider")
 @patch_command("get_resources")
 @patch_command("get_fencing_topology")
 @patch_env("push_cib")
@@ -40,9 +41,7 @@ class AddLevel(TestCase):
     ):
         mock_get_cib.return_value = "mocked cib"
         mock_status_xml.return_value = "mock get_cluster_status_xml"
-        mock_status.return_value = mock.MagicMock(
-            node_section=mock.MagicMock(nodes="nodes")
-        )
+        mock_status.return_value = mock.MagicMock(nodes="nodes")
         mock_get_topology.return_value = "topology el"
         mock_get_resources.return_value = "resources_el"
 
@@ -75,6 +74,7 @@ class AddLevel(TestCase):
             lib_env.report_processor,
             "topology el",
             "resources_el",
+            "id_provider",
             "level",
             "target type",
             "target value",
@@ -108,6 +108,7 @@ class AddLevel(TestCase):
             lib_env.report_processor,
             "topology el",
             "resources_el",
+            "id_provider",
             "level",
             TARGET_TYPE_ATTRIBUTE,
             "target value",
@@ -141,6 +142,7 @@ class AddLevel(TestCase):
             lib_env.report_processor,
             "topology el",
             "resources_el",
+            "id_provider",
             "level",
             TARGET_TYPE_REGEXP,
             "target value",
@@ -231,9 +233,7 @@ class Verify(TestCase):
         mock_get_resources, mock_verify
     ):
         mock_status_xml.return_value = "mock get_cluster_status_xml"
-        mock_status.return_value = mock.MagicMock(
-            node_section=mock.MagicMock(nodes="nodes")
-        )
+        mock_status.return_value = mock.MagicMock(nodes="nodes")
         mock_get_topology.return_value = "topology el"
         mock_get_resources.return_value = "resources_el"
         lib_env = create_lib_env()
@@ -29,8 +29,8 @@ create_env = partial(
 )
 
 def fixture_node(order_num):
-    node = mock.MagicMock(attrs=mock.MagicMock())
-    node.attrs.name = "node-{0}".format(order_num)
+    node = mock.MagicMock()
+    node.name = "node-{0}".format(order_num)
     return node
 
 class StandbyMaintenancePassParameters(TestCase):
@@ -281,9 +281,7 @@ class CibRunnerNodes(TestCase):
         self, get_cluster_status_xml, cluster_state, ensure_wait_satisfiable,
         push_cib
     ):
-        cluster_state.return_value = mock.MagicMock(
-            node_section=mock.MagicMock(nodes="nodes")
-        )
+        cluster_state.return_value = mock.MagicMock(nodes="nodes")
         get_cluster_status_xml.return_value = "mock get_cluster_status_xml"
         wait = 10
 
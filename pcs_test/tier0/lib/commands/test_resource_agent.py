@@ -14,6 +14,8 @@ from pcs.common import report_codes
 from pcs.lib import resource_agent as lib_ra
 from pcs.lib.env import LibraryEnvironment
 from pcs.lib.errors import ReportItemSeverity as severity
+from pcs.lib.external import CommandRunner
+from pcs.lib.resource_agent_cache import AgentMetadataCache
 
 from pcs.lib.commands import resource_agent as lib
 
@@ -233,8 +235,9 @@ class TestListAgents(TestCase):
         )
 
 
+    @mock.patch("pcs.lib.resource_agent.prefetch_metadata")
     @mock.patch.object(lib_ra.Agent, "_get_metadata", autospec=True)
-    def test_describe(self, mock_metadata):
+    def test_describe(self, mock_metadata, mock_prefetch):
         def mock_metadata_func(self):
             if self.get_name() == "ocf:test:Stateful":
                 raise lib_ra.UnableToGetAgentMetadata(
@@ -280,6 +283,7 @@ class TestListAgents(TestCase):
                 },
             ]
         )
+        mock_prefetch.assert_called_once()
 
 
 class CompleteAgentList(TestCase):
@@ -303,6 +307,78 @@ class CompleteAgentList(TestCase):
             metadata_class=Agent,
         ))
 
+@mock.patch(
+    "pcs.lib.resource_agent.list_resource_agents_standards_and_providers",
+    lambda runner: ["ocf:test", "systemd"]
+)
+@mock.patch(
+    "pcs.lib.resource_agent.list_resource_agents",
+    lambda runner, standard: {
+        "ocf:test": ["Delay"],
+        "systemd": ["pcsd"],
+    }.get(standard, [])
+)
+@mock.patch(
+    "pcs.lib.resource_agent.list_stonith_agents",
+    lambda runner: ["fence_xvm"]
+)
+class RefreshMetadataCache(TestCase):
+    def setUp(self):
+        self.mock_logger = mock.MagicMock(logging.Logger)
+        self.mock_reporter = MockLibraryReportProcessor()
+        self.lib_env = LibraryEnvironment(self.mock_logger, self.mock_reporter)
+        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        cmd_runner_patcher = mock.patch.object(
+            LibraryEnvironment, "cmd_runner", lambda env: self.mock_runner
+        )
+        cmd_runner_patcher.start()
+        self.addCleanup(cmd_runner_patcher.stop)
+        self.mock_cache = mock.MagicMock(spec_set=AgentMetadataCache)
+        self.mock_cache.get.return_value = None
+        self.addCleanup(lib_ra.Agent.set_metadata_cache, None)
+
+    def test_success(self):
+        lib_ra.Agent.set_metadata_cache(self.mock_cache)
+        self.mock_runner.run_parallel.side_effect = (
+            lambda command_list, max_processes: (
+                [("<resource-agent/>", "", 0)] * len(command_list)
+            )
+        )
+        self.mock_runner.run.return_value = ("<resource-agent/>", "", 0)
+
+        lib.refresh_metadata_cache(self.lib_env)
+
+        self.mock_cache.clear.assert_called_once_with()
+        self.assertEqual(
+            [
+                "ocf:test:Delay",
+                "stonith:fence_xvm",
+                "pacemaker-fenced",
+            ],
+            [call[1][0] for call in self.mock_cache.set.mock_calls]
+        )
+        self.assertEqual(
+            [
+                ["ocf:test:Delay", "systemd:pcsd"],
+                ["stonith:fence_xvm"],
+            ],
+            [
+                [args[-1] for args, dummy_env in call[1][0]]
+                for call in self.mock_runner.run_parallel.mock_calls
+            ]
+        )
+
+    def test_cache_disabled(self):
+        assert_raise_library_error(
+            lambda: lib.refresh_metadata_cache(self.lib_env),
+            (
+                severity.ERROR,
+                report_codes.AGENT_METADATA_CACHE_DISABLED,
+                {},
+            ),
+        )
+
+
 @mock.patch.object(lib_ra.ResourceAgent, "_load_metadata", autospec=True)
 @mock.patch("pcs.lib.resource_agent.guess_exactly_one_resource_agent_full_name")
 @mock.patch.object(
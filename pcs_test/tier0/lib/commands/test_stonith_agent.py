@@ -92,8 +92,9 @@ class TestListAgents(TestCase):
         )
 
 
+    @mock.patch("pcs.lib.resource_agent.prefetch_metadata")
     @mock.patch.object(lib_ra.Agent, "_get_metadata", autospec=True)
-    def test_describe(self, mock_metadata):
+    def test_describe(self, mock_metadata, mock_prefetch):
         self.maxDiff = None
         def mock_metadata_func(self):
             if self.get_name() == "ocf:test:Stateful":
@@ -140,6 +141,7 @@ class TestListAgents(TestCase):
                 },
             ]
         )
+        mock_prefetch.assert_called_once()
 
 
 @mock.patch.object(lib_ra.StonithAgent, "_load_metadata", autospec=True)
@@ -21,8 +21,18 @@ from pcs.lib.external import CommandRunner
 
 # pylint: disable=no-self-use
 
-def get_runner(stdout="", stderr="", returncode=0, env_vars=None):
+def get_mock_runner():
     runner = mock.MagicMock(spec_set=CommandRunner)
+    def run_streaming(args, stdout_sink):
+        # streamed commands are expected among the other commands run
+        stdout, stderr, returncode = runner.run(args)
+        stdout_sink(stdout.encode("utf-8"))
+        return stdout, stderr, returncode
+    runner.run_streaming.side_effect = run_streaming
+    return runner
+
+def get_runner(stdout="", stderr="", returncode=0, env_vars=None):
+    runner = get_mock_runner()
     runner.run.return_value = (stdout, stderr, returncode)
     runner.env_vars = env_vars if env_vars else {}
     return runner
@@ -318,7 +328,7 @@ class UpgradeCibTest(TestCase):
 @mock.patch("pcs.lib.pacemaker.live._upgrade_cib")
 class EnsureCibVersionTest(TestCase):
     def setUp(self):
-        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        self.mock_runner = get_mock_runner()
         self.cib = etree.XML('<cib validate-with="pacemaker-2.3.4"/>')
 
     def test_same_version(self, mock_upgrade, mock_get_cib):
@@ -623,7 +633,7 @@ class ResourceRefreshTest(LibraryPacemakerTest):
     def test_basic(self):
         expected_stdout = "expected output"
         expected_stderr = "expected stderr"
-        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner = get_mock_runner()
         call_list = [
             mock.call(self.crm_mon_cmd()),
             mock.call([self.path("crm_resource"), "--refresh"]),
@@ -713,7 +723,7 @@ class ResourceRefreshTest(LibraryPacemakerTest):
     def test_full(self):
         expected_stdout = "expected output"
         expected_stderr = "expected stderr"
-        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner = get_mock_runner()
         call_list = [
             mock.call(self.crm_mon_cmd()),
             mock.call([self.path("crm_resource"), "--refresh", "--force"]),
@@ -783,7 +793,7 @@ class ResourceRefreshTest(LibraryPacemakerTest):
         expected_stdout = "some info"
         expected_stderr = "some error"
         expected_retval = 1
-        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner = get_mock_runner()
         call_list = [
             mock.call(self.crm_mon_cmd()),
             mock.call([self.path("crm_resource"), "--refresh"]),
@@ -970,3 +980,141 @@ class ResourcesWaitingTest(LibraryPacemakerTest):
         mock_runner.run.assert_called_once_with(
             [self.path("crm_resource"), "--wait"]
         )
+
+
+class WaitForStateTest(LibraryPacemakerTest):
+    def setUp(self):
+        self.status_list = []
+        self.history_list = None
+        self.history_xpath = (
+            "/cib/status/node_state/lrm/lrm_resources/lrm_resource"
+        )
+        self.runner = get_mock_runner()
+        self.runner.run.side_effect = self.run_command
+
+    def run_command(self, args):
+        if args[0] == self.path("cibadmin"):
+            self.assertEqual(
+                [
+                    self.path("cibadmin"), "--local", "--query", "--xpath",
+                    self.history_xpath,
+                ],
+                args
+            )
+            if self.history_list is None:
+                return "", "error", 1
+            return self.history_list.pop(0)
+        self.assertEqual(self.crm_mon_cmd(), args)
+        return self.status_list.pop(0)
+
+    def fixture_status(self, nodes_count):
+        status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
+        status.find("summary/nodes_configured").set(
+            "number", str(nodes_count)
+        )
+        return etree.tostring(status).decode(), "", 0
+
+    def fixture_wait(self, stdout="", stderr="", retval=0, checks=0):
+        def run_interruptible(
+            args, interrupt_check, check_interval, max_check_interval
+        ):
+            self.assertEqual(
+                [self.path("crm_resource"), "--wait", "--timeout=10"], args
+            )
+            self.assertEqual(settings.wait_state_check_interval, check_interval)
+            self.assertEqual(
+                settings.wait_state_check_max_interval, max_check_interval
+            )
+            for dummy_i in range(checks):
+                if interrupt_check():
+                    return "", "", -15, True
+            return stdout, stderr, retval, False
+        self.runner.run_interruptible.side_effect = run_interruptible
+
+    @staticmethod
+    def state_reached(cluster_state):
+        return cluster_state.summary.nodes_count == 2
+
+    def test_state_reached(self):
+        self.status_list = [self.fixture_status(1), self.fixture_status(2)]
+        self.fixture_wait(checks=3)
+        cluster_state = lib.wait_for_state(self.runner, 10, self.state_reached)
+        self.assertEqual(2, cluster_state.summary.nodes_count)
+        self.assertEqual([], self.status_list)
+
+    def test_cluster_settled(self):
+        self.status_list = [self.fixture_status(1)]
+        self.fixture_wait(checks=1)
+        self.assertIsNone(
+            lib.wait_for_state(self.runner, 10, self.state_reached)
+        )
+
+    @staticmethod
+    def fixture_history(call_id):
+        return (
+            (
+                '<lrm_resource id="A"><lrm_rsc_op id="A_last_0" '
+                'call-id="{0}"/></lrm_resource>'
+            ).format(call_id),
+            "",
+            0
+        )
+
+    def test_unchanged_history_not_checked(self):
+        self.history_list = [
+            self.fixture_history(1),
+            self.fixture_history(1),
+            self.fixture_history(2),
+        ]
+        self.status_list = [self.fixture_status(1), self.fixture_status(2)]
+        self.fixture_wait(checks=3)
+        cluster_state = lib.wait_for_state(self.runner, 10, self.state_reached)
+        self.assertEqual(2, cluster_state.summary.nodes_count)
+        self.assertEqual([], self.status_list)
+        self.assertEqual([], self.history_list)
+
+    def test_no_history_not_checked_again(self):
+        self.history_list = [("", "", 105), ("", "", 105)]
+        self.status_list = [self.fixture_status(1)]
+        self.fixture_wait(checks=2)
+        self.assertIsNone(
+            lib.wait_for_state(self.runner, 10, self.state_reached)
+        )
+        self.assertEqual([], self.status_list)
+        self.assertEqual([], self.history_list)
+
+    def test_history_of_resources(self):
+        self.history_xpath = (
+            "/cib/status/node_state/lrm/lrm_resources/lrm_resource"
+            "[substring-before(concat(@id, ':'), ':')"
+            " = /cib/configuration/resources//*[@id='A' or @id='B']"
+            "/descendant-or-self::primitive/@id]"
+        )
+        self.history_list = [self.fixture_history(1)]
+        self.status_list = [self.fixture_status(2)]
+        self.fixture_wait(checks=1)
+        cluster_state = lib.wait_for_state(
+            self.runner, 10, self.state_reached, ["B", "A"]
+        )
+        self.assertEqual(2, cluster_state.summary.nodes_count)
+
+    def test_state_not_available(self):
+        self.status_list = [
+            ("", "error", 1), ("not xml", "", 0), self.fixture_status(2)
+        ]
+        self.fixture_wait(checks=3)
+        cluster_state = lib.wait_for_state(self.runner, 10, self.state_reached)
+        self.assertEqual(2, cluster_state.summary.nodes_count)
+
+    def test_wait_error(self):
+        self.fixture_wait("some info", "some error", 124)
+        assert_raise_library_error(
+            lambda: lib.wait_for_state(self.runner, 10, self.state_reached),
+            (
+                Severity.ERROR,
+                report_codes.WAIT_FOR_IDLE_TIMED_OUT,
+                {
+                    "reason": "some error\nsome info",
+                }
+            )
+        )
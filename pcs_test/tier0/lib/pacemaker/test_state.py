@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 from unittest import mock, TestCase
 
 from lxml import etree
@@ -7,64 +10,18 @@ from pcs_test.tools.assertions import (
     assert_report_item_equal,
 )
 from pcs_test.tools.misc import get_test_resource as rc
-from pcs_test.tools.xml import get_xml_manipulation_creator_from_file
+from pcs_test.tools.xml import (
+    etree_to_str,
+    get_xml_manipulation_creator_from_file,
+)
 
 from pcs.common import report_codes
 from pcs.lib.pacemaker import state
-from pcs.lib.pacemaker.state import (
-    ClusterState,
-    _Attrs,
-    _Children,
-)
+from pcs.lib.pacemaker.state import ClusterState
 from pcs.lib.errors import ReportItemSeverity as severities
 
 # pylint: disable=no-self-use, protected-access
 
-class AttrsTest(TestCase):
-    def test_get_declared_attr(self):
-        attrs = _Attrs('test', {'node-name': 'node1'}, {'name': 'node-name'})
-        self.assertEqual('node1', attrs.name)
-
-    def test_raises_on_undeclared_attribute(self):
-        attrs = _Attrs('test', {'node-name': 'node1'}, {})
-        self.assertRaises(AttributeError, lambda: attrs.name)
-
-    def test_raises_on_missing_required_attribute(self):
-        attrs = _Attrs('test', {}, {'name': 'node-name'})
-        self.assertRaises(AttributeError, lambda: attrs.name)
-
-    def test_attr_transformation_success(self):
-        attrs = _Attrs('test', {'number': '7'}, {'count': ('number', int)})
-        self.assertEqual(7, attrs.count)
-
-    def test_attr_transformation_fail(self):
-        attrs = _Attrs('test', {'number': 'abc'}, {'count': ('number', int)})
-        self.assertRaises(ValueError, lambda: attrs.count)
-
-class ChildrenTest(TestCase):
-    def setUp(self):
-        self.dom = etree.fromstring(
-            '<main><some name="0"/><any name="1"/><any name="2"/></main>'
-        )
-
-    def wrap(self, element):
-        return '{0}.{1}'.format(element.tag, element.attrib['name'])
-
-    def test_get_declared_section(self):
-        children = _Children(
-            'test', self.dom, {}, {'some_section': ('some', self.wrap)}
-        )
-        self.assertEqual('some.0', children.some_section)
-
-    def test_get_declared_children(self):
-        children = _Children('test', self.dom, {'anys': ('any', self.wrap)}, {})
-        self.assertEqual(['any.1', 'any.2'], children.anys)
-
-    def test_raises_on_undeclared_children(self):
-        children = _Children('test', self.dom, {}, {})
-        self.assertRaises(AttributeError, lambda: children.some_section)
-
-
 class TestBase(TestCase):
     def setUp(self):
         self.create_covered_status = get_xml_manipulation_creator_from_file(
@@ -94,6 +51,47 @@ class ClusterStatusTest(TestBase):
         )
 
 
+class ClusterStateParserTest(TestBase):
+    def fixture_xml(self):
+        self.covered_status.append_to_first_tag_name(
+            "nodes",
+            """<node name="node1" id="1" type="member" online="true"
+                standby="false" standby_onfail="false" maintenance="false"
+                pending="false" unclean="false" shutdown="false"
+                expected_up="true" is_dc="true" resources_running="0"
+            />"""
+        )
+        return str(self.covered_status).encode("utf-8")
+
+    def test_fed_in_chunks(self):
+        xml = self.fixture_xml()
+        parser = state.ClusterStateParser()
+        for i in range(0, len(xml), 7):
+            parser.feed(xml[i:i + 7])
+        cluster_state = parser.close()
+        self.assertEqual(
+            ["node1"], [node.name for node in cluster_state.nodes]
+        )
+
+    def test_invalid_xml(self):
+        parser = state.ClusterStateParser()
+        parser.feed(b"<crm_mon><nodes></crm_mon>")
+        # the rest of the output is ignored
+        parser.feed(b"</nodes>")
+        assert_raise_library_error(
+            parser.close,
+            (severities.ERROR, report_codes.BAD_CLUSTER_STATE_FORMAT, {})
+        )
+
+    def test_unfinished_xml(self):
+        parser = state.ClusterStateParser()
+        parser.feed(self.fixture_xml()[:-10])
+        assert_raise_library_error(
+            parser.close,
+            (severities.ERROR, report_codes.BAD_CLUSTER_STATE_FORMAT, {})
+        )
+
+
 class WorkWithClusterStatusNodesTest(TestBase):
     def fixture_node_string(self, **kwargs):
         attrs = dict(name='name', id='id', type='member')
@@ -123,7 +121,7 @@ class WorkWithClusterStatusNodesTest(TestBase):
         xml = str(self.covered_status)
         self.assertEqual(
             ['node1', 'node2'],
-            [node.attrs.name for node in ClusterState(xml).node_section.nodes]
+            [node.name for node in ClusterState(xml).nodes]
         )
 
     def test_can_filter_out_remote_nodes(self):
@@ -136,21 +134,78 @@ class WorkWithClusterStatusNodesTest(TestBase):
         self.assertEqual(
             ['node1'],
             [
-                node.attrs.name
-                for node in ClusterState(xml).node_section.nodes
-                if node.attrs.type != 'remote'
+                node.name
+                for node in ClusterState(xml).nodes
+                if node.type != 'remote'
             ]
         )
 
+    def test_can_get_node_by_name(self):
+        self.covered_status.append_to_first_tag_name(
+            'nodes',
+            self.fixture_node_string(name='node1', id='1'),
+            self.fixture_node_string(name='node2', type='remote', id='2'),
+        )
+        cluster_state = ClusterState(str(self.covered_status))
+        node = cluster_state.get_node('node2')
+        self.assertEqual(
+            ('2', 'node2', 'remote', True, True, False, 0),
+            (
+                node.id, node.name, node.type, node.online, node.standby,
+                node.is_dc, node.resources_running,
+            )
+        )
+        self.assertIsNone(cluster_state.get_node('node3'))
+
 
 class WorkWithClusterStatusSummaryTest(TestBase):
     def test_nodes_count(self):
         xml = str(self.covered_status)
-        self.assertEqual(0, ClusterState(xml).summary.nodes.attrs.count)
+        self.assertEqual(0, ClusterState(xml).summary.nodes_count)
 
     def test_resources_count(self):
         xml = str(self.covered_status)
-        self.assertEqual(0, ClusterState(xml).summary.resources.attrs.count)
+        self.assertEqual(0, ClusterState(xml).summary.resources_count)
+
+
+class ClusterStateValidationTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        schema_path = os.path.join(self.tmp_dir, "crm_mon.rng")
+        with open(schema_path, "w") as schema_file:
+            schema_file.write("""
+                <element name="crm_mon"
+                    xmlns="http://relaxng.org/ns/structure/1.0"
+                >
+                    <empty/>
+                </element>
+            """)
+        patcher = mock.patch.object(
+            state.settings, "crm_mon_schema", schema_path
+        )
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_document_validated(self):
+        ClusterState("<crm_mon/>")
+        assert_raise_library_error(
+            lambda: ClusterState("<crm_mon><nodes/></crm_mon>"),
+            (severities.ERROR, report_codes.BAD_CLUSTER_STATE_FORMAT, {})
+        )
+
+    def test_trusted_source_not_validated(self):
+        ClusterState("<crm_mon><nodes/></crm_mon>", trusted_source=True)
+
+
+def fixture_cluster_state(*resources_xml):
+    status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
+    resources = etree.SubElement(status, "resources")
+    for xml in resources_xml:
+        resources.append(etree.fromstring(xml))
+    return ClusterState(etree_to_str(status))
 
 
 class GetPrimitiveRolesWithNodes(TestCase):
@@ -186,9 +241,7 @@ class GetPrimitiveRolesWithNodes(TestCase):
                 </resource>
             """,
         ]
-        primitives = [
-            etree.fromstring(xml) for xml in primitives_xml
-        ]
+        primitives = fixture_cluster_state(*primitives_xml).get_primitives("A")
 
         self.assertEqual(
             state._get_primitive_roles_with_nodes(primitives),
@@ -330,9 +383,9 @@ class GetPrimitivesForStateCheck(TestCase):
     """)
 
     def setUp(self):
-        self.status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
-        self.status.append(self.status_xml)
-        for resource in self.status.xpath(".//resource"):
+        status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
+        status.append(self.status_xml)
+        for resource in status.xpath(".//resource"):
             resource.attrib.update({
                 "resource_agent": "ocf::pacemaker:Stateful",
                 "role": "Started",
@@ -343,12 +396,13 @@ class GetPrimitivesForStateCheck(TestCase):
                 "failure_ignored": "false",
                 "nodes_running_on": "1",
             })
+        self.status = ClusterState(etree_to_str(status))
 
     def assert_primitives(self, resource_id, primitive_ids, expected_running):
         self.assertEqual(
             [
-                elem.attrib["id"]
-                for elem in state._get_primitives_for_state_check(
+                primitive.id
+                for primitive in state._get_primitives_for_state_check(
                     self.status, resource_id, expected_running
                 )
             ],
@@ -819,9 +873,9 @@ class IsResourceManaged(TestCase):
     """)
 
     def setUp(self):
-        self.status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
-        self.status.append(self.status_xml)
-        for resource in self.status.xpath(".//resource"):
+        status = etree.parse(rc("crm_mon.minimal.xml")).getroot()
+        status.append(self.status_xml)
+        for resource in status.xpath(".//resource"):
             resource.attrib.update({
                 "resource_agent": "ocf::pacemaker:Stateful",
                 "role": "Started",
@@ -832,6 +886,7 @@ class IsResourceManaged(TestCase):
                 "failure_ignored": "false",
                 "nodes_running_on": "1",
             })
+        self.status = ClusterState(etree_to_str(status))
 
     def assert_managed(self, resource, managed):
         self.assertEqual(
@@ -1,10 +1,15 @@
 from functools import partial
+import logging
 from unittest import mock, TestCase
 from lxml import etree
 
 from pcs_test.tools import fixture
-from pcs_test.tools.assertions import  assert_xml_equal
+from pcs_test.tools.assertions import (
+    assert_raise_library_error,
+    assert_xml_equal,
+)
 from pcs_test.tools.command_env import get_env_tools
+from pcs_test.tools.custom_mock import MockLibraryReportProcessor
 from pcs_test.tools.misc import (
     get_test_resource as rc,
     create_setup_patch_mixin,
@@ -12,6 +17,7 @@ from pcs_test.tools.misc import (
 from pcs_test.tools.xml import etree_to_str
 
 from pcs.common import report_codes
+from pcs.lib.errors import ReportItemSeverity as severities
 from pcs.common.tools import Version
 from pcs.lib.env import LibraryEnvironment
 
@@ -21,6 +27,23 @@ def mock_tmpfile(filename):
     mock_file.name = rc(filename)
     return mock_file
 
+CIB_DIFF_FEATURE_SET = """
+    <diff format="2">
+      <change operation="modify" path="/cib">
+        <change-list>
+          <change-attr name="crm_feature_set" operation="set" value="3.0.8"/>
+        </change-list>
+        <change-result>
+          <cib validate-with="pacemaker-2.0" crm_feature_set="3.0.8"
+            update-origin="rh7-3" update-client="crmd"
+            cib-last-written="Thu Aug 23 16:49:17 2012" have-quorum="0"
+            dc-uuid="2" admin_epoch="0" epoch="557" num_updates="122"
+          />
+        </change-result>
+      </change>
+    </diff>
+"""
+
 SetupPatchMixin = create_setup_patch_mixin(
     partial(mock.patch.object, LibraryEnvironment)
 )
@@ -153,11 +176,20 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.cib_cannot_diff = "cib-empty-1.2.xml"
         self.env_assist, self.config = get_env_tools(test_case=self)
 
-    def config_load_and_push_diff(self):
+    def config_load_and_push_diff(self, cib_diff):
         (self.config
             .runner.cib.load(filename=self.cib_can_diff)
-            .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
-            .runner.cib.push_diff()
+            .runner.cib.push_diff(cib_diff=cib_diff)
+        )
+
+    def config_load_crm_diff(self):
+        # crm_diff is used as a fallback for CIBs the native diff does not
+        # support, e.g. CIBs with comments
+        self.config.runner.cib.load_content(
+            open(rc(self.cib_can_diff)).read().replace(
+                "<configuration>", "<configuration><!-- comment -->"
+            ),
+            name="runner.cib.load",
         )
 
     def config_load_and_push(self):
@@ -194,12 +226,12 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         ]
 
     def test_get_and_push(self):
-        self.config_load_and_push_diff()
+        self.config.runner.cib.load(filename=self.cib_can_diff)
         env = self.env_assist.get_env()
 
         env.get_cib()
+        # nothing has been changed, there is nothing to push
         env.push_cib()
-        self.env_assist.assert_reports(self.push_reports())
 
     def test_get_and_push_cannot_diff(self):
         self.config_load_and_push()
@@ -212,18 +244,67 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
     def test_modified_cib_features_do_not_matter(self):
-        self.config_load_and_push_diff()
+        self.config_load_and_push_diff(CIB_DIFF_FEATURE_SET)
         env = self.env_assist.get_env()
 
         cib = env.get_cib()
         cib.set("crm_feature_set", "3.0.8")
         env.push_cib()
-        self.env_assist.assert_reports(self.push_reports(
-            cib_new=self.config.calls.get("runner.cib.load").stdout.replace(
-                "3.0.9",
-                "3.0.8"
-            )
-        ))
+
+    def test_push_tracked_changes(self):
+        self.config_load_and_push_diff(CIB_DIFF_FEATURE_SET)
+        env = self.env_assist.get_env()
+
+        cib = env.get_cib(track_changes=True)
+        env.cib_journal.record_change(cib)
+        cib.set("crm_feature_set", "3.0.8")
+        env.push_cib()
+
+    def test_push_tracked_changes_only(self):
+        self.config.runner.cib.load(filename=self.cib_can_diff)
+        env = self.env_assist.get_env()
+
+        cib = env.get_cib(track_changes=True)
+        # a change not announced to the journal is not pushed
+        cib.set("crm_feature_set", "3.0.8")
+        env.push_cib()
+
+    def test_push_tracked_changes_crm_diff(self):
+        self.config_load_crm_diff()
+        self.config.runner.cib.diff(
+            self.tmpfile_old.name, self.tmpfile_new.name
+        )
+        self.config.runner.cib.push_diff()
+        env = self.env_assist.get_env()
+
+        cib = env.get_cib(track_changes=True)
+        env.cib_journal.record_change(cib.find("configuration"))
+        env.push_cib()
+        self.env_assist.assert_reports(self.push_reports())
+
+    def test_journal_not_tracked(self):
+        self.config.runner.cib.load(filename=self.cib_can_diff)
+        env = self.env_assist.get_env()
+
+        env.get_cib()
+        self.assertIsNone(env.cib_journal)
+
+    def test_journal_not_loaded(self):
+        env = self.env_assist.get_env()
+        # need to use lambda because env.cib_journal is a property
+        self.assert_raises_cib_not_loaded(lambda: env.cib_journal)
+
+    def test_get_and_push_crm_diff(self):
+        self.config_load_crm_diff()
+        self.config.runner.cib.diff(
+            self.tmpfile_old.name, self.tmpfile_new.name
+        )
+        self.config.runner.cib.push_diff()
+        env = self.env_assist.get_env()
+
+        env.get_cib()
+        env.push_cib()
+        self.env_assist.assert_reports(self.push_reports())
 
     def test_push_no_features_goes_with_full(self):
         (self.config
@@ -239,19 +320,18 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
     def test_can_get_after_push(self):
-        self.config_load_and_push_diff()
+        self.config_load_and_push_diff(CIB_DIFF_FEATURE_SET)
         self.config.runner.cib.load(
             name="load_cib_2",
             filename=self.cib_can_diff
         )
         env = self.env_assist.get_env()
 
-        env.get_cib()
+        env.get_cib().set("crm_feature_set", "3.0.8")
         env.push_cib()
         # need to use lambda because env.cib is a property
         self.assert_raises_cib_not_loaded(lambda: env.cib)
         env.get_cib()
-        self.env_assist.assert_reports(self.push_reports())
 
     def test_can_get_after_push_cannot_diff(self):
         self.config_load_and_push()
@@ -275,7 +355,7 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.assert_raises_cib_not_loaded(env.push_cib)
 
     def test_tmpfile_fails(self):
-        self.config.runner.cib.load(filename=self.cib_can_diff)
+        self.config_load_crm_diff()
         self.mock_write_tmpfile.side_effect = EnvironmentError("test error")
         env = self.env_assist.get_env()
 
@@ -292,15 +372,13 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
     def test_diff_is_empty(self):
-        (self.config
-            .runner.cib.load(filename=self.cib_can_diff)
-            .runner.cib.diff(
-                self.tmpfile_old.name,
-                self.tmpfile_new.name,
-                stdout="",
-                stderr="",
-                returncode=1
-            )
+        self.config_load_crm_diff()
+        self.config.runner.cib.diff(
+            self.tmpfile_old.name,
+            self.tmpfile_new.name,
+            stdout="",
+            stderr="",
+            returncode=1
         )
         env = self.env_assist.get_env()
         env.get_cib()
@@ -308,37 +386,95 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.env_assist.assert_reports(self.push_reports())
 
     def test_diff_fails(self):
+        self.config_load_crm_diff()
+        self.config.runner.cib.diff(
+            self.tmpfile_old.name,
+            self.tmpfile_new.name,
+            stderr="invalid cib",
+            returncode=65
+        )
+        env = self.env_assist.get_env()
+        env.get_cib()
+        self.env_assist.assert_raise_library_error(
+            env.push_cib,
+            [
+                fixture.error(
+                    report_codes.CIB_DIFF_ERROR,
+                    reason="invalid cib",
+                )
+            ],
+            expected_in_processor=False
+        )
+        self.env_assist.assert_reports(self.push_reports())
+
+    def config_native_diff_rejected(self, crm_diff_push_returncode):
         (self.config
             .runner.cib.load(filename=self.cib_can_diff)
-            .runner.cib.diff(
-                self.tmpfile_old.name,
-                self.tmpfile_new.name,
+            .runner.cib.push_diff(
+                cib_diff=CIB_DIFF_FEATURE_SET,
                 stderr="invalid cib",
-                returncode=65
+                returncode=78
+            )
+            .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
+            .runner.cib.push_diff(
+                name="runner.cib.push_diff.crm_diff",
+                stderr=(
+                    "invalid cib" if crm_diff_push_returncode else ""
+                ),
+                returncode=crm_diff_push_returncode
             )
         )
+
+    def native_diff_rejected_reports(self, cib_new):
+        return [
+            fixture.debug(
+                report_codes.CIB_PUSH_NATIVE_DIFF_REJECTED,
+                reason="invalid cib",
+            ),
+        ] + self.push_reports(cib_new=cib_new)
+
+    def test_push_diff_rejected_crm_diff_pushed(self):
+        self.config_native_diff_rejected(0)
         env = self.env_assist.get_env()
-        env.get_cib()
+        cib = env.get_cib()
+        cib.set("crm_feature_set", "3.0.8")
+        cib_new = etree_to_str(cib)
+        env.push_cib()
+        self.env_assist.assert_reports(
+            self.native_diff_rejected_reports(cib_new)
+        )
+
+    def test_push_diff_rejected_crm_diff_fails(self):
+        self.config_native_diff_rejected(1)
+        env = self.env_assist.get_env()
+        cib = env.get_cib()
+        cib.set("crm_feature_set", "3.0.8")
+        cib_new = etree_to_str(cib)
         self.env_assist.assert_raise_library_error(
             env.push_cib,
             [
                 fixture.error(
-                    report_codes.CIB_DIFF_ERROR,
+                    report_codes.CIB_PUSH_ERROR,
                     reason="invalid cib",
                 )
             ],
             expected_in_processor=False
         )
-        self.env_assist.assert_reports(self.push_reports())
+        self.env_assist.assert_reports(
+            self.native_diff_rejected_reports(cib_new)
+        )
 
     def test_push_diff_fails(self):
         (self.config
             .runner.cib.load(filename=self.cib_can_diff)
-            .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
-            .runner.cib.push_diff(stderr="invalid cib", returncode=1)
+            .runner.cib.push_diff(
+                cib_diff=CIB_DIFF_FEATURE_SET,
+                stderr="invalid cib",
+                returncode=1
+            )
         )
         env = self.env_assist.get_env()
-        env.get_cib()
+        env.get_cib().set("crm_feature_set", "3.0.8")
         self.env_assist.assert_raise_library_error(
             env.push_cib,
             [
@@ -349,7 +485,6 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
             ],
             expected_in_processor=False
         )
-        self.env_assist.assert_reports(self.push_reports())
 
     def test_push_fails(self):
         (self.config
@@ -376,15 +511,37 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         (self.config
             .runner.cib.load(filename=self.cib_can_diff)
             .runner.pcmk.can_wait()
-            .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
-            .runner.cib.push_diff()
+            .runner.cib.push_diff(cib_diff=CIB_DIFF_FEATURE_SET)
             .runner.pcmk.wait(timeout=self.wait_timeout)
         )
         env = self.env_assist.get_env()
 
-        env.get_cib()
+        env.get_cib().set("crm_feature_set", "3.0.8")
         env.push_cib(wait=self.wait_timeout)
-        self.env_assist.assert_reports(self.push_reports())
+
+    @mock.patch("pcs.lib.env.wait_for_state")
+    def test_wait_state_reached(self, mock_wait_for_state):
+        (self.config
+            .runner.cib.load(filename=self.cib_can_diff)
+            .runner.pcmk.can_wait()
+            .runner.cib.push_diff(cib_diff=CIB_DIFF_FEATURE_SET)
+        )
+        mock_wait_for_state.return_value = "cluster state"
+        state_reached = mock.Mock()
+        env = self.env_assist.get_env()
+
+        env.get_cib().set("crm_feature_set", "3.0.8")
+        self.assertEqual(
+            "cluster state",
+            env.push_cib(
+                wait=self.wait_timeout,
+                wait_state_reached=state_reached,
+                wait_state_resource_ids=["A"],
+            )
+        )
+        mock_wait_for_state.assert_called_once_with(
+            mock.ANY, self.wait_timeout, state_reached, ["A"]
+        )
 
     def test_wait_cannot_diff(self):
         (self.config
@@ -437,6 +594,92 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
 
+class PushCibChanges(TestCase, ManageCibAssertionMixin):
+    def setUp(self):
+        self.env_assist, self.config = get_env_tools(test_case=self)
+        with open(rc("cib-empty-2.0.xml")) as cib_file:
+            self.cib_original = cib_file.read()
+
+    def test_push_diff(self):
+        self.config.runner.cib.push_diff(cib_diff=CIB_DIFF_FEATURE_SET)
+        cib_modified = etree.fromstring(self.cib_original)
+        cib_modified.set("crm_feature_set", "3.0.8")
+
+        self.env_assist.get_env().push_cib_changes(
+            self.cib_original, etree_to_str(cib_modified)
+        )
+
+    def test_nothing_changed(self):
+        self.env_assist.get_env().push_cib_changes(
+            self.cib_original, self.cib_original
+        )
+
+    def test_no_features_goes_with_full(self):
+        self.config.runner.cib.push_independent("<cib a=\"b\"/>")
+
+        self.env_assist.get_env().push_cib_changes("<cib/>", "<cib a='b'/>")
+        self.env_assist.assert_reports([
+            fixture.warn(
+                report_codes.CIB_PUSH_FORCED_FULL_DUE_TO_CRM_FEATURE_SET,
+                current_set="0.0.0",
+                required_set="3.0.9"
+            )
+        ])
+
+    def test_after_get(self):
+        self.config.runner.cib.load()
+        env = self.env_assist.get_env()
+
+        env.get_cib()
+        self.assert_raises_cib_error(
+            partial(
+                env.push_cib_changes, self.cib_original, self.cib_original
+            ),
+            "CIB has been loaded, cannot push CIB changes"
+        )
+
+
+@mock.patch.object(LibraryEnvironment, "cmd_runner")
+class DeferredCibPush(TestCase):
+    cib = "<cib><configuration/></cib>"
+
+    @staticmethod
+    def get_env(cib_data):
+        return LibraryEnvironment(
+            mock.MagicMock(logging.Logger),
+            MockLibraryReportProcessor(),
+            cib_data=cib_data,
+            defer_cib_push=True,
+        )
+
+    def test_kept_in_memory(self, mock_cmd_runner):
+        env = self.get_env(self.cib)
+        cib = env.get_cib()
+        etree.SubElement(cib.find("configuration"), "resources")
+        env.push_cib()
+        assert_xml_equal(
+            "<cib><configuration><resources/></configuration></cib>",
+            env.final_mocked_cib_content
+        )
+        # the CIB pushed before is loaded again
+        cib = env.get_cib()
+        self.assertIsNotNone(cib.find("configuration/resources"))
+        mock_cmd_runner.assert_not_called()
+
+    def test_wait_not_suported_for_mocked_cib(self, mock_cmd_runner):
+        env = self.get_env(self.cib)
+        env.get_cib()
+        assert_raise_library_error(
+            lambda: env.push_cib(wait=10),
+            (
+                severities.ERROR,
+                report_codes.WAIT_FOR_IDLE_NOT_LIVE_CLUSTER,
+                {},
+            ),
+        )
+        mock_cmd_runner.assert_not_called()
+
+
 class PushCustomCib(TestCase, ManageCibAssertionMixin):
     custom_cib = "<custom_cib />"
     wait_timeout = 10
@@ -1,4 +1,6 @@
 import logging
+import sys
+import time
 from subprocess import DEVNULL
 from unittest import mock, TestCase
 
@@ -386,6 +388,302 @@ class CommandRunnerTest(TestCase):
         )
 
 
+class CommandRunnerRunParallelTest(TestCase):
+    def setUp(self):
+        self.mock_logger = mock.MagicMock(logging.Logger)
+        self.mock_reporter = MockLibraryReportProcessor()
+        self.runner = lib.CommandRunner(
+            self.mock_logger, self.mock_reporter, {"LC_ALL": "C"}
+        )
+
+    @staticmethod
+    def command(script, env_extend=None):
+        return [sys.executable, "-c", script], env_extend
+
+    def test_results_in_command_order(self):
+        script = (
+            "import os, sys, time; time.sleep(float(sys.argv[1]));"
+            "sys.stdout.write(sys.argv[1] + os.environ.get('A', '') + '\\r\\n');"
+            "sys.stderr.write('err');"
+            "sys.exit(int(float(sys.argv[1]) * 10))"
+        )
+        command_list = [
+            ([sys.executable, "-c", script, delay], env_extend)
+            for delay, env_extend in (
+                ("0.3", None), ("0.1", {"A": "a"}), ("0.2", None),
+            )
+        ]
+        self.assertEqual(
+            [
+                ("0.3\n", "err", 3),
+                ("0.1a\n", "err", 1),
+                ("0.2\n", "err", 2),
+            ],
+            self.runner.run_parallel(command_list, 2)
+        )
+        self.assertEqual(
+            [
+                report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+                report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+                report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+            ],
+            [item.code for item in self.mock_reporter.report_item_list]
+        )
+        self.assertEqual(
+            {"LC_ALL": "C", "A": "a"},
+            self.mock_reporter.report_item_list[1].info["environment"]
+        )
+
+    def test_large_output(self):
+        script = (
+            "import sys; sys.stdout.write('o' * 300000);"
+            "sys.stderr.write('e' * 300000)"
+        )
+        self.assertEqual(
+            [("o" * 300000, "e" * 300000, 0)] * 2,
+            self.runner.run_parallel(
+                [self.command(script), self.command(script)], 1
+            )
+        )
+
+    def test_no_commands(self):
+        self.assertEqual([], self.runner.run_parallel([], 4))
+
+    def test_start_error(self):
+        command_list = [
+            self.command("import time; time.sleep(10)"),
+            (["/nonexistent/command"], None),
+        ]
+        assert_raise_library_error(
+            lambda: self.runner.run_parallel(command_list, 2),
+            (
+                severity.ERROR,
+                report_codes.RUN_EXTERNAL_PROCESS_ERROR,
+                {
+                    "command": "/nonexistent/command",
+                    "reason": "No such file or directory",
+                }
+            )
+        )
+
+
+class CommandRunnerRunInterruptibleTest(TestCase):
+    def setUp(self):
+        self.mock_reporter = MockLibraryReportProcessor()
+        self.runner = lib.CommandRunner(
+            mock.MagicMock(logging.Logger), self.mock_reporter
+        )
+        self.check_count = 0
+
+    def interrupt_check(self, interrupt_on):
+        def check():
+            self.check_count += 1
+            return self.check_count == interrupt_on
+        return check
+
+    def test_not_interrupted(self):
+        script = (
+            "import sys, time; sys.stdout.write('out'); sys.stdout.flush();"
+            "time.sleep(0.3); sys.stderr.write('err'); sys.exit(3)"
+        )
+        self.assertEqual(
+            ("out", "err", 3, False),
+            self.runner.run_interruptible(
+                [sys.executable, "-c", script],
+                self.interrupt_check(None),
+                0.05
+            )
+        )
+        self.assertTrue(self.check_count > 0)
+        self.assertEqual(
+            [
+                report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+            ],
+            [item.code for item in self.mock_reporter.report_item_list]
+        )
+
+    def test_interrupted(self):
+        script = (
+            "import sys, time; sys.stdout.write('out'); sys.stdout.flush();"
+            "time.sleep(10)"
+        )
+        stdout, dummy_stderr, retval, interrupted = (
+            self.runner.run_interruptible(
+                [sys.executable, "-c", script],
+                self.interrupt_check(2),
+                0.05
+            )
+        )
+        self.assertEqual(("out", True), (stdout, interrupted))
+        self.assertNotEqual(0, retval)
+        self.assertEqual(2, self.check_count)
+
+    def test_check_interval_backoff(self):
+        check_time_list = []
+        def check():
+            check_time_list.append(time.monotonic())
+            return False
+        self.runner.run_interruptible(
+            [sys.executable, "-c", "import time; time.sleep(0.8)"],
+            check,
+            0.02,
+            0.16
+        )
+        interval_list = [
+            later - earlier
+            for earlier, later in zip(check_time_list, check_time_list[1:])
+        ]
+        # 0.04, 0.08, 0.16, 0.16, ...
+        self.assertTrue(len(check_time_list) < 10)
+        self.assertTrue(interval_list[0] < interval_list[2])
+
+    def test_start_error(self):
+        assert_raise_library_error(
+            lambda: self.runner.run_interruptible(
+                ["/nonexistent/command"], self.interrupt_check(None), 0.05
+            ),
+            (
+                severity.ERROR,
+                report_codes.RUN_EXTERNAL_PROCESS_ERROR,
+                {
+                    "command": "/nonexistent/command",
+                    "reason": "No such file or directory",
+                }
+            )
+        )
+
+
+class CommandRunnerRunStreamingTest(TestCase):
+    def setUp(self):
+        self.mock_logger = mock.MagicMock(logging.Logger)
+        self.mock_reporter = MockLibraryReportProcessor()
+        self.runner = lib.CommandRunner(self.mock_logger, self.mock_reporter)
+        self.chunk_list = []
+
+    def run_script(self, script):
+        return self.runner.run_streaming(
+            [sys.executable, "-c", script], self.chunk_list.append
+        )
+
+    def test_success(self):
+        script = (
+            "import sys; sys.stdout.write('out' * 10000); "
+            "sys.stderr.write('err'); sys.exit(3)"
+        )
+        self.assertEqual(
+            ("out" * 10000, "err", 3), self.run_script(script)
+        )
+        self.assertEqual(b"out" * 10000, b"".join(self.chunk_list))
+        self.assertEqual(
+            [
+                report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+            ],
+            [item.code for item in self.mock_reporter.report_item_list]
+        )
+
+    @mock.patch.object(settings, "external_process_output_preview_length", 10)
+    def test_output_truncated(self):
+        script = (
+            "import sys; sys.stdout.write('o' * 100000); "
+            "sys.stderr.write('e' * 100000)"
+        )
+        self.assertEqual(
+            ("o" * 10 + "\n... (truncated)", "e" * 10 + "\n... (truncated)", 0),
+            self.run_script(script)
+        )
+        self.assertEqual(b"o" * 100000, b"".join(self.chunk_list))
+        self.assertEqual(
+            "o" * 10 + "\n... (truncated)",
+            self.mock_reporter.report_item_list[1].info["stdout"]
+        )
+
+    def test_sink_error(self):
+        script = (
+            "import sys, time; sys.stdout.write('out'); sys.stdout.flush();"
+            "time.sleep(10)"
+        )
+        def sink(chunk):
+            raise ValueError(chunk)
+        self.assertRaises(
+            ValueError,
+            lambda: self.runner.run_streaming(
+                [sys.executable, "-c", script], sink
+            )
+        )
+
+    def test_start_error(self):
+        assert_raise_library_error(
+            lambda: self.runner.run_streaming(
+                ["/nonexistent/command"], self.chunk_list.append
+            ),
+            (
+                severity.ERROR,
+                report_codes.RUN_EXTERNAL_PROCESS_ERROR,
+                {
+                    "command": "/nonexistent/command",
+                    "reason": "No such file or directory",
+                }
+            )
+        )
+
+
+@mock.patch("subprocess.Popen", autospec=True)
+class CommandRunnerDebugTest(TestCase):
+    def setUp(self):
+        self.mock_logger = mock.MagicMock(logging.Logger)
+        self.mock_reporter = MockLibraryReportProcessor()
+        mock_process = mock.MagicMock(spec_set=["communicate", "returncode"])
+        mock_process.communicate.return_value = ("o" * 20, "e" * 20)
+        mock_process.returncode = 0
+        self.mock_process = mock_process
+
+    def test_debug_disabled(self, mock_popen):
+        mock_popen.return_value = self.mock_process
+        self.mock_logger.isEnabledFor.return_value = False
+        runner = lib.CommandRunner(self.mock_logger, self.mock_reporter)
+        runner.run(["a_command"], stdin_string="input")
+        self.mock_logger.isEnabledFor.assert_called_with(logging.DEBUG)
+        self.mock_logger.debug.assert_not_called()
+        self.assertEqual(2, len(self.mock_reporter.report_item_list))
+
+    @mock.patch.object(settings, "external_process_output_preview_length", 10)
+    def test_reports_truncated(self, mock_popen):
+        mock_popen.return_value = self.mock_process
+        runner = lib.CommandRunner(self.mock_logger, self.mock_reporter)
+        runner.run(["a_command"], stdin_string="i" * 20)
+        assert_report_item_list_equal(
+            self.mock_reporter.report_item_list,
+            [
+                (
+                    severity.DEBUG,
+                    report_codes.RUN_EXTERNAL_PROCESS_STARTED,
+                    {
+                        "command": "a_command",
+                        "stdin": "i" * 10 + "\n... (truncated)",
+                        "environment": dict(),
+                    }
+                ),
+                (
+                    severity.DEBUG,
+                    report_codes.RUN_EXTERNAL_PROCESS_FINISHED,
+                    {
+                        "command": "a_command",
+                        "return_value": 0,
+                        "stdout": "o" * 10 + "\n... (truncated)",
+                        "stderr": "e" * 10 + "\n... (truncated)",
+                    }
+                )
+            ]
+        )
+        # the log is not truncated
+        self.assertIn("o" * 20, self.mock_logger.debug.call_args[0][0])
+
+
 @mock.patch("pcs.lib.external.is_systemctl")
 @mock.patch("pcs.lib.external.is_service_installed")
 class DisableServiceTest(TestCase):
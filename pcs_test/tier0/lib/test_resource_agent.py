@@ -18,6 +18,7 @@ from pcs.common import report_codes
 from pcs.lib import resource_agent as lib_ra
 from pcs.lib.errors import ReportItemSeverity as severity, LibraryError
 from pcs.lib.external import CommandRunner
+from pcs.lib.resource_agent_cache import AgentMetadataCache
 
 # pylint: disable=protected-access
 
@@ -1882,6 +1883,200 @@ class CrmAgentMetadataIsValidAgentTest(TestCase):
         self.assertFalse(self.agent.is_valid_metadata())
 
 
+class AgentMetadataCacheUsageTest(TestCase):
+    metadata = "<resource-agent><shortdesc>test</shortdesc></resource-agent>"
+
+    def setUp(self):
+        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        self.mock_cache = mock.MagicMock(spec_set=AgentMetadataCache)
+        lib_ra.Agent.set_metadata_cache(self.mock_cache)
+        self.addCleanup(lib_ra.Agent.set_metadata_cache, None)
+
+    def assert_metadata(self, agent):
+        assert_xml_equal(
+            self.metadata, str(XmlManipulation(agent._get_metadata()))
+        )
+
+    def test_cached(self):
+        self.mock_cache.get.return_value = self.metadata
+        agent = lib_ra.ResourceAgent(self.mock_runner, "ocf:pacemaker:Dummy")
+        self.assert_metadata(agent)
+        self.mock_runner.run.assert_not_called()
+        self.mock_cache.get.assert_called_once_with(
+            "ocf:pacemaker:Dummy",
+            [
+                "/usr/lib/ocf/resource.d/pacemaker/Dummy",
+                "/usr/sbin/crm_resource",
+            ]
+        )
+        self.mock_cache.set.assert_not_called()
+
+    def test_not_cached(self):
+        self.mock_cache.get.return_value = None
+        self.mock_runner.run.return_value = (self.metadata, "", 0)
+        agent = lib_ra.StonithAgent(self.mock_runner, "fence_xvm")
+        self.assert_metadata(agent)
+        self.mock_runner.run.assert_called_once()
+        source_file_list = ["/usr/sbin/fence_xvm", "/usr/sbin/crm_resource"]
+        self.mock_cache.get.assert_called_once_with(
+            "stonith:fence_xvm", source_file_list
+        )
+        self.mock_cache.set.assert_called_once_with(
+            "stonith:fence_xvm", source_file_list, self.metadata
+        )
+
+    def test_invalid_metadata_not_cached(self):
+        self.mock_cache.get.return_value = None
+        self.mock_runner.run.return_value = ("some garbage", "", 0)
+        agent = lib_ra.ResourceAgent(self.mock_runner, "ocf:pacemaker:Dummy")
+        self.assertFalse(agent.is_valid_metadata())
+        self.mock_cache.set.assert_not_called()
+
+    def test_fenced(self):
+        self.mock_cache.get.return_value = self.metadata
+        agent = lib_ra.FencedMetadata(self.mock_runner)
+        self.assert_metadata(agent)
+        self.mock_runner.run.assert_not_called()
+        self.mock_cache.get.assert_called_once_with(
+            "pacemaker-fenced", ["/usr/libexec/pacemaker/pacemaker-fenced"]
+        )
+
+    def test_agent_without_source_file(self):
+        self.mock_runner.run.return_value = (self.metadata, "", 0)
+        agent = lib_ra.ResourceAgent(self.mock_runner, "systemd:pcsd")
+        self.assert_metadata(agent)
+        self.mock_runner.run.assert_called_once()
+        self.mock_cache.get.assert_not_called()
+        self.mock_cache.set.assert_not_called()
+
+    def test_absent_agent(self):
+        agent = lib_ra.AbsentResourceAgent(
+            self.mock_runner, "ocf:pacemaker:Dummy"
+        )
+        agent._get_metadata()
+        self.mock_cache.get.assert_not_called()
+        self.mock_cache.set.assert_not_called()
+
+
+class PrefetchMetadataTest(TestCase):
+    metadata = "<resource-agent><shortdesc>{0}</shortdesc></resource-agent>"
+
+    def setUp(self):
+        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        self.mock_cache = mock.MagicMock(spec_set=AgentMetadataCache)
+        self.mock_cache.get.return_value = None
+        lib_ra.Agent.set_metadata_cache(self.mock_cache)
+        self.addCleanup(lib_ra.Agent.set_metadata_cache, None)
+
+    def test_load_in_parallel(self):
+        self.mock_cache.get.side_effect = lambda name, source_file_list: (
+            self.metadata.format("cached") if name == "ocf:pacemaker:Stateful"
+            else None
+        )
+        self.mock_runner.run_parallel.return_value = [
+            (self.metadata.format("Dummy"), "", 0),
+            ("", "error", 1),
+            ("garbage", "", 0),
+        ]
+        agent_list = [
+            lib_ra.ResourceAgent(self.mock_runner, "ocf:pacemaker:Dummy"),
+            lib_ra.ResourceAgent(self.mock_runner, "ocf:pacemaker:Stateful"),
+            lib_ra.AbsentResourceAgent(
+                self.mock_runner, "ocf:pacemaker:Absent"
+            ),
+            lib_ra.StonithAgent(self.mock_runner, "fence_broken"),
+            lib_ra.ResourceAgent(self.mock_runner, "systemd:garbage"),
+        ]
+
+        lib_ra.prefetch_metadata(self.mock_runner, agent_list, 3)
+
+        self.mock_runner.run_parallel.assert_called_once_with(
+            [
+                agent._get_metadata_command()
+                for agent in (agent_list[0], agent_list[3], agent_list[4])
+            ],
+            3
+        )
+        self.assertEqual("Dummy", agent_list[0].get_shortdesc())
+        self.assertEqual("cached", agent_list[1].get_shortdesc())
+        self.assertEqual("", agent_list[2].get_shortdesc())
+        self.assertFalse(agent_list[3].is_valid_metadata())
+        self.assertFalse(agent_list[4].is_valid_metadata())
+        self.mock_runner.run.assert_not_called()
+        self.mock_cache.set.assert_called_once_with(
+            "ocf:pacemaker:Dummy",
+            [
+                "/usr/lib/ocf/resource.d/pacemaker/Dummy",
+                "/usr/sbin/crm_resource",
+            ],
+            self.metadata.format("Dummy")
+        )
+
+    def test_nothing_to_load(self):
+        agent = lib_ra.ResourceAgent(self.mock_runner, "ocf:pacemaker:Dummy")
+        agent._metadata = etree.fromstring("<resource-agent/>")
+        lib_ra.prefetch_metadata(
+            self.mock_runner,
+            [
+                agent,
+                lib_ra.AbsentStonithAgent(self.mock_runner, "fence_absent"),
+            ],
+            3
+        )
+        self.mock_runner.run_parallel.assert_not_called()
+
+
+class MetadataPrefetchTest(TestCase):
+    metadata = "<resource-agent><shortdesc>Dummy</shortdesc></resource-agent>"
+
+    def setUp(self):
+        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        self.mock_cache = mock.MagicMock(spec_set=AgentMetadataCache)
+        self.mock_cache.get.return_value = None
+        lib_ra.Agent.set_metadata_cache(self.mock_cache)
+        self.addCleanup(lib_ra.Agent.set_metadata_cache, None)
+        self.agent = lib_ra.ResourceAgent(
+            self.mock_runner, "ocf:pacemaker:Dummy"
+        )
+
+    def test_command_when_not_loaded(self):
+        self.assertEqual(
+            self.agent._get_metadata_command(),
+            self.agent.get_metadata_prefetch_command()
+        )
+
+    def test_no_command_when_loaded(self):
+        self.agent._metadata = etree.fromstring("<resource-agent/>")
+        self.assertIsNone(self.agent.get_metadata_prefetch_command())
+
+    def test_no_command_when_cached(self):
+        self.mock_cache.get.return_value = self.metadata
+        self.assertIsNone(self.agent.get_metadata_prefetch_command())
+        self.assertEqual("Dummy", self.agent.get_shortdesc())
+
+    def test_no_command_when_cached_metadata_invalid(self):
+        self.mock_cache.get.return_value = "garbage"
+        self.assertIsNone(self.agent.get_metadata_prefetch_command())
+        self.assertFalse(self.agent.is_valid_metadata())
+        self.assertIsNone(self.agent.get_metadata_prefetch_command())
+
+    def test_no_command_when_not_run(self):
+        agent = lib_ra.AbsentStonithAgent(self.mock_runner, "fence_absent")
+        self.assertIsNone(agent.get_metadata_prefetch_command())
+
+    def test_set_output(self):
+        self.agent.set_metadata_prefetch_output(self.metadata, "", 0)
+        self.assertEqual("Dummy", self.agent.get_shortdesc())
+        self.mock_runner.run.assert_not_called()
+        self.assertIsNone(self.agent.get_metadata_prefetch_command())
+
+    def test_set_output_error(self):
+        self.agent.set_metadata_prefetch_output("", "error", 1)
+        self.assertFalse(self.agent.is_valid_metadata())
+        self.mock_runner.run.assert_not_called()
+        self.mock_cache.set.assert_not_called()
+
+
 class StonithAgentMetadataGetNameTest(TestCase, ExtendedAssertionsMixin):
     def test_success(self):
         mock_runner = mock.MagicMock(spec_set=CommandRunner)
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from pcs.lib.resource_agent_cache import AgentMetadataCache
+
+
+class AgentMetadataCacheTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.agent_path = os.path.join(self.tmp_dir, "agent")
+        self.write_file(self.agent_path, "agent v1")
+        self.cache = AgentMetadataCache(self.cache_dir, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def write_file(path, content, mtime=None):
+        with open(path, "w") as a_file:
+            a_file.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def list_cache_dir(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_empty(self):
+        self.assertIsNone(self.cache.get("ocf:pacemaker:Dummy", []))
+        self.assertIsNone(
+            self.cache.get("ocf:pacemaker:Dummy", [self.agent_path])
+        )
+
+    def test_get_stored(self):
+        self.cache.set("ocf:pacemaker:Dummy", [self.agent_path], "<metadata/>")
+        self.assertEqual(
+            "<metadata/>",
+            self.cache.get("ocf:pacemaker:Dummy", [self.agent_path])
+        )
+        self.assertIsNone(self.cache.get("ocf:pacemaker:Stateful", []))
+        self.assertEqual(
+            ["ocf%3Apacemaker%3ADummy.json"], self.list_cache_dir()
+        )
+
+    def test_replace_stored(self):
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<b/>")
+        self.assertEqual(
+            "<b/>", self.cache.get("stonith:fence_xvm", [self.agent_path])
+        )
+        self.assertEqual(["stonith%3Afence_xvm.json"], self.list_cache_dir())
+
+    def test_source_changed_size(self):
+        self.write_file(self.agent_path, "agent v1", 1000)
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        self.write_file(self.agent_path, "agent v22", 1000)
+        self.assertIsNone(
+            self.cache.get("stonith:fence_xvm", [self.agent_path])
+        )
+
+    def test_source_changed_mtime(self):
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        self.write_file(self.agent_path, "agent v2", 1000)
+        self.assertIsNone(
+            self.cache.get("stonith:fence_xvm", [self.agent_path])
+        )
+
+    def test_source_removed(self):
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        os.unlink(self.agent_path)
+        self.assertIsNone(
+            self.cache.get("stonith:fence_xvm", [self.agent_path])
+        )
+
+    def test_source_list_changed(self):
+        other_path = os.path.join(self.tmp_dir, "other")
+        self.write_file(other_path, "other")
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        self.assertIsNone(
+            self.cache.get("stonith:fence_xvm", [self.agent_path, other_path])
+        )
+
+    def test_source_missing_not_stored(self):
+        self.cache.set(
+            "stonith:fence_xvm",
+            [os.path.join(self.tmp_dir, "missing")],
+            "<a/>"
+        )
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_broken_entry(self):
+        self.cache.set("stonith:fence_xvm", [self.agent_path], "<a/>")
+        self.write_file(
+            os.path.join(self.cache_dir, "stonith%3Afence_xvm.json"), "{broken"
+        )
+        self.assertIsNone(
+            self.cache.get("stonith:fence_xvm", [self.agent_path])
+        )
+
+    def test_evict_least_recently_used(self):
+        for name in ("a", "b", "c"):
+            self.cache.set(name, [self.agent_path], name)
+        entry_path = os.path.join(self.cache_dir, "{0}.json")
+        for mtime, name in enumerate(("a", "b", "c")):
+            os.utime(entry_path.format(name), (mtime, mtime))
+        # "a" becomes the most recently used one
+        self.assertEqual("a", self.cache.get("a", [self.agent_path]))
+        self.cache.set("d", [self.agent_path], "d")
+        self.assertEqual(
+            ["a.json", "c.json", "d.json"], self.list_cache_dir()
+        )
+        self.assertIsNone(self.cache.get("b", [self.agent_path]))
+
+    def test_clear(self):
+        self.cache.set("a", [self.agent_path], "a")
+        self.cache.set("b", [self.agent_path], "b")
+        self.write_file(os.path.join(self.cache_dir, "other"), "other")
+        self.cache.clear()
+        self.assertEqual(["other"], self.list_cache_dir())
+        self.assertIsNone(self.cache.get("a", [self.agent_path]))
+
+    def test_clear_no_dir(self):
+        self.cache.clear()
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_unusable_dir(self):
+        cache = AgentMetadataCache(self.agent_path, 3)
+        cache.set("a", [self.agent_path], "a")
+        self.assertIsNone(cache.get("a", [self.agent_path]))
+        cache.clear()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from lxml import etree
+
+from pcs.lib.xml_schema import SchemaRegistry
+
+
+RNG = """
+    <element name="{0}" xmlns="http://relaxng.org/ns/structure/1.0">
+        <empty/>
+    </element>
+"""
+
+DTD = "<!ELEMENT {0} EMPTY>"
+
+class SchemaRegistryTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rng_path = os.path.join(self.tmp_dir, "schema.rng")
+        self.dtd_path = os.path.join(self.tmp_dir, "schema.dtd")
+        self.write_file(self.rng_path, RNG.format("a"), 0)
+        self.write_file(self.dtd_path, DTD.format("a"), 0)
+        self.registry = SchemaRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def write_file(path, content, mtime):
+        with open(path, "w") as a_file:
+            a_file.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def test_missing_schema(self):
+        missing_path = os.path.join(self.tmp_dir, "missing.rng")
+        self.assertIsNone(self.registry.get_schema(missing_path))
+        self.registry.validate(missing_path, etree.fromstring("<b/>"))
+
+    def test_schema_types(self):
+        self.assertIsInstance(
+            self.registry.get_schema(self.rng_path), etree.RelaxNG
+        )
+        self.assertIsInstance(
+            self.registry.get_schema(self.dtd_path), etree.DTD
+        )
+
+    def test_schema_compiled_once(self):
+        schema = self.registry.get_schema(self.rng_path)
+        self.assertIs(schema, self.registry.get_schema(self.rng_path))
+
+    def test_schema_recompiled_when_changed(self):
+        schema = self.registry.get_schema(self.rng_path)
+        self.write_file(self.rng_path, RNG.format("b"), 1000)
+        self.assertIsNot(schema, self.registry.get_schema(self.rng_path))
+        self.registry.validate(self.rng_path, etree.fromstring("<b/>"))
+
+    def test_clear(self):
+        schema = self.registry.get_schema(self.rng_path)
+        self.registry.clear()
+        self.assertIsNot(schema, self.registry.get_schema(self.rng_path))
+
+    def test_validate(self):
+        for path in (self.rng_path, self.dtd_path):
+            with self.subTest(path=path):
+                self.registry.validate(path, etree.fromstring("<a/>"))
+                self.assertRaises(
+                    etree.DocumentInvalid,
+                    lambda: self.registry.validate(
+                        path, etree.fromstring("<b/>")
+                    )
+                )
+
+    def test_validate_trusted_source(self):
+        self.registry.validate(
+            self.rng_path, etree.fromstring("<b/>"), trusted_source=True
+        )
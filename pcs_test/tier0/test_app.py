@@ -0,0 +1,77 @@
+import subprocess
+import sys
+from unittest import mock, TestCase
+
+from pcs import app
+
+
+class LoadCommand(TestCase):
+    @mock.patch("pcs.app.importlib.import_module")
+    def test_import_on_call(self, mock_import):
+        command = app.load_command("pcs.cli.routing.acl", "acl_cmd")
+        mock_import.assert_not_called()
+
+        command("lib", ["role"], "modifiers")
+        mock_import.assert_called_once_with("pcs.cli.routing.acl")
+        mock_import.return_value.acl_cmd.assert_called_once_with(
+            "lib", ["role"], "modifiers"
+        )
+
+    def test_all_commands_exist(self):
+        for cmd, (module_name, function_name) in app.COMMAND_MAP.items():
+            with self.subTest(cmd=cmd):
+                self.assertTrue(callable(getattr(
+                    __import__(module_name, fromlist=[function_name]),
+                    function_name
+                )))
+
+
+class LazyImport(TestCase):
+    @staticmethod
+    def imported_modules(code):
+        # a fresh interpreter is needed, other tests import the commands
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; sys.path = {0!r}\n{1}\n"
+                "sys.stderr.write('\\n'.join(sys.modules))".format(
+                    sys.path, code
+                ),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        return result.stderr.decode().splitlines()
+
+    def test_commands_not_imported(self):
+        module_list = self.imported_modules("import pcs.app")
+        self.assertEqual(
+            [],
+            [
+                module for module in module_list
+                if module.startswith(("pcs.cli.routing.", "pcs.lib.commands."))
+            ]
+        )
+
+    def test_version_imports_no_command_modules(self):
+        module_list = self.imported_modules(
+            "from pcs import app\n"
+            "try:\n"
+            "    app.main(['--version'])\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+        self.assertEqual(
+            [],
+            [
+                module for module in (
+                    "pcs.usage",
+                    "pcs.utils",
+                    "pcs.lib.resource_agent",
+                    "pcs.lib.resource_agent_cache",
+                )
+                if module in module_list
+            ]
+        )
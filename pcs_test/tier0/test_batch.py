@@ -0,0 +1,138 @@
+import os
+import shutil
+from unittest import mock, TestCase
+
+from pcs_test.tools.assertions import ac
+from pcs_test.tools.misc import get_test_resource as rc
+from pcs_test.tools.pcs_runner import pcs
+
+from pcs.batch import parse_commands
+
+# pylint: disable=invalid-name
+
+empty_cib = rc("cib-empty.xml")
+temp_cib = rc("temp-cib.xml")
+batch_file = rc("temp-batch.txt")
+
+
+class ParseCommands(TestCase):
+    def test_commands(self):
+        self.assertEqual(
+            [
+                (1, ["resource", "create", "R1", "ocf:heartbeat:Dummy"]),
+                (3, ["property", "set", "a=b c"]),
+            ],
+            parse_commands(
+                "resource create R1 ocf:heartbeat:Dummy\n"
+                "\n"
+                "property set 'a=b c'\n"
+            )
+        )
+
+    def test_comments(self):
+        self.assertEqual(
+            [(2, ["resource", "disable", "R1"])],
+            parse_commands(
+                "# disable a resource\n"
+                "resource disable R1 # the first one\n"
+                "  # the end\n"
+            )
+        )
+
+    def test_continued_lines(self):
+        self.assertEqual(
+            [
+                (1, ["resource", "create", "R1", "ocf:heartbeat:Dummy"]),
+                (3, ["resource", "disable", "R1"]),
+            ],
+            parse_commands(
+                "resource create R1 \\\n"
+                "ocf:heartbeat:Dummy\n"
+                "resource disable R1\n"
+            )
+        )
+
+    @mock.patch("pcs.batch.utils.err", side_effect=SystemExit(1))
+    def test_unparsable_line(self, mock_err):
+        self.assertRaises(
+            SystemExit,
+            lambda: parse_commands("resource disable R1\nproperty set 'a\n")
+        )
+        mock_err.assert_called_once_with(
+            "Unable to parse line 2: No closing quotation"
+        )
+
+    @mock.patch("pcs.batch.utils.err", side_effect=SystemExit(1))
+    def test_unfinished_continued_line(self, mock_err):
+        self.assertRaises(
+            SystemExit,
+            lambda: parse_commands("resource disable R1\nproperty set \\")
+        )
+        mock_err.assert_called_once_with(
+            "Unexpected end of the batch after line 2"
+        )
+
+
+class Batch(TestCase):
+    def setUp(self):
+        shutil.copy(empty_cib, temp_cib)
+
+    def tearDown(self):
+        if os.path.exists(batch_file):
+            os.unlink(batch_file)
+
+    @staticmethod
+    def write_batch(text):
+        with open(batch_file, "w") as a_file:
+            a_file.write(text)
+
+    def test_success(self):
+        self.write_batch(
+            "resource create R1 ocf:heartbeat:Dummy --no-default-ops\n"
+            "resource create R2 ocf:heartbeat:Dummy --no-default-ops\n"
+            "constraint order R1 then R2\n"
+            "resource disable R2\n"
+        )
+        output, retval = pcs(temp_cib, "batch {0}".format(batch_file))
+        ac(
+            output,
+            "Adding R1 R2 (kind: Mandatory) (Options: first-action=start "
+                "then-action=start)\n"
+        )
+        self.assertEqual(0, retval)
+
+        output, retval = pcs(temp_cib, "constraint order")
+        ac(
+            output,
+            "Ordering Constraints:\n"
+            "  start R1 then start R2 (kind:Mandatory)\n"
+        )
+        self.assertEqual(0, retval)
+
+    def test_failed_command(self):
+        self.write_batch(
+            "resource create R1 ocf:heartbeat:Dummy --no-default-ops\n"
+            "resource disable R2\n"
+        )
+        output, retval = pcs(temp_cib, "batch {0}".format(batch_file))
+        ac(
+            output,
+            "Error: bundle/clone/group/resource 'R2' does not exist\n"
+            "Error: Command on line 2 failed, no changes have been pushed\n"
+        )
+        self.assertEqual(1, retval)
+
+        output, retval = pcs(temp_cib, "resource config")
+        ac(output, "")
+        self.assertEqual(0, retval)
+
+    def test_forbidden_option(self):
+        self.write_batch("resource disable R1 -f other.xml\n")
+        output, retval = pcs(temp_cib, "batch {0}".format(batch_file))
+        ac(
+            output,
+            "Error: Option '-f' cannot be used in a batch command, specify it "
+                "for the whole batch instead\n"
+            "Error: Command on line 1 failed, no changes have been pushed\n"
+        )
+        self.assertEqual(1, retval)
@@ -1,3 +1,5 @@
+import datetime
+from io import StringIO
 import os
 import shutil
 import unittest
@@ -171,6 +173,53 @@ class ClusterStartStop(unittest.TestCase, AssertPcsMixin):
         )
 
 
+@mock.patch("pcs.cluster.time.sleep", lambda interval: None)
+@mock.patch("pcs.utils.send_http_requests")
+class WaitForRemoteNodesStarted(unittest.TestCase):
+    started = '{"online": true, "pending": false}'
+    pending = '{"online": true, "pending": true}'
+
+    def setUp(self):
+        self.stop_at = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    @mock.patch("sys.stdout", new_callable=StringIO)
+    def test_ask_only_waiting_nodes(self, mock_stdout, mock_send):
+        mock_send.side_effect = [
+            [
+                ("node1", 0, self.started),
+                ("node2", 0, self.pending),
+                ("node3", 3, "Unable to authenticate"),
+            ],
+            [("node2", 2, "Unable to connect")],
+            [("node2", 0, self.started)],
+        ]
+        self.assertEqual(
+            ["node3"],
+            cluster.wait_for_remote_nodes_started(
+                ["node1", "node2", "node3"], self.stop_at, 2
+            )
+        )
+        self.assertEqual(
+            [["node1", "node2", "node3"], ["node2"], ["node2"]],
+            [call[0][0] for call in mock_send.call_args_list]
+        )
+        self.assertEqual(
+            "node1: Started\nnode3: Unable to authenticate\nnode2: Started\n",
+            mock_stdout.getvalue()
+        )
+
+    @mock.patch("sys.stdout", new_callable=StringIO)
+    def test_timeout(self, mock_stdout, mock_send):
+        mock_send.return_value = [("node1", 0, self.pending)]
+        self.assertEqual(
+            ["node1"],
+            cluster.wait_for_remote_nodes_started(
+                ["node1"], datetime.datetime.now(), 2
+            )
+        )
+        self.assertEqual("node1: Waiting timeout\n", mock_stdout.getvalue())
+
+
 @skip_unless_root()
 class ClusterEnableDisable(unittest.TestCase, AssertPcsMixin):
     def setUp(self):
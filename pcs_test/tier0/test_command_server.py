@@ -0,0 +1,188 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock, skipUnless, TestCase
+
+from pcs import command_server, settings
+
+
+PACKAGE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+CLIENT = (
+    "import sys; sys.path.insert(0, {package_dir!r}); "
+    "from pcs import command_server; "
+    "sys.exit(command_server.run_by_server({socket_path!r}, sys.argv[1:]))"
+)
+
+
+class Frames(TestCase):
+    def setUp(self):
+        self.sock_a, self.sock_b = socket.socketpair(socket.AF_UNIX)
+
+    def tearDown(self):
+        self.sock_a.close()
+        self.sock_b.close()
+
+    def test_document(self):
+        document = {"argv": ["resource", "config"], "cwd": "/"}
+        # pylint: disable=protected-access
+        command_server._send_frame(self.sock_a, document)
+        self.assertEqual(
+            (document, []), command_server._recv_frame(self.sock_b)
+        )
+
+    def test_document_with_fds(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            # pylint: disable=protected-access
+            command_server._send_frame(self.sock_a, {}, [write_fd])
+            document, fd_list = command_server._recv_frame(self.sock_b, 3)
+        finally:
+            os.close(write_fd)
+        self.assertEqual({}, document)
+        self.assertEqual(1, len(fd_list))
+        os.write(fd_list[0], b"data")
+        os.close(fd_list[0])
+        self.assertEqual(b"data", os.read(read_fd, 10))
+        os.close(read_fd)
+
+    def test_connection_closed(self):
+        self.sock_a.sendall(b"10\n{}")
+        self.sock_a.close()
+        self.assertRaises(
+            command_server.CommandServerError,
+            # pylint: disable=protected-access
+            lambda: command_server._recv_frame(self.sock_b)
+        )
+
+    def test_invalid_header(self):
+        self.sock_a.sendall(b"x" * 100)
+        self.assertRaises(
+            command_server.CommandServerError,
+            # pylint: disable=protected-access
+            lambda: command_server._recv_frame(self.sock_b)
+        )
+
+
+class GetExitCode(TestCase):
+    # pylint: disable=protected-access
+    def test_none(self):
+        self.assertEqual(0, command_server._get_exit_code(None))
+
+    def test_int(self):
+        self.assertEqual(3, command_server._get_exit_code(3))
+
+    @mock.patch("pcs.command_server.sys.stderr")
+    def test_message(self, mock_stderr):
+        self.assertEqual(1, command_server._get_exit_code("failed"))
+        mock_stderr.write.assert_called_once_with("failed\n")
+
+
+class IsValid(TestCase):
+    # pylint: disable=protected-access
+    def test_valid(self):
+        self.assertTrue(command_server._is_valid(
+            {"argv": ["status"], "env": {"LANG": "C"}, "cwd": "/"}
+        ))
+
+    def test_invalid(self):
+        for request in (
+            [],
+            {"argv": ["status"], "env": {}},
+            {"argv": [1], "env": {}, "cwd": "/"},
+            {"argv": [], "env": {"LANG": None}, "cwd": "/"},
+        ):
+            with self.subTest(request=request):
+                self.assertFalse(command_server._is_valid(request))
+
+
+class Main(TestCase):
+    @mock.patch("pcs.command_server.run_by_server")
+    @mock.patch("pcs.command_server._can_use_server", lambda: True)
+    def test_run_by_server(self, mock_run):
+        mock_run.return_value = 2
+        with self.assertRaises(SystemExit) as cm:
+            command_server.main(["status"])
+        self.assertEqual(2, cm.exception.code)
+        mock_run.assert_called_once_with(
+            settings.pcs_command_server_socket, ["status"]
+        )
+
+    @mock.patch("pcs.app.main")
+    @mock.patch("pcs.command_server.run_by_server")
+    @mock.patch("pcs.command_server._can_use_server", lambda: True)
+    def test_server_not_available(self, mock_run, mock_app_main):
+        mock_run.return_value = None
+        command_server.main(["status"])
+        mock_app_main.assert_called_once_with(["status"])
+
+    @mock.patch("pcs.app.main")
+    @mock.patch("pcs.command_server.run_by_server")
+    @mock.patch("pcs.command_server._can_use_server", lambda: False)
+    def test_server_not_usable(self, mock_run, mock_app_main):
+        command_server.main(["status"])
+        mock_run.assert_not_called()
+        mock_app_main.assert_called_once_with(["status"])
+
+    def test_no_server(self):
+        self.assertIsNone(command_server.run_by_server(
+            os.path.join(tempfile.gettempdir(), "pcs-missing.socket"),
+            ["status"]
+        ))
+
+
+@skipUnless(os.geteuid() == 0, "the command server serves root only")
+class Server(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, "server.socket")
+        self.server_pid = command_server.start_server_process(self.socket_path)
+        for dummy_i in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self):
+        os.kill(self.server_pid, 15)
+        os.waitpid(self.server_pid, 0)
+        shutil.rmtree(self.tmp_dir)
+
+    def run_client(self, argv):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                CLIENT.format(
+                    package_dir=PACKAGE_DIR, socket_path=self.socket_path
+                ),
+            ] + argv,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.tmp_dir,
+        )
+
+    def test_success(self):
+        result = self.run_client(["--version"])
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(
+            "{0}\n".format(settings.pcs_version), result.stdout.decode()
+        )
+
+    def test_failure(self):
+        result = self.run_client(["no-such-command"])
+        self.assertEqual(1, result.returncode)
+        self.assertIn("Usage: pcs", result.stdout.decode())
+
+    def test_socket_removed_on_exit(self):
+        os.kill(self.server_pid, 15)
+        os.waitpid(self.server_pid, 0)
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.server_pid = command_server.start_server_process(
+            self.socket_path
+        )
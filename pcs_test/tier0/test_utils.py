@@ -1,7 +1,6 @@
 # pylint: disable=too-many-lines
 from io import StringIO
 import sys
-from time import sleep
 from unittest import mock, TestCase
 import xml.dom.minidom
 import xml.etree.cElementTree as ET
@@ -10,6 +9,15 @@ from pcs_test.tools.xml import dom_get_child_elements
 from pcs_test.tools.misc import get_test_resource as rc
 
 from pcs import utils
+from pcs.cli.common.cib_snapshot import CibSnapshot
+from pcs.common.host import (
+    Destination,
+    PcsKnownHost,
+)
+from pcs.common.node_communicator import (
+    RequestData,
+    RequestTarget,
+)
 
 # pylint: disable=too-many-public-methods, too-many-statements, line-too-long, invalid-name
 
@@ -1837,44 +1845,213 @@ class UtilsTest(TestCase):
             self.assertEqual(node.tagName, tag)
 
 
-class RunParallelTest(TestCase):
-    @staticmethod
-    def fixture_create_worker(log, name, sleepSeconds=0):
-        def worker():
-            sleep(sleepSeconds)
-            log.append(name)
-        return worker
-
-    def test_run_all_workers(self):
-        log = []
-        utils.run_parallel(
+def fixture_response(host, response_code=200, data="", error_msg=None):
+    return mock.Mock(
+        request=mock.Mock(host_label=host),
+        was_connected=error_msg is None,
+        response_code=response_code,
+        data=data,
+        error_msg=error_msg,
+    )
+
+
+@mock.patch("pcs.utils.get_cib_user_groups", lambda: (None, None))
+@mock.patch(
+    "pcs.utils.read_known_hosts_file",
+    lambda: {
+        "node1": PcsKnownHost(
+            "node1", "token1", [Destination("10.0.0.1", 2225)]
+        ),
+    }
+)
+@mock.patch("pcs.utils.send_requests")
+class SendHttpRequestsTest(TestCase):
+    def test_results(self, mock_send_requests):
+        mock_send_requests.return_value = [
+            fixture_response("node1", data="ok"),
+            fixture_response("node2", response_code=401),
+            fixture_response("node3", response_code=403),
+            fixture_response("node4", response_code=500),
+            fixture_response("node5", error_msg="reason"),
+        ]
+        request_data = RequestData("remote/action")
+        result = list(utils.send_http_requests(
+            ["node1", "node2", "node3", "node4", "node5"], request_data
+        ))
+        self.assertEqual(
             [
-                self.fixture_create_worker(log, 'first'),
-                self.fixture_create_worker(log, 'second'),
+                ("node1", 0, "ok"),
+                (
+                    "node2", 3,
+                    "Unable to authenticate to node2 - (HTTP error: 401), try "
+                    "running 'pcs host auth node2'"
+                ),
+                ("node3", 4, "node3: Permission denied - (HTTP error: 403)"),
+                ("node4", 1, "Error connecting to node4 - (HTTP error: 500)"),
+                (
+                    "node5", 2,
+                    "Unable to connect to node5, try setting higher timeout "
+                    "in --request-timeout option (reason)"
+                ),
             ],
-            wait_seconds=.1
+            result
+        )
+
+    def test_requests(self, mock_send_requests):
+        mock_send_requests.return_value = []
+        request_data = RequestData("remote/action")
+        list(utils.send_http_requests(
+            ["node1", "node2"], request_data, repeat_on_timeout=3
+        ))
+        dummy_communicator, request_list = mock_send_requests.call_args[0]
+        self.assertEqual(
+            {"repeat_on_timeout": 3}, mock_send_requests.call_args[1]
+        )
+        self.assertEqual(
+            [
+                RequestTarget(
+                    "node1", "token1", [Destination("10.0.0.1", 2225)]
+                ),
+                RequestTarget("node2"),
+            ],
+            [request.target for request in request_list]
+        )
+        self.assertEqual(
+            ["remote/action", "remote/action"],
+            [request.action for request in request_list]
+        )
+
+
+@mock.patch("pcs.utils.send_http_requests")
+class SendHttpRequestToNodesTest(TestCase):
+    @mock.patch("sys.stdout", new_callable=StringIO)
+    def test_errors(self, mock_stdout, mock_send_http_requests):
+        mock_send_http_requests.return_value = [
+            ("node1", 0, "Started\n"),
+            ("node2", 2, "Unable to connect"),
+        ]
+        request_data = RequestData("remote/cluster_start")
+        self.assertEqual(
+            {"node2": "node2: Unable to connect"},
+            utils.send_http_request_to_nodes(
+                ["node1", "node2"], request_data, timeout=10
+            )
         )
+        self.assertEqual(
+            "node1: Started\nnode2: Unable to connect\n",
+            mock_stdout.getvalue()
+        )
+        mock_send_http_requests.assert_called_once_with(
+            ["node1", "node2"], request_data, 10, 0
+        )
+
 
+CIB_WITH_RESOURCES = """<cib>
+  <configuration>
+    <resources>
+      <primitive id="R1"/>
+      <primitive id="R2"/>
+    </resources>
+  </configuration>
+</cib>"""
+
+@mock.patch("pcs.utils.usefile", False)
+@mock.patch("pcs.utils.run")
+class CibSnapshotTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch("pcs.utils.cib_snapshot", CibSnapshot())
+        self.snapshot = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_once(self, mock_run):
+        mock_run.return_value = (CIB_WITH_RESOURCES, 0)
+        self.assertEqual(CIB_WITH_RESOURCES, utils.get_cib())
+        self.assertTrue(utils.does_exist('//primitive[@id="R1"]'))
+        self.assertFalse(utils.does_exist('//primitive[@id="R3"]'))
         self.assertEqual(
-            sorted(log),
-            sorted(['first', 'second'])
+            '<primitive id="R2"/>',
+            utils.get_cib_xpath('//primitive[@id="R2"]')
+        )
+        self.assertEqual("", utils.get_cib_xpath('//group'))
+        self.assertEqual(
+            ["R1", "R2"],
+            [
+                el.getAttribute("id") for el in
+                utils.get_cib_dom().getElementsByTagName("primitive")
+            ]
         )
+        mock_run.assert_called_once_with(["cibadmin", "-l", "-Q"])
+        self.assertEqual((5, 1), (self.snapshot.hits, self.snapshot.misses))
 
+    def test_multiple_matches(self, mock_run):
+        mock_run.return_value = (CIB_WITH_RESOURCES, 0)
+        self.assertEqual(
+            "<xpath-query>\n"
+            '<primitive id="R1"/>\n<primitive id="R2"/>\n'
+            "</xpath-query>\n",
+            utils.get_cib_xpath("//primitive")
+        )
 
-class NodeActionTaskTest(TestCase):
-    def test_can_run_action(self):
-        def action(node, arg, kwarg=None):
-            return (0, ':'.join([node, arg, kwarg]))
+    def test_reload_after_invalidate(self, mock_run):
+        mock_run.return_value = (CIB_WITH_RESOURCES, 0)
+        utils.get_cib()
+        utils.invalidate_cib_snapshot()
+        utils.get_cib()
+        self.assertEqual(2, mock_run.call_count)
 
-        report_list = []
-        def report(node, returncode, output):
-            report_list.append('|'.join([node, str(returncode), output]))
+    def test_reload_when_cib_file_changed(self, mock_run):
+        mock_run.return_value = (CIB_WITH_RESOURCES, 0)
+        utils.get_cib()
+        with mock.patch("pcs.utils.usefile", True):
+            with mock.patch("pcs.utils.filename", "cib.xml"):
+                utils.get_cib()
+        self.assertEqual(2, mock_run.call_count)
 
-        task = utils.create_task(report, action, 'node', 'arg', kwarg='kwarg')
-        task()
+    def test_fallback_to_cibadmin(self, mock_run):
+        mock_run.side_effect = [("", 1), ("<xpath-query/>", 0)]
+        self.assertEqual("<xpath-query/>", utils.get_cib_xpath("//primitive"))
+        mock_run.assert_called_with(
+            ["cibadmin", "-Q", "--xpath", "//primitive"]
+        )
 
-        self.assertEqual(['node|0|node:arg:kwarg'], report_list)
+    @mock.patch("pcs.utils.err")
+    def test_load_failed(self, mock_err, mock_run):
+        mock_run.return_value = ("", 1)
+        utils.get_cib()
+        mock_err.assert_called_once_with("unable to get cib")
+
+    @mock.patch("pcs.utils.CommandRunner.run")
+    def test_cmd_runner_invalidates(self, mock_runner_run, mock_run):
+        mock_run.return_value = (CIB_WITH_RESOURCES, 0)
+        mock_runner_run.return_value = ("", "", 0)
+        utils.get_cib()
+        utils.cmd_runner().run(["crm_resource", "--cleanup"])
+        utils.get_cib()
+        self.assertEqual(2, mock_run.call_count)
+
+
+@mock.patch("pcs.utils.usefile", False)
+@mock.patch("pcs.utils.subprocess.Popen")
+class RunInvalidatesCibSnapshotTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch("pcs.utils.cib_snapshot")
+        self.snapshot = patcher.start()
+        self.addCleanup(patcher.stop)
 
+    @staticmethod
+    def fixture_popen(mock_popen):
+        mock_popen.return_value.communicate.return_value = ("", "")
+        mock_popen.return_value.returncode = 0
+
+    def test_query(self, mock_popen):
+        self.fixture_popen(mock_popen)
+        utils.run(["cibadmin", "-Q", "--xpath", "//primitive"])
+        self.snapshot.invalidate.assert_not_called()
+
+    def test_other_command(self, mock_popen):
+        self.fixture_popen(mock_popen)
+        utils.run(["cibadmin", "-D", "--xpath", "//primitive"])
+        self.snapshot.invalidate.assert_called_once_with()
 
 class TouchCibFile(TestCase):
     @mock.patch("pcs.utils.os.path.isfile", mock.Mock(return_value=False))
@@ -17,7 +17,12 @@ class Call:
 
 
 def get_push_cib(call_queue):
-    def push_cib(lib_env, custom_cib=None, wait=False):
+    def push_cib(
+        lib_env, custom_cib=None, wait=False, wait_state_reached=None,
+        wait_state_resource_ids=None
+    ):
+        # the mocked push does not wait, so the waiting never ends early
+        del wait_state_reached, wait_state_resource_ids
         i, expected_call = call_queue.take(CALL_TYPE_PUSH_CIB)
 
         if custom_cib is None and expected_call.custom_cib:
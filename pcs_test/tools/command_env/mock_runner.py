@@ -118,3 +118,16 @@ class Runner:
 
         call.check_stdin(stdin_string, command, i)
         return  call.stdout, call.stderr, call.returncode
+
+    def run_streaming(self, args, stdout_sink, env_extend=None):
+        stdout, stderr, returncode = self.run(args, env_extend=env_extend)
+        stdout_sink(stdout.encode("utf-8"))
+        return stdout, stderr, returncode
+
+    def run_interruptible(
+        self, args, interrupt_check, check_interval, max_check_interval=None
+    ):
+        # The mocked command finishes immediately, so it is never interrupted.
+        del interrupt_check, check_interval, max_check_interval
+        stdout, stderr, returncode = self.run(args)
+        return stdout, stderr, returncode, False
@@ -189,6 +189,10 @@ class MockCurlMulti:
         # pylint: disable=no-self-use
         return (0, 0)
 
+    def socket_action(self, sock_fd, ev_bitmask):
+        # pylint: disable=unused-argument
+        return (0, len(self._handle_list))
+
     def timeout(self):
         # pylint: disable=no-self-use
         return 0
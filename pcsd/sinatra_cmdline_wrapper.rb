@@ -1,63 +1,116 @@
-require "base64"
 require "date"
 require "json"
 
-request_json = ARGF.read()
+# Requests are read from stdin and responses are written to stdout as frames
+# until stdin is closed. A frame is a decimal length of a payload terminated by
+# a newline followed by the payload itself. A request consists of a frame with
+# the request in json and a frame with a request body. A response consists of
+# a frame with the response in json and frames with chunks of a response body
+# terminated by an empty frame.
+BODY_CHUNK_BYTES = 65536
 
-begin
-  request = JSON.parse(request_json)
-rescue => e
-  puts e
-  exit
-end
+def process_request(request, request_body)
+  $tornado_logs = []
+  $tornado_username = nil
+  $tornado_groups = nil
+  $tornado_is_authenticated = nil
 
-if !request.include?("type")
-  result = {:error => "Type not specified"}
-  print result.to_json
-  exit
-end
+  body = []
 
-$tornado_logs = []
+  if !request.include?("type")
+    return {:error => "Type not specified", :logs => []}, body
+  end
 
-require 'pcsd'
+  if request["type"] == "ping"
+    result = {:pong => true}
+  elsif ["sinatra_gui", "sinatra_remote"].include?(request["type"])
+    if request["type"] == "sinatra_gui"
+      $tornado_username = request["session"]["username"]
+      $tornado_groups = request["session"]["groups"]
+      $tornado_is_authenticated = request["session"]["is_authenticated"]
+    end
 
-if ["sinatra_gui", "sinatra_remote"].include?(request["type"])
-  if request["type"] == "sinatra_gui"
-    $tornado_username = request["session"]["username"]
-    $tornado_groups = request["session"]["groups"]
-    $tornado_is_authenticated = request["session"]["is_authenticated"]
-  end
+    set :logging, true
+    set :run, false
+    # Do not turn exceptions into fancy 100kB HTML pages and print them on
+    # stdout. Instead, rack.errors is logged and therefore returned in
+    # result[:log].
+    set :show_exceptions, false
+    app = [Sinatra::Application][0]
+
+    env = request["env"]
+    env["rack.input"] = StringIO.new(request_body)
+    env["rack.errors"] = StringIO.new()
+
+    status, headers, body = app.call(env)
+    rack_errors = env['rack.errors'].string()
+    if not rack_errors.empty?()
+      $logger.error(rack_errors)
+    end
 
-  set :logging, true
-  set :run, false
-  # Do not turn exceptions into fancy 100kB HTML pages and print them on stdout.
-  # Instead, rack.errors is logged and therefore returned in result[:log].
-  set :show_exceptions, false
-  app = [Sinatra::Application][0]
-
-  env = request["env"]
-  env["rack.input"] = StringIO.new(env["rack.input"])
-  env["rack.errors"] = StringIO.new()
-
-  status, headers, body = app.call(env)
-  rack_errors = env['rack.errors'].string()
-  if not rack_errors.empty?()
-    $logger.error(rack_errors)
+    result = {
+      :status => status,
+      :headers => headers,
+    }
+
+  elsif request["type"] == "sync_configs"
+    result = {
+      :next => Time.now.to_i + run_cfgsync()
+    }
+  else
+    result = {:error => "Unknown type: '#{request["type"]}'"}
   end
 
-  result = {
-    :status => status,
-    :headers => headers,
-    :body => Base64.encode64(body.join("")),
-  }
+  result[:logs] = $tornado_logs
+  return result, body
+end
+
+def read_frame(input)
+  header = input.gets
+  return nil if header.nil?
+  return input.read(header.to_i)
+end
+
+def write_frame(output, payload)
+  output.write("#{payload.bytesize}\n")
+  output.write(payload)
+  output.flush
+end
 
-elsif request["type"] == "sync_configs"
-  result = {
-    :next => Time.now.to_i + run_cfgsync()
+def write_body(output, body)
+  body.each { |chunk|
+    offset = 0
+    while offset < chunk.bytesize
+      write_frame(output, chunk.byteslice(offset, BODY_CHUNK_BYTES))
+      offset += BODY_CHUNK_BYTES
+    end
   }
-else
-  result = {:error => "Unknown type: '#{request["type"]}'"}
+  write_frame(output, "")
+ensure
+  body.close() if body.respond_to?(:close)
 end
 
-result[:logs] = $tornado_logs
-print result.to_json
+def serve_requests(input, output)
+  loop do
+    request_json = read_frame(input)
+    break if request_json.nil?
+    request_body = read_frame(input) || ""
+    begin
+      result, body = process_request(JSON.parse(request_json), request_body)
+    rescue JSON::ParserError => e
+      result, body = {:error => e.to_s, :logs => []}, []
+    end
+    write_frame(output, result.to_json)
+    write_body(output, body)
+  end
+end
+
+# Keep the original stdout for responses only. Anything else printed by pcsd
+# code must not break the framing, so it goes to stderr.
+output = $stdout.dup
+output.binmode
+$stdout.reopen($stderr)
+$stdin.binmode
+$tornado_logs = []
+require 'pcsd'
+serve_requests($stdin, output)
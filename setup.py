@@ -1,8 +1,10 @@
 #!/usr/bin/python3
 
+import json
 import os
 
 from setuptools import setup, Command, find_packages
+from setuptools.command.build_py import build_py
 
 class CleanCommand(Command):
     user_options = []
@@ -16,6 +18,19 @@ class CleanCommand(Command):
         assert os.getcwd() == self.cwd, 'Must be in package root: %s' % self.cwd
         os.system('rm -rf ./build ./dist ./*.pyc ./*.egg-info')
 
+class BuildPyCommand(build_py):
+    def run(self):
+        super().run()
+        # Shell completion reads the index instead of building it from usage.
+        #pylint: disable=import-outside-toplevel
+        from pcs.cli.common.completion import build_completion_index
+        if not self.dry_run:
+            index_path = os.path.join(
+                self.build_lib, 'pcs', 'completion_index.json'
+            )
+            with open(index_path, 'w') as index_file:
+                json.dump(build_completion_index(), index_file)
+
 setup(
     name='pcs',
     version='0.10.1',
@@ -32,13 +47,14 @@ setup(
     zip_safe=False,
     entry_points={
         'console_scripts': [
-            'pcs = pcs.app:main',
+            'pcs = pcs.command_server:main',
             'pcsd = pcs.run:daemon',
             'pcs_snmp_agent = pcs.run:pcs_snmp_agent',
             'pcs_internal = pcs.pcs_internal:main',
         ],
     },
     cmdclass={
+        'build_py': BuildPyCommand,
         'clean': CleanCommand,
     }
 )